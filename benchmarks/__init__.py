@@ -0,0 +1,4 @@
+"""
+Benchmarks
+Emulador local de la API de RouterOS y suite de rendimiento reproducible (ver benchmarks/run.py).
+"""
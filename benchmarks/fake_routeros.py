@@ -0,0 +1,390 @@
+"""
+Fake RouterOS API Server
+Emulador del protocolo API de RouterOS (puerto 8728, palabras con prefijo de longitud) para
+medir el sistema sin routers reales:
+- RouterDataset: miles de PPP secrets, simple queues, interfaces, leases y address-lists
+  generados con semilla (mismo dataset en cada corrida).
+- FakeRouterOS: servidor TCP con login en texto plano, print (.proplist y ?consultas),
+  add/set/remove, monitor-traffic y ping; latencia configurable por comando y por fila.
+"""
+import random
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BLOCKED_LIST = 'IPS_BLOQUEADAS'
+
+
+# --- Codificación de palabras (API de RouterOS) ---
+
+def encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes([length])
+    if length < 0x4000:
+        return (length | 0x8000).to_bytes(2, 'big')
+    if length < 0x200000:
+        return (length | 0xC00000).to_bytes(3, 'big')
+    if length < 0x10000000:
+        return (length | 0xE0000000).to_bytes(4, 'big')
+    return b'\xf0' + length.to_bytes(4, 'big')
+
+
+def encode_sentence(words: Iterable[str]) -> bytes:
+    out = bytearray()
+    for word in words:
+        data = word.encode('utf-8')
+        out += encode_length(len(data)) + data
+    return bytes(out + b'\x00')
+
+
+def _read_exact(sock, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('conexión cerrada')
+        data += chunk
+    return data
+
+
+def read_length(sock) -> int:
+    first = _read_exact(sock, 1)[0]
+    if first < 0x80:
+        return first
+    if first < 0xC0:
+        return ((first & 0x3F) << 8) | _read_exact(sock, 1)[0]
+    if first < 0xE0:
+        return ((first & 0x1F) << 16) | int.from_bytes(_read_exact(sock, 2), 'big')
+    if first < 0xF0:
+        return ((first & 0x0F) << 24) | int.from_bytes(_read_exact(sock, 3), 'big')
+    return int.from_bytes(_read_exact(sock, 4), 'big')
+
+
+def read_sentence(sock) -> List[str]:
+    words = []
+    while True:
+        length = read_length(sock)
+        if length == 0:
+            return words
+        words.append(_read_exact(sock, length).decode('utf-8', 'replace'))
+
+
+# --- Datos simulados ---
+
+@dataclass
+class SimulatedClient:
+    """Cliente del router simulado; sirve también para sembrar la base de datos del benchmark"""
+    index: int
+    username: str
+    legal_name: str
+    ip_address: str
+    service_type: str          # pppoe | simple_queue
+    online: bool
+    blocked: bool
+    max_limit: str
+
+
+@dataclass
+class RouterDataset:
+    clients: List[SimulatedClient]
+    tables: Dict[str, List[Dict[str, str]]]
+    identity: str = 'bench-router'
+
+    @classmethod
+    def generate(cls, clients: int = 2000, seed: int = 1, pppoe_ratio: float = 0.6,
+                 online_ratio: float = 0.85, blocked_ratio: float = 0.05,
+                 extra_address_list: int = 0) -> 'RouterDataset':
+        rng = random.Random(seed)
+        plans = ['5M/10M', '10M/20M', '20M/40M', '50M/100M']
+        simulated: List[SimulatedClient] = []
+        for i in range(clients):
+            simulated.append(SimulatedClient(
+                index=i,
+                username=f"user{i:05d}",
+                legal_name=f"Cliente Benchmark {i:05d}",
+                ip_address=f"10.{20 + i // 65025}.{(i // 255) % 255}.{i % 255 + 1}",
+                service_type='pppoe' if rng.random() < pppoe_ratio else 'simple_queue',
+                online=rng.random() < online_ratio,
+                blocked=rng.random() < blocked_ratio,
+                max_limit=rng.choice(plans),
+            ))
+
+        tables: Dict[str, List[Dict[str, str]]] = {
+            '/ppp/secret': [], '/ppp/active': [], '/queue/simple': [], '/interface': [],
+            '/ip/arp': [], '/ip/dhcp-server/lease': [], '/ip/firewall/address-list': [],
+            '/ip/firewall/filter': [], '/ip/pool': [{'name': 'pool-clientes', 'ranges': '10.20.0.2-10.30.255.254'}],
+            '/ppp/profile': [{'name': p, 'rate-limit': p, 'local-address': '10.19.0.1'} for p in plans],
+            '/queue/type': [{'name': 'pcq-download', 'kind': 'pcq'}, {'name': 'default', 'kind': 'pfifo'}],
+            '/log': [{'time': f"00:00:{i % 60:02d}", 'topics': 'system,info', 'message': f"evento {i}"} for i in range(200)],
+        }
+        for n in range(1, 6):
+            tables['/interface'].append({'name': f"ether{n}", 'type': 'ether', 'disabled': 'false', 'running': 'true',
+                                         'rx-byte': '0', 'tx-byte': '0', 'last-link-up-time': 'jan/01/2026 00:00:00'})
+
+        for c in simulated:
+            tables['/queue/simple'].append({'name': c.username, 'target': f"{c.ip_address}/32",
+                                            'max-limit': c.max_limit, 'rate': '0/0', 'bytes': '0/0',
+                                            'disabled': 'false', 'comment': c.legal_name})
+            if c.service_type == 'pppoe':
+                tables['/ppp/secret'].append({'name': c.username, 'password': 'x', 'service': 'pppoe',
+                                              'profile': c.max_limit, 'remote-address': c.ip_address,
+                                              'disabled': 'false'})
+                if c.online:
+                    tables['/ppp/active'].append({'name': c.username, 'address': c.ip_address, 'uptime': '1d2h',
+                                                  'service': 'pppoe'})
+                    tables['/interface'].append({'name': f"<pppoe-{c.username}>", 'type': 'pppoe-in',
+                                                 'disabled': 'false', 'running': 'true', 'rx-byte': '0',
+                                                 'tx-byte': '0', 'last-link-up-time': 'jan/01/2026 00:00:00'})
+            elif c.online:
+                mac = f"02:00:{c.index >> 16 & 255:02X}:{c.index >> 8 & 255:02X}:{c.index & 255:02X}:01"
+                tables['/ip/arp'].append({'address': c.ip_address, 'mac-address': mac, 'interface': 'ether2',
+                                          'status': 'reachable'})
+                tables['/ip/dhcp-server/lease'].append({'address': c.ip_address, 'mac-address': mac,
+                                                        'status': 'bound', 'last-seen': '5s'})
+            if c.blocked:
+                tables['/ip/firewall/address-list'].append({'list': BLOCKED_LIST, 'address': c.ip_address,
+                                                            'comment': c.legal_name, 'disabled': 'false'})
+        for i in range(extra_address_list):
+            tables['/ip/firewall/address-list'].append({'list': 'BOGONS', 'address': f"100.64.{i // 255 % 255}.{i % 255}",
+                                                        'disabled': 'false'})
+        return cls(clients=simulated, tables=tables)
+
+
+@dataclass
+class LatencyProfile:
+    """Latencia simulada: base por comando + costo por fila devuelta (+ jitter uniforme)"""
+    command_ms: float = 0.0
+    per_row_us: float = 0.0
+    jitter_ms: float = 0.0
+    seed: int = 7
+    _rng: random.Random = field(default=None, repr=False)
+
+    def delay(self, rows: int) -> float:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.command_ms + jitter) / 1000.0 + rows * self.per_row_us / 1_000_000.0
+
+
+# --- Estado del router ---
+
+class RouterState:
+    """Tablas mutables con .id estilo RouterOS (*1, *2, ...) y contadores que avanzan en cada lectura"""
+
+    def __init__(self, dataset: RouterDataset, seed: int = 3):
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._next_id = 1
+        self.identity = dataset.identity
+        self.tables: Dict[str, List[Dict[str, str]]] = {}
+        for path, rows in dataset.tables.items():
+            self.tables[path] = [self._with_id(dict(row)) for row in rows]
+        self.commands = 0
+
+    def _with_id(self, row: Dict[str, str]) -> Dict[str, str]:
+        row['.id'] = f"*{self._next_id:X}"
+        self._next_id += 1
+        return row
+
+    def _advance_counters(self, path: str, rows: List[Dict[str, str]]):
+        if path == '/queue/simple':
+            for row in rows:
+                up, down = self._rng.randint(0, 2_000_000), self._rng.randint(0, 8_000_000)
+                b_up, b_down = (int(x) for x in row.get('bytes', '0/0').split('/'))
+                row['rate'] = f"{up}/{down}"
+                row['bytes'] = f"{b_up + up // 8}/{b_down + down // 8}"
+        elif path == '/interface':
+            for row in rows:
+                row['rx-byte'] = str(int(row.get('rx-byte', 0)) + self._rng.randint(0, 250_000))
+                row['tx-byte'] = str(int(row.get('tx-byte', 0)) + self._rng.randint(0, 1_000_000))
+
+    @staticmethod
+    def _matches(row: Dict[str, str], queries: List[str]) -> bool:
+        for q in queries:
+            if q.startswith('?-'):
+                if q[2:] in row:
+                    return False
+            elif '=' in q:
+                key, value = q[1:].split('=', 1)
+                if row.get(key, '') != value:
+                    return False
+            elif q[1:] not in row:
+                return False
+        return True
+
+    def execute(self, path: str, command: str, attrs: Dict[str, str], queries: List[str]) -> Tuple[List[Dict[str, str]], Dict[str, str]]:
+        """Devuelve (filas !re, atributos de !done); lanza KeyError/ValueError como !trap"""
+        with self._lock:
+            self.commands += 1
+            if path == '/system/resource' and command == 'print':
+                return [{'uptime': '3w2d', 'version': '7.14 (stable)', 'cpu-load': str(self._rng.randint(1, 40)),
+                         'free-memory': '536870912', 'total-memory': '1073741824', 'board-name': 'CCR2004',
+                         'platform': 'MikroTik'}], {}
+            if path == '/system/identity' and command == 'print':
+                return [{'name': self.identity}], {}
+            if path == '/interface' and command == 'monitor-traffic':
+                return [{'name': attrs.get('interface', ''), 'rx-bits-per-second': str(self._rng.randint(0, 5_000_000)),
+                         'tx-bits-per-second': str(self._rng.randint(0, 20_000_000))}], {}
+            if path == '/tool' and command == 'ping':
+                count = int(attrs.get('count', 1) or 1)
+                return [{'seq': str(i), 'host': attrs.get('address', ''), 'time': f"{self._rng.randint(1, 30)}ms",
+                         'sent': str(i + 1), 'received': str(i + 1)} for i in range(count)], {}
+
+            if path not in self.tables:
+                raise KeyError('no such command prefix')
+            table = self.tables[path]
+
+            if command in ('print', 'getall'):
+                rows = [row for row in table if self._matches(row, queries)]
+                if 'count-only' in attrs:
+                    return [], {'ret': str(len(rows))}
+                self._advance_counters(path, rows)
+                proplist = attrs.get('.proplist')
+                if proplist:
+                    keys = proplist.split(',')
+                    rows = [{k: row[k] for k in keys if k in row} for row in rows]
+                else:
+                    rows = [dict(row) for row in rows]
+                return rows, {}
+
+            if command == 'add':
+                row = {k: v for k, v in attrs.items() if not k.startswith('.')}
+                if path in ('/ppp/secret', '/queue/simple') and any(r.get('name') == row.get('name') for r in table):
+                    raise ValueError('failure: already have such name')
+                table.append(self._with_id(row))
+                return [], {'ret': row['.id']}
+
+            ids = set((attrs.get('.id') or attrs.get('numbers') or '').split(','))
+            if command == 'set':
+                found = [row for row in table if row['.id'] in ids]
+                if not found:
+                    raise ValueError('no such item')
+                for row in found:
+                    row.update({k: v for k, v in attrs.items() if k not in ('.id', 'numbers')})
+                return [], {}
+            if command == 'remove':
+                before = len(table)
+                table[:] = [row for row in table if row['.id'] not in ids]
+                if len(table) == before:
+                    raise ValueError('no such item')
+                return [], {}
+            raise KeyError('no such command')
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server: 'FakeRouterOS' = self.server.fake
+        sock = self.request
+        try:
+            while True:
+                words = read_sentence(sock)
+                if not words:
+                    continue
+                reply = server.dispatch(words)
+                sock.sendall(reply)
+        except (ConnectionError, OSError):
+            return
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeRouterOS:
+    """
+    Servidor API falso. Uso:
+        with FakeRouterOS(RouterDataset.generate(5000), LatencyProfile(command_ms=2)) as fake:
+            adapter.connect(fake.host, 'admin', 'x', port=fake.port)
+    """
+
+    def __init__(self, dataset: Optional[RouterDataset] = None, latency: Optional[LatencyProfile] = None,
+                 host: str = '127.0.0.1', port: int = 0, username: str = 'admin', password: Optional[str] = None):
+        self.dataset = dataset or RouterDataset.generate(100)
+        self.latency = latency or LatencyProfile()
+        self.username = username
+        self.password = password
+        self.state = RouterState(self.dataset)
+        self._bind = (host, port)
+        self._server: Optional[_TCPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> 'FakeRouterOS':
+        self._server = _TCPServer(self._bind, _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name='fake-routeros')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset(self):
+        """Restaura las tablas al dataset original (entre repeticiones de un benchmark)"""
+        self.state = RouterState(self.dataset)
+
+    def __enter__(self) -> 'FakeRouterOS':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def dispatch(self, words: List[str]) -> bytes:
+        head, rest = words[0], words[1:]
+        attrs: Dict[str, str] = {}
+        queries: List[str] = []
+        tag = None
+        for word in rest:
+            if word.startswith('=') and '=' in word[1:]:
+                key, value = word[1:].split('=', 1)
+                attrs[key] = value
+            elif word.startswith('?'):
+                queries.append(word)
+            elif word.startswith('.tag='):
+                tag = word[5:]
+        tag_words = [f'.tag={tag}'] if tag is not None else []
+
+        if head == '/login':
+            if attrs.get('name') != self.username or (self.password is not None and attrs.get('password') != self.password):
+                return (encode_sentence(['!trap', '=message=invalid user name or password (6)'] + tag_words) +
+                        encode_sentence(['!done'] + tag_words))
+            return encode_sentence(['!done'] + tag_words)
+
+        path, _, command = head.rpartition('/')
+        try:
+            rows, done = self.state.execute(path or '/', command, attrs, queries)
+        except (KeyError, ValueError) as e:
+            time.sleep(self.latency.delay(0))
+            message = e.args[0] if e.args else str(e)
+            return (encode_sentence(['!trap', f'=message={message}'] + tag_words) +
+                    encode_sentence(['!done'] + tag_words))
+
+        delay = self.latency.delay(len(rows))
+        if delay:
+            time.sleep(delay)
+        out = bytearray()
+        for row in rows:
+            out += encode_sentence(['!re'] + [f'={k}={v}' for k, v in row.items()] + tag_words)
+        out += encode_sentence(['!done'] + [f'={k}={v}' for k, v in done.items()] + tag_words)
+        return bytes(out)
+
+
+def free_port() -> int:
+    """Puerto TCP libre en localhost (para fijar api_port antes de arrancar el servidor)"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
@@ -0,0 +1,111 @@
+"""
+Benchmark Harness
+Ejecución cronometrada de escenarios (warmup + repeticiones, con setup fuera del tiempo medido),
+resultados en JSON y comparación contra una línea base para detectar regresiones.
+"""
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    runs: int
+    items: int                     # Unidades procesadas por corrida (clientes, facturas, operaciones...)
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    min_ms: float
+    max_ms: float
+    items_per_sec: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(name: str, durations_s: List[float], items: int = 1, extra: Optional[Dict[str, Any]] = None) -> BenchmarkResult:
+    ms = sorted(d * 1000 for d in durations_s)
+    mean = statistics.fmean(ms) if ms else 0.0
+    return BenchmarkResult(
+        name=name, runs=len(ms), items=items,
+        mean_ms=round(mean, 3), p50_ms=round(_percentile(ms, 0.5), 3), p95_ms=round(_percentile(ms, 0.95), 3),
+        min_ms=round(ms[0], 3) if ms else 0.0, max_ms=round(ms[-1], 3) if ms else 0.0,
+        items_per_sec=round(items / (mean / 1000), 1) if mean else 0.0,
+        extra=extra or {},
+    )
+
+
+def run_benchmark(name: str, func: Callable[[], Any], setup: Optional[Callable[[], Any]] = None,
+                  repeat: int = 5, warmup: int = 1, items: int = 1,
+                  clock: Callable[[], float] = time.perf_counter) -> BenchmarkResult:
+    """
+    Ejecuta `setup()` (no medido) y luego `func()` (medido) warmup + repeat veces.
+    Si func devuelve un dict, el último se adjunta como `extra` (p.ej. contadores del escenario).
+    """
+    durations = []
+    last = None
+    for i in range(warmup + repeat):
+        if setup:
+            setup()
+        started = clock()
+        last = func()
+        elapsed = clock() - started
+        if i >= warmup:
+            durations.append(elapsed)
+    return summarize(name, durations, items, last if isinstance(last, dict) else None)
+
+
+def environment_info() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def write_results(path: str, results: List[BenchmarkResult], params: Dict[str, Any]):
+    payload = {'environment': environment_info(), 'params': params, 'results': [asdict(r) for r in results]}
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(payload, fh, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding='utf-8') as fh:
+        payload = json.load(fh)
+    return {r['name']: r for r in payload.get('results', [])}
+
+
+def find_regressions(results: List[BenchmarkResult], baseline: Dict[str, Dict[str, Any]],
+                     tolerance: float = 0.20, metric: str = 'p50_ms') -> List[Dict[str, Any]]:
+    """Escenarios cuya métrica empeoró más que `tolerance` (0.20 = 20 %) respecto a la línea base"""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base or not base.get(metric):
+            continue
+        current = getattr(result, metric)
+        ratio = current / base[metric]
+        if ratio > 1 + tolerance:
+            regressions.append({'name': result.name, 'metric': metric, 'baseline': base[metric],
+                                'current': current, 'ratio': round(ratio, 2)})
+    return regressions
+
+
+def format_table(results: List[BenchmarkResult]) -> str:
+    header = f"{'escenario':<32} {'items':>7} {'p50 ms':>10} {'p95 ms':>10} {'media ms':>10} {'items/s':>10}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(f"{r.name:<32} {r.items:>7} {r.p50_ms:>10.2f} {r.p95_ms:>10.2f} {r.mean_ms:>10.2f} {r.items_per_sec:>10.1f}")
+    return '\n'.join(lines)
@@ -0,0 +1,191 @@
+"""
+Micro-benchmarks de parseo RouterOS
+Compara src.infrastructure.mikrotik.parsing con la implementación anterior (copiada abajo
+tal cual como referencia congelada) sobre columnas realistas de un tick de monitoreo.
+
+Uso:
+    python -m benchmarks.micro_parsing --rows 5000 --repeat 7
+    python -m benchmarks.micro_parsing --json micro.json --baseline micro_prev.json
+"""
+import argparse
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from benchmarks.harness import BenchmarkResult, find_regressions, format_table, load_results, run_benchmark, write_results
+
+
+# --- Implementación anterior (referencia, no usar en la aplicación) ---
+
+def legacy_parse_absolute(time_str: str) -> Optional[datetime]:
+    try:
+        months = {
+            'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+            'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+        }
+        parts = time_str.split(' ')
+        if len(parts) != 2:
+            return None
+        date_part, time_part = parts
+        date_subparts = date_part.split('/')
+        if len(date_subparts) == 3:
+            m_str, d_str, y_str = date_subparts
+        elif len(date_subparts) == 2:
+            m_str, d_str = date_subparts
+            y_str = str(datetime.now().year)
+        else:
+            return None
+        month = months.get(m_str.lower())
+        if not month:
+            return None
+        dt_str = f"{y_str}-{month:02d}-{int(d_str):02d} {time_part}"
+        return datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
+    except Exception:
+        return None
+
+
+def legacy_parse_relative(time_str: str) -> Optional[datetime]:
+    try:
+        s = time_str.strip().lower()
+        total_seconds = 0
+        w_match = re.search(r'(\d+)\s*w', s)
+        d_match = re.search(r'(\d+)\s*d', s)
+        if w_match: total_seconds += int(w_match.group(1)) * 604800
+        if d_match: total_seconds += int(d_match.group(1)) * 86400
+        remaining = re.sub(r'\d+\s*[wd]', '', s).strip()
+        if ':' in remaining:
+            parts = [int(x) for x in remaining.split(':')]
+            if len(parts) == 3:
+                total_seconds += parts[0] * 3600 + parts[1] * 60 + parts[2]
+            elif len(parts) == 2:
+                total_seconds += parts[0] * 60 + parts[1]
+        else:
+            for unit, mult in [('h', 3600), ('m', 60), ('s', 1)]:
+                match = re.search(fr'(\d+)\s*{unit}', remaining)
+                if match: total_seconds += int(match.group(1)) * mult
+        if total_seconds > 0:
+            return datetime.now() - timedelta(seconds=total_seconds)
+    except Exception:
+        pass
+    return None
+
+
+def legacy_parse_time(time_str: str) -> Optional[datetime]:
+    if not time_str or time_str.lower() == 'never':
+        return None
+    return legacy_parse_absolute(time_str) or legacy_parse_relative(time_str)
+
+
+def legacy_rate_pair(rate: str):
+    try:
+        u, d = rate.split('/')
+        return int(u), int(d)
+    except Exception:
+        return 0, 0
+
+
+def legacy_bulk_traffic(queues: List[Dict[str, str]], targets: List[str]) -> Dict[str, Dict[str, int]]:
+    """Una llamada de get_bulk_traffic por interfaz, como hacía el ciclo de monitoreo"""
+    out = {}
+    for target in targets:
+        queue_map = {q.get('name'): q.get('rate', '0/0') for q in queues if q.get('name')}
+        parts = queue_map.get(target, '0/0').split('/')
+        out[target] = {'tx': int(parts[1]), 'rx': int(parts[0])} if len(parts) == 2 else {'tx': 0, 'rx': 0}
+    return out
+
+
+# --- Datos ---
+
+def sample_columns(rows: int, seed: int = 11) -> Dict[str, List[str]]:
+    """Columnas con la repetición típica de un router: pocos planes, last-seen agrupados, tasas vivas"""
+    rng = random.Random(seed)
+    plans = ['5M/5M', '10M/10M', '20M/10M', '30M/15M', '50M/25M', '100M/50M', '512k/1M', '1G/1G']
+    last_seen = [f"{m}m{s}s" for m in range(0, 30) for s in range(0, 60, 5)] + \
+        [f"{d}d{h:02d}:{m:02d}:00" for d in range(0, 5) for h in range(0, 24, 3) for m in (0, 30)] + ['never']
+    absolute = [f"{mon}/{day:02d}/2026 {h:02d}:{m:02d}:00" for mon in ('jan', 'feb', 'mar')
+                for day in range(1, 28, 3) for h in (0, 8, 16) for m in (0, 30)]
+    return {
+        'rates': [f"{rng.randint(0, 5_000_000)}/{rng.randint(0, 20_000_000)}" for _ in range(rows)],
+        'limits': [rng.choice(plans) for _ in range(rows)],
+        'last_seen': [rng.choice(last_seen) for _ in range(rows)],
+        'absolute': [rng.choice(absolute) for _ in range(rows)],
+        'names': [f"client-{i:05d}" for i in range(rows)],
+    }
+
+
+# --- Escenarios ---
+
+def run_micro(rows: int = 5000, repeat: int = 7, warmup: int = 1, interfaces: int = 20) -> List[BenchmarkResult]:
+    from src.infrastructure.mikrotik import parsing
+
+    cols = sample_columns(rows)
+    queues = [{'name': n, 'rate': r} for n, r in zip(cols['names'], cols['rates'])]
+    targets = cols['names'][:interfaces]
+    now = datetime.now()
+
+    def new_bulk_traffic():
+        rates = parsing.rate_map(queues)
+        return {t: {'tx': rates.get(t, (0, 0))[1], 'rx': rates.get(t, (0, 0))[0]} for t in targets}
+
+    cases = [
+        ('time.last_seen', lambda: [legacy_parse_time(v) for v in cols['last_seen']],
+         lambda: parsing.parse_time_column(cols['last_seen'], now)),
+        ('time.absolute', lambda: [legacy_parse_time(v) for v in cols['absolute']],
+         lambda: parsing.parse_time_column(cols['absolute'], now)),
+        ('rate.live', lambda: [legacy_rate_pair(v) for v in cols['rates']],
+         lambda: parsing.parse_rate_column(cols['rates'])),
+        ('rate.limits', lambda: [legacy_rate_pair(v) for v in cols['limits']],   # La versión anterior no soportaba sufijos
+         lambda: parsing.parse_rate_column(cols['limits'])),
+        ('tick.interface_traffic', lambda: legacy_bulk_traffic(queues, targets), new_bulk_traffic),
+    ]
+    results = []
+    for name, legacy, current in cases:
+        parsing.clear_caches()
+        results.append(run_benchmark(f"{name}.legacy", legacy, repeat=repeat, warmup=warmup, items=rows))
+        parsing.clear_caches()
+        results.append(run_benchmark(f"{name}.new", current, repeat=repeat, warmup=warmup, items=rows))
+    return results
+
+
+def speedups(results: List[BenchmarkResult]) -> Dict[str, float]:
+    by_name = {r.name: r for r in results}
+    out = {}
+    for name, result in by_name.items():
+        if name.endswith('.new'):
+            legacy = by_name.get(name[:-4] + '.legacy')
+            if legacy and result.p50_ms:
+                out[name[:-4]] = round(legacy.p50_ms / result.p50_ms, 1)
+    return out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Micro-benchmarks de parseo de tiempos y tasas RouterOS')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--interfaces', type=int, default=20, help='Interfaces monitoreadas en el escenario de tick')
+    parser.add_argument('--json', dest='json_path')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.20)
+    args = parser.parse_args(argv)
+
+    results = run_micro(args.rows, args.repeat, args.warmup, args.interfaces)
+    print(format_table(results))
+    for name, ratio in speedups(results).items():
+        print(f"⚡ {name}: x{ratio}")
+    if args.json_path:
+        write_results(args.json_path, results, {k: v for k, v in vars(args).items() if k not in ('json_path', 'baseline')})
+    if args.baseline:
+        regressions = [r for r in find_regressions(results, load_results(args.baseline), args.tolerance)
+                       if r['name'].endswith('.new')]
+        for r in regressions:
+            print(f"⚠️ Regresión en {r['name']}: {r['metric']} {r['baseline']} -> {r['current']} (x{r['ratio']})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
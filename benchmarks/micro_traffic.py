@@ -0,0 +1,106 @@
+"""
+Micro-benchmark del payload de tráfico de clientes
+Simula ticks de monitoreo de un router ocupado y compara el emit JSON anterior ('client_traffic')
+con el protocolo delta ('client_traffic_delta', JSON y msgpack si está instalado):
+bytes por tick en el socket, costo del servidor y costo de parsear lo recibido (lo que
+paga el navegador con JSON.parse crece con los bytes; el desempaquetado delta es un bucle plano).
+
+Uso:
+    python -m benchmarks.micro_traffic --clients 2000 --ticks 200 --churn 0.15
+"""
+import argparse
+import json
+import random
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.harness import BenchmarkResult, format_table, run_benchmark
+
+
+def simulate_ticks(clients: int, ticks: int, churn: float, seed: int = 3) -> List[Dict[int, Dict[str, Any]]]:
+    """Snapshots por tick como los de TrafficSurgicalEngine; `churn` = fracción de clientes que cambian de tasa"""
+    rng = random.Random(seed)
+    state = {cid: {'id': cid, 'status': 'online' if rng.random() < 0.9 else 'offline',
+                   'upload': rng.randint(0, 5_000_000), 'download': rng.randint(0, 30_000_000),
+                   'method': rng.choice(('pppoe', 'pppoe', 'arp', 'dhcp'))}
+             for cid in range(1, clients + 1)}
+    out = []
+    for _ in range(ticks):
+        for cid in rng.sample(range(1, clients + 1), int(clients * churn)):
+            c = state[cid]
+            state[cid] = {**c, 'upload': max(0, c['upload'] + rng.randint(-2_000_000, 2_000_000)),
+                          'download': max(0, c['download'] + rng.randint(-8_000_000, 8_000_000))}
+        out.append({cid: dict(c) for cid, c in state.items()})
+    return out
+
+
+def legacy_emits(ticks: List[Dict[int, Dict[str, Any]]], threshold: int = 50000) -> List[str]:
+    """Réplica del filtro anterior de MonitoringManager, serializado como lo envía Socket.IO"""
+    last: Dict[int, Dict[str, Any]] = {}
+    payloads = []
+    for tick in ticks:
+        delta = {}
+        for cid, c in tick.items():
+            prev = last.get(cid)
+            if not prev or c['status'] != prev['status'] or abs(c['upload'] - prev['upload']) > threshold or \
+               abs(c['download'] - prev['download']) > threshold:
+                delta[cid] = c
+        if delta:
+            last.update(delta)
+            payloads.append(json.dumps(delta))
+    return payloads
+
+
+def delta_emits(ticks: List[Dict[int, Dict[str, Any]]], binary: bool) -> List[Any]:
+    from src.application.services.traffic_delta import TrafficDeltaEncoder, pack_frame
+    encoder = TrafficDeltaEncoder(1, keyframe_seconds=30)
+    payloads = []
+    for i, tick in enumerate(ticks):
+        frame = encoder.encode(tick, i * 1.5)
+        if frame:
+            packed = pack_frame(frame, binary)
+            payloads.append(packed if binary else json.dumps(packed, separators=(',', ':')))
+    return payloads
+
+
+def run_micro(clients: int, ticks: int, churn: float, repeat: int) -> List[BenchmarkResult]:
+    """Por variante: costo del servidor (filtrar + codificar + serializar) y de parsear lo recibido"""
+    from src.application.services.traffic_delta import msgpack_available, unpack_frame
+
+    data = simulate_ticks(clients, ticks, churn)
+    variants = [('json.legacy', lambda: legacy_emits(data), json.loads),
+                ('delta.json', lambda: delta_emits(data, False), json.loads)]
+    if msgpack_available():
+        variants.append(('delta.msgpack', lambda: delta_emits(data, True), unpack_frame))
+
+    results = []
+    for name, encode, parse in variants:
+        payloads = encode()
+        size = sum(len(p) for p in payloads)
+        extra = {'bytes_total': size, 'bytes_per_tick': round(size / ticks), 'frames': len(payloads)}
+        server = run_benchmark(f"{name}.server", encode, repeat=repeat, warmup=1, items=ticks)
+        received = run_benchmark(f"{name}.parse", lambda: [parse(p) for p in payloads], repeat=repeat, warmup=1, items=ticks)
+        server.extra.update(extra)
+        received.extra.update(extra)
+        results.extend((server, received))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Bytes y CPU del emit de tráfico de clientes: JSON vs delta')
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--churn', type=float, default=0.15)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = run_micro(args.clients, args.ticks, args.churn, args.repeat)
+    print(format_table(results))
+    base = results[0].extra['bytes_per_tick']
+    for r in results[::2]:
+        print(f"📦 {r.name[:-len('.server')]}: {r.extra['bytes_per_tick']} bytes/tick (x{round(base / max(1, r.extra['bytes_per_tick']), 1)})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark Runner
+Levanta el router falso, siembra una base SQLite temporal y mide los escenarios.
+
+Uso:
+    python -m benchmarks.run --clients 2000 --latency-ms 2 --repeat 5 --json results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.25   # sale con código 1 si hay regresión
+    python -m benchmarks.run --only traffic_snapshot,monitor_tick
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks SGUBM contra un RouterOS emulado')
+    parser.add_argument('--clients', type=int, default=2000, help='Clientes simulados en el router')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=1.0, help='Latencia base por comando API')
+    parser.add_argument('--per-row-us', type=float, default=5.0, help='Latencia adicional por fila devuelta')
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--only', default='', help='Escenarios separados por coma')
+    parser.add_argument('--json', dest='json_path', help='Guardar resultados en JSON')
+    parser.add_argument('--baseline', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.20, help='Regresión permitida (0.20 = 20%%)')
+    parser.add_argument('--workdir', help='Directorio para la base SQLite (por defecto temporal)')
+    parser.add_argument('--log-level', default='CRITICAL', help='Nivel de log de la aplicación durante la corrida')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='sgubm-bench-')
+
+    # La configuración se lee al importar settings: fijar el entorno antes de importar la app
+    os.environ.update({
+        'DB_DRIVER': 'sqlite',
+        'DB_NAME': os.path.join(workdir, 'bench'),
+        'MT_AUTO_SYNC': 'false',
+        'AUTO_BILLING': 'false',
+        'SUSPENSION_FREEZE_UNTIL': '',
+    })
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.CRITICAL))
+
+    from benchmarks.fake_routeros import FakeRouterOS, LatencyProfile, RouterDataset
+    from benchmarks.harness import find_regressions, format_table, load_results, write_results
+    from benchmarks.scenarios import SCENARIOS, BenchmarkContext, run_scenarios, seed_database
+
+    names = [n.strip() for n in args.only.split(',') if n.strip()] or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"Escenarios desconocidos: {', '.join(unknown)} (disponibles: {', '.join(SCENARIOS)})")
+        return 2
+
+    dataset = RouterDataset.generate(args.clients, seed=args.seed)
+    latency = LatencyProfile(command_ms=args.latency_ms, per_row_us=args.per_row_us, jitter_ms=args.jitter_ms)
+    params = {k: v for k, v in vars(args).items() if k not in ('json_path', 'baseline', 'workdir', 'log_level')}
+
+    with FakeRouterOS(dataset, latency) as fake:
+        seeded = seed_database(dataset, fake.host, fake.port)
+        ctx = BenchmarkContext(fake=fake, dataset=dataset, router_id=seeded['router_id'],
+                               client_ids=seeded['client_ids'], repeat=args.repeat, warmup=args.warmup)
+        print(f"🧪 {len(ctx.client_ids)} clientes sembrados en {workdir}; router falso en {fake.host}:{fake.port}")
+        try:
+            results = run_scenarios(ctx, names, on_error=lambda name, e: print(f"❌ {name}: {e}"))
+        finally:
+            ctx.close()
+
+    print(format_table(results))
+    if args.json_path:
+        write_results(args.json_path, results, params)
+        print(f"💾 Resultados guardados en {args.json_path}")
+
+    if args.baseline:
+        regressions = find_regressions(results, load_results(args.baseline), args.tolerance)
+        for r in regressions:
+            print(f"⚠️ Regresión en {r['name']}: {r['metric']} {r['baseline']} -> {r['current']} (x{r['ratio']})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
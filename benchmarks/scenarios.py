@@ -0,0 +1,268 @@
+"""
+Benchmark Scenarios
+Caminos críticos medidos contra el router falso y una base SQLite sembrada:
+- monitor_tick: una iteración completa del ciclo rápido de MonitoringManager.
+- traffic_snapshot: TrafficSurgicalEngine.get_snapshot para todos los clientes del router.
+- sync_operations: SyncService.sync_router_operations con operaciones pendientes encoladas.
+- bulk_suspensions: BillingService.process_suspensions sobre facturas vencidas.
+- invoice_generation: BillingService.generate_monthly_invoices del router sembrado.
+- technical_names: reconciliación en bloque de nombres de cola / interfaz de todo el router.
+
+La base de datos se toma de get_db(): benchmarks/run.py apunta DB_DRIVER/DB_NAME a un
+archivo temporal antes de importar la aplicación.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_routeros import FakeRouterOS, RouterDataset
+from benchmarks.harness import BenchmarkResult, run_benchmark
+
+
+@dataclass
+class BenchmarkContext:
+    fake: FakeRouterOS
+    dataset: RouterDataset
+    router_id: int
+    client_ids: List[int]
+    repeat: int = 5
+    warmup: int = 1
+    _adapter: Any = field(default=None, repr=False)
+
+    def adapter(self):
+        """Adaptador persistente (como el del ciclo de monitoreo)"""
+        if self._adapter is None:
+            from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+            adapter = MikroTikAdapter()
+            if not adapter.connect(self.fake.host, self.fake.username, 'bench', port=self.fake.port, timeout=5):
+                raise ConnectionError('No se pudo conectar al router falso')
+            self._adapter = adapter
+        return self._adapter
+
+    def close(self):
+        if self._adapter is not None:
+            self._adapter.disconnect()
+            self._adapter = None
+
+
+def seed_database(dataset: RouterDataset, host: str, port: int) -> Dict[str, Any]:
+    """Router + plan + un cliente por cada cliente simulado (inserción en bloque)"""
+    from src.infrastructure.database.db_manager import get_db
+    from src.infrastructure.database.models import Client, InternetPlan, Router
+
+    session = get_db().session
+    router = Router(alias='Bench Router', host_address=host, api_username='admin', api_password='bench',
+                    api_port=port, status='online', billing_day=1, grace_period=5)
+    plan = InternetPlan(name='Bench 20M', download_speed=20000, upload_speed=10000, monthly_price=25.0)
+    session.add_all([router, plan])
+    session.flush()
+
+    rows = [{
+        'router_id': router.id,
+        'plan_id': plan.id,
+        'subscriber_code': f"BENCH-{c.index:05d}",
+        'legal_name': c.legal_name,
+        'username': c.username,
+        'ip_address': c.ip_address,
+        'service_type': 'pppoe' if c.service_type == 'pppoe' else 'simple_queue',
+        'mikrotik_queue_name': c.username,
+        'status': 'active',
+        'monthly_fee': 25.0,
+        'billing_enabled': True,
+        'account_balance': 0.0,
+    } for c in dataset.clients]
+    session.bulk_insert_mappings(Client, rows)
+    session.commit()
+    client_ids = [cid for (cid,) in session.query(Client.id).filter(Client.router_id == router.id).order_by(Client.id)]
+    router_id = router.id
+    get_db().remove_session()
+    return {'router_id': router_id, 'client_ids': client_ids}
+
+
+def _session():
+    from src.infrastructure.database.db_manager import get_db
+    return get_db().session
+
+
+def _done():
+    from src.infrastructure.database.db_manager import get_db
+    get_db().remove_session()
+
+
+def bench_traffic_snapshot(ctx: BenchmarkContext) -> BenchmarkResult:
+    from src.application.services.traffic_engine import TrafficSurgicalEngine
+    from src.infrastructure.database.db_manager import get_db
+
+    engine = TrafficSurgicalEngine()
+    adapter = ctx.adapter()
+
+    def snapshot():
+        result = engine.get_snapshot(adapter, ctx.client_ids, get_db().session_factory)
+        return {'online': sum(1 for r in result.values() if r['status'] == 'online')}
+
+    return run_benchmark('traffic_snapshot', snapshot, repeat=ctx.repeat, warmup=ctx.warmup,
+                         items=len(ctx.client_ids))
+
+
+def bench_monitor_tick(ctx: BenchmarkContext, monitored: int = 200) -> BenchmarkResult:
+    """Peor caso del ciclo: cada tick incluye la sincronización de fondo de todo el router"""
+    from src.application.services.monitoring_manager import MonitoringManager
+    from src.infrastructure.database.models import Router
+
+    manager = MonitoringManager()
+    adapter = ctx.adapter()
+    router = _session().query(Router).get(ctx.router_id)
+    manager.monitored_clients[ctx.router_id] = set(ctx.client_ids[:monitored])
+    manager.monitored_interfaces[ctx.router_id] = {'ether1'}
+    manager.dashboard_interfaces[ctx.router_id] = {'ether1', 'ether2'}
+    # Fuera de la medición: el sync de operaciones pendientes y el de nombres técnicos
+    setattr(manager, f'last_pending_sync_{ctx.router_id}', float('inf'))
+    manager.last_name_sync[ctx.router_id] = float('inf')
+    state: Dict[str, Any] = {}
+
+    def setup():
+        manager.last_db_sync.pop(ctx.router_id, None)
+        state.clear()
+
+    def tick():
+        manager._monitor_tick(ctx.router_id, router, adapter, time.time(), state)
+
+    try:
+        return run_benchmark('monitor_tick', tick, setup=setup, repeat=ctx.repeat, warmup=ctx.warmup,
+                             items=len(ctx.client_ids))
+    finally:
+        from src.infrastructure.database.write_queue import get_write_queue
+        get_write_queue().run(lambda session: None)   # Esperar las escrituras encoladas por los ticks
+        _done()
+
+
+def bench_sync_operations(ctx: BenchmarkContext, operations: int = 500) -> BenchmarkResult:
+    from src.application.services.sync_service import SyncService
+    from src.infrastructure.database.db_manager import get_db
+    from src.infrastructure.database.models import PendingOperation
+
+    adapter = ctx.adapter()
+    targets = ctx.dataset.clients[:operations]
+    ids = ctx.client_ids[:operations]
+
+    def setup():
+        ctx.fake.reset()
+        session = _session()
+        session.query(PendingOperation).filter(PendingOperation.router_id == ctx.router_id).delete()
+        session.bulk_insert_mappings(PendingOperation, [{
+            'operation_type': 'suspend', 'client_id': cid, 'router_id': ctx.router_id,
+            'ip_address': c.ip_address, 'target_status': 'suspended', 'status': 'pending',
+            'operation_data': json.dumps({'id': cid, 'username': c.username, 'ip_address': c.ip_address}),
+        } for cid, c in zip(ids, targets)])
+        session.commit()
+        _done()
+
+    def sync():
+        return SyncService(get_db()).sync_router_operations(ctx.router_id, {}, shared_adapter=adapter)
+
+    return run_benchmark('sync_operations', sync, setup=setup, repeat=ctx.repeat, warmup=ctx.warmup,
+                         items=len(ids))
+
+
+def bench_bulk_suspensions(ctx: BenchmarkContext, debtors: int = 100) -> BenchmarkResult:
+    from src.application.services.billing_service import BillingService
+    from src.infrastructure.database.models import Client, Invoice, InvoiceItem
+
+    ids = ctx.client_ids[:debtors]
+
+    def setup():
+        ctx.fake.reset()
+        session = _session()
+        session.query(InvoiceItem).delete()
+        session.query(Invoice).delete()
+        session.query(Client).filter(Client.router_id == ctx.router_id).update(
+            {'status': 'active', 'account_balance': 0.0, 'promise_date': None}, synchronize_session=False)
+        session.query(Client).filter(Client.id.in_(ids)).update({'account_balance': 25.0}, synchronize_session=False)
+        overdue = datetime.now() - timedelta(days=10)
+        session.bulk_insert_mappings(Invoice, [{
+            'client_id': cid, 'issue_date': overdue - timedelta(days=5), 'due_date': overdue,
+            'total_amount': 25.0, 'status': 'unpaid',
+        } for cid in ids])
+        session.commit()
+        _done()
+
+    def suspend():
+        BillingService().process_suspensions(router_id=ctx.router_id)
+        suspended = _session().query(Client).filter(Client.id.in_(ids), Client.status == 'suspended').count()
+        _done()
+        return {'suspended': suspended}
+
+    return run_benchmark('bulk_suspensions', suspend, setup=setup, repeat=ctx.repeat, warmup=ctx.warmup,
+                         items=len(ids))
+
+
+def bench_invoice_generation(ctx: BenchmarkContext) -> BenchmarkResult:
+    from src.application.services.billing_service import BillingService
+    from src.infrastructure.database.models import Client, Invoice, InvoiceItem
+
+    target = datetime.now()
+
+    def setup():
+        session = _session()
+        session.query(InvoiceItem).delete()
+        session.query(Invoice).delete()
+        session.query(Client).filter(Client.router_id == ctx.router_id).update(
+            {'status': 'active', 'account_balance': 0.0}, synchronize_session=False)
+        session.commit()
+        _done()
+
+    def generate():
+        ok = BillingService().generate_monthly_invoices(target.year, target.month, router_id=ctx.router_id)
+        created = _session().query(Invoice).count()
+        _done()
+        return {'ok': ok, 'created': created}
+
+    return run_benchmark('invoice_generation', generate, setup=setup, repeat=ctx.repeat, warmup=ctx.warmup,
+                         items=len(ctx.client_ids))
+
+
+def bench_technical_names(ctx: BenchmarkContext) -> BenchmarkResult:
+    """Peor caso: ningún cliente tiene nombres técnicos resueltos"""
+    from src.application.services.technical_names import reconcile_technical_names
+    from src.infrastructure.database.db_manager import get_db
+    from src.infrastructure.database.models import Client
+
+    adapter = ctx.adapter()
+
+    def setup():
+        session = _session()
+        session.query(Client).filter(Client.router_id == ctx.router_id).update(
+            {'mikrotik_queue_name': None, 'mikrotik_interface_name': None}, synchronize_session=False)
+        session.commit()
+        _done()
+
+    def reconcile():
+        return {'changes': len(reconcile_technical_names(ctx.router_id, adapter, get_db().session_factory))}
+
+    return run_benchmark('technical_names', reconcile, setup=setup, repeat=ctx.repeat, warmup=ctx.warmup,
+                         items=len(ctx.client_ids))
+
+
+SCENARIOS: Dict[str, Callable[[BenchmarkContext], BenchmarkResult]] = {
+    'monitor_tick': bench_monitor_tick,
+    'traffic_snapshot': bench_traffic_snapshot,
+    'sync_operations': bench_sync_operations,
+    'bulk_suspensions': bench_bulk_suspensions,
+    'invoice_generation': bench_invoice_generation,
+    'technical_names': bench_technical_names,
+}
+
+
+def run_scenarios(ctx: BenchmarkContext, names: Optional[List[str]] = None,
+                  on_error: Optional[Callable[[str, Exception], None]] = None) -> List[BenchmarkResult]:
+    results = []
+    for name in names or list(SCENARIOS):
+        try:
+            results.append(SCENARIOS[name](ctx))
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(name, e)
+    return results
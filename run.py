@@ -11,11 +11,10 @@ from src.application.events.event_bus import get_event_bus, SystemEvents
 from src.presentation.api.websocket_events import register_socket_events
 from src.application.services.automation_manager import AutomationManager
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (JSON estructurado, escrito por un hilo de fondo)
+from src.infrastructure.observability.request_logging import configure_logging
+_system_config = get_config().system
+configure_logging(_system_config.log_level, _system_config.log_format, _system_config.log_queue_size)
 logger = logging.getLogger(__name__)
 
 
@@ -54,8 +53,32 @@ def create_app() -> Flask:
     # Asegurar usuario admin por defecto
     _ensure_default_admin(app)
     
-    # Inicializar SocketIO
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+    # Precargar mapa host -> tenant (cada request lo resuelve en memoria)
+    try:
+        from src.application.services.tenant_service import TenantService
+        with app.app_context():
+            TenantService.warm_cache()
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo precargar la caché de tenants: {e}")
+    
+    # Varios workers: reparto de routers y líder de automatización antes de arrancar el monitoreo
+    if config.cluster.enabled:
+        from src.infrastructure.cluster.coordinator import get_coordinator
+        get_coordinator().start()
+
+    # Outbox de WhatsApp en cada worker: recupera reclamos vencidos y despacha pendientes desde el arranque
+    # (el ciclo sólo envía en el líder; los seguidores encolan y el líder entrega)
+    try:
+        from src.infrastructure.notifications.whatsapp_outbox import get_whatsapp_outbox
+        get_whatsapp_outbox().start()
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo iniciar el outbox de WhatsApp: {e}")
+
+    # Inicializar SocketIO (con cola de mensajes, los emits de cualquier worker llegan a todos los clientes)
+    from src.infrastructure.cluster.socketio_queue import socketio_queue_options, socketio_transports
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
+                        **socketio_queue_options(config.cluster))
+    app.config['SOCKETIO_TRANSPORTS'] = socketio_transports(config.cluster)
     register_socket_events(socketio)
     app.socketio = socketio
     
@@ -67,6 +90,10 @@ def create_app() -> Flask:
         from src.infrastructure.database.db_manager import get_db
         get_db().remove_session()
 
+    # Log estructurado por petición (muestreado por ruta, con duración)
+    from src.infrastructure.observability.request_logging import init_request_logging, RequestLogPolicy
+    init_request_logging(app, RequestLogPolicy.from_config(config.system))
+
     @app.before_request
     def resolve_tenant():
         """Resuelve el tenant dinámicamente desde el subdominio"""
@@ -81,17 +108,14 @@ def create_app() -> Flask:
             g.brand_color = tenant.brand_color
             g.logo_path = tenant.logo_path
 
-    # Log de depuración para cada petición
-    @app.before_request
-    def log_request_info():
-        from flask import request
-        # Loguear solo si no es socket.io para no inundar el log
-        if not request.path.startswith('/socket.io'):
-            logger.info(f"📥 PETICIÓN: [{request.method}] {request.path} - Headers: {dict(request.headers)}")
-    
     from src.presentation.api.health_controller import health_bp
     app.register_blueprint(health_bp)
 
+    # Telemetría en texto Prometheus (latencias RouterOS, SQL por petición, lag de monitoreo)
+    if config.system.metrics_enabled:
+        from src.presentation.api.metrics_controller import register_metrics
+        register_metrics(app)
+
     # Manejador de errores para SPA: redirigir rutas no-API a index.html
     @app.errorhandler(404)
     def handle_404(e):
@@ -153,6 +177,19 @@ def _register_event_handlers(event_bus):
     
     event_bus.subscribe(SystemEvents.CLIENT_CREATED, on_client_created)
     event_bus.subscribe(SystemEvents.CLIENT_SUSPENDED, on_client_suspended)
+    
+    # Índice de IPs/Segmentos en memoria (se mantiene con eventos de cliente)
+    from src.application.services.ip_index import get_network_index
+    get_network_index().register_event_handlers(event_bus)
+
+
+# Módulos de uso esporádico: se importan en su primera petición
+LAZY_BLUEPRINTS = [
+    ('src.presentation.api.reports_controller', 'reports_bp'),
+    ('src.presentation.api.support_controller', 'support_bp'),
+    ('src.presentation.api.reciclador_controller', 'reciclador_bp'),
+    ('src.presentation.api.collector_finance_controller', 'collector_finance_bp'),
+]
 
 
 def _register_blueprints(app: Flask):
@@ -165,16 +202,9 @@ def _register_blueprints(app: Flask):
     from src.presentation.api.billing_controller import billing_bp
     from src.presentation.api.plans_controller import plans_bp
     from src.presentation.api.sync_controller import sync_bp
-    from src.presentation.api.reports_controller import reports_bp
     from src.presentation.api.whatsapp_controller import whatsapp_bp
     from src.presentation.api.auth_controller import auth_bp
-    from src.presentation.api.support_controller import support_bp
-    from src.presentation.api.reciclador_controller import reciclador_bp
-    
-    # Registrar blueprints
-    from src.presentation.api.auth_controller import auth_bp
     from src.presentation.api.users_controller import users_bp
-    from src.presentation.api.collector_finance_controller import collector_finance_bp
     
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(routers_bp)
@@ -183,15 +213,21 @@ def _register_blueprints(app: Flask):
     app.register_blueprint(billing_bp)
     app.register_blueprint(plans_bp)
     app.register_blueprint(sync_bp)
-    app.register_blueprint(reports_bp)
     app.register_blueprint(whatsapp_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(users_bp)
-    app.register_blueprint(collector_finance_bp)
-    app.register_blueprint(support_bp)
-    app.register_blueprint(reciclador_bp)
     
-    logger.info('✅ Blueprints registered: auth, users, dashboard, routers, clients, payments, billing, plans, sync, reports, whatsapp, collector_finance, support, reciclador')
+    lazy = get_config().system.lazy_blueprints
+    from src.presentation.api.lazy_blueprints import register_lazy_blueprint
+    for module_name, attribute in LAZY_BLUEPRINTS:
+        if lazy:
+            register_lazy_blueprint(app, module_name, attribute)
+        else:
+            import importlib
+            app.register_blueprint(getattr(importlib.import_module(module_name), attribute))
+    
+    logger.info('✅ Blueprints registered: auth, users, dashboard, routers, clients, payments, billing, plans, sync, whatsapp'
+                f" + {'lazy' if lazy else 'eager'}: reports, support, reciclador, collector_finance")
 
 
 def _ensure_default_admin(app: Flask):
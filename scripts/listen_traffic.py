@@ -1,9 +1,15 @@
 
+import os
+import sys
 import socketio
 import json
 import time
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.application.services.traffic_delta import TrafficDeltaDecoder
+
 sio = socketio.Client()
+decoder = TrafficDeltaDecoder()
 
 @sio.event
 def connect():
@@ -18,6 +24,16 @@ def on_traffic(data):
     print("Received client_traffic event:")
     print(json.dumps(data, indent=2))
 
+@sio.on('client_traffic_delta')
+def on_traffic_delta(frame):
+    changed = decoder.apply(frame)
+    if changed is None:
+        print("Delta fuera de secuencia, pidiendo keyframe...")
+        sio.emit('traffic_resync', {'router_id': 1})
+        return
+    print("Received client_traffic_delta event (decoded):")
+    print(json.dumps(changed, indent=2, default=str))
+
 @sio.on('dashboard_traffic_update')
 def on_dashboard(data):
     print("Received dashboard_traffic_update event:")
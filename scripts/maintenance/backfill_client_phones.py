@@ -0,0 +1,34 @@
+"""
+Migración + Backfill: índice de teléfonos normalizados
+Agrega clients.phone_e164 si falta, crea client_phones y la llena desde clients.phone.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from src.infrastructure.database.db_manager import get_db
+from src.infrastructure.database.models import ClientPhone
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate():
+    db = get_db()
+    engine = db.engine
+
+    columns = [c['name'] for c in inspect(engine).get_columns('clients')]
+    if 'phone_e164' not in columns:
+        logger.info("Adding phone_e164 column to clients...")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE clients ADD COLUMN phone_e164 VARCHAR(20)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_clients_phone_e164 ON clients (phone_e164)"))
+    else:
+        logger.info("Column phone_e164 already exists.")
+
+    ClientPhone.__table__.create(bind=engine, checkfirst=True)
+
+    indexed = db.get_client_repository().rebuild_phone_index()
+    logger.info(f"Backfill completed: {indexed} phone numbers indexed.")
+
+if __name__ == "__main__":
+    migrate()
@@ -8,7 +8,7 @@ sys.path.append(os.getcwd())
 from src.infrastructure.database.db_manager import get_db
 from src.infrastructure.database.models import Client
 from src.application.services.report_service import ReportService
-from sqlalchemy import func
+from src.application.services.ip_index import get_network_index
 
 def generate_report():
     print("🚀 Generating IP Conflict Report...")
@@ -16,27 +16,22 @@ def generate_report():
     session = db.session
     
     try:
-        # 1. Find duplicate IPs
-        duplicates = session.query(
-            Client.ip_address, 
-            func.count(Client.ip_address).label('count')
-        ).filter(
-            Client.ip_address != None,
-            Client.ip_address != '',
-            Client.ip_address != 'N/A'
-        ).group_by(
-            Client.ip_address
-        ).having(
-            func.count(Client.ip_address) > 1
-        ).all()
+        # 1. Find duplicate IPs (índice en memoria: una sola carga, conflictos en O(1) por IP)
+        network_index = get_network_index()
+        network_index.rebuild(session)
+        duplicates = network_index.conflicts(statuses=None)
         
         duplicates_data = []
         if duplicates:
             print(f"⚠️ Found {len(duplicates)} duplicate IPs.")
-            for ip, count in duplicates:
-                clients = session.query(Client).filter(Client.ip_address == ip).all()
+            all_ids = [cid for ids in duplicates.values() for cid in ids]
+            clients_by_id = {c.id: c for c in session.query(Client).filter(Client.id.in_(all_ids)).all()}
+            for ip, client_ids in sorted(duplicates.items()):
                 clients_list = []
-                for c in clients:
+                for cid in client_ids:
+                    c = clients_by_id.get(cid)
+                    if not c:
+                        continue
                     clients_list.append({
                         'code': c.subscriber_code,
                         'name': c.legal_name,
@@ -46,7 +41,7 @@ def generate_report():
                 
                 duplicates_data.append({
                     'ip': ip,
-                    'count': count,
+                    'count': len(client_ids),
                     'clients': clients_list
                 })
         else:
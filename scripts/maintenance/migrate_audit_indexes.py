@@ -0,0 +1,23 @@
+"""
+Migración: índices compuestos de audit_logs
+create_all no agrega índices a tablas existentes; este script los crea si faltan.
+"""
+import logging
+
+from src.infrastructure.database.db_manager import get_db
+from src.infrastructure.database.models import AuditLog
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate():
+    engine = get_db().engine
+    for index in AuditLog.__table__.indexes:
+        try:
+            index.create(bind=engine, checkfirst=True)
+            logger.info(f"Index {index.name} OK")
+        except Exception as e:
+            logger.error(f"Error creating index {index.name}: {e}")
+
+if __name__ == "__main__":
+    migrate()
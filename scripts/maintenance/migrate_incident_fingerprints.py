@@ -0,0 +1,41 @@
+"""
+Migración: deduplicación de incidentes del RECICLADOR
+Agrega system_incidents.fingerprint / occurrences / first_seen / last_seen si faltan.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from src.infrastructure.database.db_manager import get_db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NEW_COLUMNS = {
+    'fingerprint': 'VARCHAR(64)',
+    'occurrences': 'INTEGER DEFAULT 1',
+    'first_seen': 'TIMESTAMP',
+    'last_seen': 'TIMESTAMP',
+}
+
+def migrate():
+    engine = get_db().engine
+    columns = [c['name'] for c in inspect(engine).get_columns('system_incidents')]
+
+    with engine.begin() as conn:
+        for name, col_type in NEW_COLUMNS.items():
+            if name in columns:
+                logger.info(f"Column {name} already exists.")
+                continue
+            logger.info(f"Adding {name} column to system_incidents...")
+            conn.execute(text(f"ALTER TABLE system_incidents ADD COLUMN {name} {col_type}"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_system_incidents_fingerprint ON system_incidents (fingerprint)"))
+        # Incidentes previos: una ocurrencia, vista al crearse
+        conn.execute(text(
+            "UPDATE system_incidents SET occurrences = COALESCE(occurrences, 1), "
+            "first_seen = COALESCE(first_seen, created_at), last_seen = COALESCE(last_seen, created_at)"))
+    logger.info("Migration completed.")
+
+if __name__ == "__main__":
+    migrate()
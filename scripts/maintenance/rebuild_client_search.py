@@ -0,0 +1,27 @@
+"""
+Migración: índice de búsqueda de clientes
+Crea el índice (FTS5 en SQLite / pg_trgm en PostgreSQL) y, en SQLite, lo regenera completo.
+Útil en instalaciones con DB_SKIP_CREATE_ALL o tras cargas masivas que no pasan por el ORM.
+"""
+import logging
+
+from src.infrastructure.database.db_manager import get_db
+from src.infrastructure.database.search_index import get_client_search_index
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate():
+    index = get_client_search_index(get_db().engine)
+    if not index.ensure():
+        logger.error("Search index could not be created; client search will keep using ILIKE.")
+        return
+
+    if index.dialect == 'sqlite':
+        indexed = index.rebuild()
+        logger.info(f"Rebuild completed: {indexed} clients indexed.")
+    else:
+        logger.info("pg_trgm expression index is in place.")
+
+if __name__ == "__main__":
+    migrate()
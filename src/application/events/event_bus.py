@@ -12,6 +12,10 @@ Ejemplo de uso:
 from typing import Dict, List, Callable, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass, field
+from collections import deque, OrderedDict
+import asyncio
+import inspect
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,6 +30,87 @@ class Event:
     source_module: str = "unknown"
 
 
+@dataclass
+class DispatchPolicy:
+    """
+    Política de despacho por tipo de evento.
+    mode: 'sync' (en el hilo que publica) | 'async' (cola + hilo propio del evento)
+    overflow (cola llena): 'block' (espera hasta block_timeout y luego descarta),
+    'drop_new', 'drop_oldest' o 'coalesce' (un pendiente por coalesce_key; el nuevo reemplaza al viejo).
+    """
+    mode: str = 'sync'
+    maxsize: int = 1000
+    overflow: str = 'block'
+    coalesce_key: Optional[Callable[[Dict[str, Any]], Any]] = None
+    block_timeout: float = 1.0
+
+
+class _EventWorker:
+    """Cola acotada + hilo dedicado para un tipo de evento asíncrono"""
+
+    def __init__(self, event_name: str, policy: DispatchPolicy, dispatch: Callable[[Event], None]):
+        self.event_name = event_name
+        self.policy = policy
+        self._dispatch = dispatch
+        self._pending: 'OrderedDict[Any, Event]' = OrderedDict()
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.stats = {'queued': 0, 'processed': 0, 'dropped': 0, 'coalesced': 0}
+        self._thread = threading.Thread(target=self._loop, daemon=True, name=f"EventBus-{event_name}")
+        self._thread.start()
+
+    def put(self, event: Event) -> bool:
+        policy = self.policy
+        with self._cond:
+            if policy.overflow == 'coalesce' and policy.coalesce_key:
+                key = ('k', policy.coalesce_key(event.data))
+                if key in self._pending:
+                    self._pending[key] = event  # Conserva la posición, actualiza el contenido
+                    self.stats['coalesced'] += 1
+                    return True
+            else:
+                self._seq += 1
+                key = ('s', self._seq)
+
+            if len(self._pending) >= policy.maxsize:
+                if policy.overflow == 'block':
+                    self._cond.wait_for(lambda: len(self._pending) < policy.maxsize or self._stopped,
+                                        timeout=policy.block_timeout)
+                if len(self._pending) >= policy.maxsize:
+                    if policy.overflow in ('drop_oldest', 'coalesce'):
+                        self._pending.popitem(last=False)
+                        self.stats['dropped'] += 1
+                    else:
+                        self.stats['dropped'] += 1
+                        return False
+
+            self._pending[key] = event
+            self.stats['queued'] += 1
+            self._cond.notify_all()
+            return True
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def stop(self, timeout: float = 2.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopped)
+                if not self._pending:
+                    return
+                _, event = self._pending.popitem(last=False)
+                self._cond.notify_all()
+            self._dispatch(event)
+            self.stats['processed'] += 1
+
+
 class EventBus:
     """
     Implementación del patrón Pub/Sub para comunicación entre módulos
@@ -33,8 +118,12 @@ class EventBus:
     
     def __init__(self):
         self._subscribers: Dict[str, List[Callable]] = {}
-        self._event_history: List[Event] = []
         self._max_history = 1000  # Límite de eventos en historial
+        self._event_history: deque = deque(maxlen=self._max_history)
+        self._policies: Dict[str, DispatchPolicy] = {}
+        self._workers: Dict[str, _EventWorker] = {}
+        self._workers_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
     
     def subscribe(self, event_name: str, handler: Callable) -> None:
         """
@@ -57,6 +146,22 @@ class EventBus:
             if handler in self._subscribers[event_name]:
                 self._subscribers[event_name].remove(handler)
                 logger.info(f"Handler unsubscribed from event: {event_name}")
+
+    def configure(self, event_name: str, mode: str = 'async', maxsize: int = 1000, overflow: str = 'block',
+                  coalesce_key: Optional[Callable[[Dict[str, Any]], Any]] = None, block_timeout: float = 1.0) -> None:
+        """
+        Define cómo se despacha un tipo de evento (ver DispatchPolicy).
+        Los eventos sin configurar se despachan de forma síncrona, como siempre.
+        """
+        self._policies[event_name] = DispatchPolicy(mode, maxsize, overflow, coalesce_key, block_timeout)
+        with self._workers_lock:
+            worker = self._workers.pop(event_name, None)
+        if worker:
+            worker.stop()
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Loop asyncio donde programar handlers async publicados desde hilos"""
+        self._loop = loop
     
     def publish(self, event_name: str, data: Dict[str, Any], source: str = "unknown") -> None:
         """
@@ -69,43 +174,71 @@ class EventBus:
         """
         event = Event(name=event_name, data=data, source_module=source)
         
-        # Guardar en historial
+        # Guardar en historial (deque acotado, O(1))
         self._event_history.append(event)
-        if len(self._event_history) > self._max_history:
-            self._event_history.pop(0)
-        
-        # Notificar a suscriptores
-        if event_name in self._subscribers:
-            for handler in self._subscribers[event_name]:
-                try:
-                    import asyncio
-                    import inspect
-                    
-                    result = handler(event.data)
-                    
-                    # Si el handler devolvió una corrutina (es async), intentar programarla
-                    if inspect.iscoroutine(result):
-                        try:
-                            # Intentar obtener el loop actual (si estamos en el hilo principal)
-                            loop = asyncio.get_event_loop()
-                            if loop.is_running():
-                                loop.create_task(result)
-                            else:
-                                # Si no está corriendo, no podemos hacer mucho aquí sin saber el loop
-                                pass
-                        except RuntimeException:
-                            # Fuera del loop, usar threadsafe si es necesario (avanzado)
-                            pass
-                    
-                    logger.debug(f"Event {event_name} handled successfully")
-                except Exception as e:
-                    logger.error(f"Error handling event {event_name}: {str(e)}")
+
+        if event_name not in self._subscribers:
+            return
+
+        policy = self._policies.get(event_name)
+        if policy and policy.mode == 'async':
+            if not self._get_worker(event_name, policy).put(event):
+                logger.debug(f"Event {event_name} dropped (queue full)")
+            return
+
+        self._dispatch(event)
+
+    def _get_worker(self, event_name: str, policy: DispatchPolicy) -> _EventWorker:
+        worker = self._workers.get(event_name)
+        if worker is None:
+            with self._workers_lock:
+                worker = self._workers.get(event_name)
+                if worker is None:
+                    worker = _EventWorker(event_name, policy, self._dispatch)
+                    self._workers[event_name] = worker
+        return worker
+
+    def _dispatch(self, event: Event) -> None:
+        """Notifica a suscriptores"""
+        for handler in list(self._subscribers.get(event.name, [])):
+            try:
+                result = handler(event.data)
+                
+                # Si el handler devolvió una corrutina (es async), intentar programarla
+                if inspect.iscoroutine(result):
+                    self._schedule_coroutine(result)
+                
+                logger.debug(f"Event {event.name} handled successfully")
+            except Exception as e:
+                logger.error(f"Error handling event {event.name}: {str(e)}")
+
+    def _schedule_coroutine(self, coro) -> None:
+        if self._loop is not None and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+            return
+        try:
+            # Si estamos dentro de un loop en ejecución, programarla ahí
+            asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            # Fuera de cualquier loop y sin loop adjunto: no hay dónde ejecutarla
+            coro.close()
+
+    def get_dispatch_stats(self) -> Dict[str, Dict[str, int]]:
+        """Contadores por evento asíncrono (encolados, procesados, descartados, fusionados, profundidad)"""
+        return {name: dict(w.stats, depth=w.depth()) for name, w in list(self._workers.items())}
+
+    def shutdown(self) -> None:
+        """Detiene los hilos de despacho asíncrono (drenando lo pendiente)"""
+        with self._workers_lock:
+            workers, self._workers = list(self._workers.values()), {}
+        for worker in workers:
+            worker.stop()
     
     def get_history(self, event_name: Optional[str] = None, limit: int = 100) -> List[Event]:
         """Obtiene historial de eventos"""
         if event_name:
             return [e for e in self._event_history if e.name == event_name][-limit:]
-        return self._event_history[-limit:]
+        return list(self._event_history)[-limit:]
     
     def clear_history(self) -> None:
         """Limpia el historial de eventos"""
@@ -161,9 +294,20 @@ from typing import Optional
 _event_bus_instance: Optional[EventBus] = None
 
 
+def _configure_default_policies(bus: EventBus) -> None:
+    """
+    Eventos con suscriptores lentos (Socket.IO, BD) o en ráfagas se despachan fuera
+    del hilo que publica. Los de CRUD de clientes siguen síncronos: el índice de red depende de ellos.
+    """
+    bus.configure(SystemEvents.WHATSAPP_MESSAGE_RECEIVED, maxsize=1000, overflow='block')
+    bus.configure(SystemEvents.WHATSAPP_MESSAGE_SENT, maxsize=1000, overflow='block')
+    bus.configure(SystemEvents.INCIDENT_REPORTED, maxsize=500, overflow='drop_oldest')
+
+
 def get_event_bus() -> EventBus:
     """Retorna la instancia singleton del Event Bus"""
     global _event_bus_instance
     if _event_bus_instance is None:
         _event_bus_instance = EventBus()
+        _configure_default_policies(_event_bus_instance)
     return _event_bus_instance
@@ -1,12 +1,113 @@
+import atexit
 import json
 import logging
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from src.infrastructure.database.db_manager import get_db
 from src.infrastructure.database.models import AuditLog
 
 logger = logging.getLogger(__name__)
 
+
+class AuditBuffer:
+    """
+    Sumidero asíncrono del Kardex.
+    Las entradas se acumulan en memoria y un hilo las vuelca con inserts masivos
+    (vía la cola de escritura) cada flush_interval segundos o al llegar a max_batch.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, max_batch: int = 500):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'written': 0, 'failed': 0}
+
+    def add(self, row: Dict[str, Any]):
+        with self._lock:
+            self._pending.append(row)
+            size = len(self._pending)
+        self._ensure_started()
+        if size >= self.max_batch:
+            self._wake.set()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Vuelca todo lo pendiente. Retorna cuántas entradas se escribieron."""
+        from src.infrastructure.database.write_queue import get_write_queue
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+                if not batch:
+                    break
+                try:
+                    get_write_queue().run(lambda s, rows=batch: s.bulk_insert_mappings(AuditLog, rows))
+                    written += len(batch)
+                except Exception as e:
+                    # Un registro inválido no debe tumbar el lote: reintentar uno por uno
+                    logger.warning(f"⚠️ Audit flush masivo falló ({e}), reintentando por registro")
+                    for row in batch:
+                        try:
+                            get_write_queue().run(lambda s, r=row: s.bulk_insert_mappings(AuditLog, [r]))
+                            written += 1
+                        except Exception as e_row:
+                            self.stats['failed'] += 1
+                            logger.error(f"❌ Entrada de auditoría descartada ({row.get('operation')}): {e_row}")
+        self.stats['written'] += written
+        return written
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="AuditFlusher")
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Error en volcado de auditoría: {e}")
+
+
+_audit_buffer: Optional[AuditBuffer] = None
+_audit_buffer_lock = threading.Lock()
+
+
+def get_audit_buffer() -> AuditBuffer:
+    global _audit_buffer
+    if _audit_buffer is None:
+        with _audit_buffer_lock:
+            if _audit_buffer is None:
+                _audit_buffer = AuditBuffer()
+                atexit.register(_audit_buffer.flush)
+    return _audit_buffer
+
+
+def _current_tenant_id() -> Optional[int]:
+    """tenant_id del request (los inserts masivos no pasan por el evento before_insert)"""
+    try:
+        from flask import g, has_request_context
+        if has_request_context():
+            return getattr(g, 'tenant_id', None)
+    except Exception:
+        pass
+    return None
+
 class AuditService:
     @staticmethod
     def log_action(action_type: str, entity_type: str, entity_id: int, details: str, commit: bool = True):
@@ -36,16 +137,16 @@ class AuditService:
     ):
         """
         Registra un evento en el sistema de Kardex (AuditLog).
+        commit=True: la entrada se encola en el sumidero asíncrono (fuera del request).
+        commit=False: se agrega a la sesión actual para ser atómica con la operación del llamador.
         """
+        session = None
         try:
-            db = get_db()
-            session = db.session
-            
             # Serializar estados si son diccionarios
             prev_json = json.dumps(previous_state) if isinstance(previous_state, dict) else str(previous_state) if previous_state else None
             new_json = json.dumps(new_state) if isinstance(new_state, dict) else str(new_state) if new_state else None
             
-            log_entry = AuditLog(
+            row = dict(
                 category=category,
                 operation=operation,
                 entity_type=entity_type,
@@ -59,7 +160,16 @@ class AuditService:
                 timestamp=datetime.now()
             )
             
-            session.add(log_entry)
+            session = get_db().session
+            # Si el llamador dejó cambios sin confirmar, históricamente este commit los persistía:
+            # se conserva ese comportamiento y sólo se difieren las entradas "limpias".
+            if commit and not (session.new or session.dirty or session.deleted):
+                row['tenant_id'] = _current_tenant_id()
+                get_audit_buffer().add(row)
+                logger.info(f"📝 Audit (QUEUED): {operation} on {entity_type}:{entity_id} - {description}")
+                return True
+
+            session.add(AuditLog(**row))
             if commit:
                 session.commit()
                 logger.info(f"📝 Audit (COMMITTED): {operation} on {entity_type}:{entity_id} - {description}")
@@ -68,11 +178,65 @@ class AuditService:
             return True
         except Exception as e:
             logger.error(f"❌ Error al registrar log de auditoría: {e}")
-            if commit:
+            if commit and session is not None:
                 try: session.rollback()
                 except: pass
             return False
 
+    @staticmethod
+    def query(
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        username: Optional[str] = None,
+        category: Optional[str] = None,
+        operation: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Consulta paginada del Kardex, más reciente primero.
+        Paginación por cursor (timestamp|id) para no degradar con OFFSET en tablas grandes.
+        """
+        from sqlalchemy import and_, or_
+        limit = max(1, min(limit, 500))
+        query = get_db().session.query(AuditLog)
+
+        if entity_type:
+            query = query.filter(AuditLog.entity_type == entity_type)
+        if entity_id is not None:
+            query = query.filter(AuditLog.entity_id == entity_id)
+        if user_id is not None:
+            query = query.filter(AuditLog.user_id == user_id)
+        if username:
+            query = query.filter(AuditLog.username == username)
+        if category:
+            query = query.filter(AuditLog.category == category)
+        if operation:
+            query = query.filter(AuditLog.operation == operation)
+        if start:
+            query = query.filter(AuditLog.timestamp >= start)
+        if end:
+            query = query.filter(AuditLog.timestamp <= end)
+        if cursor:
+            ts_raw, _, id_raw = cursor.rpartition('|')
+            cursor_ts, cursor_id = datetime.fromisoformat(ts_raw), int(id_raw)
+            query = query.filter(or_(
+                AuditLog.timestamp < cursor_ts,
+                and_(AuditLog.timestamp == cursor_ts, AuditLog.id < cursor_id)
+            ))
+
+        rows: List[AuditLog] = query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'items': [r.to_dict() for r in rows],
+            'next_cursor': f"{rows[-1].timestamp.isoformat()}|{rows[-1].id}" if has_more else None,
+            'limit': limit
+        }
+
     @staticmethod
     def log_accounting(operation: str, amount: float, client_id: int, description: str, commit: bool = True, **kwargs):
         """Helper para eventos contables"""
@@ -112,7 +112,7 @@ class AuthService:
         if r_name in admin_roles:
             return True
             
-        logger.info(f"Checking permission: Role={r_name}, Module={module}, Action={action}")
+        logger.debug(f"Checking permission: Role={r_name}, Module={module}, Action={action}")
         
         session = get_db().session
         try:
@@ -317,6 +317,12 @@ def permission_required(module, action='view'):
         return decorated_function
     return decorator
 
+
+def admin_required(f):
+    """
+    Decorador legado para rutas administrativas.
+    Equivale a permission_required('system:users', 'view').
+    """
     return permission_required('system:users', 'view')(f)
 
 # --- DEPENDENCIAS PARA FASTAPI ---
@@ -10,9 +10,12 @@ class AutomationManager:
     """
     Manager para tareas automáticas en segundo plano.
     Maneja el ciclo de facturacion y cortes.
+    Con varios workers (CLUSTER_ENABLED) sólo el líder del cluster ejecuta las tareas.
     """
     _instance = None
     _lock = threading.Lock()
+    TRAFFIC_SNAPSHOT_INTERVAL = 1200 # 20 minutos
+    SNAPSHOT_WORKERS = 5
 
     def __init__(self):
         self.stop_event = threading.Event()
@@ -20,6 +23,7 @@ class AutomationManager:
         self.last_check_date = None
         self.last_traffic_snapshot = 0 # Timestamp
         self.last_integrity_check = 0 # Timestamp
+        self._pulse_engine = None
 
 
     @classmethod
@@ -34,6 +38,8 @@ class AutomationManager:
         if self.thread and self.thread.is_alive():
             return
             
+        from src.infrastructure.cluster.coordinator import get_coordinator
+        get_coordinator().start()
         self.stop_event.clear()
         self.thread = threading.Thread(target=self._run_loop, daemon=True, name="AutomationThread")
         self.thread.start()
@@ -44,19 +50,28 @@ class AutomationManager:
         self.stop_event.set()
         if self.thread:
             self.thread.join(timeout=2)
+        from src.infrastructure.cluster.coordinator import get_coordinator
+        get_coordinator().stop()
 
     def _run_loop(self):
         """Bucle principal de ejecución"""
         # Esperar un poco a que el sistema esté totalmente arriba
         time.sleep(10)
         
+        from src.infrastructure.cluster.coordinator import get_coordinator
+        coordinator = get_coordinator()
+        
         while not self.stop_event.is_set():
             try:
+                if not coordinator.is_leader():
+                    # Otro worker es el líder: facturación y cortes no deben duplicarse
+                    self.stop_event.wait(10)
+                    continue
                 self._check_and_run_tasks()
                 
                 # Snapshot de tráfico cada 20 minutos (1200 seg) PARA HISTOGRAMAS REALES
                 now_ts = time.time()
-                if now_ts - self.last_traffic_snapshot > 1200:
+                if now_ts - self.last_traffic_snapshot > self.TRAFFIC_SNAPSHOT_INTERVAL:
                     logger.info("📊 AutomationManager: Iniciando captura de snapshots de tráfico (Lectura de Bytes)...")
                     self._record_traffic_snapshots()
                     self.last_traffic_snapshot = now_ts
@@ -153,6 +168,9 @@ class AutomationManager:
         from src.infrastructure.database.db_manager import get_db
         from src.infrastructure.mikrotik.adapter import MikroTikAdapter
         from src.application.services.monitoring_manager import MonitoringManager
+        from src.infrastructure.database.models import Client
+        from src.infrastructure.database.repository_registry import TrafficRepository
+        from src.infrastructure.database.write_queue import get_write_queue
         
         from concurrent.futures import ThreadPoolExecutor
         
@@ -165,6 +183,14 @@ class AutomationManager:
             if not online_routers:
                 return
 
+            # Deadline de pulso por router: las olas del pool deben caber en la mitad del periodo
+            if self._pulse_engine is None:
+                from src.application.services.pulse_engine import QualityPulseEngine
+                self._pulse_engine = QualityPulseEngine()
+            pulse_engine = self._pulse_engine
+            waves = -(-len(online_routers) // self.SNAPSHOT_WORKERS)
+            pulse_deadline = min(pulse_engine.round_deadline, (self.TRAFFIC_SNAPSHOT_INTERVAL * 0.5) / waves)
+
             def process_router(router):
                 from src.infrastructure.database.db_manager import get_db as get_local_db
                 local_db = get_local_db()
@@ -172,7 +198,6 @@ class AutomationManager:
                 try:
                     # tenant_id = router.tenant_id
                     client_repo = local_db.get_client_repository()
-                    traffic_repo = local_db.get_traffic_repository()
                     manager = MonitoringManager.get_instance()
                     
                     adapter = MikroTikAdapter()
@@ -187,11 +212,15 @@ class AutomationManager:
                         # 1. Obtener velocidades actuales (bps)
                         traffic_bps = manager.get_router_clients_traffic(router.id, client_ids, adapter)
                         
-                        # 2. Obtener contadores de bytes totales (resiliente)
-                        client_map = {c.id: c.username for c in clients}
+                        # 2. Obtener contadores de bytes totales (resiliente, una lectura por router)
+                        counter_targets = {
+                            c.id: (c.mikrotik_queue_name or c.username,
+                                   c.mikrotik_interface_name or (f"<pppoe-{c.username}>" if c.username else None))
+                            for c in clients
+                        }
                         traffic_bytes = {}
                         try:
-                            traffic_bytes = adapter.get_bulk_interface_stats(list(client_map.values()))
+                            traffic_bytes = adapter.get_bulk_interface_stats(counter_targets)
                         except Exception as e_stats:
                             logger.warning(f"get_bulk_interface_stats failed for {router.alias}: {e_stats}")
                         
@@ -206,16 +235,16 @@ class AutomationManager:
                         pulse_results = {}
                         if pulse_targets:
                             try:
-                                pulse_results = adapter.ping_bulk(pulse_targets, count=5) # 5 muestras para jitter real
+                                pulse_results = pulse_engine.run(router, pulse_targets, primary_adapter=adapter, deadline=pulse_deadline)
                             except Exception as e_ping:
-                                logger.warning(f"ping_bulk failed for {router.alias}: {e_ping}")
+                                logger.warning(f"quality pulse failed for {router.alias}: {e_ping}")
 
+                        snapshot_rows, status_updates = [], []
                         for client in clients:
                             cid = client.id
-                            user = client.username
                             # TrafficSurgicalEngine usa enteros como llaves, no strings.
                             info_bps = traffic_bps.get(cid, {})
-                            info_bytes = traffic_bytes.get(user, {})
+                            info_bytes = traffic_bytes.get(cid, {})
                             target_ip = info_bps.get('ip') or client.ip_address
                             
                             # Datos base del ping (Default: Marcar como no medido/error)
@@ -259,7 +288,7 @@ class AutomationManager:
                                 
                             lhi = max(0, min(100, lhi))
 
-                            traffic_repo.add_snapshot({
+                            snapshot_rows.append({
                                 'client_id': cid,
                                 'download_bps': float(info_bps.get('download', 0)),
                                 'upload_bps': float(info_bps.get('upload', 0)),
@@ -273,20 +302,29 @@ class AutomationManager:
                                 'timestamp': datetime.now()
                             })
 
-                            # Actualizar estado is_online en el objeto cliente para el Dashboard
+                            # Actualizar estado is_online del cliente para el Dashboard
                             if client.is_online != is_online_traffic:
-                                client.is_online = is_online_traffic
-                                client.last_seen = datetime.now() if is_online_traffic else client.last_seen
+                                update = {'id': cid, 'is_online': is_online_traffic}
+                                if is_online_traffic:
+                                    update['last_seen'] = datetime.now()
+                                status_updates.append(update)
                         
-                        local_db.session.commit()
                         adapter.disconnect()
+                        local_db.session.rollback()
+
+                        # Una sola unidad de escritura por router (insert masivo + estados)
+                        def persist(ws, rows=snapshot_rows, updates=status_updates):
+                            TrafficRepository(ws).add_snapshots_bulk(rows, commit=False)
+                            if updates:
+                                ws.bulk_update_mappings(Client, updates)
+                        get_write_queue().submit(persist)
                 except Exception as e_proc:
                     logger.error(f"Error processing router {router.alias}: {e_proc}")
                 finally:
                     local_db.remove_session()
 
             # Execute in parallel
-            with ThreadPoolExecutor(max_workers=5) as executor:
+            with ThreadPoolExecutor(max_workers=self.SNAPSHOT_WORKERS) as executor:
                 executor.map(process_router, online_routers)
                 
         except Exception as e:
@@ -340,9 +378,11 @@ class AutomationManager:
                 logger.warning(f"⚠️ Auditoría: Detectados {mismatched} clientes activos con deuda pendiente.")
                 
             # 3. Detectar IPs duplicadas activas
-            dup_ips = session.query(Client.ip_address).filter(
-                Client.status == 'active'
-            ).group_by(Client.ip_address).having(func.count(Client.id) > 1).all()
+            # Recarga el índice (corrige deriva de rutas masivas sin eventos) y consulta conflictos en O(1) por IP
+            from src.application.services.ip_index import get_network_index
+            network_index = get_network_index()
+            network_index.rebuild(session)
+            dup_ips = network_index.conflicts(statuses=('active',))
             
             if dup_ips:
                 logger.warning(f"⚠️ Auditoría: Detectadas {len(dup_ips)} IPs duplicadas en clientes activos.")
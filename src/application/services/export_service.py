@@ -0,0 +1,255 @@
+"""
+Export Service
+Exportaciones en streaming (CSV, Excel, PDF) con memoria constante.
+Las filas llegan como iterador (ver engine_profiles.stream_query) y se escriben
+a medida que se leen: CSV sale por bloques desde la primera fila; XLSX y PDF se
+escriben fila a fila / página a página a un archivo temporal que luego se envía por partes.
+"""
+import csv
+import io
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 500              # Filas por bloque CSV
+FILE_CHUNK_SIZE = 64 * 1024   # Bytes por bloque al enviar archivos temporales
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIMETYPE = "text/csv; charset=utf-8"
+PDF_MIMETYPE = "application/pdf"
+
+
+@dataclass
+class ExportColumn:
+    """Columna de exportación: título, ancho (caracteres en XLSX / pulgadas en PDF) y formato opcional"""
+    title: str
+    width: Optional[float] = None
+    fmt: Optional[str] = None   # 'money' | 'datetime'
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence[Any]], chunk_rows: int = CHUNK_ROWS,
+             bom: bool = True) -> Iterator[bytes]:
+    """
+    Genera el CSV por bloques de chunk_rows filas.
+    El BOM (utf-8-sig) va sólo en el primer bloque para que Excel reconozca los acentos.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(header)
+    pending = 0
+    first = True
+
+    def flush() -> bytes:
+        nonlocal first
+        data = buffer.getvalue().encode('utf-8-sig' if first and bom else 'utf-8')
+        first = False
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield flush()
+            pending = 0
+    yield flush()
+
+
+def iter_file(path: str, chunk_size: int = FILE_CHUNK_SIZE, remove: bool = True) -> Iterator[bytes]:
+    """Envía un archivo por bloques y lo elimina al terminar (o si el cliente corta la descarga)"""
+    try:
+        with open(path, 'rb') as fh:
+            while True:
+                chunk = fh.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _temp_path(suffix: str) -> str:
+    fd, path = tempfile.mkstemp(prefix='sgubm_export_', suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def write_xlsx(path: str, sheet_name: str, columns: List[ExportColumn], rows: Iterable[Sequence[Any]],
+               header_color: str = '#6366f1') -> int:
+    """
+    Escribe el XLSX en modo constant_memory de XlsxWriter: cada fila se vuelca a disco
+    al pasar a la siguiente, así que la memoria no depende del número de filas.
+    Retorna la cantidad de filas escritas.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'remove_timezone': True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({'bold': True, 'bg_color': header_color, 'font_color': 'white', 'border': 1})
+        formats = {
+            'money': workbook.add_format({'num_format': '$#,##0.00'}),
+            'datetime': workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm'}),
+        }
+        col_formats = [formats.get(col.fmt) for col in columns]
+
+        # Los anchos deben fijarse antes de escribir filas en constant_memory
+        for idx, col in enumerate(columns):
+            if col.width or col.fmt:
+                worksheet.set_column(idx, idx, col.width or 15, col_formats[idx])
+        for idx, col in enumerate(columns):
+            worksheet.write(0, idx, col.title, header_format)
+
+        count = 0
+        for count, row in enumerate(rows, 1):
+            for idx, value in enumerate(row):
+                if isinstance(value, datetime):
+                    worksheet.write_datetime(count, idx, value, col_formats[idx] or formats['datetime'])
+                else:
+                    worksheet.write(count, idx, value, col_formats[idx])
+        return count
+    finally:
+        workbook.close()
+
+
+def iter_xlsx(sheet_name: str, columns: List[ExportColumn], rows: Iterable[Sequence[Any]],
+              header_color: str = '#6366f1') -> Iterator[bytes]:
+    """XLSX en streaming: se genera en un archivo temporal y se envía por bloques"""
+    path = _temp_path('.xlsx')
+    try:
+        write_xlsx(path, sheet_name, columns, rows, header_color)
+    except BaseException:
+        os.remove(path)
+        raise
+    yield from iter_file(path)
+
+
+def write_pdf_table(path: str, title: str, columns: List[ExportColumn], rows: Iterable[Sequence[Any]],
+                    header_color: str = '#6366f1', landscape_mode: bool = True,
+                    total_row: Optional[Callable[[], Sequence[Any]]] = None,
+                    footer_text: str = "SGUBM Premium Billing") -> int:
+    """
+    Tabla PDF paginada de forma progresiva: cada página arma su propia Table con un
+    número fijo de filas, se dibuja y se descarta (no se acumula la lista de flowables
+    de todo el reporte). total_row se evalúa al agotar las filas (acumuladores del llamador).
+    Retorna la cantidad de filas escritas.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas as pdf_canvas
+    from reportlab.platypus import Table, TableStyle
+
+    pagesize = landscape(letter) if landscape_mode else letter
+    width, height = pagesize
+    margin = 30
+    row_height = 16
+    title_height = 40
+    col_widths = [(col.width or 1.0) * inch for col in columns]
+    max_chars = [max(4, int(w / 5.5)) for w in col_widths]   # ~5.5pt por carácter en Helvetica 8
+    rows_per_page = int((height - 2 * margin - title_height - 20) // row_height) - 1
+
+    style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
+    ])
+    header = [col.title for col in columns]
+    generated = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+
+    def cell(value, idx):
+        if value is None:
+            return '---'
+        fmt = columns[idx].fmt
+        if fmt == 'money' and isinstance(value, (int, float)):
+            text = f"${value:,.2f}"
+        elif isinstance(value, datetime):
+            text = value.strftime('%d/%m/%Y %H:%M')
+        else:
+            text = str(value)
+        return text if len(text) <= max_chars[idx] else text[:max_chars[idx] - 3] + '...'
+
+    c = pdf_canvas.Canvas(path, pagesize=pagesize, pageCompression=1)
+    page_no = 0
+
+    def draw_page(body, is_last):
+        nonlocal page_no
+        page_no += 1
+        c.setFont('Helvetica-Bold', 14 if page_no == 1 else 10)
+        c.drawCentredString(width / 2, height - margin - 14, title if page_no == 1 else f"{title} (cont.)")
+        data = [header] + body
+        table_style = style
+        if is_last and total_row:
+            data.append([cell(v, i) if v not in ('', None) else '' for i, v in enumerate(total_row())])
+            table_style = TableStyle(style.getCommands() + [('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold')])
+        table = Table(data, colWidths=col_widths, rowHeights=row_height)
+        table.setStyle(table_style)
+        _, table_height = table.wrapOn(c, width - 2 * margin, height)
+        table.drawOn(c, (width - sum(col_widths)) / 2, height - margin - title_height - table_height)
+        c.setFont('Helvetica', 7)
+        c.drawCentredString(width / 2, margin / 2, f"Generado el {generated} - {footer_text} - Página {page_no}")
+        c.showPage()
+
+    count = 0
+    body: List[List[str]] = []
+    for row in rows:
+        count += 1
+        body.append([cell(v, i) for i, v in enumerate(row)])
+        if len(body) >= rows_per_page:
+            draw_page(body, False)
+            body = []
+    draw_page(body, True)
+    c.save()
+    return count
+
+
+def iter_pdf_table(title: str, columns: List[ExportColumn], rows: Iterable[Sequence[Any]], **kwargs) -> Iterator[bytes]:
+    """PDF en streaming: páginas escritas de forma progresiva a un temporal, luego enviado por bloques"""
+    path = _temp_path('.pdf')
+    try:
+        write_pdf_table(path, title, columns, rows, **kwargs)
+    except BaseException:
+        os.remove(path)
+        raise
+    yield from iter_file(path)
+
+
+def streaming_response(chunks: Iterator[bytes], filename: str, mimetype: str):
+    """
+    Respuesta Flask por partes; conserva el contexto del request (sesión y tenant) mientras se genera.
+    El primer bloque se produce aquí, antes de enviar encabezados: XLSX y PDF se escriben completos
+    en ese paso (y CSV ejecuta su consulta), así que un fallo llega al try/except del controlador
+    y puede responder un error. Un fallo posterior sólo puede registrarse y cortar la descarga.
+    """
+    from flask import Response, stream_with_context
+
+    chunks = iter(chunks)
+    first = next(chunks, b'')
+
+    def body() -> Iterator[bytes]:
+        yield first
+        try:
+            yield from chunks
+        except Exception as e:
+            logger.error(f"❌ Exportación {filename} interrumpida: {e}")
+            raise   # La respuesta queda incompleta: el navegador marca la descarga como fallida
+
+    response = Response(stream_with_context(body()), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    response.headers["X-Accel-Buffering"] = "no"   # Evita que nginx acumule la respuesta completa
+    return response
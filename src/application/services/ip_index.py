@@ -0,0 +1,418 @@
+"""
+IP Index
+Índice en memoria de Segmentos de Red (trie de prefijos) y de IPs de clientes.
+Reemplaza los escaneos lineales sobre listas de ip_network y los GROUP BY de auditoría.
+"""
+import logging
+import threading
+from ipaddress import ip_address, ip_network, IPv4Address, IPv6Address, IPv4Network, IPv6Network
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+IPLike = Union[str, IPv4Address, IPv6Address]
+NetworkLike = Union[str, IPv4Network, IPv6Network]
+
+# Valores de IP que el sistema guarda como "sin IP"
+_EMPTY_IPS = {'', 'n/a', 'none', '0.0.0.0'}
+
+
+def normalize_ip(value: Optional[str]) -> Optional[str]:
+    """Devuelve la IP canónica (sin máscara) o None si el valor no es una IP utilizable."""
+    if not value:
+        return None
+    clean = str(value).strip().split('/')[0]
+    if clean.lower() in _EMPTY_IPS:
+        return None
+    try:
+        return str(ip_address(clean))
+    except ValueError:
+        return None
+
+
+class _Node:
+    __slots__ = ('children', 'network', 'value', 'count')
+
+    def __init__(self):
+        self.children: List[Optional['_Node']] = [None, None]
+        self.network = None  # Prefijo almacenado en este nodo (si existe)
+        self.value: Any = None
+        self.count = 0       # Prefijos almacenados en todo el subárbol
+
+
+class PrefixTrie:
+    """
+    Trie binario de prefijos CIDR (IPv4 e IPv6).
+    Las búsquedas recorren como máximo 32/128 bits, independientemente del número de segmentos.
+    """
+
+    def __init__(self):
+        self._roots = {4: _Node(), 6: _Node()}
+
+    @classmethod
+    def from_networks(cls, networks: Iterable[NetworkLike]) -> 'PrefixTrie':
+        """Construye un trie a partir de CIDRs; los inválidos se ignoran con advertencia."""
+        trie = cls()
+        for net in networks:
+            try:
+                trie.insert(net)
+            except ValueError as e:
+                logger.warning(f"Segmento inválido ignorado en índice: {net} - {e}")
+        return trie
+
+    def __len__(self) -> int:
+        return self._roots[4].count + self._roots[6].count
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __contains__(self, ip: IPLike) -> bool:
+        return self.longest_match(ip) is not None
+
+    @staticmethod
+    def _bits(addr_int: int, max_bits: int, length: int):
+        for i in range(length):
+            yield (addr_int >> (max_bits - 1 - i)) & 1
+
+    def insert(self, network: NetworkLike, value: Any = None) -> None:
+        """Inserta (o reemplaza) un prefijo con su valor asociado."""
+        net = ip_network(network, strict=False) if isinstance(network, str) else network
+        path = [self._roots[net.version]]
+        node = path[0]
+        for bit in self._bits(int(net.network_address), net.max_prefixlen, net.prefixlen):
+            if node.children[bit] is None:
+                node.children[bit] = _Node()
+            node = node.children[bit]
+            path.append(node)
+
+        is_new = node.network is None
+        node.network = net
+        node.value = value
+        if is_new:
+            for n in path:
+                n.count += 1
+
+    def remove(self, network: NetworkLike) -> bool:
+        """Elimina un prefijo. Retorna False si no existía."""
+        net = ip_network(network, strict=False) if isinstance(network, str) else network
+        path = [self._roots[net.version]]
+        node = path[0]
+        for bit in self._bits(int(net.network_address), net.max_prefixlen, net.prefixlen):
+            node = node.children[bit]
+            if node is None:
+                return False
+            path.append(node)
+
+        if node.network is None:
+            return False
+        node.network = None
+        node.value = None
+        for n in path:
+            n.count -= 1
+        return True
+
+    def matches(self, ip: IPLike) -> List[Tuple[Any, Any]]:
+        """Todos los prefijos que contienen la IP, del más general al más específico."""
+        try:
+            addr = ip_address(ip.split('/')[0].strip()) if isinstance(ip, str) else ip
+        except ValueError:
+            return []
+
+        node = self._roots[addr.version]
+        found = []
+        if node.network is not None:
+            found.append((node.network, node.value))
+        for bit in self._bits(int(addr), addr.max_prefixlen, addr.max_prefixlen):
+            node = node.children[bit]
+            if node is None or node.count == 0:
+                break
+            if node.network is not None:
+                found.append((node.network, node.value))
+        return found
+
+    def longest_match(self, ip: IPLike) -> Optional[Tuple[Any, Any]]:
+        """Prefijo más específico que contiene la IP, o None."""
+        found = self.matches(ip)
+        return found[-1] if found else None
+
+    def overlaps(self, network: NetworkLike) -> bool:
+        """True si algún prefijo almacenado contiene o está contenido en la red dada."""
+        try:
+            net = ip_network(network, strict=False) if isinstance(network, str) else network
+        except ValueError:
+            return False
+
+        node = self._roots[net.version]
+        if node.network is not None:
+            return True
+        for bit in self._bits(int(net.network_address), net.max_prefixlen, net.prefixlen):
+            node = node.children[bit]
+            if node is None:
+                return False
+            if node.network is not None:
+                return True
+        # Prefijos más específicos dentro de la red consultada
+        return node.count > 0
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        """Lista todos los prefijos almacenados."""
+        result = []
+        stack = [self._roots[4], self._roots[6]]
+        while stack:
+            node = stack.pop()
+            if node.count == 0:
+                continue
+            if node.network is not None:
+                result.append((node.network, node.value))
+            stack.extend(c for c in node.children if c is not None)
+        return result
+
+
+class ClientIPIndex:
+    """
+    Índice IP -> clientes con conjunto de conflictos mantenido incrementalmente.
+    Las consultas de dueño y de conflicto por dirección son O(1).
+    """
+
+    def __init__(self):
+        self._by_ip: Dict[str, Dict[int, Tuple[Optional[int], Optional[str]]]] = {}
+        self._by_client: Dict[int, str] = {}
+        self._conflicted: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._by_client)
+
+    def clear(self) -> None:
+        self._by_ip.clear()
+        self._by_client.clear()
+        self._conflicted.clear()
+
+    def upsert(self, client_id: int, ip: Optional[str], router_id: Optional[int] = None, status: Optional[str] = None) -> None:
+        """Registra o actualiza la IP de un cliente. Una IP vacía lo retira del índice."""
+        self.remove(client_id)
+        clean = normalize_ip(ip)
+        if not clean:
+            return
+        owners = self._by_ip.setdefault(clean, {})
+        owners[client_id] = (router_id, (status or '').lower() or None)
+        self._by_client[client_id] = clean
+        if len(owners) > 1:
+            self._conflicted.add(clean)
+
+    def remove(self, client_id: int) -> None:
+        ip = self._by_client.pop(client_id, None)
+        if ip is None:
+            return
+        owners = self._by_ip.get(ip, {})
+        owners.pop(client_id, None)
+        if not owners:
+            self._by_ip.pop(ip, None)
+        if len(owners) <= 1:
+            self._conflicted.discard(ip)
+
+    def ip_of(self, client_id: int) -> Optional[str]:
+        return self._by_client.get(client_id)
+
+    def owners(self, ip: str, router_id: Optional[int] = None,
+               exclude_statuses: Iterable[str] = ('deleted',)) -> List[int]:
+        """IDs de clientes que tienen asignada la IP (opcionalmente en un router)."""
+        clean = normalize_ip(ip)
+        if not clean:
+            return []
+        excluded = set(exclude_statuses or ())
+        return [
+            cid for cid, (rid, status) in self._by_ip.get(clean, {}).items()
+            if (router_id is None or rid == router_id) and status not in excluded
+        ]
+
+    def conflicts(self, statuses: Optional[Iterable[str]] = None, per_router: bool = False) -> Dict[Any, List[int]]:
+        """
+        IPs asignadas a más de un cliente.
+        Con per_router=True las claves son (router_id, ip) y sólo cuentan choques dentro del mismo router.
+        """
+        wanted = set(s.lower() for s in statuses) if statuses else None
+        result: Dict[Any, List[int]] = {}
+        for ip in self._conflicted:
+            groups: Dict[Any, List[int]] = {}
+            for cid, (rid, status) in self._by_ip[ip].items():
+                if wanted is not None and status not in wanted:
+                    continue
+                groups.setdefault((rid, ip) if per_router else ip, []).append(cid)
+            for key, ids in groups.items():
+                if len(ids) > 1:
+                    result[key] = sorted(ids)
+        return result
+
+
+class NetworkIndex:
+    """
+    Índice global de red: segmentos por router + IPs de clientes.
+    Se carga perezosamente desde la BD y se mantiene al día con los eventos de cliente.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._segments: Dict[Optional[int], PrefixTrie] = {}
+        self.clients = ClientIPIndex()
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    # --- Carga desde Base de Datos ---
+
+    def rebuild(self, session=None) -> None:
+        """Recarga segmentos y clientes con dos SELECT de columnas."""
+        from sqlalchemy import select
+        from src.infrastructure.database.models import Client, NetworkSegment
+
+        own_session = session is None
+        if own_session:
+            from src.infrastructure.database.db_manager import get_db
+            session = get_db().session_factory()
+        try:
+            # select() de Core: no pasa por el filtro multi-tenant de Query, el índice es global
+            segment_rows = session.execute(
+                select(NetworkSegment.id, NetworkSegment.name, NetworkSegment.cidr, NetworkSegment.router_id)
+            ).all()
+            client_rows = session.execute(
+                select(Client.id, Client.ip_address, Client.router_id, Client.status)
+            ).all()
+        finally:
+            if own_session:
+                session.close()
+
+        segments: Dict[Optional[int], PrefixTrie] = {}
+        for seg_id, name, cidr, router_id in segment_rows:
+            try:
+                segments.setdefault(router_id, PrefixTrie()).insert(
+                    cidr, {'id': seg_id, 'name': name, 'cidr': cidr, 'router_id': router_id}
+                )
+            except ValueError as e:
+                logger.warning(f"Segmento inválido en BD: {cidr} - {e}")
+
+        clients = ClientIPIndex()
+        for cid, ip, router_id, status in client_rows:
+            clients.upsert(cid, ip, router_id, status)
+
+        with self._lock:
+            self._segments = segments
+            self.clients = clients
+            self._loaded = True
+        logger.info(f"🌐 NetworkIndex: {sum(len(t) for t in segments.values())} segmentos, {len(clients)} IPs de clientes indexadas")
+
+    def ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.rebuild()
+
+    def refresh_client(self, client_id: int, session=None) -> None:
+        """Relee un único cliente por PK y actualiza su entrada."""
+        from sqlalchemy import select
+        from src.infrastructure.database.models import Client
+
+        own_session = session is None
+        if own_session:
+            from src.infrastructure.database.db_manager import get_db
+            session = get_db().session_factory()
+        try:
+            row = session.execute(
+                select(Client.ip_address, Client.router_id, Client.status).where(Client.id == client_id)
+            ).first()
+        finally:
+            if own_session:
+                session.close()
+
+        with self._lock:
+            if row is None:
+                self.clients.remove(client_id)
+            else:
+                self.clients.upsert(client_id, row[0], row[1], row[2])
+
+    # --- Mantenimiento por eventos ---
+
+    def register_event_handlers(self, event_bus) -> None:
+        from src.application.events.event_bus import SystemEvents
+        event_bus.subscribe(SystemEvents.CLIENT_CREATED, self._on_client_changed)
+        event_bus.subscribe(SystemEvents.CLIENT_UPDATED, self._on_client_changed)
+        event_bus.subscribe(SystemEvents.CLIENT_DELETED, self._on_client_deleted)
+
+    def _on_client_changed(self, data: Dict[str, Any]) -> None:
+        if not self._loaded:
+            return  # Se cargará completo en el primer uso
+        client_id = data.get('client_id')
+        if client_id is None:
+            return
+        if 'ip_address' in data:
+            with self._lock:
+                self.clients.upsert(int(client_id), data.get('ip_address'), data.get('router_id'), data.get('status'))
+        else:
+            self.refresh_client(int(client_id))
+
+    def _on_client_deleted(self, data: Dict[str, Any]) -> None:
+        client_id = data.get('client_id')
+        if client_id is not None:
+            with self._lock:
+                self.clients.remove(int(client_id))
+
+    def set_router_segments(self, router_id: Optional[int], segments: Iterable[Any]) -> PrefixTrie:
+        """Reemplaza los segmentos de un router (objetos NetworkSegment o dicts con 'cidr')."""
+        trie = PrefixTrie()
+        for s in segments:
+            cidr = s.get('cidr') if isinstance(s, dict) else s.cidr
+            payload = s if isinstance(s, dict) else {'id': s.id, 'name': s.name, 'cidr': s.cidr, 'router_id': s.router_id}
+            try:
+                trie.insert(cidr, payload)
+            except ValueError as e:
+                logger.warning(f"Segmento inválido en BD: {cidr} - {e}")
+        with self._lock:
+            self._segments[router_id] = trie
+        return trie
+
+    # --- Consultas ---
+
+    def router_segments(self, router_id: Optional[int]) -> PrefixTrie:
+        self.ensure_loaded()
+        return self._segments.get(router_id) or PrefixTrie()
+
+    def segment_for(self, ip: str, router_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Segmento más específico que contiene la IP (en un router o en toda la red)."""
+        self.ensure_loaded()
+        tries = [self._segments.get(router_id)] if router_id is not None else list(self._segments.values())
+        best = None
+        for trie in tries:
+            if not trie:
+                continue
+            match = trie.longest_match(ip)
+            if match and (best is None or match[0].prefixlen > best[0].prefixlen):
+                best = match
+        return best[1] if best else None
+
+    def owner_of(self, ip: str, router_id: Optional[int] = None,
+                 exclude_client_id: Optional[int] = None) -> Optional[int]:
+        """
+        Primer cliente (no eliminado) que usa la IP, excluyendo opcionalmente a uno.
+        Orientativo: es una copia por proceso que algunas escrituras masivas no actualizan.
+        Las validaciones de escritura usan ClientRepository.find_ip_owner.
+        """
+        self.ensure_loaded()
+        for cid in self.clients.owners(ip, router_id=router_id):
+            if cid != exclude_client_id:
+                return cid
+        return None
+
+    def conflicts(self, statuses: Optional[Iterable[str]] = ('active',), per_router: bool = False) -> Dict[Any, List[int]]:
+        self.ensure_loaded()
+        with self._lock:
+            return self.clients.conflicts(statuses=statuses, per_router=per_router)
+
+
+_network_index: Optional[NetworkIndex] = None
+
+
+def get_network_index() -> NetworkIndex:
+    """Retorna la instancia singleton del índice de red"""
+    global _network_index
+    if _network_index is None:
+        _network_index = NetworkIndex()
+    return _network_index
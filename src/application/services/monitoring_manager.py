@@ -15,10 +15,23 @@ from typing import Dict, List, Any, Optional, Set
 from src.application.services.traffic_engine import TrafficSurgicalEngine
 from src.application.services.monitoring_utils import MikroTikTimeParser
 from src.application.services.status_resolver import StatusResolver
+from src.application.services.traffic_delta import TrafficDeltaEncoder, msgpack_available, pack_frame
 from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+from src.application.events.event_bus import get_event_bus
+from src.infrastructure.observability.metrics import get_metrics
+from src.infrastructure.cluster.coordinator import get_coordinator
 
 logger = logging.getLogger(__name__)
 
+MONITOR_INTERVAL = 1.5  # Pausa entre iteraciones del ciclo rápido (segundos)
+
+LOOP_LAG = get_metrics().gauge(
+    'sgubm_monitor_loop_lag_seconds', 'Retraso del ciclo de monitoreo sobre su intervalo nominal', ('router',))
+LOOP_DURATION = get_metrics().gauge(
+    'sgubm_monitor_loop_duration_seconds', 'Duración de la última iteración del ciclo de monitoreo', ('router',))
+SOCKET_EMITS = get_metrics().counter(
+    'sgubm_socketio_emits_total', 'Eventos Socket.IO emitidos desde el monitoreo', ('event',))
+
 class MonitoringManager:
     _instance = None
     _lock = threading.Lock()
@@ -35,12 +48,20 @@ class MonitoringManager:
         self.last_db_sync: Dict[int, float] = {} # {router_id: last_sync_timestamp}
         self.last_name_sync: Dict[int, float] = {} # {router_id: last_sync_timestamp}
         self.client_metadata_cache = {}
-        self.last_emitted_data: Dict[int, Dict] = {} # {router_id: {client_id: last_data}}
+        self.last_emitted_data: Dict[int, Dict] = {} # {router_id: {client_id: last_data}} (protocolo json)
+        self.traffic_encoders: Dict[int, TrafficDeltaEncoder] = {} # {router_id: stream delta}
+        self._traffic_options: Optional[Dict[str, Any]] = None
         self.global_traffic = {'tx': 0, 'rx': 0}
         self.socketio: Optional[Any] = None
         self._active_syncs: Set[int] = set() # {router_id} para evitar hilos de sync duplicados
         self._sync_lock = threading.Lock()
         self.loop = None
+        # Cluster: routers que pidió este worker pero monitorea otro, y los pedidos por suscriptores
+        self.remote_routers: Set[int] = set()
+        self.demanded_routers: Set[int] = set()
+        # Lo que piden otros workers de los routers propios, aparte de las suscripciones locales:
+        # {router_id: {worker: {'interfaces': set, 'clients': set}}}, recalculado en cada rebalanceo
+        self.remote_demand: Dict[int, Dict[str, Dict[str, set]]] = {}
 
     @classmethod
     def get_instance(cls):
@@ -55,6 +76,8 @@ class MonitoringManager:
             self.loop = asyncio.get_running_loop()
         except RuntimeError:
             self.loop = asyncio.get_event_loop()
+        # Los handlers async del Event Bus (websocket_events) se programan en este mismo loop
+        get_event_bus().attach_loop(self.loop)
         logger.info(f"MonitoringManager: AsyncServer injected and loop captured: {self.loop}")
 
     def _safe_emit(self, event, data, room=None):
@@ -62,6 +85,7 @@ class MonitoringManager:
         if not hasattr(self, 'sio') or not self.sio:
             return
             
+        SOCKET_EMITS.inc(event=event)
         try:
             if room:
                 asyncio.run_coroutine_threadsafe(self.sio.emit(event, data, room=room), self.loop)
@@ -70,8 +94,23 @@ class MonitoringManager:
         except Exception as e:
             logger.error(f"Error in _safe_emit ({event}): {e}")
 
-    def start_router_monitoring(self, router_id: int):
-        """Starts a dedicated thread for monitoring a specific router"""
+    def start_router_monitoring(self, router_id: int, demand: bool = True):
+        """
+        Starts a dedicated thread for monitoring a specific router.
+        Con varios workers sólo el dueño del router (hashing consistente) lo monitorea; el resto
+        publica su interés (demand=True: hay suscriptores locales) y recibe los emits por la cola.
+        """
+        if demand:
+            self.demanded_routers.add(router_id)
+        coordinator = get_coordinator()
+        if coordinator.enabled:
+            coordinator.add_interest_provider(self._cluster_interests)
+            coordinator.add_listener(self._on_cluster_rebalance)
+            if not coordinator.owns(router_id):
+                self.remote_routers.add(router_id)
+                return
+            self.remote_routers.discard(router_id)
+
         if router_id in self.router_threads and self.router_threads[router_id].is_alive():
             return
 
@@ -99,6 +138,66 @@ class MonitoringManager:
             del self.router_threads[router_id]
         if router_id in self.router_sessions:
             del self.router_sessions[router_id]
+        self.traffic_encoders.pop(router_id, None)
+        self.last_emitted_data.pop(router_id, None)
+
+    def _cluster_interests(self) -> Dict[str, Dict[str, Any]]:
+        """Routers con suscriptores en este worker que pertenecen a otro (ver ClusterCoordinator)"""
+        return {
+            f"router:{rid}": {
+                'router_id': rid,
+                'interfaces': sorted(self.monitored_interfaces.get(rid, ())),
+                'clients': sorted(self.monitored_clients.get(rid, ())),
+            }
+            for rid in list(self.demanded_routers) if rid in self.remote_routers
+        }
+
+    def _on_cluster_rebalance(self, coordinator):
+        """Cambió el conjunto de workers o de intereses: soltar routers ajenos y tomar los propios"""
+        for router_id in list(self.router_threads):
+            if not coordinator.owns(router_id):
+                logger.info(f"🔀 Router {router_id} reasignado a {coordinator.owner_of(router_id)}; deteniendo monitoreo local")
+                self.stop_router_monitoring(router_id)
+                self.remote_routers.add(router_id)
+
+        for router_id in list(self.remote_routers):
+            if coordinator.owns(router_id):
+                logger.info(f"🔀 Router {router_id} asignado a este worker; iniciando monitoreo")
+                self.start_router_monitoring(router_id, demand=False)
+
+        demand: Dict[int, Dict[str, Dict[str, set]]] = {}
+        for key, by_worker in coordinator.interests_by_worker().items():
+            if not key.startswith('router:'):
+                continue
+            router_id = int(key.split(':', 1)[1])
+            if not coordinator.owns(router_id):
+                continue
+            demand[router_id] = {
+                worker: {'interfaces': set(entry.get('interfaces') or ()), 'clients': set(entry.get('clients') or ())}
+                for worker, entry in by_worker.items() if worker != coordinator.worker_id
+            }
+        # Reemplazo completo: lo que otro worker dejó de pedir (o el worker que murió) desaparece aquí
+        self.remote_demand = demand
+        for router_id in demand:
+            self.start_router_monitoring(router_id, demand=False)
+
+    def release_router_demand(self, router_id: int):
+        """Ya no quedan suscriptores locales del router: dejar de publicar el interés al dueño"""
+        self.demanded_routers.discard(router_id)
+
+    def _interfaces_of(self, router_id: int) -> List[str]:
+        """Interfaces a consultar: suscripciones locales más las pedidas por otros workers"""
+        wanted = set(self.monitored_interfaces.get(router_id, ()))
+        for entry in self.remote_demand.get(router_id, {}).values():
+            wanted |= entry['interfaces']
+        return sorted(wanted)
+
+    def _clients_of(self, router_id: int) -> List[int]:
+        """Clientes a consultar: suscripciones locales más los pedidos por otros workers"""
+        wanted = set(self.monitored_clients.get(router_id, ()))
+        for entry in self.remote_demand.get(router_id, {}).values():
+            wanted |= entry['clients']
+        return sorted(wanted)
 
     def get_active_session(self, router_id: int) -> Optional[MikroTikAdapter]:
         """Returns an active MikroTikAdapter session if available and connected"""
@@ -110,6 +209,7 @@ class MonitoringManager:
     def start_dashboard_monitoring(self):
         """Ensures all routers with dashboard interfaces are being monitored"""
         from src.infrastructure.database.models import Router
+        from src.infrastructure.database.db_manager import get_db
         import json
         
         db = get_db()
@@ -129,7 +229,7 @@ class MonitoringManager:
                             for iface in dashboard_ifaces:
                                 self.add_monitored_interface(router.id, iface)
                     
-                    self.start_router_monitoring(router.id)
+                    self.start_router_monitoring(router.id, demand=False)
                 except Exception as e:
                     logger.error(f"Error starting proactive monitoring for router {router.id}: {e}")
 
@@ -180,151 +280,208 @@ class MonitoringManager:
             self.router_sessions[router_id] = adapter
             
             # 3. Fast monitoring loop
-            last_metrics_check = 0
+            state: Dict[str, Any] = {}
+            last_started = None
             while not stop_event.is_set():
                 now = time.time()
+                started = time.monotonic()
+                if last_started is not None:
+                    LOOP_LAG.set(round(max(0.0, started - last_started - MONITOR_INTERVAL), 4), router=router_id)
+                last_started = started
                 
                 try:
-                    # Sync Service, Interfaces, Queues, Traffic, etc.
-                    if adapter._is_connected:
-                        try:
-                            # Sincronizar operaciones pendientes cada 15 segundos
-                            if now - getattr(self, f'last_pending_sync_{router_id}', 0) > 15.0:
-                                setattr(self, f'last_pending_sync_{router_id}', now)
-                                
-                                def run_sync():
-                                    with self._sync_lock:
-                                        if router_id in self._active_syncs:
-                                            return
-                                        self._active_syncs.add(router_id)
-
-                                    try:
-                                        from src.infrastructure.database.db_manager import get_db
-                                        db_local = get_db()
-                                        from src.application.services.sync_service import SyncService
-                                        sync_service = SyncService(db_local)
-                                        router_info = router.to_dict()
-                                        result = sync_service.sync_router_operations(router_id, router_info)
-                                        
-                                        if result['completed'] > 0:
-                                            logger.info(f"🔄 Sincronizadas {result['completed']} operaciones para router {router_id}")
-                                            self._safe_emit('sync_completed', {
-                                                'router_id': router_id,
-                                                'router_name': router.alias,
-                                                'completed': result['completed'],
-                                                'timestamp': datetime.now().isoformat()
-                                            })
-                                    finally:
-                                        with self._sync_lock:
-                                            if router_id in self._active_syncs:
-                                                self._active_syncs.remove(router_id)
-
-                                threading.Thread(target=run_sync, daemon=True).start()
-                        except Exception as e:
-                            logger.error(f"Error iniciando Sync Service: {e}")
-
-                    # Pre-fetch surgical data
-                    try:
-                        all_ifaces = adapter._get_resource('/interface').call('print', {".proplist": "name,rx-byte,tx-byte,disabled,last-link-up-time"})
-                        all_queues = adapter._get_resource('/queue/simple').call('print', {".proplist": "name,target,rate,max-limit,burst-limit,disabled"})
-                    except Exception as mt_err:
-                        logger.warning(f"Error surgical pre-fetch: {mt_err}")
-                        all_ifaces, all_queues = [], []
-
-                    # Traffic Interfaces (Graphed in Modal)
-                    current_interfaces = list(self.monitored_interfaces.get(router_id, []))
-                    if current_interfaces:
-                        traffic_data = {}
-                        for iface_name in current_interfaces:
-                            # 1. Intentar obtener de colas (por si es un alias o cliente)
-                            temp_q = adapter.get_bulk_traffic([iface_name], all_queues=all_queues)
-                            if temp_q and iface_name in temp_q and (temp_q[iface_name]['tx'] > 0 or temp_q[iface_name]['rx'] > 0):
-                                traffic_data[iface_name] = temp_q[iface_name]
-                            else:
-                                # 2. Intentar obtener directamente de la interfaz (monitor-traffic)
-                                traffic_data[iface_name] = adapter.get_interface_traffic(iface_name)
-                        
-                        if traffic_data:
-                            self._safe_emit('interface_traffic', {
-                                'router_id': router_id,
-                                'traffic': traffic_data,
-                                'timestamp': now
-                            }, room=f"router_{router_id}")
-
-                    # Background DB Sync (60s)
-                    if now - self.last_db_sync.get(router_id, 0) > 60:
-                        self.last_db_sync[router_id] = now
-                        try:
-                            from src.infrastructure.database.models import Client
-                            session_sync = get_db().session_factory()
-                            try:
-                                all_active = session_sync.query(Client.id).filter(Client.router_id == router_id, Client.status == 'active').all()
-                                all_ids = [c.id for c in all_active]
-                            finally:
-                                session_sync.close()
-                            
-                            if all_ids:
-                                full_snapshot = self.traffic_engine.get_snapshot(adapter, all_ids, get_db().session_factory, raw_ifaces=all_ifaces, raw_queues=all_queues)
-                                offline_meta = adapter.get_all_last_seen()
-                                self.update_clients_online_status(router_id, full_snapshot, offline_metadata=offline_meta)
-                        except Exception as sync_e:
-                            logger.error(f"Error in background sync: {sync_e}")
-
-                    # Client Monitoring
-                    router_monitored_clients = list(self.monitored_clients.get(router_id, []))
-                    if router_monitored_clients:
-                        if now - self.last_name_sync.get(router_id, 0) > 300:
-                            self.last_name_sync[router_id] = now
-                            self._sync_technical_names(router_id, adapter)
-
-                        client_traffic = self.traffic_engine.get_snapshot(adapter, router_monitored_clients, get_db().session_factory, raw_ifaces=all_ifaces, raw_queues=all_queues)
-                        if client_traffic:
-                            self.update_clients_online_status(router_id, client_traffic)
-                            
-                            router_last = self.last_emitted_data.get(router_id, {})
-                            delta_data = {}
-                            for cid, cdata in client_traffic.items():
-                                last_cdata = router_last.get(cid)
-                                if not last_cdata or cdata['status'] != last_cdata['status'] or \
-                                   abs(cdata['upload'] - last_cdata['upload']) > 50000 or \
-                                   abs(cdata['download'] - last_cdata['download']) > 50000:
-                                    delta_data[cid] = cdata
-                            
-                            if delta_data:
-                                router_last.update(delta_data)
-                                self.last_emitted_data[router_id] = router_last
-                                self._safe_emit('client_traffic', delta_data, room=f"router_{router_id}")
-
-                    # Dashboard Interfaces
-                    dashboard_ifaces = self.dashboard_interfaces.get(router_id, [])
-                    if dashboard_ifaces:
-                        total_tx, total_rx = 0, 0
-                        for iface in dashboard_ifaces:
-                            res = adapter.get_interface_traffic(iface)
-                            total_tx += res.get('tx', 0)
-                            total_rx += res.get('rx', 0)
-                        self._safe_emit('dashboard_traffic_update', {'router_id': router_id, 'tx': total_tx, 'rx': total_rx, 'timestamp': now})
-
-                    # Router Metrics (5s)
-                    if now - last_metrics_check >= 5.0:
-                        last_metrics_check = now
-                        system_info = adapter.get_system_info()
-                        self._safe_emit('router_metrics', {'router_id': router_id, 'cpu': system_info.get('cpu_load', '0'), 'memory': system_info.get('memory_usage', 0), 'uptime': system_info.get('uptime', ''), 'timestamp': now}, room=f"router_{router_id}")
-
+                    self._monitor_tick(router_id, router, adapter, now, state)
                 except Exception as loop_e:
                     logger.error(f"Error in fast loop for router {router_id}: {loop_e}")
                     if not adapter._is_connected:
                         break # Force re-connect
 
-                time.sleep(1.5)
+                LOOP_DURATION.set(round(time.monotonic() - started, 4), router=router_id)
+                time.sleep(MONITOR_INTERVAL)
 
         except Exception as e:
             logger.critical(f"Critical error in monitor thread for router {router_id}: {e}")
         finally:
             if adapter: adapter.disconnect()
             if router_id in self.router_sessions: del self.router_sessions[router_id]
+            LOOP_LAG.remove(router=router_id)
+            LOOP_DURATION.remove(router=router_id)
             logger.info(f"Monitor thread for router {router_id} finished")
 
+    def _monitor_tick(self, router_id: int, router, adapter: MikroTikAdapter, now: float, state: Dict[str, Any]):
+        """Una iteración del ciclo rápido: pre-fetch, tráfico, sync de fondo y métricas del router"""
+        from src.infrastructure.database.db_manager import get_db
+
+        # Sync Service, Interfaces, Queues, Traffic, etc.
+        if adapter._is_connected:
+            try:
+                # Sincronizar operaciones pendientes cada 15 segundos
+                if now - getattr(self, f'last_pending_sync_{router_id}', 0) > 15.0:
+                    setattr(self, f'last_pending_sync_{router_id}', now)
+
+                    def run_sync():
+                        with self._sync_lock:
+                            if router_id in self._active_syncs:
+                                return
+                            self._active_syncs.add(router_id)
+
+                        try:
+                            from src.infrastructure.database.db_manager import get_db
+                            db_local = get_db()
+                            from src.application.services.sync_service import SyncService
+                            sync_service = SyncService(db_local)
+                            router_info = router.to_dict()
+                            result = sync_service.sync_router_operations(router_id, router_info)
+
+                            if result['completed'] > 0:
+                                logger.info(f"🔄 Sincronizadas {result['completed']} operaciones para router {router_id}")
+                                self._safe_emit('sync_completed', {
+                                    'router_id': router_id,
+                                    'router_name': router.alias,
+                                    'completed': result['completed'],
+                                    'timestamp': datetime.now().isoformat()
+                                })
+                        finally:
+                            with self._sync_lock:
+                                if router_id in self._active_syncs:
+                                    self._active_syncs.remove(router_id)
+
+                    threading.Thread(target=run_sync, daemon=True).start()
+            except Exception as e:
+                logger.error(f"Error iniciando Sync Service: {e}")
+
+        # Pre-fetch surgical data
+        try:
+            all_ifaces = adapter._get_resource('/interface').call('print', {".proplist": "name,rx-byte,tx-byte,disabled,last-link-up-time"})
+            all_queues = adapter._get_resource('/queue/simple').call('print', {".proplist": "name,target,rate,max-limit,burst-limit,disabled"})
+        except Exception as mt_err:
+            logger.warning(f"Error surgical pre-fetch: {mt_err}")
+            all_ifaces, all_queues = [], []
+
+        # Traffic Interfaces (Graphed in Modal)
+        current_interfaces = self._interfaces_of(router_id)
+        if current_interfaces:
+            traffic_data = {}
+            # Un solo parseo de las tasas de colas para todas las interfaces del tick
+            queue_traffic = adapter.get_bulk_traffic(current_interfaces, all_queues=all_queues) or {}
+            for iface_name in current_interfaces:
+                # 1. Intentar obtener de colas (por si es un alias o cliente)
+                temp_q = queue_traffic.get(iface_name)
+                if temp_q and (temp_q['tx'] > 0 or temp_q['rx'] > 0):
+                    traffic_data[iface_name] = temp_q
+                else:
+                    # 2. Intentar obtener directamente de la interfaz (monitor-traffic)
+                    traffic_data[iface_name] = adapter.get_interface_traffic(iface_name)
+
+            if traffic_data:
+                self._safe_emit('interface_traffic', {
+                    'router_id': router_id,
+                    'traffic': traffic_data,
+                    'timestamp': now
+                }, room=f"router_{router_id}")
+
+        # Background DB Sync (60s)
+        if now - self.last_db_sync.get(router_id, 0) > 60:
+            self.last_db_sync[router_id] = now
+            try:
+                from src.infrastructure.database.models import Client
+                session_sync = get_db().session_factory()
+                try:
+                    all_active = session_sync.query(Client.id).filter(Client.router_id == router_id, Client.status == 'active').all()
+                    all_ids = [c.id for c in all_active]
+                finally:
+                    session_sync.close()
+
+                if all_ids:
+                    full_snapshot = self.traffic_engine.get_snapshot(adapter, all_ids, get_db().session_factory, raw_ifaces=all_ifaces, raw_queues=all_queues)
+                    offline_meta = adapter.get_all_last_seen()
+                    self.update_clients_online_status(router_id, full_snapshot, offline_metadata=offline_meta)
+            except Exception as sync_e:
+                logger.error(f"Error in background sync: {sync_e}")
+
+        # Client Monitoring
+        router_monitored_clients = self._clients_of(router_id)
+        if router_monitored_clients:
+            if now - self.last_name_sync.get(router_id, 0) > 300:
+                self.last_name_sync[router_id] = now
+                self._sync_technical_names(router_id, adapter)
+
+            client_traffic = self.traffic_engine.get_snapshot(adapter, router_monitored_clients, get_db().session_factory, raw_ifaces=all_ifaces, raw_queues=all_queues)
+            if client_traffic:
+                self.update_clients_online_status(router_id, client_traffic)
+                self._emit_client_traffic(router_id, client_traffic, now)
+
+        # Dashboard Interfaces
+        dashboard_ifaces = self.dashboard_interfaces.get(router_id, [])
+        if dashboard_ifaces:
+            total_tx, total_rx = 0, 0
+            for iface in dashboard_ifaces:
+                res = adapter.get_interface_traffic(iface)
+                total_tx += res.get('tx', 0)
+                total_rx += res.get('rx', 0)
+            self._safe_emit('dashboard_traffic_update', {'router_id': router_id, 'tx': total_tx, 'rx': total_rx, 'timestamp': now})
+
+        # Router Metrics (5s)
+        if now - state.get('last_metrics_check', 0) >= 5.0:
+            state['last_metrics_check'] = now
+            system_info = adapter.get_system_info()
+            metrics = {'router_id': router_id, 'cpu': system_info.get('cpu_load', '0'), 'memory': system_info.get('memory_usage', 0), 'uptime': system_info.get('uptime', ''), 'timestamp': now}
+            self._safe_emit('router_metrics', metrics, room=f"router_{router_id}")
+
+    def _traffic_settings(self) -> Dict[str, Any]:
+        if self._traffic_options is None:
+            from src.infrastructure.config.settings import get_config
+            config = get_config()
+            mt = config.mikrotik
+            # La cola 'db' serializa en JSON: ahí los frames binarios no viajan
+            binary = mt.traffic_msgpack and config.cluster.socketio_message_queue.strip() != 'db' and msgpack_available()
+            self._traffic_options = {
+                'protocol': mt.traffic_protocol, 'binary': binary, 'quantum': mt.traffic_quantum_bps,
+                'threshold': mt.traffic_threshold_bps, 'keyframe_seconds': mt.traffic_keyframe_seconds,
+            }
+        return self._traffic_options
+
+    def _traffic_encoder(self, router_id: int) -> TrafficDeltaEncoder:
+        encoder = self.traffic_encoders.get(router_id)
+        if encoder is None:
+            opts = self._traffic_settings()
+            encoder = TrafficDeltaEncoder(router_id, quantum=opts['quantum'], threshold=opts['threshold'],
+                                          keyframe_seconds=opts['keyframe_seconds'])
+            self.traffic_encoders[router_id] = encoder
+        return encoder
+
+    def _emit_client_traffic(self, router_id: int, client_traffic: Dict, now: float):
+        """Emite a router_{id} sólo los clientes que cambiaron (delta compacto o JSON legado)"""
+        opts = self._traffic_settings()
+        if opts['protocol'] == 'delta':
+            frame = self._traffic_encoder(router_id).encode(client_traffic, now)
+            if frame:
+                self._safe_emit('client_traffic_delta', pack_frame(frame, opts['binary']), room=f"router_{router_id}")
+            return
+
+        threshold = opts['threshold']
+        router_last = self.last_emitted_data.get(router_id, {})
+        delta_data = {}
+        for cid, cdata in client_traffic.items():
+            last_cdata = router_last.get(cid)
+            if not last_cdata or cdata['status'] != last_cdata['status'] or \
+               abs(cdata['upload'] - last_cdata['upload']) > threshold or \
+               abs(cdata['download'] - last_cdata['download']) > threshold:
+                delta_data[cid] = cdata
+
+        if delta_data:
+            router_last.update(delta_data)
+            self.last_emitted_data[router_id] = router_last
+            self._safe_emit('client_traffic', delta_data, room=f"router_{router_id}")
+
+    def traffic_keyframe(self, router_id: int):
+        """Keyframe del stream delta para un navegador que entra o perdió la secuencia (None si no hay stream local)"""
+        encoder = self.traffic_encoders.get(router_id)
+        frame = encoder.keyframe() if encoder else None
+        if frame is None:
+            return None
+        return pack_frame(frame, self._traffic_settings()['binary'])
+
     def add_monitored_interface(self, router_id: int, interface_name: str):
         if router_id not in self.monitored_interfaces:
             self.monitored_interfaces[router_id] = set()
@@ -339,6 +496,7 @@ class MonitoringManager:
         """Agrega clientes al monitoreo, infiriendo el router si no se proporciona"""
         # 1. Agrupar clientes por su router_id real (desde DB)
         from src.infrastructure.database.models import Client
+        from src.infrastructure.database.db_manager import get_db
         db = get_db()
         session = db.session
         
@@ -384,11 +542,13 @@ class MonitoringManager:
         """
         Legacy wrapper. Ahora usa el motor modular TrafficSurgicalEngine.
         """
+        from src.infrastructure.database.db_manager import get_db
         return self.traffic_engine.get_snapshot(adapter, client_ids, get_db().session_factory)
 
 
     def update_clients_online_status(self, router_id: int, traffic_results: Dict[str, Any], offline_metadata: Dict[str, str] = None):
         """Actualiza el estado is_online y last_seen en la BD basado en el monitoreo"""
+        from src.infrastructure.database.db_manager import get_db
         try:
             from src.infrastructure.database.models import Client
             
@@ -450,14 +610,10 @@ class MonitoringManager:
             
             if not client_updates: return
 
-            for u in client_updates:
-                data = {'is_online': u['is_online']}
-                if 'last_seen' in u:
-                    data['last_seen'] = u['last_seen']
-                
-                session.query(Client).filter(Client.id == u['id']).update(data, synchronize_session=False)
-
-            session.commit()
+            # Liberar la sesión de lectura antes de escribir y delegar al escritor único
+            session.rollback()
+            from src.infrastructure.database.write_queue import get_write_queue
+            get_write_queue().submit(lambda ws: ws.bulk_update_mappings(Client, client_updates))
             
             if offline_metadata:
                 logger.info(f"✅ DB Sync Router {router_id}: Actualizado con metadatos del MikroTik.")
@@ -472,41 +628,16 @@ class MonitoringManager:
         """
         Sincroniza los nombres técnicos de MikroTik (Queues e Interfaces) 
         con los clientes en la base de datos para optimizar el monitoreo.
-        Punto 5 del Plan de Optimización.
+        Una pasada por router: una lectura de secrets/colas/interfaces y un solo update por lotes.
         """
-        logger.info(f"⚙️ Iniciando sincronización de nombres técnicos para router {router_id}...")
+        from src.application.services.technical_names import reconcile_technical_names
+        from src.infrastructure.database.db_manager import get_db
         try:
-            from src.infrastructure.database.db_manager import get_db
-            db_manager = get_db()
-            db = db_manager.session
-            from src.infrastructure.database.models import Client
-            clients = db.query(Client).filter(Client.router_id == router_id).all()
-            
-            updates = 0
-            for client in clients:
-                user_l = client.username.lower()
-                legal_norm = normalize_name(client.legal_name)
-                c_ip = client.ip_address.strip() if client.ip_address else None
-                    
-                # A. Resolver Interfaz
-                iface_patterns = [user_l, f"<{user_l}>", f"pppoe-{user_l}", f"<pppoe-{user_l}>"]
-                resolved_iface = next((iface_map[p] for p in iface_patterns if p in iface_map), None)
-                
-                # B. Resolver Cola
-                queue_patterns = [user_l, f"<{user_l}>", legal_norm, f"<{legal_norm}>", user_l.replace('-', '_')]
-                resolved_queue = next((queue_by_name[p] for p in queue_patterns if p in queue_by_name), None)
-                if not resolved_queue and c_ip in queue_by_ip:
-                    resolved_queue = queue_by_ip[c_ip]
-                
-                # Guardar si cambió
-                if client.mikrotik_queue_name != resolved_queue or client.mikrotik_interface_name != resolved_iface:
-                    client.mikrotik_queue_name = resolved_queue
-                    client.mikrotik_interface_name = resolved_iface
-                    updates += 1
-                
-                if updates > 0:
-                    db.commit()
-                    logger.info(f"✅ Sincronizados {updates} nombres técnicos en DB para router {router_id}")
-
+            changes = reconcile_technical_names(router_id, adapter, get_db().session_factory)
+            if changes:
+                # La metadata cacheada del motor de tráfico conserva los nombres viejos
+                for change in changes:
+                    self.traffic_engine.metadata_cache.pop(change['id'], None)
+                logger.info(f"✅ Sincronizados {len(changes)} nombres técnicos en DB para router {router_id}")
         except Exception as e:
             logger.error(f"Error en sync_technical_names: {e}")
@@ -0,0 +1,151 @@
+"""
+Quality Pulse Engine
+Pings concurrentes desde el router para el índice de salud de enlace (LHI).
+Reparte los destinos entre varios canales API, respeta un deadline por ronda
+y rota el punto de inicio para que cada cliente se muestree en ciclo.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _disconnect(adapter):
+    try:
+        adapter.disconnect()
+    except Exception:
+        pass
+
+
+class QualityPulseEngine:
+    """
+    Motor de pulso de calidad con canales paralelos y calendario rotativo.
+    Los destinos que no alcanzan a medirse en una ronda conservan su último
+    resultado (si no ha caducado) y son los primeros en la ronda siguiente.
+    """
+
+    def __init__(self, channels: Optional[int] = None, count: Optional[int] = None,
+                 interval_ms: Optional[int] = None, round_deadline: Optional[float] = None,
+                 max_result_age: float = 3600, adapter_factory: Optional[Callable[[], Any]] = None,
+                 join_grace: float = 5.0):
+        if None in (channels, count, interval_ms, round_deadline):
+            from src.infrastructure.config.settings import get_config
+            mt = get_config().mikrotik
+            channels = channels if channels is not None else mt.pulse_channels
+            count = count if count is not None else mt.pulse_count
+            interval_ms = interval_ms if interval_ms is not None else mt.pulse_interval_ms
+            round_deadline = round_deadline if round_deadline is not None else mt.pulse_round_deadline
+
+        self.channels = max(1, channels)
+        self.count = max(1, count)
+        self.interval_ms = interval_ms
+        self.round_deadline = round_deadline
+        self.max_result_age = max_result_age
+        self._adapter_factory = adapter_factory
+        self.join_grace = join_grace   # Espera extra por el ping en curso al vencer el deadline
+        self._cursors: Dict[int, int] = {}                                  # {router_id: offset}
+        self._last_results: Dict[int, Dict[str, Tuple[float, Dict]]] = {}   # {router_id: {ip: (ts, result)}}
+        self._lock = threading.Lock()
+
+    def _new_adapter(self):
+        if self._adapter_factory:
+            return self._adapter_factory()
+        from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+        return MikroTikAdapter()
+
+    def _open_channels(self, router, wanted: int) -> List[Any]:
+        """Abre conexiones API adicionales; se detiene en el primer fallo."""
+        opened = []
+        for _ in range(max(0, wanted)):
+            adapter = self._new_adapter()
+            if not adapter.connect(router.host_address, router.api_username, router.api_password, router.api_port, timeout=5):
+                break
+            opened.append(adapter)
+        return opened
+
+    def run(self, router, targets: List[str], primary_adapter=None,
+            deadline: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Ejecuta una ronda de pulso para un router.
+        Retorna {ip: {'latency', 'loss', 'jitter', 'status'}} con resultados frescos o recientes.
+        """
+        targets = sorted(set(t for t in targets if t))
+        if not targets:
+            return {}
+
+        budget = deadline if deadline is not None else self.round_deadline
+        round_end = time.monotonic() + budget
+        offset = self._cursors.get(router.id, 0) % len(targets)
+        work: 'queue.Queue[str]' = queue.Queue()
+        for target in targets[offset:] + targets[:offset]:
+            work.put(target)
+
+        owned = self._open_channels(router, min(self.channels, len(targets)) - (1 if primary_adapter else 0))
+        adapters = ([primary_adapter] if primary_adapter else []) + owned
+        fresh: Dict[str, Dict[str, Any]] = {}
+        taken = [0]
+        results_lock = threading.Lock()
+
+        def worker(adapter, owns: bool):
+            try:
+                while time.monotonic() < round_end:
+                    try:
+                        target = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    with results_lock:
+                        taken[0] += 1
+                    result = adapter.ping_target(target, self.count, self.interval_ms)
+                    with results_lock:
+                        fresh[target] = result
+            finally:
+                # Cada hilo cierra su propio canal: si venció el join sigue usándolo hasta terminar el ping
+                if owns:
+                    _disconnect(adapter)
+
+        started = set()
+        try:
+            threads = [threading.Thread(target=worker, args=(a, a is not primary_adapter), daemon=True,
+                                        name=f"Pulse-{router.id}-{i}")
+                       for i, a in enumerate(adapters)]
+            for t, adapter in zip(threads, adapters):
+                t.start()
+                started.add(id(adapter))
+            # Margen para el ping en curso al vencer el deadline
+            grace = (self.count * (self.interval_ms or 1000)) / 1000.0 + self.join_grace
+            for t in threads:
+                t.join(timeout=max(0.0, round_end - time.monotonic()) + grace)
+        finally:
+            # Sólo los canales cuyo hilo nunca arrancó; los demás los cierra su hilo
+            for adapter in owned:
+                if id(adapter) not in started:
+                    _disconnect(adapter)
+
+        with results_lock:
+            fresh = dict(fresh)
+        with self._lock:
+            self._cursors[router.id] = (offset + taken[0]) % len(targets)
+            merged = self._merge(router.id, targets, fresh)
+
+        if len(fresh) < len(targets):
+            logger.info(f"📶 Pulse {getattr(router, 'alias', router.id)}: {len(fresh)}/{len(targets)} medidos en esta ronda ({len(adapters)} canales), el resto rota a la siguiente")
+        return merged
+
+    def _merge(self, router_id: int, targets: List[str], fresh: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Combina resultados frescos con los recientes y descarta destinos que ya no existen."""
+        now = time.time()
+        previous = self._last_results.get(router_id, {})
+        current: Dict[str, Tuple[float, Dict]] = {}
+        merged: Dict[str, Dict] = {}
+        for target in targets:
+            if target in fresh:
+                current[target] = (now, fresh[target])
+                merged[target] = fresh[target]
+            elif target in previous and now - previous[target][0] <= self.max_result_age:
+                current[target] = previous[target]
+                merged[target] = previous[target][1]
+        self._last_results[router_id] = current
+        return merged
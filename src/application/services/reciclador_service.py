@@ -1,15 +1,257 @@
+import atexit
+import hashlib
+import re
+import threading
+import time
 import traceback
 import json
 import logging
 import os
 import sys
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
 from src.infrastructure.database.db_manager import get_db
 from src.infrastructure.database.models import SystemIncident
 from src.application.events.event_bus import get_event_bus, SystemEvents
 
 logger = logging.getLogger(__name__)
 
+OPEN_STATUSES = ('new', 'investigating', 'recurring')
+
+_NORMALIZERS = [
+    (re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.I), '<uuid>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<ip>'),
+    (re.compile(r'\b0x[0-9a-f]+\b', re.I), '<hex>'),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), '<str>'),
+    (re.compile(r'\d+'), '<n>'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def normalize_message(message: str) -> str:
+    """Quita lo variable del mensaje (ids, IPs, direcciones, literales) para agrupar repeticiones"""
+    text = str(message or '')[:1000]
+    for pattern, replacement in _NORMALIZERS:
+        text = pattern.sub(replacement, text)
+    return text.strip()[:500]
+
+
+def incident_fingerprint(error_type: str, location: str, message: str, tenant_id: Optional[int] = None) -> str:
+    raw = f"{tenant_id or ''}|{error_type}|{location}|{normalize_message(message)}"
+    return hashlib.sha1(raw.encode('utf-8', 'replace')).hexdigest()
+
+
+def exception_location(exception, fallback: str) -> str:
+    """archivo:función del frame donde se lanzó la excepción (estable entre ediciones menores)"""
+    tb = getattr(exception, '__traceback__', None)
+    if tb is not None:
+        frames = traceback.extract_tb(tb)
+        if frames:
+            return f"{os.path.basename(frames[-1].filename)}:{frames[-1].name}"
+    return fallback
+
+
+class TokenBucket:
+    """Cubeta de tokens: capacity ráfagas inmediatas, luego refill_per_sec tokens por segundo"""
+
+    def __init__(self, capacity: float, refill_per_sec: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def consume(self) -> bool:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+@dataclass
+class PendingIncident:
+    """Repeticiones de una huella acumuladas en memoria hasta el siguiente volcado"""
+    fingerprint: str
+    row: Dict[str, Any]
+    count: int = 0
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    announce: bool = False      # Al menos una captura pasó el límite: publicar tras escribir
+    suppressed: int = 0
+
+
+class IncidentBuffer:
+    """
+    Sumidero deduplicado de incidentes.
+    Cada captura se agrega a la entrada de su huella; un hilo vuelca cada flush_interval segundos
+    (vía la cola de escritura) insertando una fila por huella nueva o sumando ocurrencias a la abierta.
+    La cubeta de tokens por huella limita logs y notificaciones en tiempo real; lo suprimido sólo suma al contador.
+    """
+
+    def __init__(self, flush_interval: float = 2.0, burst: int = 3, refill_per_minute: float = 1.0,
+                 max_pending: int = 1000, max_buckets: int = 5000,
+                 runner: Optional[Callable[[Callable], Any]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.flush_interval = flush_interval
+        self.burst = burst
+        self.refill_per_sec = refill_per_minute / 60.0
+        self.max_pending = max_pending
+        self.max_buckets = max_buckets
+        self._runner = runner
+        self._clock = clock
+        self._pending: Dict[str, PendingIncident] = {}
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'captured': 0, 'inserted': 0, 'merged': 0, 'suppressed': 0, 'dropped': 0, 'failed': 0}
+
+    def record(self, fingerprint: str, build_row: Callable[[], Dict[str, Any]]) -> bool:
+        """
+        Registra una ocurrencia. build_row sólo se evalúa para la primera de cada volcado.
+        Retorna si la ocurrencia pasó el límite de la huella (se loguea y notifica).
+        """
+        now = datetime.now()
+        with self._lock:
+            self.stats['captured'] += 1
+            entry = self._pending.get(fingerprint)
+            if entry is None:
+                if len(self._pending) >= self.max_pending:
+                    self.stats['dropped'] += 1
+                    return False
+                entry = PendingIncident(fingerprint=fingerprint, row=build_row(), first_seen=now)
+                self._pending[fingerprint] = entry
+            entry.count += 1
+            entry.last_seen = now
+
+            allowed = self._bucket(fingerprint).consume()
+            if allowed:
+                entry.announce = True
+            else:
+                entry.suppressed += 1
+                self.stats['suppressed'] += 1
+        self._ensure_started()
+        return allowed
+
+    def _bucket(self, fingerprint: str) -> TokenBucket:
+        bucket = self._buckets.get(fingerprint)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, self.refill_per_sec, self._clock)
+            self._buckets[fingerprint] = bucket
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(fingerprint)
+        return bucket
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Vuelca las huellas pendientes. Retorna cuántas se escribieron."""
+        with self._flush_lock:
+            with self._lock:
+                entries = list(self._pending.values())
+                self._pending = {}
+            if not entries:
+                return 0
+            try:
+                results = self._run(lambda s: _persist_incidents(s, entries))
+            except Exception as e:
+                logger.warning(f"⚠️ RECICLADOR: volcado agrupado falló ({e}), reintentando por huella")
+                results = []
+                for entry in entries:
+                    try:
+                        results.extend(self._run(lambda s, e=entry: _persist_incidents(s, [e])))
+                    except Exception as e_row:
+                        self.stats['failed'] += 1
+                        logger.error(f"❌ RECICLADOR: incidente descartado ({entry.row.get('error_type')}): {e_row}")
+
+        for entry, incident, inserted in results:
+            self.stats['inserted' if inserted else 'merged'] += 1
+            if entry.announce:
+                RecicladorService._broadcast(incident)
+        return len(results)
+
+    def _run(self, unit):
+        if self._runner is not None:
+            return self._runner(unit)
+        from src.infrastructure.database.write_queue import get_write_queue
+        return get_write_queue().run(unit)
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="IncidentFlusher")
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Error en volcado del RECICLADOR: {e}")
+
+
+def _persist_incidents(session, entries: List[PendingIncident]):
+    """
+    Unidad de escritura: suma ocurrencias al incidente abierto de cada huella o inserta uno nuevo
+    ('recurring' si la huella ya tuvo un incidente resuelto). Retorna [(entry, incident_dict, inserted)].
+    """
+    fingerprints = [e.fingerprint for e in entries]
+    latest: Dict[str, SystemIncident] = {}
+    seen_before = set()
+    for incident in session.query(SystemIncident).filter(SystemIncident.fingerprint.in_(fingerprints)) \
+            .order_by(SystemIncident.id.asc()).all():
+        seen_before.add(incident.fingerprint)
+        if incident.status in OPEN_STATUSES:
+            latest[incident.fingerprint] = incident
+
+    written = []
+    for entry in entries:
+        incident = latest.get(entry.fingerprint)
+        inserted = incident is None
+        if inserted:
+            incident = SystemIncident(**entry.row)
+            incident.fingerprint = entry.fingerprint
+            incident.occurrences = entry.count
+            incident.first_seen = entry.first_seen
+            incident.status = 'recurring' if entry.fingerprint in seen_before else 'new'
+            session.add(incident)
+        else:
+            incident.occurrences = (incident.occurrences or 1) + entry.count
+        incident.last_seen = entry.last_seen
+        written.append((entry, incident, inserted))
+
+    session.flush()
+    return [(entry, incident.to_dict(), inserted) for entry, incident, inserted in written]
+
+
+_incident_buffer: Optional[IncidentBuffer] = None
+_incident_buffer_lock = threading.Lock()
+
+
+def get_incident_buffer() -> IncidentBuffer:
+    global _incident_buffer
+    if _incident_buffer is None:
+        with _incident_buffer_lock:
+            if _incident_buffer is None:
+                _incident_buffer = IncidentBuffer()
+                atexit.register(_incident_buffer.flush)
+    return _incident_buffer
+
+
 class RecicladorService:
     """
     Servicio Centinela (RECICLADOR) para captura proactiva de errores.
@@ -18,13 +260,17 @@ class RecicladorService:
     @staticmethod
     def capture(exception, category='system', severity='error', context=None):
         """
-        Captura una excepción con todo el contexto posible y la guarda en la BD.
+        Captura una excepción con todo el contexto posible.
+        Las repeticiones se agrupan por huella (tipo + ubicación + mensaje normalizado) y se
+        vuelcan en segundo plano: una tormenta de fallos se traduce en un contador, no en miles de filas.
+        Retorna la huella del incidente (o None si la captura falló).
         """
         try:
             # 1. Extraer detalles básicos
             error_type = type(exception).__name__
             message = str(exception)
             stack = traceback.format_exc()
+            calling_module = RecicladorService._get_calling_module()
             
             # 2. Obtener contexto
             url, method, params, payload, ip, user_id, username, tenant_id = [None]*8
@@ -56,47 +302,45 @@ class RecicladorService:
                         tenant_id = router.tenant_id
                 except: pass
             
-            # 3. Metadata del entorno
-            env_meta = json.dumps({
-                'os': sys.platform,
-                'python_version': sys.version,
-                'pid': os.getpid(),
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            # 3.8 Generar Análisis de IA (Deducción Inteligente)
-            ai_info = RecicladorService._generate_ai_analysis(error_type, message, RecicladorService._get_calling_module())
-            
-            # 4. Guardar en Base de Datos
-            db = get_db()
-            incident = SystemIncident(
-                tenant_id=tenant_id,
-                severity=severity,
-                category=category,
-                module=RecicladorService._get_calling_module(),
-                error_type=error_type,
-                message=message,
-                stack_trace=stack,
-                url=url,
-                method=method,
-                request_params=params,
-                request_payload=payload,
-                user_id=user_id,
-                username=username,
-                ip_address=ip,
-                environment_meta=env_meta,
-                ai_analysis=json.dumps(ai_info),
-                status='new'
-            )
-            
-            db.session.add(incident)
-            db.session.commit()
-            
-            # 5. Notificar en tiempo real (PROACTIVIDAD)
-            RecicladorService._broadcast(incident)
+            location = exception_location(exception, calling_module)
+            fingerprint = incident_fingerprint(error_type, location, message, tenant_id)
+
+            def build_row():
+                # 3. Metadata del entorno
+                env_meta = json.dumps({
+                    'os': sys.platform,
+                    'python_version': sys.version,
+                    'pid': os.getpid(),
+                    'timestamp': datetime.now().isoformat()
+                })
+                
+                # 3.8 Generar Análisis de IA (Deducción Inteligente)
+                ai_info = RecicladorService._generate_ai_analysis(error_type, message, calling_module)
+                return dict(
+                    tenant_id=tenant_id,
+                    severity=severity,
+                    category=category,
+                    module=calling_module,
+                    error_type=error_type,
+                    message=message,
+                    stack_trace=stack,
+                    url=url,
+                    method=method,
+                    request_params=params,
+                    request_payload=payload,
+                    user_id=user_id,
+                    username=username,
+                    ip_address=ip,
+                    environment_meta=env_meta,
+                    ai_analysis=json.dumps(ai_info)
+                )
             
-            logger.error(f"🚨 RECICLADOR: Incidente capturado [{error_type}]: {message}")
-            return incident
+            # 4. Agrupar por huella (se persiste y notifica al volcar)
+            if get_incident_buffer().record(fingerprint, build_row):
+                logger.error(f"🚨 RECICLADOR: Incidente capturado [{error_type}]: {message}")
+            else:
+                logger.debug(f"🔁 RECICLADOR: Repetición suprimida [{error_type}] {fingerprint[:8]}")
+            return fingerprint
             
         except Exception as e:
             # Fail silently to avoid recursion or blocking the app
@@ -181,14 +425,14 @@ class RecicladorService:
         return "unknown"
 
     @staticmethod
-    def _broadcast(incident):
-        """Envía el incidente al EventBus para que sea replicado vía WebSockets"""
+    def _broadcast(incident: Dict[str, Any]):
+        """Envía el incidente (ya serializado) al EventBus para que sea replicado vía WebSockets"""
         try:
             from src.application.events.event_bus import get_event_bus, SystemEvents
             # Envolver en una estructura que el frontend espera
             payload = {
                 'event_type': SystemEvents.INCIDENT_REPORTED,
-                'incident': incident.to_dict()
+                'incident': incident
             }
             get_event_bus().publish(SystemEvents.INCIDENT_REPORTED, payload, source='reciclador')
             logger.info(f"📡 Centinela: Incidente publicado en el EventBus")
@@ -0,0 +1,203 @@
+"""
+Report Aggregation
+Agregación mensual de métricas financieras y de crecimiento en consultas agrupadas.
+En lugar de una consulta por mes (o recorrer todos los clientes por cada mes), cada métrica
+se obtiene con un GROUP BY por (router, año, mes) y los reportes arman sus periodos a partir de los buckets.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+SUCCESS_PAYMENT_STATUSES = ('paid', 'verified', 'approved', 'success')
+WORKING_STATUSES = ('active', 'suspended', 'deleted')
+
+
+def month_index(year: int, month: int) -> int:
+    """Índice lineal de mes (comparaciones y rangos sin fechas)"""
+    return year * 12 + (month - 1)
+
+
+def month_bounds(index: int) -> Tuple[datetime, datetime]:
+    """Inicio y fin (inclusive, al segundo) del mes de un índice"""
+    year, month = divmod(index, 12)
+    start = datetime(year, month + 1, 1)
+    next_start = datetime(year + 1, 1, 1) if month == 11 else datetime(year, month + 2, 1)
+    return start, next_start - timedelta(seconds=1)
+
+
+@dataclass
+class ClientCohort:
+    """Clientes agrupados por router, estado, mes de alta y (si fueron retirados) mes de baja"""
+    router_id: int
+    status: str
+    created: Optional[int]        # month_index de created_at
+    deleted: Optional[int]        # month_index de updated_at para retirados
+    count: int
+    fees: float
+
+    def counts_in_financial_month(self, index: int) -> bool:
+        """Misma regla que el reporte financiero: alta hasta el mes; retirados sólo si la baja no es anterior"""
+        if self.created is None or self.created > index:
+            return False
+        if self.status == 'deleted' and self.deleted is not None and self.deleted < index:
+            return False
+        return True
+
+    def installed_at_end_of(self, index: int) -> bool:
+        """Base instalada al cierre del mes (retirados cuentan si la baja fue posterior)"""
+        if self.created is None or self.created > index:
+            return False
+        return self.status != 'deleted' or (self.deleted is not None and self.deleted > index)
+
+
+class MonthlyReportAggregator:
+    """
+    Consultas agrupadas por mes, con alcance opcional de router(s).
+    Cada método es una sola consulta, independiente del número de meses o clientes.
+    """
+
+    def __init__(self, session, router_id: Optional[Any] = None):
+        self.session = session
+        self.router_id = router_id
+
+    def _scoped(self, query):
+        from src.infrastructure.database.models import Client
+        if self.router_id:
+            if isinstance(self.router_id, list):
+                return query.filter(Client.router_id.in_(self.router_id))
+            return query.filter(Client.router_id == self.router_id)
+        return query
+
+    @staticmethod
+    def _month_columns(column):
+        from sqlalchemy import extract
+        return extract('year', column), extract('month', column)
+
+    def collected(self, start: datetime, end: datetime) -> Dict[Tuple[int, int], float]:
+        """Recaudo exitoso por (router_id, mes)"""
+        from sqlalchemy import func
+        from src.infrastructure.database.models import Client, Payment
+        year, month = self._month_columns(Payment.payment_date)
+        query = self._scoped(
+            self.session.query(Client.router_id, year, month, func.sum(Payment.amount))
+            .join(Client, Payment.client_id == Client.id)
+            .filter(Payment.payment_date >= start, Payment.payment_date <= end,
+                    Payment.status.in_(SUCCESS_PAYMENT_STATUSES))
+        ).group_by(Client.router_id, year, month)
+        return {(rid, month_index(int(y), int(m))): float(total or 0) for rid, y, m, total in query.all()}
+
+    def invoiced(self, start: datetime, end: datetime) -> Dict[Tuple[int, int], float]:
+        """Facturado (por fecha de emisión) por (router_id, mes)"""
+        from sqlalchemy import func
+        from src.infrastructure.database.models import Client, Invoice
+        year, month = self._month_columns(Invoice.issue_date)
+        query = self._scoped(
+            self.session.query(Client.router_id, year, month, func.sum(Invoice.total_amount))
+            .join(Client, Invoice.client_id == Client.id)
+            .filter(Invoice.issue_date >= start, Invoice.issue_date <= end)
+        ).group_by(Client.router_id, year, month)
+        return {(rid, month_index(int(y), int(m))): float(total or 0) for rid, y, m, total in query.all()}
+
+    def cohorts(self) -> List[ClientCohort]:
+        """Cohortes de clientes (alta / baja por mes) con suma de cuotas"""
+        from sqlalchemy import case, func
+        from src.infrastructure.database.models import Client
+        status = func.lower(Client.status)
+        created_y, created_m = self._month_columns(Client.created_at)
+        updated_y, updated_m = self._month_columns(Client.updated_at)
+        deleted_y = case((status == 'deleted', updated_y), else_=None)
+        deleted_m = case((status == 'deleted', updated_m), else_=None)
+        query = self._scoped(
+            self.session.query(Client.router_id, status, created_y, created_m, deleted_y, deleted_m,
+                               func.count(Client.id), func.sum(func.coalesce(Client.monthly_fee, 0)))
+        ).group_by(Client.router_id, status, created_y, created_m, deleted_y, deleted_m)
+
+        result = []
+        for rid, st, cy, cm, dy, dm, count, fees in query.all():
+            result.append(ClientCohort(
+                router_id=rid,
+                status=st or '',
+                created=month_index(int(cy), int(cm)) if cy is not None else None,
+                deleted=month_index(int(dy), int(dm)) if dy is not None else None,
+                count=int(count),
+                fees=float(fees or 0)
+            ))
+        return result
+
+    def status_distribution(self) -> Dict[str, int]:
+        """Conteo por estado y conexión (tarjetas de resumen)"""
+        from sqlalchemy import func
+        from src.infrastructure.database.models import Client
+        status = func.lower(Client.status)
+        online = func.coalesce(Client.is_online, False)
+        rows = self._scoped(
+            self.session.query(status, online, func.count(Client.id))
+        ).group_by(status, online).all()
+
+        dist = {'active': 0, 'suspended': 0, 'retired': 0, 'offline': 0}
+        for st, is_online, count in rows:
+            if st == 'active':
+                dist['active' if is_online else 'offline'] += count
+            elif st == 'suspended':
+                dist['suspended'] += count
+            elif st == 'deleted':
+                dist['retired'] += count
+        return dist
+
+    def router_aliases(self, router_ids) -> Dict[Any, str]:
+        from src.infrastructure.database.models import Router
+        ids = [rid for rid in router_ids if rid is not None]
+        rows = self.session.query(Router.id, Router.alias).filter(Router.id.in_(ids)).all() if ids else []
+        aliases = {rid: alias for rid, alias in rows if alias}
+        return {rid: aliases.get(rid, f"Router {rid}") for rid in router_ids}
+
+
+def working_clients_by_router(cohorts: List[ClientCohort]) -> Dict[Any, int]:
+    """Cantidad de clientes operativos por router (base del promedio de cuota)"""
+    counts: Dict[Any, int] = defaultdict(int)
+    for cohort in cohorts:
+        if cohort.status in WORKING_STATUSES:
+            counts[cohort.router_id] += cohort.count
+    return dict(counts)
+
+
+def financial_months(cohorts: List[ClientCohort], collected: Dict[Tuple[int, int], float],
+                     indexes: List[int]) -> Dict[int, Dict[int, Dict[str, float]]]:
+    """
+    {month_index: {router_id: {'collected', 'theoretical_active', 'theoretical_lost'}}}
+    para los clientes operativos (activos, suspendidos y retirados).
+    """
+    result: Dict[int, Dict[int, Dict[str, float]]] = {}
+    for index in indexes:
+        per_router: Dict[int, Dict[str, float]] = defaultdict(
+            lambda: {'collected': 0.0, 'theoretical_active': 0.0, 'theoretical_lost': 0.0})
+        for cohort in cohorts:
+            if cohort.status not in WORKING_STATUSES or not cohort.counts_in_financial_month(index):
+                continue
+            key = 'theoretical_lost' if cohort.status == 'deleted' else 'theoretical_active'
+            per_router[cohort.router_id][key] += cohort.fees
+        for (rid, month), amount in collected.items():
+            if month == index:
+                per_router[rid]['collected'] += amount
+        result[index] = dict(per_router)
+    return result
+
+
+def growth_months(cohorts: List[ClientCohort], collected: Dict[Tuple[int, int], float],
+                  indexes: List[int]) -> Dict[int, Dict[str, float]]:
+    """{month_index: {'new', 'churn', 'base', 'theoretical', 'revenue'}} para el reporte de rendimiento"""
+    result = {}
+    for index in indexes:
+        stats = {'new': 0, 'churn': 0, 'base': 0, 'theoretical': 0.0, 'revenue': 0.0}
+        for cohort in cohorts:
+            if cohort.created == index:
+                stats['new'] += cohort.count
+            if cohort.status == 'deleted' and cohort.deleted == index:
+                stats['churn'] += cohort.count
+            if cohort.installed_at_end_of(index):
+                stats['base'] += cohort.count
+                stats['theoretical'] += cohort.fees
+        stats['revenue'] = sum(amount for (_, month), amount in collected.items() if month == index)
+        result[index] = stats
+    return result
@@ -1,14 +1,5 @@
 import io
-import pandas as pd
 from datetime import datetime
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.piecharts import Pie
-from reportlab.graphics.charts.legends import Legend
 
 class ReportService:
     """ Servio para generación de reportes premium (PDF, Excel) """
@@ -39,6 +30,11 @@ class ReportService:
     @staticmethod
     def generate_payments_pdf(payments, start_date=None, end_date=None):
         """ Genera un PDF profesional con el listado de pagos """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), 
                                rightMargin=30, leftMargin=30, 
@@ -119,6 +115,7 @@ class ReportService:
     @staticmethod
     def generate_payments_excel(payments):
         """ Genera un Excel formateado con el listado de pagos """
+        import pandas as pd
         data = []
         for p in payments:
             data.append({
@@ -174,6 +171,11 @@ class ReportService:
     @staticmethod
     def generate_debtors_pdf(debtors):
         """ Genera reporte PDF de morosos premium """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, 
                                rightMargin=40, leftMargin=40, 
@@ -235,6 +237,7 @@ class ReportService:
     @staticmethod
     def generate_debtors_excel(debtors):
         """ Genera reporte Excel de morosos premium """
+        import pandas as pd
         data = []
         for c in debtors:
             data.append({
@@ -283,6 +286,13 @@ class ReportService:
         Genera un reporte analítico por Router con gráficas
         router_stats: Lista de dicts {name, total_clients, active, cut, retired, solvent, debtor, total_debt, potential_revenue}
         """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.graphics.charts.piecharts import Pie
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, 
                                rightMargin=30, leftMargin=30, 
@@ -456,6 +466,11 @@ class ReportService:
     @staticmethod
     def generate_clients_pdf(clients, router_name="General"):
         """Genera un PDF con el listado de clientes de un router"""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=landscape(letter),
                                rightMargin=30, leftMargin=30, 
@@ -512,6 +527,11 @@ class ReportService:
     @staticmethod
     def generate_duplicate_ips_report(duplicates_data):
         """Genera un PDF con el reporte de IPs duplicadas"""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter,
                                rightMargin=30, leftMargin=30, 
@@ -581,6 +601,7 @@ class ReportService:
     @staticmethod
     def generate_clients_excel(clients, router_name="General"):
         """Genera un Excel con el listado de clientes de un router"""
+        import pandas as pd
         data = []
         for i, c in enumerate(clients, 1):
             data.append({
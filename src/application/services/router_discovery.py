@@ -0,0 +1,115 @@
+"""
+Router Discovery Cache
+Evita repetir el descubrimiento completo de configuración (métodos de gestión, perfiles PPP,
+pools, colas, interfaces) en cada conexión o sincronización.
+- Huella barata: versión/placa/arquitectura de /system/resource, identidad y conteos
+  (print count-only) de las tablas que alimentan el descubrimiento.
+- Si la huella coincide con la guardada se usa el snapshot; sólo system_info se refresca
+  (sale de la misma lectura de /system/resource).
+- force=True (o una huella incompleta) vuelve a descubrir y reemplaza el snapshot.
+Cambios que no alteran conteos (p.ej. editar el max-limit de una cola) requieren forzar:
+casilla "Redescubrir" del diálogo de sincronización (POST /api/routers/<id>/sync con force_discovery).
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from src.infrastructure.mikrotik.capabilities.system import parse_resource_usage
+from src.infrastructure.observability.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# /interface no entra: las interfaces dinámicas de PPPoE cambiarían la huella con cada sesión
+DISCOVERY_COUNTED_PATHS = ['/ppp/secret', '/ppp/profile', '/ip/pool', '/queue/simple']
+SNAPSHOT_KEYS = ('methods', 'detected_plans', 'network_segments', 'interfaces')
+
+DISCOVERY_RESULTS = get_metrics().counter(
+    'sgubm_router_discovery_total', 'Descubrimientos de configuración por resultado (hit/miss/forced)', ('result',))
+
+
+def discovery_fingerprint(facts: Dict[str, Any]) -> Optional[str]:
+    """sha256 de los datos estables; None si faltan conteos (no se puede confiar en la huella)"""
+    counts = facts.get('counts') or {}
+    if not facts.get('resource') or any(v is None for v in counts.values()):
+        return None
+    resource = facts['resource']
+    stable = {
+        'version': resource.get('version', ''),
+        'board': resource.get('board-name', ''),
+        'arch': resource.get('architecture-name', ''),
+        'identity': facts.get('identity', ''),
+        'counts': counts,
+    }
+    return hashlib.sha256(json.dumps(stable, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _load_snapshot(session_factory, router_id: int):
+    from src.infrastructure.database.models import RouterDiscoverySnapshot
+    session = session_factory()
+    try:
+        row = session.get(RouterDiscoverySnapshot, router_id)
+        if row is None:
+            return None
+        return {'fingerprint': row.fingerprint, 'snapshot': row.snapshot, 'discovered_at': row.discovered_at}
+    finally:
+        session.close()
+
+
+def _store_snapshot(router_id: int, fingerprint: str, config: Dict[str, Any], facts: Dict[str, Any],
+                    discovered_at: datetime, write: Callable):
+    from src.infrastructure.database.models import RouterDiscoverySnapshot
+    snapshot = json.dumps({k: config.get(k, []) for k in SNAPSHOT_KEYS}, default=str)
+    facts_json = json.dumps({'identity': facts.get('identity', ''), 'counts': facts.get('counts', {}),
+                             'version': facts.get('resource', {}).get('version', '')})
+
+    def unit(session):
+        session.merge(RouterDiscoverySnapshot(router_id=router_id, fingerprint=fingerprint, snapshot=snapshot,
+                                              facts=facts_json, discovered_at=discovered_at))
+    write(unit)
+
+
+def discover_router_configuration(router_id: int, adapter, force: bool = False,
+                                  session_factory=None, write: Optional[Callable] = None) -> Dict[str, Any]:
+    """
+    Igual que adapter.discover_configuration(), pero reutiliza el snapshot guardado del router
+    mientras su huella no cambie. Agrega 'discovery': {cached, fingerprint, discovered_at}.
+    """
+    if session_factory is None:
+        from src.infrastructure.database.db_manager import get_db
+        session_factory = get_db().session_factory
+    if write is None:
+        from src.infrastructure.database.write_queue import get_write_queue
+        write = get_write_queue().run
+
+    try:
+        facts = adapter.get_discovery_facts(DISCOVERY_COUNTED_PATHS)
+    except Exception as e:
+        logger.warning(f"⚠️ Router {router_id}: no se pudo calcular la huella de descubrimiento: {e}")
+        facts = {}
+    fingerprint = discovery_fingerprint(facts) if facts else None
+
+    if fingerprint and not force:
+        stored = _load_snapshot(session_factory, router_id)
+        if stored and stored['fingerprint'] == fingerprint:
+            DISCOVERY_RESULTS.inc(result='hit')
+            config = json.loads(stored['snapshot'])
+            config['system_info'] = parse_resource_usage(facts['resource'])
+            config['discovery'] = {'cached': True, 'fingerprint': fingerprint,
+                                   'discovered_at': stored['discovered_at'].isoformat() if stored['discovered_at'] else None}
+            return config
+
+    DISCOVERY_RESULTS.inc(result='forced' if force else 'miss')
+    config = adapter.discover_configuration()
+    discovered_at = datetime.now()
+    if fingerprint and config:
+        try:
+            _store_snapshot(router_id, fingerprint, config, facts, discovered_at, write)
+        except Exception as e:
+            logger.error(f"No se pudo guardar el snapshot de descubrimiento del router {router_id}: {e}")
+    else:
+        logger.info(f"🔎 Router {router_id}: huella incompleta, descubrimiento sin caché")
+    if config:
+        config['discovery'] = {'cached': False, 'fingerprint': fingerprint, 'discovered_at': discovered_at.isoformat()}
+    return config
@@ -0,0 +1,153 @@
+"""
+Technical Names Reconciliation
+Resuelve en bloque los nombres técnicos (cola simple e interfaz) de los clientes de un router.
+- Una sola lectura de /ppp/secret, /queue/simple y /interface por router.
+- Índices por nombre, IP y comentario (normalizados) en lugar de búsquedas por cliente.
+- El diff completo se aplica en una única actualización por lotes.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.infrastructure.mikrotik.adapter import normalize_name
+
+logger = logging.getLogger(__name__)
+
+
+def _ip(value: Optional[str]) -> Optional[str]:
+    """'10.0.0.5/32' -> '10.0.0.5' (targets de colas y remote-address de secrets)"""
+    if not value:
+        return None
+    return value.split(',')[0].split('/')[0].strip() or None
+
+
+@dataclass
+class TechnicalNameIndex:
+    """Índices de búsqueda sobre los objetos del router (claves en minúsculas, valores con el nombre real)"""
+    queue_by_name: Dict[str, str] = field(default_factory=dict)
+    queue_by_ip: Dict[str, str] = field(default_factory=dict)
+    queue_by_comment: Dict[str, str] = field(default_factory=dict)
+    iface_by_name: Dict[str, str] = field(default_factory=dict)
+    secret_by_name: Dict[str, str] = field(default_factory=dict)
+    secret_by_ip: Dict[str, str] = field(default_factory=dict)
+    secret_by_comment: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, secrets: Iterable[Dict[str, Any]], queues: Iterable[Dict[str, Any]],
+              interfaces: Iterable[Dict[str, Any]]) -> 'TechnicalNameIndex':
+        index = cls()
+        for q in queues:
+            name = q.get('name')
+            if not name:
+                continue
+            index.queue_by_name.setdefault(name.lower(), name)
+            ip = _ip(q.get('target'))
+            if ip:
+                index.queue_by_ip.setdefault(ip, name)
+            comment = normalize_name(q.get('comment', ''))
+            if comment:
+                index.queue_by_comment.setdefault(comment, name)
+        for s in secrets:
+            name = s.get('name')
+            if not name:
+                continue
+            index.secret_by_name.setdefault(name.lower(), name)
+            ip = _ip(s.get('remote-address'))
+            if ip:
+                index.secret_by_ip.setdefault(ip, name)
+            comment = normalize_name(s.get('comment', ''))
+            if comment:
+                index.secret_by_comment.setdefault(comment, name)
+        for i in interfaces:
+            name = i.get('name')
+            if name:
+                index.iface_by_name.setdefault(name.lower(), name)
+        return index
+
+    def _secret_for(self, username: str, legal_norm: str, ip: Optional[str]) -> Optional[str]:
+        return (self.secret_by_name.get(username)
+                or (self.secret_by_comment.get(legal_norm) if legal_norm else None)
+                or (self.secret_by_ip.get(ip) if ip else None))
+
+    def resolve(self, username: Optional[str], legal_name: Optional[str],
+                ip_address: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """(nombre de cola, nombre de interfaz) del cliente; None si el router no tiene el objeto"""
+        user_l = (username or '').strip().lower()
+        legal_norm = normalize_name(legal_name or '')
+        ip = _ip(ip_address)
+        secret = self._secret_for(user_l, legal_norm, ip)
+        aliases = [a for a in dict.fromkeys([user_l, (secret or '').lower()]) if a]
+
+        # A. Interfaz: la dinámica de PPPoE se llama <pppoe-usuario> (existe sólo con sesión activa)
+        iface = None
+        for alias in aliases:
+            iface = next((self.iface_by_name[p] for p in (alias, f"<{alias}>", f"pppoe-{alias}", f"<pppoe-{alias}>")
+                          if p in self.iface_by_name), None)
+            if iface:
+                break
+        if not iface and secret:
+            iface = f"<pppoe-{secret}>"
+
+        # B. Cola: nombre (usuario, secret, razón social) -> comentario -> IP del target
+        patterns = []
+        for alias in aliases:
+            patterns += [alias, f"<{alias}>", f"<pppoe-{alias}>", alias.replace('-', '_')]
+        if legal_norm:
+            patterns += [legal_norm, f"<{legal_norm}>"]
+        queue = next((self.queue_by_name[p] for p in patterns if p in self.queue_by_name), None)
+        if not queue and legal_norm:
+            queue = self.queue_by_comment.get(legal_norm)
+        if not queue and ip:
+            queue = self.queue_by_ip.get(ip)
+        return queue, iface
+
+
+def fetch_router_objects(adapter) -> Dict[str, List[Dict[str, Any]]]:
+    """Una lectura por tabla con sólo las columnas necesarias"""
+    return {
+        'secrets': adapter._get_resource('/ppp/secret').call('print', {'.proplist': 'name,remote-address,comment'}),
+        'queues': adapter._get_resource('/queue/simple').call('print', {'.proplist': 'name,target,comment'}),
+        'interfaces': adapter._get_resource('/interface').call('print', {'.proplist': 'name'}),
+    }
+
+
+def compute_name_changes(clients: Iterable[Any], index: TechnicalNameIndex) -> List[Dict[str, Any]]:
+    """
+    Diff completo: filas {'id', 'mikrotik_queue_name', 'mikrotik_interface_name'} sólo de los
+    clientes cuyo nombre resuelto difiere del guardado.
+    """
+    changes = []
+    for c in clients:
+        queue, iface = index.resolve(c.username, c.legal_name, c.ip_address)
+        if queue != c.mikrotik_queue_name or iface != c.mikrotik_interface_name:
+            changes.append({'id': c.id, 'mikrotik_queue_name': queue, 'mikrotik_interface_name': iface})
+    return changes
+
+
+def reconcile_technical_names(router_id: int, adapter, session_factory, write=None) -> List[Dict[str, Any]]:
+    """
+    Reconciliación en una pasada para un router: lectura del router, lectura de columnas
+    de clientes, diff y una sola actualización por lotes (vía la cola de escritura por defecto).
+    Retorna los cambios aplicados.
+    """
+    from src.infrastructure.database.models import Client
+
+    objects = fetch_router_objects(adapter)
+    index = TechnicalNameIndex.build(objects['secrets'], objects['queues'], objects['interfaces'])
+
+    session = session_factory()
+    try:
+        clients = session.query(
+            Client.id, Client.username, Client.legal_name, Client.ip_address,
+            Client.mikrotik_queue_name, Client.mikrotik_interface_name,
+        ).filter(Client.router_id == router_id).all()
+    finally:
+        session.close()
+
+    changes = compute_name_changes(clients, index)
+    if changes:
+        if write is None:
+            from src.infrastructure.database.write_queue import get_write_queue
+            write = get_write_queue().run
+        write(lambda s: s.bulk_update_mappings(Client, changes))
+    return changes
@@ -1,7 +1,141 @@
 
 from src.infrastructure.database.db_manager import get_db
 from src.infrastructure.database.models import Tenant
+from dataclasses import dataclass
+from typing import Dict, Optional
 import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RESERVED_SUBDOMAINS = ('www', 'app', 'api')
+
+
+@dataclass(frozen=True)
+class TenantInfo:
+    """Datos del tenant que necesita cada request (copia desacoplada de la sesión ORM)"""
+    id: int
+    name: str
+    subdomain: str
+    brand_color: Optional[str] = None
+    logo_path: Optional[str] = None
+
+    @classmethod
+    def from_model(cls, tenant: Tenant) -> 'TenantInfo':
+        return cls(id=tenant.id, name=tenant.name, subdomain=tenant.subdomain,
+                   brand_color=tenant.brand_color, logo_path=tenant.logo_path)
+
+
+class TenantHostCache:
+    """
+    Mapa subdominio -> tenant en memoria del proceso.
+    Se carga completo (warm) y se invalida cuando cambia un Tenant en este proceso;
+    max_age acota lo que puede tardar en verse un cambio hecho por otro proceso.
+    Los subdominios desconocidos quedan en caché negativa negative_ttl segundos.
+    """
+
+    def __init__(self, max_age: float = 300.0, negative_ttl: float = 60.0, max_negative: int = 10000,
+                 clock=time.monotonic):
+        self.max_age = max_age
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self._clock = clock
+        self._by_subdomain: Dict[str, TenantInfo] = {}
+        self._missing: Dict[str, float] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'loads': 0}
+
+    def warm(self, session=None) -> int:
+        """Carga todos los tenants activos. Retorna cuántos quedaron en caché."""
+        session = session or get_db().session
+        tenants = session.query(Tenant).filter(Tenant.is_active == True, Tenant.subdomain != None).all()
+        mapping = {t.subdomain.lower(): TenantInfo.from_model(t) for t in tenants}
+        with self._lock:
+            self._by_subdomain = mapping
+            self._missing = {}
+            self._loaded_at = self._clock()
+            self.stats['loads'] += 1
+        return len(mapping)
+
+    def invalidate(self):
+        with self._lock:
+            self._by_subdomain = {}
+            self._missing = {}
+            self._loaded_at = None
+
+    def lookup(self, subdomain: str, session=None) -> Optional[TenantInfo]:
+        subdomain = subdomain.lower()
+        now = self._clock()
+        if self._loaded_at is None or now - self._loaded_at > self.max_age:
+            self.warm(session)
+
+        tenant = self._by_subdomain.get(subdomain)
+        if tenant is not None:
+            self.stats['hits'] += 1
+            return tenant
+        expires = self._missing.get(subdomain)
+        if expires is not None and expires > now:
+            self.stats['negative_hits'] += 1
+            return None
+
+        # Desconocido: puede haberse creado en otro proceso después del warm
+        self.stats['misses'] += 1
+        session = session or get_db().session
+        model = session.query(Tenant).filter(Tenant.subdomain == subdomain, Tenant.is_active == True).first()
+        with self._lock:
+            if model is not None:
+                tenant = TenantInfo.from_model(model)
+                self._by_subdomain = {**self._by_subdomain, subdomain: tenant}
+                return tenant
+            if len(self._missing) >= self.max_negative:
+                self._missing = {k: v for k, v in self._missing.items() if v > now}
+                if len(self._missing) >= self.max_negative:
+                    self._missing.clear()
+            self._missing[subdomain] = now + self.negative_ttl
+        return None
+
+
+_host_cache: Optional[TenantHostCache] = None
+_host_cache_lock = threading.Lock()
+
+
+def get_tenant_host_cache() -> TenantHostCache:
+    global _host_cache
+    if _host_cache is None:
+        with _host_cache_lock:
+            if _host_cache is None:
+                _host_cache = TenantHostCache()
+    return _host_cache
+
+
+def _register_invalidation():
+    """Invalida el mapa al escribir un Tenant y otra vez al confirmar (evita quedarse con datos sin commit)"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session, object_session
+
+    def on_tenant_change(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info['tenant_cache_dirty'] = True
+        get_tenant_host_cache().invalidate()
+
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(Tenant, name, on_tenant_change)
+
+    @event.listens_for(Session, 'after_commit')
+    def on_commit(session):
+        if session.info.pop('tenant_cache_dirty', False):
+            get_tenant_host_cache().invalidate()
+
+    @event.listens_for(Session, 'after_soft_rollback')
+    def on_rollback(session, previous_transaction):
+        session.info.pop('tenant_cache_dirty', None)
+
+
+_register_invalidation()
 
 class TenantService:
     """Servicio para gestión de Inquilinos (Tenants)"""
@@ -19,9 +153,9 @@ class TenantService:
         return session.query(Tenant).get(tenant_id)
 
     @staticmethod
-    def resolve_from_host(host: str) -> Tenant:
+    def resolve_from_host(host: str) -> Optional[TenantInfo]:
         """
-        Resuelve el tenant basado en el hostname (subdominio).
+        Resuelve el tenant basado en el hostname (subdominio) desde el mapa en memoria.
         Ej: 'cliente1.sgubm.com' -> cliente1
         """
         if not host or '.' not in host:
@@ -31,11 +165,18 @@ class TenantService:
         # Asumiendo estructura: subdominio.dominio.tld o subdominio.localhost:port
         if len(parts) >= 2:
             subdomain = parts[0]
-            if subdomain in ['www', 'app', 'api']:
+            if subdomain in RESERVED_SUBDOMAINS:
                 return None
-            return TenantService.get_by_subdomain(subdomain)
+            return get_tenant_host_cache().lookup(subdomain)
         return None
 
+    @staticmethod
+    def warm_cache() -> int:
+        """Precarga el mapa host -> tenant (arranque de la app)"""
+        count = get_tenant_host_cache().warm()
+        logger.info(f"🏢 Caché de tenants lista: {count} subdominios")
+        return count
+
     @staticmethod
     def get_settings(tenant_id: int) -> dict:
         """Retorna las configuraciones personalizadas del tenant"""
@@ -0,0 +1,192 @@
+"""
+Traffic Delta Protocol
+Codificación compacta del tráfico de clientes que el monitoreo emite a las salas router_{id}.
+- Índice de clientes por stream (epoch): slot -> client_id, enviado una vez y no en cada tick.
+- Frames 'client_traffic_delta' con sólo las filas que cambiaron, como arreglo plano de enteros
+  [slot, flags, up, down, ...] y tasas cuantizadas (quantum bps por unidad).
+- Keyframes periódicos con la tabla completa (compactan slots de clientes que ya no se monitorean) y
+  keyframes a pedido (join_router / traffic_resync) que no alteran la tabla de la sala.
+- msgpack opcional: si está instalado, el frame viaja como binario de Socket.IO.
+
+Campos del frame:
+    v versión · r router_id · e epoch · s secuencia · k 1 si keyframe · q quantum · t timestamp
+    ids  tabla completa slot -> client_id (keyframe)
+    add  [base, id, id, ...] slots nuevos a partir de base (delta)
+    d    [slot, flags, up, down, ...] con flags = online | método << 1
+El navegador (static/js/services/traffic-stream.service.js) reconstruye el mismo
+{client_id: {id, status, upload, download, method}} que emitía el protocolo JSON.
+"""
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PROTOCOL_VERSION = 1
+METHODS = ('none', 'pppoe', 'arp', 'dhcp')
+_METHOD_CODES = {m: i for i, m in enumerate(METHODS)}
+
+Row = Tuple[int, int, int]   # (flags, up, down) cuantizados
+
+
+def encode_row(data: Dict[str, Any], quantum: int) -> Row:
+    flags = (1 if data.get('status') == 'online' else 0) | (_METHOD_CODES.get(data.get('method'), 0) << 1)
+    half = quantum // 2
+    return flags, ((data.get('upload') or 0) + half) // quantum, ((data.get('download') or 0) + half) // quantum
+
+
+def decode_row(cid: Any, flags: int, up: int, down: int, quantum: int) -> Dict[str, Any]:
+    method = flags >> 1
+    return {
+        'id': cid,
+        'status': 'online' if flags & 1 else 'offline',
+        'upload': up * quantum,
+        'download': down * quantum,
+        'method': METHODS[method] if method < len(METHODS) else 'none',
+    }
+
+
+class TrafficDeltaEncoder:
+    """Estado del stream de un router: índice de slots, último valor enviado y secuencia"""
+
+    def __init__(self, router_id: int, quantum: int = 1000, threshold: int = 50000,
+                 keyframe_seconds: float = 30, clock=time.time):
+        self.router_id = router_id
+        self.quantum = max(1, int(quantum))
+        self.threshold_units = threshold / self.quantum
+        self.keyframe_seconds = keyframe_seconds
+        self.clock = clock
+        self.epoch = random.randint(1, 2 ** 31 - 1)   # Cambia si el proceso reinicia: el navegador se resincroniza
+        self.seq = 0
+        self.ids: List[Any] = []
+        self.slots: Dict[Any, int] = {}
+        self.sent: List[Optional[Row]] = []      # Último valor emitido por slot
+        self.current: List[Optional[Row]] = []   # Último valor conocido por slot (para keyframes a pedido)
+        self._last_keyframe: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _slot(self, cid: Any) -> int:
+        slot = self.slots.get(cid)
+        if slot is None:
+            slot = len(self.ids)
+            self.slots[cid] = slot
+            self.ids.append(cid)
+            self.sent.append(None)
+            self.current.append(None)
+        return slot
+
+    def _frame(self, keyframe: bool, now: float, data: List[int], added: Optional[List[Any]] = None) -> Dict[str, Any]:
+        frame = {'v': PROTOCOL_VERSION, 'r': self.router_id, 'e': self.epoch, 's': self.seq,
+                 'k': 1 if keyframe else 0, 'q': self.quantum, 't': round(now, 3), 'd': data}
+        if keyframe:
+            frame['ids'] = list(self.ids)
+        elif added:
+            frame['add'] = added
+        return frame
+
+    def encode(self, traffic: Dict[Any, Dict[str, Any]], now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Frame para el tick (delta o keyframe periódico); None si nada cambió lo suficiente"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            if self._last_keyframe is None or now - self._last_keyframe >= self.keyframe_seconds:
+                return self._periodic_keyframe(traffic, now)
+
+            base = len(self.ids)
+            data: List[int] = []
+            # Bucle caliente (todos los clientes monitoreados por tick): encode_row y _changed en línea
+            q, half, limit = self.quantum, self.quantum // 2, self.threshold_units
+            slots, sent, current = self.slots, self.sent, self.current
+            for cid, cdata in traffic.items():
+                slot = slots.get(cid)
+                if slot is None:
+                    slot = self._slot(cid)
+                flags = (1 if cdata['status'] == 'online' else 0) | (_METHOD_CODES.get(cdata.get('method'), 0) << 1)
+                row = (flags, ((cdata['upload'] or 0) + half) // q, ((cdata['download'] or 0) + half) // q)
+                current[slot] = row
+                last = sent[slot]
+                if last is None or flags != last[0] or abs(row[1] - last[1]) > limit or abs(row[2] - last[2]) > limit:
+                    sent[slot] = row
+                    data.extend((slot, *row))
+            added = self.ids[base:]
+            if not data and not added:
+                return None
+            self.seq += 1
+            return self._frame(False, now, data, [base, *added] if added else None)
+
+    def _periodic_keyframe(self, traffic: Dict[Any, Dict[str, Any]], now: float) -> Dict[str, Any]:
+        # Cada tick trae todos los clientes monitoreados: los ausentes ya no tienen suscriptores y se compactan
+        self.ids, self.slots, self.sent, self.current = [], {}, [], []
+        for cid, cdata in traffic.items():
+            self.current[self._slot(cid)] = encode_row(cdata, self.quantum)
+        self._last_keyframe = now
+        self.seq += 1
+        return self._keyframe_locked(now, commit=True)
+
+    def _keyframe_locked(self, now: float, commit: bool) -> Dict[str, Any]:
+        data: List[int] = []
+        for slot, row in enumerate(self.current):
+            if row is not None:
+                data.extend((slot, *row))
+                if commit:
+                    self.sent[slot] = row
+        return self._frame(True, now, data)
+
+    def keyframe(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Keyframe a pedido para un navegador que entra o perdió la secuencia.
+        Reusa la secuencia actual y no toca lo enviado a la sala: los deltas siguientes (s+1) aplican igual.
+        """
+        with self._lock:
+            if self._last_keyframe is None:
+                return None
+            return self._keyframe_locked(self.clock() if now is None else now, commit=False)
+
+
+class TrafficDeltaDecoder:
+    """Contraparte en Python del consumidor JS (scripts de diagnóstico y pruebas)"""
+
+    def __init__(self):
+        self.streams: Dict[int, Dict[str, Any]] = {}
+
+    def apply(self, frame: Any) -> Optional[Dict[Any, Dict[str, Any]]]:
+        """Filas cambiadas {client_id: {...}}; None si el frame no es aplicable (falta keyframe)"""
+        if isinstance(frame, (bytes, bytearray)):
+            frame = unpack_frame(frame)
+        router_id = frame['r']
+        stream = self.streams.get(router_id)
+        if frame.get('k'):
+            stream = {'epoch': frame['e'], 'seq': frame['s'], 'ids': list(frame['ids'])}
+            self.streams[router_id] = stream
+        else:
+            if not stream or stream['epoch'] != frame['e'] or frame['s'] != stream['seq'] + 1:
+                return None
+            added = frame.get('add')
+            if added:
+                if added[0] != len(stream['ids']):
+                    return None
+                stream['ids'].extend(added[1:])
+            stream['seq'] = frame['s']
+        ids, q, d = stream['ids'], frame['q'], frame['d']
+        return {ids[d[i]]: decode_row(ids[d[i]], d[i + 1], d[i + 2], d[i + 3], q) for i in range(0, len(d), 4)}
+
+
+# --- Binario opcional ---
+
+def msgpack_available() -> bool:
+    try:
+        import msgpack  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def pack_frame(frame: Dict[str, Any], binary: bool = False):
+    """dict (JSON de Socket.IO) o bytes msgpack (adjunto binario de Socket.IO)"""
+    if not binary:
+        return frame
+    import msgpack
+    return msgpack.packb(frame, use_bin_type=True)
+
+
+def unpack_frame(payload: bytes) -> Dict[str, Any]:
+    import msgpack
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False)
@@ -6,6 +6,7 @@ Este motor está diseñado para ser invocado por el MonitoringManager y no depen
 import logging
 from typing import List, Dict, Set, Optional
 from cachetools import TTLCache
+from src.infrastructure.mikrotik.parsing import parse_rate_pair
 
 logger = logging.getLogger(__name__)
 
@@ -124,12 +125,7 @@ class TrafficSurgicalEngine:
             name = q.get('name', '').lower()
             if not name: continue
             
-            rate = q.get('rate', '0/0')
-            try:
-                u, d = rate.split('/')
-                up, dw = int(u), int(d)
-            except:
-                up, dw = 0, 0
+            up, dw = parse_rate_pair(q.get('rate'))
                 
             target = q.get('target', '')
             ip = target.split('/')[0] if '/' in target else target
@@ -54,14 +54,18 @@ class WhatsAppAgentService(IWhatsAppAgentService):
         
         return response
 
-    def _log_outgoing(self, phone: str, text: str, client_id: Optional[int], intent: str):
-        msg_obj = self.whatsapp_repo.create({
+    def _log_outgoing(self, phone: str, text: str, client_id: Optional[int], intent: str,
+                      tenant_id: Optional[int] = None):
+        data = {
             'client_id': client_id,
             'phone': phone,
             'message_text': text,
             'is_outgoing': True,
             'intent_identified': intent
-        })
+        }
+        if tenant_id is not None:
+            data['tenant_id'] = tenant_id   # Fuera de un request before_insert no tiene g.tenant_id
+        msg_obj = self.whatsapp_repo.create(data)
         from src.application.events.event_bus import SystemEvents
         self.event_bus.publish(SystemEvents.WHATSAPP_MESSAGE_SENT, msg_obj.to_dict())
 
@@ -157,13 +161,5 @@ class WhatsAppAgentService(IWhatsAppAgentService):
         return f"Muchas gracias por su mensaje, {client.legal_name}. Como su asistente virtual, he registrado su consulta. Un asesor especializado la atenderá personalmente en unos instantes para brindarle una solución a medida."
 
     def _find_client_by_phone(self, phone: str) -> Optional[Any]:
-        # Clean phone number
-        clean_phone = "".join(filter(str.isdigit, phone))
-        if not clean_phone:
-            return None
-            
-        # Try finding by exact match or suffix (last 10 digits as a common pattern)
-        # We search in DB using ilike for more flexibility
-        search_pattern = f"%{clean_phone[-10:]}%"
-        from src.infrastructure.database.models import Client
-        return self.db_manager.session.query(Client).filter(Client.phone.ilike(search_pattern)).first()
+        # Lookup indexado por E.164 (principal y secundarios), sin escaneo ilike
+        return self.client_repo.find_by_phone(phone)
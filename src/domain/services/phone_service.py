@@ -0,0 +1,68 @@
+import re
+from typing import List, Optional
+
+# Separadores habituales cuando el campo guarda varios números ("0414-... / 0424-...")
+_SEPARATORS = re.compile(r'[/,;|\n]|\s+(?:y|o)\s+', re.IGNORECASE)
+
+
+class PhoneService:
+    """
+    Normalización de teléfonos a E.164
+    Convierte formatos nacionales (0414-1234567), internacionales (+58 414 ...)
+    e identificadores de WhatsApp (584141234567@c.us) a una misma clave de búsqueda.
+    El código de país por defecto es NotificationConfig.phone_country_code (PHONE_COUNTRY_CODE).
+    """
+
+    @staticmethod
+    def default_country_code() -> str:
+        from src.infrastructure.config.settings import get_config
+        return get_config().notification.phone_country_code
+
+    @staticmethod
+    def normalize(raw: Optional[str], country_code: Optional[str] = None) -> Optional[str]:
+        """Retorna el número en formato E.164 (+584141234567) o None si no es utilizable."""
+        if not raw:
+            return None
+        country_code = country_code or PhoneService.default_country_code()
+        raw = str(raw).split('@')[0].strip()
+        digits = ''.join(ch for ch in raw if ch.isdigit())
+        if not digits:
+            return None
+
+        if raw.startswith('+'):
+            e164 = digits
+        elif digits.startswith('00'):
+            e164 = digits[2:]
+        elif digits.startswith(country_code) and len(digits) == len(country_code) + 10:
+            e164 = digits
+        elif digits.startswith('0') and len(digits) == 11:
+            e164 = country_code + digits[1:]   # Prefijo troncal nacional
+        elif len(digits) == 10:
+            e164 = country_code + digits
+        else:
+            e164 = digits
+
+        # E.164: máximo 15 dígitos; menos de 11 no identifica un móvil con país
+        if not 11 <= len(e164) <= 15:
+            return None
+        return f"+{e164}"
+
+    @staticmethod
+    def extract_all(raw: Optional[str], country_code: Optional[str] = None) -> List[str]:
+        """Normaliza todos los números presentes en un campo (principal primero, sin duplicados)."""
+        if not raw:
+            return []
+        country_code = country_code or PhoneService.default_country_code()
+        numbers: List[str] = []
+        for chunk in _SEPARATORS.split(str(raw)):
+            normalized = PhoneService.normalize(chunk, country_code)
+            if normalized is None and sum(ch.isdigit() for ch in chunk) > 15:
+                # Dos números separados sólo por espacios
+                for part in chunk.split():
+                    part_normalized = PhoneService.normalize(part, country_code)
+                    if part_normalized and part_normalized not in numbers:
+                        numbers.append(part_normalized)
+                continue
+            if normalized and normalized not in numbers:
+                numbers.append(normalized)
+        return numbers
@@ -0,0 +1 @@
+"""Cluster: coordinación entre workers (leases, reparto de routers y fan-out de Socket.IO)"""
@@ -0,0 +1,325 @@
+"""
+Cluster Coordinator
+Coordina varios workers (gunicorn -w N) sobre la misma base de datos, sin servicios extra:
+- Cada worker renueva un lease 'worker:<id>' en cluster_leases cada heartbeat_seconds.
+- Un único líder (lease 'leader:automation') ejecuta la automatización (facturación, cortes).
+- Los routers se reparten por hashing consistente entre los workers vivos; si uno deja de
+  latir, su lease vence y sus routers pasan a los demás moviendo sólo esa fracción.
+- Un worker que necesita un router ajeno publica un lease 'interest' para que el dueño lo monitoree.
+
+Deshabilitado (CLUSTER_ENABLED=false) el proceso es líder y dueño de todo, como antes.
+Los vencimientos usan el reloj de cada worker: en varios hosts el desfase debe ser << lease_seconds.
+"""
+import bisect
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from src.infrastructure.observability.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+KIND_WORKER = 'worker'
+KIND_LEADER = 'leader'
+KIND_INTEREST = 'interest'
+LEADER_LEASE = 'leader:automation'
+
+CLUSTER_WORKERS = get_metrics().gauge('sgubm_cluster_workers', 'Workers vivos según los leases del cluster')
+CLUSTER_LEADER = get_metrics().gauge('sgubm_cluster_leader', '1 si este worker es el líder de automatización')
+
+InterestProvider = Callable[[], Dict[str, Dict[str, Any]]]
+RebalanceListener = Callable[['ClusterCoordinator'], None]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class HashRing:
+    """Anillo de hashing consistente con nodos virtuales (md5, estable entre procesos)"""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = max(1, replicas)
+        self._keys: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: Set[str] = set()
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            point = self._hash(f"{node}#{i}")
+            index = bisect.bisect(self._keys, point)
+            self._keys.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        kept = [(k, o) for k, o in zip(self._keys, self._owners) if o != node]
+        self._keys = [k for k, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def node_for(self, key: Any) -> Optional[str]:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, self._hash(str(key))) % len(self._keys)
+        return self._owners[index]
+
+
+class LeaseStore:
+    """Leases con vencimiento sobre la tabla cluster_leases (UPDATE condicional + INSERT)"""
+
+    def __init__(self, engine):
+        from src.infrastructure.database.models import ClusterLease
+        self.engine = engine
+        self.table = ClusterLease.__table__
+
+    def acquire(self, name: str, kind: str, holder: str, now: datetime, expires_at: datetime,
+                payload: Optional[str] = None) -> bool:
+        """Toma o renueva el lease si es propio o ya venció. False si otro lo tiene vigente."""
+        from sqlalchemy import or_
+        from sqlalchemy.exc import IntegrityError
+
+        t = self.table
+        values = {'kind': kind, 'holder': holder, 'expires_at': expires_at, 'renewed_at': now, 'payload': payload}
+        with self.engine.begin() as conn:
+            updated = conn.execute(
+                t.update().where(t.c.name == name).where(or_(t.c.holder == holder, t.c.expires_at < now)).values(**values)
+            ).rowcount
+        if updated:
+            return True
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(t.insert().values(name=name, **values))
+            return True
+        except IntegrityError:
+            return False   # Existe y lo tiene otro worker
+
+    def release(self, name: str, holder: str):
+        t = self.table
+        with self.engine.begin() as conn:
+            conn.execute(t.delete().where(t.c.name == name).where(t.c.holder == holder))
+
+    def release_all(self, holder: str):
+        t = self.table
+        with self.engine.begin() as conn:
+            conn.execute(t.delete().where(t.c.holder == holder))
+
+    def live(self, kind: str, now: datetime) -> List[Any]:
+        t = self.table
+        with self.engine.connect() as conn:
+            return list(conn.execute(
+                t.select().where(t.c.kind == kind).where(t.c.expires_at >= now).order_by(t.c.name)))
+
+    def purge(self, before: datetime) -> int:
+        t = self.table
+        with self.engine.begin() as conn:
+            return conn.execute(t.delete().where(t.c.expires_at < before)).rowcount
+
+
+class ClusterCoordinator:
+    """
+    Membresía, liderazgo y reparto de routers de este worker.
+    tick() hace una ronda (latido, liderazgo, intereses, anillo); start() la repite en un hilo.
+    Los listeners se llaman tras un tick cuando cambian los workers vivos o los intereses.
+    """
+
+    def __init__(self, store: Optional[LeaseStore], worker_id: Optional[str] = None, lease_seconds: int = 30,
+                 heartbeat_seconds: int = 10, replicas: int = 64, enabled: bool = True,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.store = store
+        self.worker_id = worker_id or default_worker_id()
+        self.lease = timedelta(seconds=lease_seconds)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.replicas = replicas
+        self.enabled = enabled
+        self.clock = clock
+        self._ring = HashRing([self.worker_id], replicas)
+        self._members: List[str] = [self.worker_id]
+        self._leader_until: Optional[datetime] = None
+        self._interests: Dict[str, Dict[str, Dict[str, Any]]] = {}   # {clave: {worker: payload}}
+        self._published: Set[str] = set()
+        self._providers: List[InterestProvider] = []
+        self._listeners: List[RebalanceListener] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Consultas ---
+
+    def is_leader(self) -> bool:
+        if not self.enabled:
+            return True
+        until = self._leader_until
+        return until is not None and self.clock() < until
+
+    def owner_of(self, key: Any) -> str:
+        if not self.enabled:
+            return self.worker_id
+        with self._lock:
+            return self._ring.node_for(key) or self.worker_id
+
+    def owns(self, key: Any) -> bool:
+        return self.owner_of(key) == self.worker_id
+
+    @property
+    def members(self) -> List[str]:
+        with self._lock:
+            return list(self._members)
+
+    def interests(self) -> Dict[str, List[Dict[str, Any]]]:
+        """{clave: [payload de cada worker interesado]} vigentes en el último tick"""
+        with self._lock:
+            return {k: list(v.values()) for k, v in self._interests.items()}
+
+    def interests_by_worker(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """{clave: {worker: payload}} vigentes en el último tick (para saber quién pidió qué)"""
+        with self._lock:
+            return {k: dict(v) for k, v in self._interests.items()}
+
+    # --- Extensión ---
+
+    def add_interest_provider(self, provider: InterestProvider):
+        """provider() -> {clave: payload JSON} que este worker necesita que su dueño atienda"""
+        if provider not in self._providers:
+            self._providers.append(provider)
+
+    def add_listener(self, listener: RebalanceListener):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    # --- Ciclo ---
+
+    def _interest_lease(self, key: str) -> str:
+        return f"{KIND_INTEREST}:{key}:{self.worker_id}"
+
+    def tick(self) -> bool:
+        """Una ronda de coordinación. Retorna True si cambió el reparto (workers o intereses)."""
+        if not self.enabled:
+            return False
+        now = self.clock()
+        expires = now + self.lease
+        store = self.store
+
+        store.acquire(f"{KIND_WORKER}:{self.worker_id}", KIND_WORKER, self.worker_id, now, expires)
+
+        was_leader = self.is_leader()
+        leader = store.acquire(LEADER_LEASE, KIND_LEADER, self.worker_id, now, expires)
+        self._leader_until = expires if leader else None
+        if leader != was_leader:
+            logger.info(f"👑 Cluster: {self.worker_id} {'asume' if leader else 'cede'} el liderazgo de automatización")
+        CLUSTER_LEADER.set(1 if leader else 0)
+
+        published: Dict[str, Dict[str, Any]] = {}
+        for provider in list(self._providers):
+            try:
+                published.update(provider() or {})
+            except Exception as e:
+                logger.error(f"Cluster: proveedor de intereses falló: {e}")
+        for key, payload in published.items():
+            store.acquire(self._interest_lease(key), KIND_INTEREST, self.worker_id, now, expires,
+                          json.dumps({'key': key, 'worker': self.worker_id, 'data': payload}))
+        for key in self._published - set(published):
+            store.release(self._interest_lease(key), self.worker_id)
+        self._published = set(published)
+
+        if leader:
+            store.purge(now - self.lease)   # Leases de workers muertos hace más de un período
+
+        members = sorted({row.holder for row in store.live(KIND_WORKER, now)} | {self.worker_id})
+        interests: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for row in store.live(KIND_INTEREST, now):
+            try:
+                entry = json.loads(row.payload)
+            except (TypeError, ValueError):
+                continue
+            interests.setdefault(entry['key'], {})[entry.get('worker') or row.holder] = entry.get('data') or {}
+
+        with self._lock:
+            changed = members != self._members or interests != self._interests
+            if members != self._members:
+                logger.info(f"🔀 Cluster: workers vivos {self._members} -> {members}")
+                self._ring = HashRing(members, self.replicas)
+                self._members = members
+            self._interests = interests
+        CLUSTER_WORKERS.set(len(members))
+
+        if changed:
+            for listener in list(self._listeners):
+                try:
+                    listener(self)
+                except Exception as e:
+                    logger.error(f"Cluster: error en listener de rebalanceo: {e}")
+        return changed
+
+    def start(self):
+        """Primera ronda síncrona (el reparto ya es válido al volver) y luego el hilo de latidos"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        try:
+            self.tick()
+        except Exception as e:
+            logger.error(f"Cluster: primera ronda de coordinación falló: {e}")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ClusterCoordinator")
+        self._thread.start()
+        logger.info(f"🤝 Cluster: worker {self.worker_id} coordinando (lease {int(self.lease.total_seconds())}s)")
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Cluster: error en latido: {e}")
+
+    def stop(self):
+        """Detiene el latido y libera los leases para que el resto rebalancee sin esperar el vencimiento"""
+        if not self.enabled:
+            return
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._leader_until = None
+        self._published = set()
+        try:
+            self.store.release_all(self.worker_id)
+        except Exception as e:
+            logger.error(f"Cluster: no se pudieron liberar los leases: {e}")
+
+
+_coordinator: Optional[ClusterCoordinator] = None
+_coordinator_lock = threading.Lock()
+
+
+def get_coordinator() -> ClusterCoordinator:
+    """Coordinador del proceso según CLUSTER_*; deshabilitado no toca la base de datos"""
+    global _coordinator
+    if _coordinator is None:
+        with _coordinator_lock:
+            if _coordinator is None:
+                from src.infrastructure.config.settings import get_config
+
+                cfg = get_config().cluster
+                store = None
+                if cfg.enabled:
+                    from src.infrastructure.database.db_manager import get_db
+                    store = LeaseStore(get_db().engine)
+                _coordinator = ClusterCoordinator(
+                    store, worker_id=cfg.worker_id or None, lease_seconds=cfg.lease_seconds,
+                    heartbeat_seconds=cfg.heartbeat_seconds, replicas=cfg.ring_replicas, enabled=cfg.enabled)
+    return _coordinator
@@ -0,0 +1,120 @@
+"""
+Socket.IO Message Queue
+Fan-out de emits entre workers: lo que un proceso emite llega a los clientes conectados a cualquiera.
+- SOCKETIO_MESSAGE_QUEUE=redis://... | amqp://...: gestores nativos de Flask-SocketIO.
+- SOCKETIO_MESSAGE_QUEUE=db: DatabaseSocketIOManager, cola sobre la tabla socketio_messages
+  (sin servicios extra; cada worker sondea los mensajes nuevos cada poll_interval).
+- Con CLUSTER_ENABLED el navegador se conecta sólo por websocket: gunicorn no tiene sesiones
+  pegajosas y el long-polling de Engine.IO exige que cada petición llegue al mismo worker.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from socketio import PubSubManager
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseSocketIOManager(PubSubManager):
+    """
+    Gestor pub/sub de python-socketio respaldado por la base de datos.
+    Los mensajes se leen por id creciente desde el último visto; los de más de
+    retention_seconds se borran (cualquier worker puede hacerlo, la limpieza es idempotente).
+    En PostgreSQL un id menor puede confirmarse después de uno mayor: los huecos de la secuencia
+    se vuelven a consultar durante gap_timeout segundos antes de darlos por perdidos (rollback).
+    """
+    name = 'sgubm-db'
+
+    def __init__(self, engine, channel: str = 'sgubm', write_only: bool = False, logger=None,
+                 poll_interval: float = 0.1, retention_seconds: int = 60, batch: int = 500,
+                 gap_timeout: float = 5.0):
+        from src.infrastructure.database.models import SocketIOMessage
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.engine = engine
+        self.table = SocketIOMessage.__table__
+        self.poll_interval = poll_interval
+        self.retention = timedelta(seconds=retention_seconds)
+        self.batch = batch
+        self.gap_timeout = gap_timeout
+        self._last_cleanup = 0.0
+
+    def _publish(self, data):
+        t = self.table
+        with self.engine.begin() as conn:
+            conn.execute(t.insert().values(channel=self.channel, payload=self.json.dumps(data),
+                                           created_at=datetime.now()))
+
+    def _latest_id(self) -> int:
+        from sqlalchemy import func, select
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.max(self.table.c.id))).scalar() or 0
+
+    def _cleanup(self):
+        now = time.monotonic()
+        if now - self._last_cleanup < self.retention.total_seconds() / 2:
+            return
+        self._last_cleanup = now
+        t = self.table
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(t.delete().where(t.c.created_at < datetime.now() - self.retention))
+        except Exception as e:
+            logger.debug(f"Limpieza de socketio_messages omitida: {e}")
+
+    def _read(self, last_id: int, gaps: Dict[int, float]) -> List[Any]:
+        """Filas nuevas (id > last_id, todos los canales para detectar huecos) y las que llenaron huecos"""
+        t = self.table
+        with self.engine.connect() as conn:
+            rows = conn.execute(t.select().where(t.c.id > last_id).order_by(t.c.id).limit(self.batch)).fetchall()
+            if gaps:
+                rows = conn.execute(t.select().where(t.c.id.in_(list(gaps)))).fetchall() + rows
+        return rows
+
+    def _listen(self):
+        last_id = self._latest_id()   # Sólo mensajes publicados desde que este worker escucha
+        gaps: Dict[int, float] = {}   # {id aún no visible: vencimiento monotónico}
+        while True:
+            try:
+                rows = self._read(last_id, gaps)
+            except Exception as e:
+                logger.error(f"❌ Socket.IO queue: error leyendo mensajes: {e}")
+                rows = []
+                time.sleep(1)
+            fresh = 0
+            now = time.monotonic()
+            for row in rows:
+                if row.id > last_id:
+                    fresh += 1
+                    if row.id - last_id - 1 <= self.batch:   # Saltos enormes: no es una transacción en vuelo
+                        for missing in range(last_id + 1, row.id):
+                            gaps[missing] = now + self.gap_timeout
+                    last_id = row.id
+                elif gaps.pop(row.id, None) is None:
+                    continue
+                if row.channel == self.channel:
+                    yield row.payload
+            for missing in [i for i, deadline in gaps.items() if deadline < now]:
+                del gaps[missing]
+            self._cleanup()
+            if fresh < self.batch:
+                time.sleep(self.poll_interval)
+
+
+def socketio_transports(cluster_config) -> List[str]:
+    """Transportes del cliente Socket.IO (window.SGUBM_CONFIG.socket_transports)"""
+    return ['websocket'] if cluster_config.enabled else ['polling', 'websocket']
+
+
+def socketio_queue_options(cluster_config) -> Dict[str, Any]:
+    """kwargs adicionales para flask_socketio.SocketIO según SOCKETIO_MESSAGE_QUEUE"""
+    url = (cluster_config.socketio_message_queue or '').strip()
+    if not url:
+        return {}
+    if url == 'db':
+        from src.infrastructure.database.db_manager import get_db
+        logger.info("📡 Socket.IO: fan-out entre workers vía base de datos (socketio_messages)")
+        return {'client_manager': DatabaseSocketIOManager(get_db().engine, channel=cluster_config.socketio_channel)}
+    logger.info(f"📡 Socket.IO: fan-out entre workers vía {url.split('://', 1)[0]}")
+    return {'message_queue': url, 'channel': cluster_config.socketio_channel}
@@ -20,6 +20,19 @@ class DatabaseConfig:
     name: str = os.getenv("DB_NAME", "sgubm_isp")
     user: str = os.getenv("DB_USER", "postgres")
     password: str = os.getenv("DB_PASSWORD", "")
+    # Perfil de engine (ver engine_profiles.py)
+    pool_size: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    sqlite_read_pool: int = int(os.getenv("DB_SQLITE_READ_POOL", "8"))
+    sqlite_busy_timeout_ms: int = int(os.getenv("DB_SQLITE_BUSY_TIMEOUT_MS", "15000"))
+    slow_query_ms: int = int(os.getenv("DB_SLOW_QUERY_MS", "500"))       # Sentencias más lentas se registran con parámetros
+    # Omitir create_all al arrancar (esquema gestionado por migraciones)
+    skip_create_all: bool = os.getenv("DB_SKIP_CREATE_ALL", "false").lower() == "true"
+    # Hilo escritor único para escrituras de fondo: auto (sólo SQLite) | on | off
+    single_writer: str = os.getenv("DB_SINGLE_WRITER", "auto").lower()
     
     @property
     def connection_string(self) -> str:
@@ -48,6 +61,17 @@ class MikroTikConfig:
     max_retries: int = 3
     sync_interval_minutes: int = int(os.getenv("MT_SYNC_INTERVAL", "5"))
     enable_auto_sync: bool = os.getenv("MT_AUTO_SYNC", "true").lower() == "true"
+    # Quality Pulse (pings concurrentes desde el router)
+    pulse_channels: int = int(os.getenv("MT_PULSE_CHANNELS", "4"))
+    pulse_count: int = int(os.getenv("MT_PULSE_COUNT", "5"))
+    pulse_interval_ms: int = int(os.getenv("MT_PULSE_INTERVAL_MS", "200"))
+    pulse_round_deadline: int = int(os.getenv("MT_PULSE_DEADLINE", "240"))
+    # Tráfico de clientes hacia el navegador (ver traffic_delta)
+    traffic_protocol: str = os.getenv("MT_TRAFFIC_PROTOCOL", "delta").lower()          # delta | json (client_traffic legado)
+    traffic_msgpack: bool = os.getenv("MT_TRAFFIC_MSGPACK", "true").lower() == "true"  # Sólo si msgpack está instalado
+    traffic_quantum_bps: int = int(os.getenv("MT_TRAFFIC_QUANTUM_BPS", "1000"))
+    traffic_threshold_bps: int = int(os.getenv("MT_TRAFFIC_THRESHOLD_BPS", "50000"))
+    traffic_keyframe_seconds: int = int(os.getenv("MT_TRAFFIC_KEYFRAME_SECONDS", "30"))
 
 
 @dataclass
@@ -72,6 +96,24 @@ class NotificationConfig:
     sms_provider: str = os.getenv("SMS_PROVIDER", "twilio")
     sms_api_key: str = os.getenv("SMS_API_KEY", "")
     whatsapp_enabled: bool = os.getenv("WHATSAPP_ENABLED", "false").lower() == "true"
+    phone_country_code: str = os.getenv("PHONE_COUNTRY_CODE", "58") # Para normalizar números nacionales a E.164
+    whatsapp_bridge_url: str = os.getenv("WHATSAPP_BRIDGE_URL", "http://localhost:5001")
+    whatsapp_workers: int = int(os.getenv("WHATSAPP_WORKERS", "3"))
+    whatsapp_rate_seconds: float = float(os.getenv("WHATSAPP_RATE_SECONDS", "3")) # Intervalo mínimo por destino
+    whatsapp_max_attempts: int = int(os.getenv("WHATSAPP_MAX_ATTEMPTS", "5"))
+
+
+@dataclass
+class ClusterConfig:
+    """Coordinación entre workers (gunicorn -w N): leases en la base de datos"""
+    enabled: bool = os.getenv("CLUSTER_ENABLED", "false").lower() == "true"
+    worker_id: str = os.getenv("CLUSTER_WORKER_ID", "")                  # Vacío: hostname:pid
+    lease_seconds: int = int(os.getenv("CLUSTER_LEASE_SECONDS", "30"))   # Un worker sin latido se da por muerto
+    heartbeat_seconds: int = int(os.getenv("CLUSTER_HEARTBEAT_SECONDS", "10"))
+    ring_replicas: int = int(os.getenv("CLUSTER_RING_REPLICAS", "64"))   # Nodos virtuales por worker
+    # Fan-out de Socket.IO entre procesos: "" (local), "db" (tabla socketio_messages) o URL redis:// / amqp://
+    socketio_message_queue: str = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+    socketio_channel: str = os.getenv("SOCKETIO_CHANNEL", "sgubm")
 
 
 @dataclass
@@ -80,9 +122,23 @@ class SystemConfig:
     environment: str = os.getenv("ENVIRONMENT", "development")
     debug_mode: bool = os.getenv("DEBUG", "true").lower() == "true"
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_format: str = os.getenv("LOG_FORMAT", "json").lower()            # json | text
+    log_queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))      # Registros en espera del escritor
+    # Log de peticiones: muestreo por defecto y por ruta ("patrón=tasa,patrón=tasa", glob sobre el path)
+    request_log_sample: float = float(os.getenv("REQUEST_LOG_SAMPLE", "1.0"))
+    request_log_routes: str = os.getenv("REQUEST_LOG_ROUTES", "")
+    request_log_slow_ms: int = int(os.getenv("REQUEST_LOG_SLOW_MS", "1000"))  # Lentas: siempre se registran
+    request_log_headers: str = os.getenv("REQUEST_LOG_HEADERS", "")      # Encabezados extra permitidos (coma)
+    request_log_query_warn: int = int(os.getenv("REQUEST_LOG_QUERY_WARN", "50"))  # Posible N+1: siempre se registra
+    # /metrics (texto Prometheus): opt-in; si hay token se exige "Authorization: Bearer <token>"
+    # (en producción no se registra sin token)
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    metrics_token: str = os.getenv("METRICS_TOKEN", "")
     max_upload_size_mb: int = int(os.getenv("MAX_UPLOAD_MB", "10"))
     session_lifetime_hours: int = int(os.getenv("SESSION_HOURS", "8"))
     timezone: str = os.getenv("TIMEZONE", "America/New_York")
+    # Módulos API poco usados se importan en su primera petición (arranque más rápido)
+    lazy_blueprints: bool = os.getenv("LAZY_BLUEPRINTS", "true").lower() == "true"
     
     @property
     def is_production(self) -> bool:
@@ -105,6 +161,7 @@ class Config:
         self.mikrotik = MikroTikConfig()
         self.billing = BillingConfig()
         self.notification = NotificationConfig()
+        self.cluster = ClusterConfig()
         self.system = SystemConfig()
     
     def validate(self) -> bool:
@@ -21,9 +21,14 @@ class DatabaseManager:
     
     def __init__(self):
         if self._engine is None:
+            from src.infrastructure.database.engine_profiles import EngineOptions
             config = get_config()
             database_url = config.database.connection_string
-            self._engine = init_db(database_url)
+            self._engine = init_db(
+                database_url,
+                create_schema=not config.database.skip_create_all,
+                options=EngineOptions.from_config(config.database)
+            )
             
             # Crear factory de sesiones y envolverla en scoped_session para hilo/request local
             session_factory = sessionmaker(bind=self._engine)
@@ -34,6 +39,11 @@ class DatabaseManager:
         """Retorna la sesión actual (scopada por hilo)"""
         return self._session_factory()
 
+    @property
+    def engine(self):
+        """Engine SQLAlchemy compartido"""
+        return self._engine
+
     @property
     def session_factory(self):
         """Retorna la factory scopada directamente"""
@@ -0,0 +1,137 @@
+"""
+Database Engine Profiles
+Perfiles de motor SQLAlchemy por backend (PostgreSQL producción / SQLite local).
+Cada perfil concentra pool, timeouts y PRAGMAs para que init_db no tenga valores mágicos.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EngineOptions:
+    """Parámetros ajustables de los perfiles (ver DatabaseConfig)"""
+    pool_size: int = 20
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    statement_timeout_ms: int = 30000
+    sqlite_read_pool: int = 8
+    sqlite_busy_timeout_ms: int = 15000
+    slow_query_ms: int = 500
+    echo: bool = False
+
+    @classmethod
+    def from_config(cls, db_config) -> 'EngineOptions':
+        return cls(
+            pool_size=db_config.pool_size,
+            max_overflow=db_config.max_overflow,
+            pool_timeout=db_config.pool_timeout,
+            pool_recycle=db_config.pool_recycle,
+            statement_timeout_ms=db_config.statement_timeout_ms,
+            sqlite_read_pool=db_config.sqlite_read_pool,
+            sqlite_busy_timeout_ms=db_config.sqlite_busy_timeout_ms,
+            slow_query_ms=db_config.slow_query_ms,
+        )
+
+
+def profile_name(database_url: str) -> str:
+    """Identifica el perfil a partir del dialecto de la URL"""
+    backend = make_url(database_url).get_backend_name()
+    if backend == 'sqlite':
+        return 'sqlite'
+    if backend == 'postgresql':
+        return 'postgresql'
+    return 'generic'
+
+
+def _postgres_engine(database_url: str, opts: EngineOptions) -> Engine:
+    """
+    Perfil de producción: pool dimensionado, pre-ping contra conexiones muertas
+    y statement_timeout del lado del servidor para cortar consultas desbocadas.
+    """
+    connect_args: Dict[str, Any] = {}
+    if make_url(database_url).get_driver_name() in ('psycopg2', 'psycopg', ''):
+        connect_args['options'] = f"-c statement_timeout={opts.statement_timeout_ms}"
+
+    return create_engine(
+        database_url,
+        echo=opts.echo,
+        pool_size=opts.pool_size,
+        max_overflow=opts.max_overflow,
+        pool_timeout=opts.pool_timeout,
+        pool_recycle=opts.pool_recycle,
+        pool_pre_ping=True,
+        pool_use_lifo=True,         # Reutiliza conexiones calientes y deja expirar las ociosas
+        connect_args=connect_args,
+    )
+
+
+def _sqlite_engine(database_url: str, opts: EngineOptions) -> Engine:
+    """
+    Perfil local: SQLite sólo admite un escritor a la vez, así que el pool es
+    pequeño (lecturas concurrentes en WAL) y la espera de bloqueo es moderada.
+    """
+    url = make_url(database_url)
+    in_memory = url.database in (None, '', ':memory:')
+    kwargs: Dict[str, Any] = {
+        'echo': opts.echo,
+        'connect_args': {
+            'check_same_thread': False,
+            'timeout': opts.sqlite_busy_timeout_ms / 1000.0,
+        },
+    }
+    if not in_memory:
+        kwargs.update(
+            pool_size=opts.sqlite_read_pool,
+            max_overflow=max(2, opts.sqlite_read_pool // 2),
+            pool_timeout=opts.pool_timeout,
+            pool_recycle=opts.pool_recycle,
+        )
+    engine = create_engine(database_url, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(opts.sqlite_busy_timeout_ms)}")
+        cursor.execute("PRAGMA cache_size=-64000") # Usar 64MB de RAM en caché
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    return engine
+
+
+def build_engine(database_url: str, options: Optional[EngineOptions] = None) -> Engine:
+    """Crea el engine aplicando el perfil correspondiente al backend"""
+    opts = options or EngineOptions()
+    profile = profile_name(database_url)
+    if profile == 'sqlite':
+        engine = _sqlite_engine(database_url, opts)
+    elif profile == 'postgresql':
+        engine = _postgres_engine(database_url, opts)
+    else:
+        engine = create_engine(database_url, echo=opts.echo, pool_pre_ping=True)
+
+    # Conteo por petición y log de sentencias lentas (ver observability/query_metrics.py)
+    from src.infrastructure.observability.query_metrics import install_query_metrics
+    install_query_metrics(engine, slow_ms=opts.slow_query_ms)
+    logger.info(f"🗄️ Engine de base de datos inicializado (perfil: {profile})")
+    return engine
+
+
+def stream_query(query, batch_size: int = 1000) -> Iterator[Any]:
+    """
+    Itera un Query ORM en lotes sin materializarlo completo.
+    En PostgreSQL usa cursor del lado del servidor (stream_results);
+    en SQLite el driver ya entrega filas de forma incremental.
+    """
+    return iter(query.yield_per(batch_size))
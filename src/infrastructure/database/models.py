@@ -2,17 +2,22 @@
 Database Models - SQLAlchemy
 Modelos de base de datos para el sistema
 """
+import logging
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 import enum
 
 Base = declarative_base()
+logger = logging.getLogger(__name__)
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
+    import sqlite3
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return  # PRAGMA sólo existe en SQLite (Postgres rechazaría la sentencia)
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
@@ -422,6 +427,9 @@ class InternetPlan(Base):
 class Client(Base):
     """Modelo de Cliente"""
     __tablename__ = 'clients'
+    __table_args__ = (
+        Index('ix_clients_router_ip', 'router_id', 'ip_address'),   # Validación de IP única por router
+    )
     
     id = Column(Integer, primary_key=True)
     tenant_id = Column(Integer, ForeignKey('tenants.id', ondelete='CASCADE'), nullable=True)
@@ -437,6 +445,7 @@ class Client(Base):
     identity_document = Column(String(50))
     email = Column(String(100))
     phone = Column(String(50))
+    phone_e164 = Column(String(20), index=True) # Teléfono principal normalizado (ver ClientPhone)
     address = Column(Text)
     
     # Información de servicio
@@ -484,6 +493,7 @@ class Client(Base):
     promise_history = relationship('PaymentPromise', back_populates='client', cascade='all, delete-orphan')
     deleted_payment_records = relationship('DeletedPayment', back_populates='client', cascade='all, delete-orphan')
     pending_operations = relationship('PendingOperation', back_populates='client', cascade='all, delete-orphan')
+    phone_numbers = relationship('ClientPhone', back_populates='client', cascade='all, delete-orphan', passive_deletes=True)
     
     def to_dict(self):
         status_val = str(self.status).lower() if self.status else 'active'
@@ -526,6 +536,80 @@ class Client(Base):
         }
 
 
+class ClientPhone(Base):
+    """
+    Índice de teléfonos normalizados (E.164) por cliente.
+    Incluye principal y secundarios del campo phone; lo mantienen los eventos de Client.
+    """
+    __tablename__ = 'client_phones'
+
+    id = Column(Integer, primary_key=True)
+    client_id = Column(Integer, ForeignKey('clients.id', ondelete='CASCADE'), nullable=False, index=True)
+    phone_e164 = Column(String(20), nullable=False, index=True)
+    is_primary = Column(Boolean, default=False)
+
+    client = relationship('Client', back_populates='phone_numbers')
+
+    __table_args__ = (
+        UniqueConstraint('client_id', 'phone_e164', name='uq_client_phone'),
+    )
+
+
+def sync_client_phones(connection, client_id, phone):
+    """Reescribe las filas de client_phones de un cliente a partir de su campo phone"""
+    from src.domain.services.phone_service import PhoneService
+    table = ClientPhone.__table__
+    connection.execute(table.delete().where(table.c.client_id == client_id))
+    numbers = PhoneService.extract_all(phone)
+    if numbers:
+        connection.execute(table.insert(), [
+            {'client_id': client_id, 'phone_e164': number, 'is_primary': i == 0}
+            for i, number in enumerate(numbers)
+        ])
+
+
+@event.listens_for(Client, "before_insert")
+@event.listens_for(Client, "before_update")
+def _normalize_client_phone(mapper, connection, target):
+    from src.domain.services.phone_service import PhoneService
+    numbers = PhoneService.extract_all(target.phone)
+    target.phone_e164 = numbers[0] if numbers else None
+
+
+@event.listens_for(Client, "after_insert")
+def _index_new_client_phones(mapper, connection, target):
+    if target.phone:
+        sync_client_phones(connection, target.id, target.phone)
+
+
+@event.listens_for(Client, "after_update")
+def _reindex_client_phones(mapper, connection, target):
+    from sqlalchemy import inspect as sa_inspect
+    if sa_inspect(target).attrs.phone.history.has_changes():
+        sync_client_phones(connection, target.id, target.phone)
+
+
+@event.listens_for(Client, "after_insert")
+def _index_new_client_search(mapper, connection, target):
+    from src.infrastructure.database.search_index import SEARCH_COLUMNS, sync_client
+    sync_client(connection, target.id, [getattr(target, col) for col in SEARCH_COLUMNS])
+
+
+@event.listens_for(Client, "after_update")
+def _reindex_client_search(mapper, connection, target):
+    from sqlalchemy import inspect as sa_inspect
+    from src.infrastructure.database.search_index import SEARCH_COLUMNS, sync_client
+    attrs = sa_inspect(target).attrs
+    if any(attrs[col].history.has_changes() for col in SEARCH_COLUMNS):
+        sync_client(connection, target.id, [getattr(target, col) for col in SEARCH_COLUMNS])
+
+
+@event.listens_for(Client, "after_delete")
+def _unindex_client_search(mapper, connection, target):
+    from src.infrastructure.database.search_index import sync_client
+    sync_client(connection, target.id)
+
+
 class Payment(Base):
     """Modelo de Pago"""
     __tablename__ = 'payments'
@@ -904,6 +988,15 @@ class AuditLog(Base):
     ip_address = Column(String(50))
     user_agent = Column(Text)
 
+    # Índices compuestos para las vistas de auditoría (filtro + orden por fecha)
+    __table_args__ = (
+        Index('ix_audit_logs_timestamp', 'timestamp'),
+        Index('ix_audit_logs_entity', 'entity_type', 'entity_id', 'timestamp'),
+        Index('ix_audit_logs_user', 'user_id', 'timestamp'),
+        Index('ix_audit_logs_category', 'category', 'timestamp'),
+        Index('ix_audit_logs_tenant', 'tenant_id', 'timestamp'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -1038,6 +1131,47 @@ class WhatsAppMessage(Base):
         }
 
 
+class WhatsAppOutboundMessage(Base):
+    """Cola persistente de mensajes salientes de WhatsApp (ver whatsapp_outbox.py)"""
+    __tablename__ = 'whatsapp_outbox'
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id', ondelete='CASCADE'), nullable=True)
+    client_id = Column(Integer, ForeignKey('clients.id', ondelete='SET NULL'), nullable=True)
+    phone = Column(String(50), nullable=False)
+    message_text = Column(Text, nullable=False)
+    intent = Column(String(100))
+
+    dedup_key = Column(String(64), nullable=False) # sha256(phone|texto) para descartar duplicados pendientes
+    status = Column(String(20), default='pending') # pending, sending, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.now)
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.now)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_whatsapp_outbox_due', 'status', 'next_attempt_at'),
+        Index('ix_whatsapp_outbox_dedup', 'dedup_key', 'status'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'client_id': self.client_id,
+            'phone': self.phone,
+            'message_text': self.message_text,
+            'intent': self.intent,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+
 class SupportTicket(Base):
     """Tickets de soporte/revisión para reportar fallas de clientes"""
     __tablename__ = 'support_tickets'
@@ -1130,6 +1264,12 @@ class SystemIncident(Base):
     message = Column(Text, nullable=False)
     stack_trace = Column(Text)
     
+    # Deduplicación: hash de (tenant, tipo, ubicación, mensaje normalizado) y contador de repeticiones
+    fingerprint = Column(String(64), index=True)
+    occurrences = Column(Integer, default=1)
+    first_seen = Column(DateTime)
+    last_seen = Column(DateTime)
+    
     # Contexto de la Petición (JSON)
     url = Column(String(255))
     method = Column(String(10))
@@ -1172,6 +1312,10 @@ class SystemIncident(Base):
             'user_id': self.user_id,
             'username': self.username,
             'status': self.status,
+            'fingerprint': self.fingerprint,
+            'occurrences': self.occurrences or 1,
+            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'ai_analysis': self.ai_analysis
         }
@@ -1217,42 +1361,140 @@ class SystemNotification(Base):
         }
 
 
+class RouterDiscoverySnapshot(Base):
+    """Última configuración descubierta por router, válida mientras no cambie su huella (router_discovery.py)"""
+    __tablename__ = 'router_discovery_snapshots'
+
+    router_id = Column(Integer, ForeignKey('routers.id', ondelete='CASCADE'), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    snapshot = Column(Text, nullable=False)         # JSON: methods, detected_plans, network_segments, interfaces
+    facts = Column(Text)                            # JSON: versión, identidad y conteos usados en la huella
+    discovered_at = Column(DateTime, default=datetime.now)
+
+
+class ClusterLease(Base):
+    """
+    Leases de coordinación entre workers (ver cluster/coordinator.py).
+    kind: 'worker' (latido de cada proceso), 'leader' (automatización) o 'interest'
+    (routers que un worker necesita monitorear pero pertenecen a otro).
+    """
+    __tablename__ = 'cluster_leases'
+
+    name = Column(String(191), primary_key=True)   # worker:<id> | leader:automation | interest:<clave>:<id>
+    kind = Column(String(20), nullable=False, index=True)
+    holder = Column(String(120), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    renewed_at = Column(DateTime)
+    payload = Column(Text)
+
+
+class SocketIOMessage(Base):
+    """Cola de mensajes Socket.IO entre procesos cuando no hay Redis (SOCKETIO_MESSAGE_QUEUE=db)"""
+    __tablename__ = 'socketio_messages'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    channel = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+
+
+# Versión del esquema (ver schema_version.py)
+from sqlalchemy import Table
+schema_info = Table(
+    'schema_info', Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('version', String(64), nullable=False),
+    Column('applied_at', DateTime),
+)
+
+
 # Database initialization
-def init_db(database_url='sqlite:///sgubm.db'):
-    """Inicializa la base de datos"""
-    # Para SQLite aumentamos el pool por el Sentinel y el Servidor Web corriendo juntos
-    if 'sqlite' in database_url:
-        engine = create_engine(
-            database_url, 
-            echo=False,
-            pool_size=50,          # Incrementar a 50
-            max_overflow=20,       # 20 de desbordamiento en picos
-            pool_recycle=1800,     # Reciclar cada 30 min
-            pool_timeout=45,       # Tolerancia de bloqueo de 45 segs
-            connect_args={
-                'check_same_thread': False,
-                'timeout': 45.0,     # Time out nativo de SQLite muy alto
-            }
-        )
-        
-        # Activar PRAGMAS de alta concurrencia como WAL y SYNCHRONOUS
-        @event.listens_for(engine, "connect")
-        def set_sqlite_pragma(dbapi_connection, connection_record):
-            cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.execute("PRAGMA journal_mode=WAL")
-            cursor.execute("PRAGMA synchronous=NORMAL")
-            cursor.execute("PRAGMA cache_size=-64000") # Usar 64MB de RAM en caché
-            cursor.execute("PRAGMA temp_store=MEMORY")
-            cursor.close()
-            
-    else:
-        engine = create_engine(database_url, echo=False)
-        
-    Base.metadata.create_all(engine)
+def init_db(database_url='sqlite:///sgubm.db', create_schema=True, options=None):
+    """
+    Inicializa la base de datos con el perfil de engine del backend.
+    create_schema=True aplica create_all sólo si la versión de esquema guardada no coincide
+    con los modelos; create_schema=False no toca el esquema (gestionado externamente).
+    """
+    from src.infrastructure.database.engine_profiles import build_engine
+    from src.infrastructure.database.schema_version import ensure_schema
+    engine = build_engine(database_url, options)
+
+    if create_schema:
+        ensure_schema(engine, Base.metadata, on_upgrade=_ensure_auxiliary_schema)
     return engine
 
 
+def _backfill_client_phones(engine):
+    from src.infrastructure.database.repository_registry import ClientRepository
+    session = sessionmaker(bind=engine)()
+    try:
+        ClientRepository(session).rebuild_phone_index()
+    finally:
+        session.close()
+
+
+def _backfill_incident_occurrences(engine):
+    # Incidentes previos: una ocurrencia, vista al crearse
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "UPDATE system_incidents SET occurrences = COALESCE(occurrences, 1), "
+            "first_seen = COALESCE(first_seen, created_at), last_seen = COALESCE(last_seen, created_at)")
+
+
+# Columnas nuevas en tablas ya existentes (create_all no hace ALTER TABLE): {tabla: columnas}
+ADDITIVE_COLUMNS = {
+    'clients': ('phone_e164',),
+    'system_incidents': ('fingerprint', 'occurrences', 'first_seen', 'last_seen'),
+}
+# Relleno de las filas previas, sólo cuando la columna se acaba de agregar: {'tabla.columna': fn(engine)}
+COLUMN_BACKFILLS = {
+    'clients.phone_e164': _backfill_client_phones,
+    'system_incidents.occurrences': _backfill_incident_occurrences,
+}
+
+
+def _add_missing_columns(engine):
+    """ALTER TABLE ... ADD COLUMN de ADDITIVE_COLUMNS ausentes. Retorna {'tabla.columna'} agregadas."""
+    from sqlalchemy import inspect
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    added = set()
+    for table_name, column_names in ADDITIVE_COLUMNS.items():
+        if table_name not in existing:
+            continue   # Tabla nueva: create_all ya la creó completa
+        present = {c['name'] for c in inspector.get_columns(table_name)}
+        table = Base.metadata.tables[table_name]
+        for name in column_names:
+            if name in present:
+                continue
+            col_type = table.c[name].type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {name} {col_type}")
+            except Exception:
+                # Otro worker la agregó primero
+                if name not in {c['name'] for c in inspect(engine).get_columns(table_name)}:
+                    raise
+                continue
+            logger.info(f"🗄️ Columna agregada: {table_name}.{name}")
+            added.add(f"{table_name}.{name}")
+    return added
+
+
+def _ensure_auxiliary_schema(engine):
+    from src.infrastructure.database.search_index import get_client_search_index
+    # Antes de los índices: algunos (ix_clients_phone_e164) son sobre columnas recién agregadas
+    added = _add_missing_columns(engine)
+    # create_all no agrega índices nuevos a tablas existentes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    for key in sorted(added):
+        if key in COLUMN_BACKFILLS:
+            COLUMN_BACKFILLS[key](engine)
+    get_client_search_index(engine).ensure()
+
+
 def get_session(engine):
     """Crea una sesión de base de datos"""
     Session = sessionmaker(bind=engine)
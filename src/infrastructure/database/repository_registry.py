@@ -2,7 +2,7 @@
 Database Repositories
 Implementaciones de IRepository para acceso a datos
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session, joinedload
 from src.infrastructure.database.models import Router, Client, Payment, RouterStatus, ClientStatus, Invoice, InvoiceItem, WhatsAppMessage, SystemSetting, Expense, ClientTrafficHistory
@@ -105,7 +105,76 @@ class ClientRepository:
     def get_by_username(self, username: str) -> Optional[Client]:
         """Obtiene un cliente por nombre de usuario"""
         return self.session.query(Client).filter(Client.username == username).first()
+
+    def find_by_phone(self, phone: str) -> Optional[Client]:
+        """
+        Busca un cliente por teléfono (principal o secundario) vía el índice normalizado E.164.
+        Prioriza clientes no eliminados y el número principal.
+        """
+        from src.domain.services.phone_service import PhoneService
+        from src.infrastructure.database.models import ClientPhone
+        e164 = PhoneService.normalize(phone)
+        if not e164:
+            return None
+        return self.session.query(Client)\
+            .join(ClientPhone, ClientPhone.client_id == Client.id)\
+            .filter(ClientPhone.phone_e164 == e164)\
+            .order_by((Client.status == 'deleted').asc(), ClientPhone.is_primary.desc(), Client.id.asc())\
+            .first()
+
+    def rebuild_phone_index(self, batch_size: int = 1000) -> int:
+        """Backfill: recalcula phone_e164 y client_phones para todos los clientes. Retorna filas indexadas."""
+        from sqlalchemy import bindparam, select, update
+        from src.domain.services.phone_service import PhoneService
+        from src.infrastructure.database.models import ClientPhone
+
+        phones_table = ClientPhone.__table__
+        clients_table = Client.__table__
+        self.session.execute(phones_table.delete())
+
+        indexed = 0
+        last_id = 0
+        while True:
+            rows = self.session.execute(
+                select(clients_table.c.id, clients_table.c.phone)
+                .where(clients_table.c.id > last_id)
+                .order_by(clients_table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            phone_rows, primaries = [], []
+            for row in rows:
+                numbers = PhoneService.extract_all(row.phone)
+                primaries.append({'cid': row.id, 'e164': numbers[0] if numbers else None})
+                phone_rows.extend(
+                    {'client_id': row.id, 'phone_e164': n, 'is_primary': i == 0}
+                    for i, n in enumerate(numbers)
+                )
+            if phone_rows:
+                self.session.execute(phones_table.insert(), phone_rows)
+            self.session.execute(
+                update(clients_table).where(clients_table.c.id == bindparam('cid')).values(phone_e164=bindparam('e164')),
+                primaries
+            )
+            indexed += len(phone_rows)
+
+        self.session.commit()
+        return indexed
     
+    def find_ip_owner(self, ip_address: str, router_id: int, exclude_client_id: Optional[int] = None) -> Optional[Client]:
+        """Cliente no eliminado que ya usa la IP en el router (índice ix_clients_router_ip)"""
+        query = self.session.query(Client).filter(
+            Client.router_id == router_id,
+            Client.ip_address == ip_address,
+            Client.status != 'deleted'
+        )
+        if exclude_client_id is not None:
+            query = query.filter(Client.id != exclude_client_id)
+        return query.order_by(Client.id.asc()).first()
+
     def get_by_router(self, router_id: int) -> List[Client]:
         """Obtiene clientes de un router específico"""
         return self.session.query(Client).filter(Client.router_id == router_id).all()
@@ -116,8 +185,13 @@ class ClientRepository:
     
     def search(self, query: str) -> List[Client]:
         """Busca clientes por nombre, código, documento o IP"""
+        query_obj = self.session.query(Client).options(joinedload(Client.router), joinedload(Client.assigned_collector), joinedload(Client.internet_plan))
+        ranking = self._search_ranking(query)
+        if ranking is not None:
+            return self._ranked(query_obj.filter(Client.id.in_(list(ranking))).all(), ranking)
+
         search_pattern = f"%{query}%"
-        return self.session.query(Client).options(joinedload(Client.router), joinedload(Client.assigned_collector), joinedload(Client.internet_plan)).filter(
+        return query_obj.filter(
             (Client.legal_name.ilike(search_pattern)) |
             (Client.subscriber_code.ilike(search_pattern)) |
             (Client.identity_document.ilike(search_pattern)) |
@@ -126,6 +200,17 @@ class ClientRepository:
             (Client.ip_address.ilike(search_pattern))
         ).all()
 
+    def _search_ranking(self, search: Optional[str]) -> Optional[Dict[int, int]]:
+        """{client_id: posición} desde el índice de búsqueda, o None para usar ILIKE"""
+        if not search:
+            return None
+        from src.infrastructure.database.search_index import get_client_search_index
+        return get_client_search_index(self.session.get_bind()).search_ids(self.session, search)
+
+    @staticmethod
+    def _ranked(clients: List[Client], ranking: Dict[int, int]) -> List[Client]:
+        return sorted(clients, key=lambda c: ranking.get(c.id, len(ranking)))
+
     def get_filtered(self, router_id: Optional[Any] = None, status: Optional[str] = None, 
                      search: Optional[str] = None, plan_id: Optional[int] = None,
                      assigned_collector_id: Optional[int] = None) -> List[Client]:
@@ -135,7 +220,101 @@ class ClientRepository:
             joinedload(Client.assigned_collector), 
             joinedload(Client.internet_plan)
         )
+        ranking = self._search_ranking(search)
+        clients = self._apply_filters(query_obj, router_id, status, search, plan_id, assigned_collector_id, ranking).all()
+        return self._ranked(clients, ranking) if ranking is not None else clients
 
+    def get_page(self, limit: int = 100, cursor: Optional[str] = None, router_id: Optional[Any] = None,
+                 status: Optional[str] = None, search: Optional[str] = None, plan_id: Optional[int] = None,
+                 assigned_collector_id: Optional[int] = None) -> Tuple[List[Client], Optional[str]]:
+        """
+        Página de clientes por keyset sobre id (mismos filtros y RBAC que get_filtered).
+        El cursor es el id del último cliente devuelto; páginas profundas cuestan lo mismo que la primera.
+        Lanza ValueError si el cursor no es válido.
+        """
+        limit = max(1, min(limit, 500))
+        query_obj = self.session.query(Client).options(
+            joinedload(Client.router),
+            joinedload(Client.assigned_collector),
+            joinedload(Client.internet_plan)
+        )
+        query_obj = self._apply_filters(query_obj, router_id, status, search, plan_id, assigned_collector_id)
+        if cursor:
+            query_obj = query_obj.filter(Client.id > int(cursor))
+
+        rows = query_obj.order_by(Client.id.asc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return rows, (str(rows[-1].id) if has_more else None)
+
+    def get_status_report(self, report_type: str, start_date: datetime, end_date: datetime,
+                          router_id: Optional[Any] = None) -> List[Any]:
+        """
+        Filas del reporte de estado de clientes ('debtors' | 'paid' | 'missing' | 'deleted') en una sola consulta:
+        total pagado en el periodo (agregado) y último pago de cada cliente (ROW_NUMBER), con el filtro del tipo en SQL.
+        """
+        from sqlalchemy import func
+
+        def scoped(query):
+            if router_id:
+                if isinstance(router_id, list):
+                    return query.filter(Client.router_id.in_(router_id))
+                return query.filter(Client.router_id == router_id)
+            return query
+
+        period_paid = scoped(
+            self.session.query(Payment.client_id.label('client_id'), func.sum(Payment.amount).label('paid_amount'))
+            .join(Client, Payment.client_id == Client.id)
+            .filter(Payment.payment_date >= start_date, Payment.payment_date <= end_date)
+        ).group_by(Payment.client_id).subquery()
+
+        ranked = scoped(
+            self.session.query(
+                Payment.client_id.label('client_id'),
+                Payment.id.label('payment_id'),
+                func.row_number().over(
+                    partition_by=Payment.client_id,
+                    order_by=(Payment.payment_date.desc(), Payment.id.desc())
+                ).label('rn')
+            ).join(Client, Payment.client_id == Client.id)
+        ).subquery()
+
+        paid_amount = func.coalesce(period_paid.c.paid_amount, 0.0)
+        query = scoped(self.session.query(
+            Client.id, Client.legal_name, Client.subscriber_code, Client.account_balance, Client.monthly_fee,
+            Client.status, Client.address, Client.phone, Router.alias.label('router_alias'),
+            paid_amount.label('paid_amount'), ranked.c.payment_id.label('last_payment_id')
+        ).select_from(Client)
+            .outerjoin(Router, Client.router_id == Router.id)
+            .outerjoin(period_paid, period_paid.c.client_id == Client.id)
+            .outerjoin(ranked, (ranked.c.client_id == Client.id) & (ranked.c.rn == 1)))
+
+        if report_type == 'debtors':
+            query = query.filter(Client.account_balance > 0, Client.status != 'deleted')
+        elif report_type == 'paid':
+            query = query.filter(period_paid.c.client_id != None, Client.status != 'deleted')
+        elif report_type == 'missing':
+            query = query.filter(func.lower(Client.status) == 'active', period_paid.c.client_id == None)
+        elif report_type == 'deleted':
+            query = query.filter(Client.status == 'deleted')
+        else:
+            return []
+
+        return query.order_by(Client.id.asc()).all()
+
+    def export_query(self, columns: List[Any], router_id: Optional[Any] = None, status: Optional[str] = None,
+                     search: Optional[str] = None, plan_id: Optional[int] = None,
+                     assigned_collector_id: Optional[int] = None):
+        """
+        Query de sólo columnas con los mismos filtros que get_filtered, sin ejecutar.
+        Pensado para exportaciones en streaming (ver engine_profiles.stream_query).
+        """
+        query_obj = self.session.query(*columns).select_from(Client)
+        query_obj = self._apply_filters(query_obj, router_id, status, search, plan_id, assigned_collector_id)
+        return query_obj.order_by(Client.id.asc())
+
+    def _apply_filters(self, query_obj, router_id=None, status=None, search=None, plan_id=None, assigned_collector_id=None,
+                       ranking: Optional[Dict[int, int]] = None):
         if router_id:
             if isinstance(router_id, list):
                 query_obj = query_obj.filter(Client.router_id.in_(router_id))
@@ -190,17 +369,23 @@ class ClientRepository:
              query_obj = query_obj.filter(Client.status != 'deleted')
 
         if search:
-            search_pattern = f"%{search}%"
-            query_obj = query_obj.filter(
-                (Client.legal_name.ilike(search_pattern)) |
-                (Client.subscriber_code.ilike(search_pattern)) |
-                (Client.identity_document.ilike(search_pattern)) |
-                (Client.username.ilike(search_pattern)) |
-                (Client.plan_name.ilike(search_pattern)) |
-                (Client.ip_address.ilike(search_pattern))
-            )
+            if ranking is None:
+                ranking = self._search_ranking(search)
+            if ranking is not None:
+                # Índice de búsqueda (FTS5 / pg_trgm): sin recorrer la tabla
+                query_obj = query_obj.filter(Client.id.in_(list(ranking)))
+            else:
+                search_pattern = f"%{search}%"
+                query_obj = query_obj.filter(
+                    (Client.legal_name.ilike(search_pattern)) |
+                    (Client.subscriber_code.ilike(search_pattern)) |
+                    (Client.identity_document.ilike(search_pattern)) |
+                    (Client.username.ilike(search_pattern)) |
+                    (Client.plan_name.ilike(search_pattern)) |
+                    (Client.ip_address.ilike(search_pattern))
+                )
         
-        return query_obj.all()
+        return query_obj
     
     def update(self, client_id: int, data: Dict[str, Any], commit: bool = True) -> Optional[Client]:
         """Actualiza un cliente"""
@@ -332,7 +517,76 @@ class PaymentRepository:
                      router_ids: Optional[List[int]] = None, status: Optional[str] = None) -> List[Payment]:
         """Obtiene pagos con filtros combinados (Optimizado con joinedload)"""
         query = self.session.query(Payment).options(joinedload(Payment.client)).join(Client, Payment.client_id == Client.id)
+        query = self._apply_filters(query, client_id, router_id, start_date, end_date, method, search, router_ids, status)
+        return query.order_by(Payment.payment_date.desc()).limit(limit).all()
+
+    def get_page(self, limit: int = 100, cursor: Optional[str] = None, client_id: Optional[int] = None,
+                 start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                 method: Optional[str] = None, search: Optional[str] = None, status: Optional[str] = None,
+                 scope_user_id: Optional[int] = None) -> Tuple[List[Payment], Optional[str]]:
+        """
+        Página de pagos por keyset sobre (payment_date, id), más reciente primero; los pagos
+        legados sin payment_date van al final (NULLS LAST), ordenados por id.
+        scope_user_id restringe en SQL a pagos de clientes asignados al usuario o de sus routers
+        (asignaciones + router legado), así el LIMIT se aplica después del filtro RBAC.
+        Cursor: "payment_date_iso|id" ("|id" ya en los pagos sin fecha). Lanza ValueError si el cursor no es válido.
+        """
+        from sqlalchemy import and_, or_
+        limit = max(1, min(limit, 1000))  # El listado de pagos del panel pide hasta 1000
+        query = self.session.query(Payment).options(joinedload(Payment.client)).join(Client, Payment.client_id == Client.id)
+        query = self._apply_filters(query, client_id, None, start_date, end_date, method, search, None, status)
+
+        if scope_user_id is not None:
+            query = query.filter(or_(
+                Client.assigned_collector_id == scope_user_id,
+                Client.router_id.in_(self._user_router_ids_subquery(scope_user_id))
+            ))
 
+        if cursor:
+            date_raw, sep, id_raw = cursor.rpartition('|')
+            if not sep:
+                raise ValueError(f"Cursor inválido: {cursor}")
+            cursor_id = int(id_raw)
+            if date_raw:
+                cursor_date = datetime.fromisoformat(date_raw)
+                query = query.filter(or_(
+                    Payment.payment_date < cursor_date,
+                    and_(Payment.payment_date == cursor_date, Payment.id < cursor_id),
+                    Payment.payment_date.is_(None)
+                ))
+            else:
+                query = query.filter(Payment.payment_date.is_(None), Payment.id < cursor_id)
+
+        rows = query.order_by(Payment.payment_date.desc().nulls_last(), Payment.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = f"{last.payment_date.isoformat() if last.payment_date else ''}|{last.id}"
+        return rows, next_cursor
+
+    def _user_router_ids_subquery(self, user_id: int):
+        """Routers permitidos a un usuario: asignaciones múltiples + router legado"""
+        from src.infrastructure.database.models import User, CollectorAssignment
+        assigned = self.session.query(CollectorAssignment.router_id).filter(CollectorAssignment.user_id == user_id)
+        legacy = self.session.query(User.assigned_router_id).filter(
+            User.id == user_id,
+            User.assigned_router_id != None
+        )
+        return assigned.union(legacy)
+
+    def export_query(self, columns: List[Any], client_id: Optional[int] = None, router_id: Optional[int] = None,
+                     start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                     method: Optional[str] = None, search: Optional[str] = None,
+                     router_ids: Optional[List[int]] = None, status: Optional[str] = None):
+        """Query de sólo columnas (pago + cliente) con los filtros de get_filtered, sin límite ni ejecutar"""
+        query = self.session.query(*columns).select_from(Payment).join(Client, Payment.client_id == Client.id)
+        query = self._apply_filters(query, client_id, router_id, start_date, end_date, method, search, router_ids, status)
+        return query.order_by(Payment.payment_date.desc(), Payment.id.desc())
+
+    def _apply_filters(self, query, client_id=None, router_id=None, start_date=None, end_date=None,
+                       method=None, search=None, router_ids=None, status=None):
         if router_ids:
             query = query.filter(Client.router_id.in_(router_ids))
         elif router_id:
@@ -361,8 +615,19 @@ class PaymentRepository:
                 (Payment.reference.ilike(search_pattern))
             )
 
-        return query.order_by(Payment.payment_date.desc()).limit(limit).all()
+        return query
     
+    def exists_in_range(self, start_date: datetime, end_date: datetime, router_id: Optional[Any] = None) -> bool:
+        """Si hay algún pago en el rango (EXISTS, sin cargar filas)"""
+        query = self.session.query(Payment.id).join(Client, Payment.client_id == Client.id)
+        if router_id:
+            if isinstance(router_id, list):
+                query = query.filter(Client.router_id.in_(router_id))
+            else:
+                query = query.filter(Client.router_id == router_id)
+        query = query.filter(Payment.payment_date >= start_date, Payment.payment_date <= end_date)
+        return self.session.query(query.exists()).scalar()
+
     def get_today_payments(self) -> List[Payment]:
         """Obtiene los pagos de hoy"""
         today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -492,6 +757,16 @@ class TrafficRepository:
             self.session.commit()
         return snapshot
     
+    def add_snapshots_bulk(self, rows: List[Dict[str, Any]], commit: bool = True) -> int:
+        """Inserta muchos snapshots en una sola sentencia (executemany)"""
+        from src.infrastructure.database.models import ClientTrafficHistory
+        if not rows:
+            return 0
+        self.session.bulk_insert_mappings(ClientTrafficHistory, rows)
+        if commit:
+            self.session.commit()
+        return len(rows)
+
     def get_history(self, client_id: int, hours: int = 24) -> List[ClientTrafficHistory]:
         """Obtiene historial de un cliente en un rango de horas"""
         from src.infrastructure.database.models import ClientTrafficHistory
@@ -541,6 +816,18 @@ class InvoiceRepository:
         """Obtiene facturas de un cliente"""
         return self.session.query(Invoice).filter(Invoice.client_id == client_id).order_by(Invoice.issue_date.desc()).all()
     
+    def exists_in_range(self, start_date: datetime, end_date: datetime, router_id: Optional[Any] = None) -> bool:
+        """Si hay alguna factura emitida en el rango (EXISTS, sin cargar filas)"""
+        query = self.session.query(Invoice.id)
+        if router_id:
+            query = query.join(Client, Invoice.client_id == Client.id)
+            if isinstance(router_id, list):
+                query = query.filter(Client.router_id.in_(router_id))
+            else:
+                query = query.filter(Client.router_id == router_id)
+        query = query.filter(Invoice.issue_date >= start_date, Invoice.issue_date <= end_date)
+        return self.session.query(query.exists()).scalar()
+
     def get_by_date_range(self, start_date: datetime, end_date: datetime, router_id: Optional[Any] = None) -> List[Invoice]:
         """Obtiene facturas en un rango de fechas de emisión"""
         query = self.session.query(Invoice)
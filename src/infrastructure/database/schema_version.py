@@ -0,0 +1,80 @@
+"""
+Schema Version
+Huella del esquema declarado en los modelos, guardada en la tabla schema_info.
+Al arrancar basta una lectura para saber si el esquema ya está al día; create_all
+(y la creación de índices auxiliares) sólo corre cuando los modelos cambiaron.
+"""
+import hashlib
+import logging
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_INFO_TABLE = 'schema_info'
+# Subir al cambiar estructuras fuera de los modelos (ej. el índice de búsqueda de clientes)
+AUXILIARY_SCHEMA_REVISION = 3
+
+
+def schema_fingerprint(metadata) -> str:
+    """Hash estable de tablas, columnas, tipos, nulabilidad e índices declarados"""
+    parts = [f"aux:{AUXILIARY_SCHEMA_REVISION}"]
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f"table:{table.name}")
+        for column in table.columns:
+            parts.append(f"col:{column.name}:{column.type!r}:{column.nullable}:{bool(column.primary_key)}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ''):
+            parts.append(f"idx:{index.name}:{','.join(c.name for c in index.columns)}:{index.unique}")
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def stored_version(engine) -> Optional[str]:
+    from sqlalchemy import text
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(text(f"SELECT version FROM {SCHEMA_INFO_TABLE} WHERE id = 1")).first()
+    except Exception:
+        return None   # Tabla inexistente: base nueva o anterior a la versión de esquema
+    return row[0] if row else None
+
+
+def stamp_version(engine, version: str):
+    """
+    Guarda la huella con un upsert: varios workers pueden terminar ensure_schema a la vez
+    (con DELETE + INSERT uno de ellos chocaba con la clave primaria del otro).
+    """
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+    params = {'v': version, 'at': datetime.now()}
+    insert = f"INSERT INTO {SCHEMA_INFO_TABLE} (id, version, applied_at) VALUES (1, :v, :at)"
+    update = f"UPDATE {SCHEMA_INFO_TABLE} SET version = :v, applied_at = :at WHERE id = 1"
+
+    if engine.dialect.name in ('sqlite', 'postgresql'):
+        with engine.begin() as conn:
+            conn.execute(text(f"{insert} ON CONFLICT (id) DO UPDATE "
+                              f"SET version = excluded.version, applied_at = excluded.applied_at"), params)
+        return
+    try:
+        with engine.begin() as conn:
+            if conn.execute(text(update), params).rowcount == 0:
+                conn.execute(text(insert), params)
+    except IntegrityError:
+        # Otro worker insertó la fila entre el UPDATE y el INSERT: ahora existe
+        with engine.begin() as conn:
+            conn.execute(text(update), params)
+
+
+def ensure_schema(engine, metadata, on_upgrade=None) -> bool:
+    """
+    Crea/actualiza el esquema sólo si la huella guardada no coincide.
+    on_upgrade(engine) corre tras create_all (estructuras auxiliares). Retorna si hubo que aplicar cambios.
+    """
+    version = schema_fingerprint(metadata)
+    if stored_version(engine) == version:
+        return False
+    logger.info("🗄️ Esquema desactualizado o sin versión: aplicando create_all")
+    metadata.create_all(engine)
+    if on_upgrade:
+        on_upgrade(engine)
+    stamp_version(engine, version)
+    return True
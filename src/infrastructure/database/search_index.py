@@ -0,0 +1,263 @@
+"""
+Client Search Index
+Índice de búsqueda de clientes para no recorrer la tabla con ILIKE '%term%' en seis columnas.
+- SQLite: tabla virtual FTS5 con tokenizador trigram (coincidencia por subcadena + tolerancia a errores),
+  sincronizada desde los eventos ORM de Client.
+- PostgreSQL: índice GIN pg_trgm sobre la expresión concatenada; se mantiene solo. Documento y término
+  pasan por la misma función IMMUTABLE sgubm_search_normalize (lower + unaccent si la extensión existe).
+Si el índice no existe, la consulta es muy corta o no hay coincidencias indexadas, el repositorio usa ILIKE.
+"""
+import logging
+import threading
+import unicodedata
+import weakref
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ('legal_name', 'subscriber_code', 'identity_document', 'username',
+                  'plan_name', 'ip_address', 'phone', 'address')
+FTS_TABLE = 'client_search'
+PG_INDEX = 'ix_clients_search_trgm'
+MIN_TERM_LENGTH = 3        # El trigrama más corto posible
+FUZZY_MIN_SCORE = 0.5      # Fracción de trigramas de la consulta presentes en el documento
+FUZZY_LIMIT = 50
+MAX_INDEXED_HITS = 5000    # Más coincidencias = término poco selectivo: el IN dejaría de convenir
+
+PG_NORMALIZE_FN = 'sgubm_search_normalize'
+# concat_ws/unaccent no son IMMUTABLE (requisito de un índice de expresión): || + coalesce y una envoltura propia
+_PG_EXPR = f"{PG_NORMALIZE_FN}(" + " || ' ' || ".join(f"coalesce({col}, '')" for col in SEARCH_COLUMNS) + ")"
+_PG_TERM = f"{PG_NORMALIZE_FN}(:term)"
+_PG_PATTERN = f"'%' || {PG_NORMALIZE_FN}(:literal) || '%'"
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Minúsculas y sin tildes ("Pérez" -> "perez"), igual al indexar y al consultar"""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().strip()
+
+
+def build_document(values) -> str:
+    """Documento indexado: los campos normalizados separados por ' | '"""
+    return ' | '.join(normalize_text(v) for v in values if v)
+
+
+def trigrams(term: str) -> List[str]:
+    term = normalize_text(term)
+    seen: List[str] = []
+    for i in range(len(term) - 2):
+        gram = term[i:i + 3]
+        if gram not in seen:
+            seen.append(gram)
+    return seen
+
+
+def _fts_literal(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def exact_match_expression(term: str) -> str:
+    """Subcadena exacta (equivalente a ILIKE '%term%') sobre el índice trigram"""
+    return _fts_literal(normalize_text(term))
+
+
+def fuzzy_match_expression(term: str) -> str:
+    """Cualquiera de los trigramas de la consulta; el filtrado fino lo hace trigram_score"""
+    return ' OR '.join(_fts_literal(gram) for gram in trigrams(term))
+
+
+def trigram_score(term: str, document: str) -> float:
+    grams = trigrams(term)
+    if not grams:
+        return 0.0
+    return sum(1 for gram in grams if gram in document) / len(grams)
+
+
+def rank_key(term: str, document: str, position: int):
+    """Prefijo de palabra primero, luego el orden bm25 de FTS5"""
+    needle = normalize_text(term)
+    is_prefix = document.startswith(needle) or f" {needle}" in document
+    return (0 if is_prefix else 1, position)
+
+
+class ClientSearchIndex:
+    """Índice de búsqueda ligado a un engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self._ready: Optional[bool] = None
+
+    # --- Estructura ---
+
+    def ensure(self) -> bool:
+        """Crea el índice si no existe (y lo puebla la primera vez). Retorna si quedó disponible."""
+        from sqlalchemy import text
+        try:
+            if self.dialect == 'sqlite':
+                with self.engine.begin() as conn:
+                    if not self._exists(conn):
+                        conn.execute(text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(doc, tokenize='trigram')"))
+                        self._populate(conn)
+                        logger.info("🔎 Índice de búsqueda FTS5 de clientes creado")
+            elif self.dialect == 'postgresql':
+                with self.engine.begin() as conn:
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                    self._ensure_pg_normalize(conn)
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON clients USING gin (({_PG_EXPR}) gin_trgm_ops)"))
+            else:
+                self._ready = False
+                return False
+            self._ready = True
+        except Exception as e:
+            # Ej. SQLite sin FTS5/trigram (< 3.34) o sin permisos para CREATE EXTENSION
+            logger.warning(f"⚠️ Índice de búsqueda de clientes no disponible, se usará ILIKE: {e}")
+            self._ready = False
+        return self._ready
+
+    def _ensure_pg_normalize(self, conn):
+        """
+        Crea la normalización usada a ambos lados de la búsqueda. Sólo si no existe: cambiar su
+        cuerpo con el índice ya construido lo dejaría inconsistente (requeriría REINDEX).
+        """
+        from sqlalchemy import text
+        if conn.execute(text("SELECT 1 FROM pg_proc WHERE proname = :name"), {'name': PG_NORMALIZE_FN}).first():
+            return
+        body = "lower($1)"
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+            body = "public.unaccent('public.unaccent'::regdictionary, lower($1))"
+        except Exception as e:
+            logger.warning(f"⚠️ Extensión unaccent no disponible, la búsqueda distinguirá tildes: {e}")
+        conn.execute(text(
+            f"CREATE FUNCTION {PG_NORMALIZE_FN}(text) RETURNS text "
+            f"LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$ SELECT {body} $$"))
+
+    def rebuild(self) -> int:
+        """Regenera el índice FTS5 completo (tras cargas masivas que no pasan por el ORM)"""
+        from sqlalchemy import text
+        if self.dialect != 'sqlite' or not self.ensure():
+            return 0
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+            return self._populate(conn)
+
+    def _populate(self, conn) -> int:
+        from sqlalchemy import text
+        rows = conn.execute(text(f"SELECT id, {', '.join(SEARCH_COLUMNS)} FROM clients")).fetchall()
+        if rows:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, doc) VALUES (:id, :doc)"),
+                         [{'id': row[0], 'doc': build_document(row[1:])} for row in rows])
+        return len(rows)
+
+    def is_ready(self, connection=None) -> bool:
+        """Si el índice existe. connection permite comprobarlo dentro de una transacción en curso."""
+        if self._ready is None:
+            try:
+                if connection is not None:
+                    self._ready = self._exists(connection)
+                else:
+                    with self.engine.connect() as conn:
+                        self._ready = self._exists(conn)
+            except Exception:
+                self._ready = False
+        return self._ready
+
+    def _exists(self, conn) -> bool:
+        from sqlalchemy import text
+        if self.dialect == 'sqlite':
+            return conn.execute(text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+                                {'name': FTS_TABLE}).first() is not None
+        if self.dialect == 'postgresql':
+            return conn.execute(text("SELECT 1 FROM pg_indexes WHERE indexname=:name"),
+                                {'name': PG_INDEX}).first() is not None
+        return False
+
+    # --- Consulta ---
+
+    def search_ids(self, session, term: str) -> Optional[Dict[int, int]]:
+        """
+        Ids de clientes que coinciden, con su posición en el ranking ({id: posición}).
+        None si el índice no aplica (sin índice o consulta corta): el llamador usa ILIKE.
+        """
+        term = (term or '').strip()
+        if len(normalize_text(term)) < MIN_TERM_LENGTH or not self.is_ready(session.connection()):
+            return None
+        try:
+            if self.dialect == 'sqlite':
+                ordered = self._search_fts(session, term)
+            else:
+                ordered = self._search_trgm(session, term)
+        except Exception as e:
+            logger.warning(f"Búsqueda indexada falló, usando ILIKE: {e}")
+            return None
+        if not ordered or len(ordered) > MAX_INDEXED_HITS:
+            # Vacío: ILIKE confirma (costo acotado a búsquedas sin resultados). Demasiados: término poco selectivo.
+            return None
+        return {client_id: pos for pos, client_id in enumerate(ordered)}
+
+    def _search_fts(self, session, term: str) -> List[int]:
+        from sqlalchemy import text
+        rows = session.execute(text(
+            f"SELECT rowid, doc FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q ORDER BY rank"),
+            {'q': exact_match_expression(term)}).fetchall()
+        ranked = sorted(enumerate(rows), key=lambda item: rank_key(term, item[1][1], item[0]))
+        ids = [row[0] for _, row in ranked]
+
+        if not ids:
+            # Sin coincidencias exactas: tolerancia a errores de tipeo
+            candidates = session.execute(text(
+                f"SELECT rowid, doc FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q ORDER BY rank LIMIT :limit"),
+                {'q': fuzzy_match_expression(term), 'limit': FUZZY_LIMIT * 4}).fetchall()
+            scored = [(trigram_score(term, doc), pos, rowid) for pos, (rowid, doc) in enumerate(candidates)]
+            scored = [item for item in scored if item[0] >= FUZZY_MIN_SCORE]
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            ids.extend(rowid for _, _, rowid in scored[:FUZZY_LIMIT])
+        return ids
+
+    def _search_trgm(self, session, term: str) -> List[int]:
+        from sqlalchemy import text
+        # El término se normaliza en SQL con la misma función del índice (no con normalize_text)
+        literal = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        # Savepoint: si la consulta falla no deja abortada la transacción del request
+        with session.begin_nested():
+            rows = session.execute(text(
+                f"SELECT id FROM clients "
+                f"WHERE {_PG_EXPR} LIKE {_PG_PATTERN} OR {_PG_TERM} <% {_PG_EXPR} "
+                f"ORDER BY ({_PG_EXPR} LIKE {_PG_PATTERN}) DESC, word_similarity({_PG_TERM}, {_PG_EXPR}) DESC"),
+                {'literal': literal, 'term': term}).fetchall()
+        return [row[0] for row in rows]
+
+
+_indexes: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_client_search_index(engine) -> ClientSearchIndex:
+    """Índice asociado a un engine (uno por engine)"""
+    index = _indexes.get(engine)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(engine)
+            if index is None:
+                index = ClientSearchIndex(engine)
+                _indexes[engine] = index
+    return index
+
+
+def sync_client(connection, client_id: int, values=None):
+    """
+    Actualiza (values = campos de SEARCH_COLUMNS) o elimina (values=None) la entrada FTS5 de un cliente
+    dentro de la transacción del flush. En PostgreSQL no hace nada: el índice de expresión se mantiene solo.
+    """
+    if connection.dialect.name != 'sqlite' or not get_client_search_index(connection.engine).is_ready(connection):
+        return
+    from sqlalchemy import text
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': client_id})
+    if values is not None:
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, doc) VALUES (:id, :doc)"),
+                           {'id': client_id, 'doc': build_document(values)})
@@ -0,0 +1,179 @@
+"""
+Database Write Queue
+Serializa las escrituras de segundo plano en un único hilo escritor.
+SQLite sólo admite un escritor a la vez: en lugar de que monitoreo, automatización
+y sincronización compitan por el lock (y bloqueen a los requests interactivos),
+sus unidades de escritura se agrupan en pocas transacciones cortas.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+WriteUnit = Callable[[Any], Any]
+
+
+class WriteQueue:
+    """
+    Cola de escritura con hilo dedicado.
+    Cada unidad es un callable que recibe la sesión y no hace commit: el escritor
+    agrupa hasta max_batch unidades (esperando como máximo linger_ms) en una sola
+    transacción. Si la transacción del lote falla, las unidades se reintentan una a una
+    para que un error aislado no arrastre al resto.
+    Deshabilitada (backends con escritores concurrentes), ejecuta la unidad en el hilo llamador.
+    """
+
+    def __init__(self, session_factory: Callable[[], Any], enabled: bool = True,
+                 max_batch: int = 200, linger_ms: int = 50, name: str = "DBWriter"):
+        self._session_factory = session_factory
+        self.enabled = enabled
+        self.max_batch = max(1, max_batch)
+        self.linger = linger_ms / 1000.0
+        self.name = name
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.stats = {'units': 0, 'batches': 0, 'failed': 0}
+
+    # --- API pública ---
+
+    def submit(self, unit: WriteUnit) -> Future:
+        """Encola una unidad de escritura. El Future resuelve con el valor que retorne la unidad."""
+        future: Future = Future()
+        if not self.enabled:
+            self._execute([(unit, future)])
+            return future
+        self._ensure_started()
+        self._queue.put((unit, future))
+        return future
+
+    def run(self, unit: WriteUnit, timeout: Optional[float] = 30) -> Any:
+        """Encola y espera el resultado (para llamadores que lo necesitan)."""
+        return self.submit(unit).result(timeout=timeout)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 5.0):
+        """Drena lo pendiente y detiene el hilo escritor."""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    # --- Hilo escritor ---
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._worker, daemon=True, name=self.name)
+            self._thread.start()
+            logger.info(f"✍️ {self.name}: hilo escritor único iniciado")
+
+    def _worker(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                    break
+                batch.append(nxt)
+            try:
+                self._execute(batch)
+            except Exception as e:  # El hilo escritor nunca debe morir
+                logger.error(f"{self.name}: error inesperado procesando lote: {e}")
+
+    def _execute(self, batch: List[Tuple[WriteUnit, Future]]):
+        live = [(unit, future) for unit, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+
+        try:
+            results = self._run_transaction([unit for unit, _ in live])
+        except Exception as e:
+            # Lote de una sola unidad: el error es de esa unidad
+            self.stats['failed'] += 1
+            logger.error(f"{self.name}: unidad de escritura fallida: {e}")
+            live[0][1].set_exception(e)
+            return
+        if results is not None:
+            self.stats['batches'] += 1
+            self.stats['units'] += len(live)
+            for (_, future), result in zip(live, results):
+                future.set_result(result)
+            return
+
+        # El lote falló: aislar la unidad culpable ejecutando una por una
+        for unit, future in live:
+            try:
+                result = self._run_transaction([unit])
+                future.set_result(result[0])
+                self.stats['units'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"{self.name}: unidad de escritura fallida: {e}")
+                future.set_exception(e)
+        self.stats['batches'] += 1
+
+    def _run_transaction(self, units: List[WriteUnit]) -> Optional[List[Any]]:
+        """Ejecuta las unidades en una transacción. None si un lote de varias falló; con una sola propaga el error."""
+        session = self._session_factory()
+        try:
+            results = [unit(session) for unit in units]
+            session.commit()
+            return results
+        except Exception:
+            try:
+                session.rollback()
+            except Exception:
+                pass
+            if len(units) == 1:
+                raise
+            return None
+        finally:
+            session.close()
+
+
+_write_queue: Optional[WriteQueue] = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> WriteQueue:
+    """
+    Retorna la cola de escritura global, ligada al engine de get_db().
+    Se habilita automáticamente en SQLite (DB_SINGLE_WRITER=auto|on|off).
+    """
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                from sqlalchemy.orm import sessionmaker
+                from src.infrastructure.database.db_manager import get_db
+                from src.infrastructure.config.settings import get_config
+
+                db = get_db()
+                mode = get_config().database.single_writer
+                enabled = mode == 'on' or (mode == 'auto' and db.engine.dialect.name == 'sqlite')
+                _write_queue = WriteQueue(sessionmaker(bind=db.engine, expire_on_commit=False), enabled=enabled)
+                atexit.register(_write_queue.stop)
+    return _write_queue
@@ -156,9 +156,19 @@ class MikroTikAdapter(INetworkService):
     def get_bulk_traffic(self, targets: List[str], all_ifaces: List[Dict] = None, all_queues: List[Dict] = None) -> Dict[str, Any]:
         return self.queues.get_bulk_traffic(targets, all_ifaces, all_queues)
 
+    def get_bulk_interface_stats(self, targets: Dict[Any, tuple]) -> Dict[Any, Dict[str, int]]:
+        """Contadores acumulados de bytes por cliente: {clave: (cola, interfaz)} -> {clave: {tx_bytes, rx_bytes}}."""
+        if not self.queues: return {}
+        return self.queues.get_bulk_byte_counters(targets)
+
     def get_all_last_seen(self) -> Dict[str, str]:
         return self.system.get_all_last_seen()
 
+    def get_discovery_facts(self, counted_paths: List[str]) -> Dict[str, Any]:
+        """Huella barata de la configuración (ver router_discovery)."""
+        if not self._is_connected: return {}
+        return self.system.get_discovery_facts(counted_paths)
+
     def get_system_info(self) -> Dict[str, Any]:
         """Obtiene información de recursos del sistema (CPU, Memeria, etc.)."""
         if not self.system: return {}
@@ -167,6 +177,9 @@ class MikroTikAdapter(INetworkService):
     def ping_bulk(self, targets: List[str], count: int = 2) -> Dict[str, Any]:
         return self.system.ping(targets, count)
 
+    def ping_target(self, target: str, count: int = 5, interval_ms: int = 200) -> Dict[str, Any]:
+        return self.system.ping_target(target, count, interval_ms)
+
     def get_logs(self, limit: int = 50) -> List[Dict]:
         return self.system.get_logs(limit)
 
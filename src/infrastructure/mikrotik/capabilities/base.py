@@ -1,14 +1,32 @@
 import logging
 from typing import Optional, List, Dict, Any
 from routeros_api.exceptions import RouterOsApiConnectionError, RouterOsApiCommunicationError
+from src.infrastructure.observability.metrics import get_metrics, timed_call
 
 logger = logging.getLogger(__name__)
 
+ROUTEROS_CALL_SECONDS = get_metrics().histogram(
+    'sgubm_routeros_call_seconds', 'Duración de llamadas de capacidad a RouterOS', ('router', 'call'))
+ROUTEROS_CALL_ERRORS = get_metrics().counter(
+    'sgubm_routeros_call_errors_total', 'Llamadas de capacidad a RouterOS que lanzaron excepción', ('router', 'call'))
+
 class CapabilityBase:
     """
     Clase base para capacidades de MikroTik (Centinela).
     Provee acceso seguro a la API y aislamiento de errores local.
     """
+    def __init_subclass__(cls, **kwargs):
+        """Cronometra cada método público de la capacidad (etiquetas: router, 'ppp.detect')"""
+        super().__init_subclass__(**kwargs)
+        prefix = cls.__name__.replace('Capability', '').lower()
+        for attr, func in list(vars(cls).items()):
+            if attr.startswith('_') or not callable(func) or getattr(func, '__wrapped_timed__', False):
+                continue
+            call = f"{prefix}.{attr}"
+            setattr(cls, attr, timed_call(
+                ROUTEROS_CALL_SECONDS, ROUTEROS_CALL_ERRORS,
+                lambda self, *a, _call=call, **kw: {'router': self._host, 'call': _call})(func))
+
     def __init__(self, api_connection):
         self._api = api_connection
         self._host = "unknown" # Se inyecta desde el Adapter principal
@@ -1,6 +1,7 @@
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from .base import CapabilityBase
+from ..parsing import rate_map
 
 logger = logging.getLogger(__name__)
 
@@ -71,22 +72,65 @@ class QueueCapability(CapabilityBase):
         try:
             # Si no se proveen colas, las obtenemos
             active_queues = all_queues if all_queues is not None else self._get_resource('/queue/simple').get()
-            queue_map = {q.get('name'): q.get('rate', '0/0') for q in active_queues if q.get('name')}
+            queue_rates = rate_map(active_queues)
             
             for target in targets:
-                rate_str = queue_map.get(target, '0/0')
-                parts = rate_str.split('/')
-                if len(parts) == 2:
-                    # En MikroTik Simple Queues, rate es upload/download
-                    # Para el frontend: tx=download, rx=upload
-                    results[target] = {'tx': int(parts[1]), 'rx': int(parts[0])}
-                else:
-                    results[target] = {'tx': 0, 'rx': 0}
+                # En MikroTik Simple Queues, rate es upload/download
+                # Para el frontend: tx=download, rx=upload
+                up, down = queue_rates.get(target, (0, 0))
+                results[target] = {'tx': down, 'rx': up}
             return results
         except Exception as e:
             logger.error(f"Error obteniendo tráfico masivo: {e}")
             return {}
 
+    def get_bulk_byte_counters(self, targets: Dict[Any, Tuple[Optional[str], Optional[str]]]) -> Dict[Any, Dict[str, int]]:
+        """
+        Lee contadores acumulados de bytes para muchos clientes en una sola pasada.
+        targets: {clave: (nombre_cola, nombre_interfaz)} ya pre-resueltos.
+        Prioriza el contador de la Simple Queue; si no existe usa la interfaz (ej. <pppoe-user>).
+        Retorna {clave: {'tx_bytes': descarga, 'rx_bytes': subida, 'source': 'queue'|'interface'}}.
+        """
+        results: Dict[Any, Dict[str, int]] = {}
+        if not targets:
+            return results
+
+        raw_queues = self._get_resource('/queue/simple').call('print', {".proplist": "name,bytes"})
+        queue_bytes = {}
+        for q in raw_queues:
+            name = (q.get('name') or '').lower()
+            try:
+                up, down = (q.get('bytes') or '0/0').split('/')
+                queue_bytes[name] = (int(up), int(down))
+            except ValueError:
+                continue
+
+        pending = {}
+        for key, (queue_name, iface_name) in targets.items():
+            counters = queue_bytes.get((queue_name or '').lower())
+            if counters:
+                # En Simple Queues, bytes es upload/download del target
+                results[key] = {'tx_bytes': counters[1], 'rx_bytes': counters[0], 'source': 'queue'}
+            elif iface_name:
+                pending[key] = iface_name.lower()
+
+        if pending:
+            raw_ifaces = self._get_resource('/interface').call('print', {".proplist": "name,rx-byte,tx-byte"})
+            iface_bytes = {}
+            for i in raw_ifaces:
+                name = (i.get('name') or '').lower()
+                try:
+                    iface_bytes[name] = (int(i.get('rx-byte') or 0), int(i.get('tx-byte') or 0))
+                except ValueError:
+                    continue
+            for key, iface_name in pending.items():
+                counters = iface_bytes.get(iface_name)
+                if counters:
+                    # En la interfaz del servidor, tx es lo que baja hacia el cliente
+                    results[key] = {'tx_bytes': counters[1], 'rx_bytes': counters[0], 'source': 'interface'}
+
+        return results
+
     def remove_queue(self, name_or_ip: str) -> bool:
         """Elimina una Simple Queue"""
         try:
@@ -1,9 +1,38 @@
 import logging
+import re
 from typing import Dict, Any, List, Optional
 from .base import CapabilityBase
 
 logger = logging.getLogger(__name__)
 
+_RTT_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|us|s)')
+_RTT_FACTORS = {'s': 1000.0, 'ms': 1.0, 'us': 0.001}
+
+
+def _parse_rtt_ms(value: Optional[str]) -> Optional[float]:
+    """Convierte tiempos de RouterOS ('12ms', '1ms345us', '850us') a milisegundos."""
+    if not value:
+        return None
+    parts = _RTT_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(num) * _RTT_FACTORS[unit] for num, unit in parts)
+
+
+def parse_resource_usage(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fila de /system/resource -> resumen de CPU, memoria y uptime"""
+    total_mem = int(data.get("total-memory", 0))
+    free_mem = int(data.get("free-memory", 0))
+    return {
+        "platform": data.get("platform", ""),
+        "board_name": data.get("board-name", ""),
+        "version": data.get("version", ""),
+        "uptime": data.get("uptime", ""),
+        "cpu_load": data.get("cpu-load", "0"),
+        "memory_usage": int(((total_mem - free_mem) / total_mem) * 100) if total_mem > 0 else 0
+    }
+
+
 class SystemCapability(CapabilityBase):
     """
     Gestiona recursos del sistema, DHCP, ARP, Firewall y monitoreo de hardware.
@@ -14,22 +43,37 @@ class SystemCapability(CapabilityBase):
         try:
             res = self._get_resource('/system/resource').get()
             if res:
-                data = res[0]
-                total_mem = int(data.get("total-memory", 0))
-                free_mem = int(data.get("free-memory", 0))
-                return {
-                    "platform": data.get("platform", ""),
-                    "board_name": data.get("board-name", ""),
-                    "version": data.get("version", ""),
-                    "uptime": data.get("uptime", ""),
-                    "cpu_load": data.get("cpu-load", "0"),
-                    "memory_usage": int(((total_mem - free_mem) / total_mem) * 100) if total_mem > 0 else 0
-                }
+                return parse_resource_usage(res[0])
             return {"uptime": "N/A", "cpu_load": 0, "memory_usage": 0}
         except Exception as e:
             logger.error(f"Error obteniendo recursos del sistema: {e}")
             return {"uptime": "N/A", "cpu_load": 0, "memory_usage": 0}
 
+    def count(self, path: str) -> Optional[int]:
+        """Cantidad de filas de una tabla con print count-only (sin transferir las filas)"""
+        try:
+            response = self._get_resource(path).call('print', {'count-only': ''})
+            ret = response.done_message.get('ret')
+            return int(ret) if ret is not None else None
+        except Exception as e:
+            logger.debug(f"count-only no disponible para {path} en {self._host}: {e}")
+            return None
+
+    def get_discovery_facts(self, counted_paths: List[str]) -> Dict[str, Any]:
+        """Datos baratos que cambian cuando cambia la configuración: recurso, identidad y conteos.
+        {} si no se pueden leer (el descubrimiento sigue, sin caché)."""
+        try:
+            resource = self._get_resource('/system/resource').get()
+            identity = self._get_resource('/system/identity').get()
+        except Exception as e:
+            logger.error(f"Error obteniendo datos de descubrimiento: {e}")
+            return {}
+        return {
+            "resource": dict(resource[0]) if resource else {},
+            "identity": identity[0].get("name", "") if identity else "",
+            "counts": {path: self.count(path) for path in counted_paths},
+        }
+
     def get_interfaces(self) -> List[Dict[str, Any]]:
         """Obtiene lista de interfaces"""
         try:
@@ -81,26 +125,53 @@ class SystemCapability(CapabilityBase):
             return []
 
     def ping(self, targets: List[str], count: int = 2) -> Dict[str, Any]:
-        """Ejecuta pings desde el router"""
+        """Ejecuta pings desde el router (secuencial sobre este canal API)"""
         results = {}
         try:
             ping_resource = self._get_resource('/tool')
             for target in targets:
-                try:
-                    res = ping_resource.call('ping', {'address': target, 'count': str(count)})
-                    avg_lat = 0
-                    received = sum(int(p.get('received', '0')) for p in res)
-                    latencies = [int(p.get('time', '0').replace('ms', '')) for p in res if p.get('received') != '0']
-                    avg_lat = sum(latencies) / len(latencies) if latencies else 0
-                    loss = ((count - received) / count) * 100
-                    results[target] = {'latency': avg_lat, 'loss': loss}
-                except:
-                    results[target] = {'latency': 0, 'loss': 100}
+                results[target] = self.ping_target(target, count, resource=ping_resource)
             return results
         except Exception as e:
             logger.error(f"Error ejecutando ping masivo: {e}")
             return {}
 
+    def ping_target(self, target: str, count: int = 5, interval_ms: int = 200, resource=None) -> Dict[str, Any]:
+        """
+        Ping de un solo destino con muestras individuales.
+        Calcula latencia promedio, pérdida y jitter real (variación media entre muestras consecutivas).
+        """
+        try:
+            ping_resource = resource or self._get_resource('/tool')
+            params = {'address': target, 'count': str(count)}
+            if interval_ms:
+                params['interval'] = f"{interval_ms}ms"
+            replies = ping_resource.call('ping', params)
+
+            samples = []
+            sent, received = 0, 0
+            for p in replies:
+                sent = max(sent, int(p.get('sent', 0) or 0))
+                received = max(received, int(p.get('received', 0) or 0))
+                rtt = _parse_rtt_ms(p.get('time'))
+                if rtt is not None and not p.get('status'):
+                    samples.append(rtt)
+
+            sent = sent or count
+            received = received or len(samples)
+            loss = ((sent - received) / sent) * 100 if sent else 100
+            avg_lat = sum(samples) / len(samples) if samples else 0
+            jitter = (sum(abs(b - a) for a, b in zip(samples, samples[1:])) / (len(samples) - 1)) if len(samples) > 1 else 0
+            return {
+                'latency': round(avg_lat, 2),
+                'loss': round(loss, 1),
+                'jitter': round(jitter, 2),
+                'status': 'online' if received > 0 else 'offline'
+            }
+        except Exception as e:
+            logger.debug(f"Ping fallido hacia {target} en {self._host}: {e}")
+            return {'latency': 0, 'loss': 100, 'jitter': 0, 'status': 'error'}
+
     def get_interface_traffic(self, interface_name: str) -> Dict[str, int]:
         """Obtiene tráfico en tiempo real (bps) para una interfaz específica."""
         try:
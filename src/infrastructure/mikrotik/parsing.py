@@ -0,0 +1,171 @@
+"""
+RouterOS Parsing
+Parseo de tiempos y tasas de RouterOS para el camino caliente del monitoreo.
+- Patrones precompilados a nivel de módulo (nada de re.search por llamada).
+- Memoización de cadenas repetidas: duraciones ('5m3s', 'never'), límites ('10M/5M').
+- APIs por lote que parsean columnas completas (todas las colas / leases de un tick).
+Las tasas vivas ('123456/654321') toman un camino rápido sin caché: son casi siempre distintas.
+"""
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# 'sep/02/2023 14:00:00' | 'sep/02 14:00:00' (año actual) | '2023-09-02 14:00:00' (RouterOS 7.10+)
+_ABSOLUTE = re.compile(r'^([a-z]{3})/(\d{1,2})(?:/(\d{4}))?\s+(\d{1,2}):(\d{2}):(\d{2})$')
+_ISO = re.compile(r'^(\d{4})-(\d{2})-(\d{2})[ t](\d{2}):(\d{2}):(\d{2})$')
+# '1w2d03:04:05', '24d 06:36:28', '5h30m', '10m', '850ms'
+_DURATION_UNIT = re.compile(r'(\d+)(ms|us|ns|w|d|h|m|s)')
+_CLOCK = re.compile(r'(\d+):(\d{1,2})(?::(\d{1,2}))?$')
+_WHITESPACE = re.compile(r'\s+')
+_RATE_VALUE = re.compile(r'^(\d+(?:\.\d+)?)([kmg]?)(?:bps)?$')
+
+_UNIT_SECONDS = {'w': 604800, 'd': 86400, 'h': 3600, 'm': 60, 's': 1, 'ms': 0, 'us': 0, 'ns': 0}
+_RATE_FACTORS = {'': 1, 'k': 1_000, 'm': 1_000_000, 'g': 1_000_000_000}
+
+
+# --- Tiempos ---
+
+@lru_cache(maxsize=8192)
+def parse_duration(value: str) -> Optional[int]:
+    """Duración de RouterOS en segundos enteros; None si no es una duración ('never', vacío, basura)"""
+    if not value:
+        return None
+    s = _WHITESPACE.sub('', value.lower())
+    if not s or s == 'never':
+        return None
+    total = 0
+    clock = _CLOCK.search(s)
+    if clock:
+        a, b, c = clock.groups()
+        total += int(a) * 3600 + int(b) * 60 + int(c) if c is not None else int(a) * 60 + int(b)
+        s = s[:clock.start()]
+    matched = 0
+    for num, unit in _DURATION_UNIT.findall(s):
+        total += int(num) * _UNIT_SECONDS[unit]
+        matched += len(num) + len(unit)
+    if matched != len(s):
+        return None   # Sobran caracteres: no es una duración
+    return total
+
+
+@lru_cache(maxsize=4096)
+def _parse_absolute(value: str, current_year: int) -> Optional[datetime]:
+    s = _WHITESPACE.sub(' ', value.strip().lower())
+    match = _ABSOLUTE.match(s)
+    try:
+        if match:
+            month = MONTHS.get(match.group(1))
+            if not month:
+                return None
+            year = int(match.group(3)) if match.group(3) else current_year
+            return datetime(year, month, int(match.group(2)),
+                            int(match.group(4)), int(match.group(5)), int(match.group(6)))
+        match = _ISO.match(s)
+        if match:
+            return datetime(*(int(g) for g in match.groups()))
+    except ValueError:
+        return None   # Fecha imposible (feb/30)
+    return None
+
+
+def parse_absolute(value: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Fecha absoluta de RouterOS ('sep/02/2023 14:00:00', 'sep/02 14:00:00', '2023-09-02 14:00:00')"""
+    if not value:
+        return None
+    return _parse_absolute(value, (now or datetime.now()).year)
+
+
+def parse_routeros_time(value: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Momento representado por un campo de tiempo de RouterOS: fecha absoluta o duración
+    relativa a `now` (uptime / last-seen). None para 'never', vacío o duración cero.
+    """
+    if not value:
+        return None
+    now = now or datetime.now()
+    absolute = _parse_absolute(value, now.year)
+    if absolute:
+        return absolute
+    seconds = parse_duration(value)
+    if not seconds:
+        return None
+    return now - timedelta(seconds=seconds)
+
+
+def parse_time_column(values: Iterable[Optional[str]], now: Optional[datetime] = None) -> List[Optional[datetime]]:
+    """parse_routeros_time sobre una columna completa con un único `now` de referencia"""
+    now = now or datetime.now()
+    return [parse_routeros_time(v, now) if v else None for v in values]
+
+
+def parse_duration_column(values: Iterable[Optional[str]]) -> List[Optional[int]]:
+    return [parse_duration(v) if v else None for v in values]
+
+
+# --- Tasas ---
+
+@lru_cache(maxsize=4096)
+def parse_rate_value(value: str) -> int:
+    """'10M' -> 10000000, '512k' -> 512000, '1500' -> 1500; inválido o vacío -> 0"""
+    if not value:
+        return 0
+    if value.isdigit():
+        return int(value)
+    match = _RATE_VALUE.match(value.strip().lower())
+    if not match:
+        return 0
+    return int(float(match.group(1)) * _RATE_FACTORS[match.group(2)])
+
+
+@lru_cache(maxsize=4096)
+def _parse_rate_pair_cached(value: str) -> Tuple[int, int]:
+    up, sep, down = value.partition('/')
+    if not sep:
+        return 0, 0
+    return parse_rate_value(up), parse_rate_value(down)
+
+
+def parse_rate_pair(value: Optional[str]) -> Tuple[int, int]:
+    """'upload/download' de RouterOS (rate, max-limit, rate-limit) -> (up, down) en bps; inválido -> (0, 0)"""
+    if not value:
+        return 0, 0
+    if value[-1].isdigit():
+        up, _, down = value.partition('/')
+        try:
+            return int(up), int(down)   # Tasa viva: camino rápido, sin ensuciar la caché
+        except ValueError:
+            pass
+    return _parse_rate_pair_cached(value)
+
+
+def parse_rate_column(values: Iterable[Optional[str]]) -> List[Tuple[int, int]]:
+    return [parse_rate_pair(v) for v in values]
+
+
+def rate_map(rows: Iterable[Dict[str, str]], key: str = 'name', field: str = 'rate',
+             lower: bool = False) -> Dict[str, Tuple[int, int]]:
+    """{fila[key]: (up, down)} para una tabla completa (p.ej. /queue/simple de un tick)"""
+    result = {}
+    for row in rows:
+        name = row.get(key)
+        if not name:
+            continue
+        result[name.lower() if lower else name] = parse_rate_pair(row.get(field))
+    return result
+
+
+def cache_info() -> Dict[str, Tuple[int, int]]:
+    """(hits, misses) de cada caché; útil para micro-benchmarks y diagnóstico"""
+    return {fn.__name__: (fn.cache_info().hits, fn.cache_info().misses)
+            for fn in (parse_duration, _parse_absolute, parse_rate_value, _parse_rate_pair_cached)}
+
+
+def clear_caches():
+    for fn in (parse_duration, _parse_absolute, parse_rate_value, _parse_rate_pair_cached):
+        fn.cache_clear()
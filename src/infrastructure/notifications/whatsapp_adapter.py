@@ -7,11 +7,14 @@ from src.core.interfaces.contracts import INotificationService
 import requests
 import logging
 
+DEFAULT_BRIDGE_URL = "http://localhost:5001"
+
 class WhatsAppAdapter(INotificationService):
     def __init__(self, bridge_url: str, api_key: str):
-        self.bridge_url = bridge_url
+        self.bridge_url = (bridge_url or DEFAULT_BRIDGE_URL).rstrip('/')
         self.api_key = api_key
         self.logger = logging.getLogger(__name__)
+        self._http = requests.Session() # Keep-alive hacia el bridge
 
     def send_email(self, to: str, subject: str, body: str) -> bool:
         # Not implemented here
@@ -24,22 +27,31 @@ class WhatsAppAdapter(INotificationService):
     def send_whatsapp(self, phone: str, message: str) -> bool:
         """
         Sends a WhatsApp message via the local bridge API (port 5001).
+        Blocking: callers outside the outbox workers should use queue_whatsapp.
         """
         try:
             # El bridge corre en el mismo servidor generalmente
-            url = "http://localhost:5001/send"
+            url = f"{self.bridge_url}/send"
             payload = {
                 "phone": phone,
                 "text": message
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self._http.post(url, json=payload, timeout=10)
             return response.status_code == 200 and response.json().get('success')
             
         except Exception as e:
             self.logger.error(f"Error sending WhatsApp via Bridge API: {str(e)}")
             return False
 
+    def queue_whatsapp(self, phone: str, message: str, client_id: Optional[int] = None, intent: Optional[str] = None) -> Optional[int]:
+        """
+        Encola el mensaje en el outbox persistente (entrega asíncrona con reintentos).
+        Retorna el id del mensaje en cola.
+        """
+        from src.infrastructure.notifications.whatsapp_outbox import get_whatsapp_outbox
+        return get_whatsapp_outbox().enqueue(phone, message, client_id=client_id, intent=intent)
+
     def handle_webhook(self, data: Dict[str, Any], agent_service: Any):
         """
         Handles incoming events from the WhatsApp bridge.
@@ -51,4 +63,4 @@ class WhatsAppAdapter(INotificationService):
         
         if phone and text:
             response = agent_service.process_incoming_message(phone, text)
-            self.send_whatsapp(phone, response)
+            self.queue_whatsapp(phone, response, intent='auto_reply')
@@ -0,0 +1,399 @@
+"""
+WhatsApp Outbox
+Cola persistente de mensajes salientes con pool de workers.
+Los llamadores encolan y siguen; los workers entregan al bridge respetando un
+intervalo mínimo por destino, reintentan con backoff exponencial y descartan
+mensajes idénticos que ya estén pendientes.
+- Reclamo atómico: un mensaje pasa de 'pending' a 'sending' con un UPDATE condicional por fila,
+  así dos procesos que leen los mismos pendientes no lo envían dos veces.
+- El reclamo es un lease (next_attempt_at = fin del lease): recover() sólo devuelve a la cola
+  los 'sending' con lease vencido (proceso caído), no los que otro worker está enviando.
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboundMessage:
+    id: int
+    phone: str
+    text: str
+    attempts: int = 0
+    client_id: Optional[int] = None
+    intent: Optional[str] = None
+    tenant_id: Optional[int] = None
+
+
+def dedup_key(phone: str, text: str) -> str:
+    return hashlib.sha256(f"{phone}|{text}".encode('utf-8')).hexdigest()
+
+
+class MemoryOutboxStore:
+    """Almacén en memoria (pruebas y entornos sin base de datos)"""
+
+    def __init__(self):
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, phone, text, key, client_id=None, intent=None, tenant_id=None) -> Tuple[int, bool]:
+        with self._lock:
+            for row_id, row in self._rows.items():
+                if row['dedup_key'] == key and row['status'] in ('pending', 'sending'):
+                    return row_id, False
+            self._seq += 1
+            self._rows[self._seq] = {
+                'phone': phone, 'text': text, 'dedup_key': key, 'client_id': client_id, 'intent': intent,
+                'tenant_id': tenant_id,
+                'status': 'pending', 'attempts': 0, 'next_attempt_at': datetime.now(), 'last_error': None
+            }
+            return self._seq, True
+
+    def due(self, limit: int) -> List[OutboundMessage]:
+        now = datetime.now()
+        with self._lock:
+            rows = sorted(
+                (r['next_attempt_at'], row_id) for row_id, r in self._rows.items()
+                if r['status'] == 'pending' and r['next_attempt_at'] <= now
+            )[:limit]
+            return [self._message(row_id) for _, row_id in rows]
+
+    def claim(self, ids: List[int], lease_until: datetime) -> List[int]:
+        won = []
+        with self._lock:
+            for row_id in ids:
+                row = self._rows[row_id]
+                if row['status'] == 'pending':
+                    row.update(status='sending', next_attempt_at=lease_until)
+                    won.append(row_id)
+        return won
+
+    def mark_sent(self, message_id: int):
+        self._update(message_id, status='sent', sent_at=datetime.now())
+
+    def mark_retry(self, message_id: int, attempts: int, error: str, next_attempt_at: datetime):
+        self._update(message_id, status='pending', attempts=attempts, last_error=error, next_attempt_at=next_attempt_at)
+
+    def mark_failed(self, message_id: int, attempts: int, error: str):
+        self._update(message_id, status='failed', attempts=attempts, last_error=error)
+
+    def recover(self) -> int:
+        now = datetime.now()
+        recovered = 0
+        with self._lock:
+            for row in self._rows.values():
+                if row['status'] == 'sending' and row['next_attempt_at'] <= now:
+                    row['status'] = 'pending'
+                    recovered += 1
+        return recovered
+
+    def get(self, message_id: int) -> Dict[str, Any]:
+        return dict(self._rows[message_id])
+
+    def _update(self, message_id, **fields):
+        with self._lock:
+            self._rows[message_id].update(fields)
+
+    def _message(self, row_id) -> OutboundMessage:
+        r = self._rows[row_id]
+        return OutboundMessage(row_id, r['phone'], r['text'], r['attempts'], r['client_id'], r['intent'], r['tenant_id'])
+
+
+class SqlOutboxStore:
+    """Almacén persistente sobre la tabla whatsapp_outbox"""
+
+    def __init__(self, session_factory: Callable[[], Any]):
+        self._session_factory = session_factory
+
+    def _run(self, fn):
+        session = self._session_factory()
+        try:
+            result = fn(session)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def enqueue(self, phone, text, key, client_id=None, intent=None, tenant_id=None) -> Tuple[int, bool]:
+        from src.infrastructure.database.models import WhatsAppOutboundMessage as Row
+
+        def op(session):
+            existing = session.query(Row.id).filter(Row.dedup_key == key, Row.status.in_(('pending', 'sending'))).first()
+            if existing:
+                return existing.id, False
+            # tenant_id None: lo completa before_insert si se encola dentro de un request
+            row = Row(phone=phone, message_text=text, dedup_key=key, client_id=client_id, intent=intent,
+                      tenant_id=tenant_id, status='pending', attempts=0, next_attempt_at=datetime.now())
+            session.add(row)
+            session.flush()
+            return row.id, True
+        return self._run(op)
+
+    def due(self, limit: int) -> List[OutboundMessage]:
+        from src.infrastructure.database.models import WhatsAppOutboundMessage as Row
+
+        def op(session):
+            rows = session.query(Row.id, Row.phone, Row.message_text, Row.attempts, Row.client_id, Row.intent,
+                                 Row.tenant_id)\
+                .filter(Row.status == 'pending', Row.next_attempt_at <= datetime.now())\
+                .order_by(Row.next_attempt_at.asc()).limit(limit).all()
+            return [OutboundMessage(r.id, r.phone, r.message_text, r.attempts or 0, r.client_id, r.intent, r.tenant_id)
+                    for r in rows]
+        return self._run(op)
+
+    def _set(self, ids, **fields):
+        from src.infrastructure.database.models import WhatsAppOutboundMessage as Row
+        if ids:
+            self._run(lambda s: s.query(Row).filter(Row.id.in_(ids)).update(fields, synchronize_session=False))
+
+    def claim(self, ids: List[int], lease_until: datetime) -> List[int]:
+        """Reclama los ids aún 'pending'; retorna sólo los ganados por este proceso"""
+        from src.infrastructure.database.models import WhatsAppOutboundMessage as Row
+
+        def op(session):
+            won = []
+            for row_id in ids:
+                claimed = session.query(Row).filter(Row.id == row_id, Row.status == 'pending')\
+                    .update({'status': 'sending', 'next_attempt_at': lease_until}, synchronize_session=False)
+                if claimed:
+                    won.append(row_id)
+            return won
+        return self._run(op) if ids else []
+
+    def mark_sent(self, message_id: int):
+        self._set([message_id], status='sent', sent_at=datetime.now())
+
+    def mark_retry(self, message_id: int, attempts: int, error: str, next_attempt_at: datetime):
+        self._set([message_id], status='pending', attempts=attempts, last_error=error, next_attempt_at=next_attempt_at)
+
+    def mark_failed(self, message_id: int, attempts: int, error: str):
+        self._set([message_id], status='failed', attempts=attempts, last_error=error)
+
+    def recover(self) -> int:
+        """Mensajes 'sending' con lease vencido (proceso caído o reiniciado) vuelven a la cola"""
+        from src.infrastructure.database.models import WhatsAppOutboundMessage as Row
+        return self._run(lambda s: s.query(Row).filter(Row.status == 'sending', Row.next_attempt_at <= datetime.now())
+                         .update({'status': 'pending'}, synchronize_session=False))
+
+
+class WhatsAppOutbox:
+    """
+    Despachador de la cola saliente.
+    send_fn(phone, text) -> bool es el transporte (WhatsAppAdapter.send_whatsapp).
+    on_sent(message) se invoca tras una entrega exitosa (ej. registrar en historial).
+    is_leader() decide si este proceso despacha (con varios workers sólo el líder: el límite
+    por destino vive en memoria); los demás sólo encolan.
+    """
+
+    def __init__(self, store, send_fn: Callable[[str, str], bool], workers: int = 3,
+                 per_destination_interval: float = 3.0, max_attempts: int = 5,
+                 backoff_base: float = 5.0, backoff_max: float = 600.0, poll_interval: float = 1.0,
+                 claim_timeout: float = 300.0, on_sent: Optional[Callable[[OutboundMessage], None]] = None,
+                 is_leader: Callable[[], bool] = lambda: True):
+        self.store = store
+        self.send_fn = send_fn
+        self.workers = max(1, workers)
+        self.per_destination_interval = per_destination_interval
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout   # Lease de un mensaje 'sending' (muy por encima del timeout del bridge)
+        self.on_sent = on_sent
+        self.is_leader = is_leader
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}          # {phone: message_id}
+        self._next_allowed: Dict[str, float] = {}     # {phone: monotonic}
+        self._next_recover = 0.0
+        self.stats = {'queued': 0, 'deduplicated': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+
+    # --- API pública ---
+
+    def enqueue(self, phone: str, text: str, client_id: Optional[int] = None, intent: Optional[str] = None,
+                tenant_id: Optional[int] = None) -> Optional[int]:
+        """Encola un mensaje. Retorna el id (el existente si ya había uno idéntico pendiente)."""
+        if not phone or not text:
+            return None
+        message_id, created = self.store.enqueue(phone, text, dedup_key(phone, text), client_id, intent, tenant_id)
+        self.stats['queued' if created else 'deduplicated'] += 1
+        self.start()
+        self._wake.set()
+        return message_id
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="WhatsAppSender")
+            self._thread = threading.Thread(target=self._dispatch_loop, daemon=True, name="WhatsAppOutbox")
+            self._thread.start()
+            logger.info(f"📤 WhatsApp Outbox iniciado ({self.workers} workers)")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        self._thread = None
+        self._executor = None
+
+    def idle(self) -> bool:
+        with self._lock:
+            return not self._in_flight
+
+    # --- Despacho ---
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.is_leader():
+                    self._recover_stale()
+                    self._dispatch_due()
+            except Exception as e:
+                logger.error(f"❌ WhatsApp Outbox: error despachando: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _recover_stale(self):
+        now = time.monotonic()
+        if now < self._next_recover:
+            return
+        self._next_recover = now + max(self.poll_interval, self.claim_timeout / 2)
+        recovered = self.store.recover()
+        if recovered:
+            logger.warning(f"⚠️ WhatsApp Outbox: {recovered} mensajes con reclamo vencido vuelven a la cola")
+
+    def _dispatch_due(self):
+        with self._lock:
+            free_slots = self.workers - len(self._in_flight)
+        if free_slots <= 0:
+            return
+
+        now = time.monotonic()
+        selected: List[OutboundMessage] = []
+        # Pedimos de más: algunos destinos pueden estar limitados en este momento
+        for message in self.store.due(free_slots * 4):
+            if len(selected) >= free_slots:
+                break
+            with self._lock:
+                if message.phone in self._in_flight or self._next_allowed.get(message.phone, 0) > now:
+                    continue
+                self._in_flight[message.phone] = message.id
+                self._next_allowed[message.phone] = now + self.per_destination_interval
+            selected.append(message)
+
+        if not selected:
+            return
+        try:
+            won = set(self.store.claim([m.id for m in selected], datetime.now() + timedelta(seconds=self.claim_timeout)))
+        except Exception:
+            # Sin reclamo no hay entrega: liberar todas las reservas o el destino quedaría "en vuelo" para siempre
+            self._release(selected)
+            raise
+        for message in selected:
+            if message.id in won:
+                self._executor.submit(self._deliver, message)
+            else:
+                self._release([message])   # Otro proceso lo reclamó primero
+
+    def _release(self, messages: List[OutboundMessage]):
+        with self._lock:
+            for message in messages:
+                if self._in_flight.get(message.phone) == message.id:
+                    del self._in_flight[message.phone]
+                self._next_allowed.pop(message.phone, None)
+
+    def _deliver(self, message: OutboundMessage):
+        error = None
+        try:
+            ok = bool(self.send_fn(message.phone, message.text))
+            if not ok:
+                error = 'Bridge rechazó el envío'
+        except Exception as e:
+            ok, error = False, str(e)
+
+        attempts = message.attempts + 1
+        try:
+            if ok:
+                self.store.mark_sent(message.id)
+                self.stats['sent'] += 1
+                if self.on_sent:
+                    try:
+                        self.on_sent(message)
+                    except Exception as e:
+                        logger.warning(f"WhatsApp Outbox: on_sent falló para {message.id}: {e}")
+            elif attempts >= self.max_attempts:
+                self.store.mark_failed(message.id, attempts, error)
+                self.stats['failed'] += 1
+                logger.error(f"❌ WhatsApp a {message.phone} descartado tras {attempts} intentos: {error}")
+            else:
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+                self.store.mark_retry(message.id, attempts, error, datetime.now() + timedelta(seconds=delay))
+                self.stats['retried'] += 1
+        finally:
+            with self._lock:
+                self._in_flight.pop(message.phone, None)
+            self._wake.set()
+
+
+_outbox: Optional[WhatsAppOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def _log_delivered(message: OutboundMessage):
+    """Registra el mensaje entregado en el historial de chats (fuera del request: tenant_id de la fila del outbox)"""
+    from src.infrastructure.database.db_manager import get_db
+    from src.application.services.whatsapp_agent_service import WhatsAppAgentService
+    db = get_db()
+    try:
+        WhatsAppAgentService(db)._log_outgoing(message.phone, message.text, message.client_id,
+                                               message.intent or 'outbound', tenant_id=message.tenant_id)
+    finally:
+        db.remove_session()
+
+
+def get_whatsapp_outbox() -> WhatsAppOutbox:
+    """Outbox global sobre la tabla whatsapp_outbox y el bridge local"""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                from sqlalchemy.orm import sessionmaker
+                from src.infrastructure.cluster.coordinator import get_coordinator
+                from src.infrastructure.config.settings import get_config
+                from src.infrastructure.database.db_manager import get_db
+                from src.infrastructure.notifications.whatsapp_adapter import WhatsAppAdapter
+
+                cfg = get_config().notification
+                adapter = WhatsAppAdapter(bridge_url=cfg.whatsapp_bridge_url, api_key='')
+                _outbox = WhatsAppOutbox(
+                    SqlOutboxStore(sessionmaker(bind=get_db().engine)),
+                    adapter.send_whatsapp,
+                    workers=cfg.whatsapp_workers,
+                    per_destination_interval=cfg.whatsapp_rate_seconds,
+                    max_attempts=cfg.whatsapp_max_attempts,
+                    on_sent=_log_delivered,
+                    is_leader=get_coordinator().is_leader
+                )
+    return _outbox
@@ -0,0 +1 @@
+"""Observability: logging estructurado y métricas"""
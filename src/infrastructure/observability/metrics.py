@@ -0,0 +1,224 @@
+"""
+Metrics Registry
+Métricas en proceso (contadores, gauges, histogramas) con exposición en texto Prometheus.
+- Sin dependencias externas: cada métrica guarda sus series en un dict protegido por lock.
+- timed_call: cronometra una llamada y la registra como histograma + contador de errores.
+"""
+import functools
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Latencias en segundos: de sub-milisegundo (SQLite) a timeouts de RouterOS
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: se esperaban etiquetas {self.labelnames}, se recibió {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def remove(self, **labels):
+        """Elimina una serie (p.ej. al detener el monitoreo de un router)"""
+        key = self._key(labels)
+        with self._lock:
+            self._series.pop(key, None)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in sorted(series):
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: LabelValues, value) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._series: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._series: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def value(self, **labels) -> Optional[float]:
+        return self._series.get(self._key(labels))
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por serie: [conteos por bucket (no acumulados)..., +Inf, suma]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                state = self._series[key] = [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels) -> int:
+        state = self._series.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def _render_series(self, key: LabelValues, state) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, hits in zip(self.buckets + (math.inf,), state[:-1]):
+            cumulative += hits
+            le = ('le', _format_value(bound))
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(state[-1])}')
+        lines.append(f'{self.name}_count{labels} {_format_value(cumulative)}')
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas por nombre; pedir dos veces la misma métrica devuelve la misma instancia"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[['MetricsRegistry'], None]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Iterable[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"La métrica {name} ya existe con otro tipo o etiquetas")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[['MetricsRegistry'], None]):
+        """Función invocada en cada render para refrescar gauges calculados al momento"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Formato de exposición de texto Prometheus (version=0.0.4)"""
+        for collector in list(self._collectors):
+            try:
+                collector(self)
+            except Exception as e:
+                logger.debug(f"Colector de métricas falló: {e}")
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+    return _metrics
+
+
+def timed_call(histogram: Histogram, errors: Counter, labels: Callable[..., Dict[str, object]]):
+    """
+    Decorador: observa la duración de la función en `histogram` y cuenta excepciones en `errors`.
+    `labels(*args, **kwargs)` calcula las etiquetas a partir de los argumentos de la llamada.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc(**labels(*args, **kwargs))
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels(*args, **kwargs))
+        wrapper.__wrapped_timed__ = True
+        return wrapper
+    return decorator
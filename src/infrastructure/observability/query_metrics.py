@@ -0,0 +1,86 @@
+"""
+Query Metrics
+Hooks de SQLAlchemy (before/after_cursor_execute) sobre el engine:
+- Duración de cada sentencia como histograma por tipo (SELECT/INSERT/...).
+- Conteo y tiempo acumulado por petición en flask.g (lo usa el log de peticiones para delatar N+1).
+- Sentencias lentas al logger 'sgubm.sql' con sus parámetros (truncados).
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from src.infrastructure.observability.metrics import get_metrics
+
+SQL_LOGGER = 'sgubm.sql'
+MAX_LOGGED_CHARS = 1000
+
+QUERY_SECONDS = get_metrics().histogram(
+    'sgubm_db_query_seconds', 'Duración de sentencias SQL', ('operation',))
+SLOW_QUERIES = get_metrics().counter(
+    'sgubm_db_slow_queries_total', 'Sentencias SQL por encima del umbral de lentitud', ('operation',))
+
+slow_logger = logging.getLogger(SQL_LOGGER)
+
+
+def statement_operation(statement: str) -> str:
+    """'  select ...' -> 'SELECT'; lo que no sea DML común queda como 'OTHER'"""
+    head = statement.lstrip()[:10].split(None, 1)
+    verb = head[0].upper() if head else ''
+    return verb if verb in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'PRAGMA') else 'OTHER'
+
+
+def _truncate(value: Any) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= MAX_LOGGED_CHARS else text[:MAX_LOGGED_CHARS] + '…'
+
+
+def request_query_stats() -> Optional[Dict[str, float]]:
+    """{'queries': n, 'ms': total} de la petición en curso, o None fuera de un request"""
+    from flask import g, has_request_context
+    if not has_request_context():
+        return None
+    return {'queries': getattr(g, '_db_queries', 0), 'ms': round(getattr(g, '_db_ms', 0.0), 2)}
+
+
+def install_query_metrics(engine, slow_ms: float = 500) -> None:
+    """Registra los hooks en el engine. Idempotente."""
+    from sqlalchemy import event
+    from flask import g, has_request_context
+
+    if engine.__dict__.get('_sgubm_query_metrics'):
+        return
+    engine._sgubm_query_metrics = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('_query_started')
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        operation = statement_operation(statement)
+        QUERY_SECONDS.observe(elapsed, operation=operation)
+
+        path = None
+        if has_request_context():
+            g._db_queries = getattr(g, '_db_queries', 0) + 1
+            g._db_ms = getattr(g, '_db_ms', 0.0) + elapsed * 1000
+            from flask import request
+            path = request.path
+
+        if slow_ms is not None and elapsed * 1000 >= slow_ms:
+            SLOW_QUERIES.inc(operation=operation)
+            slow_logger.warning(
+                f"🐢 SQL lenta ({elapsed * 1000:.0f}ms): {_truncate(' '.join(statement.split()))[:200]}",
+                extra={'duration_ms': round(elapsed * 1000, 2), 'statement': _truncate(statement),
+                       'params': _truncate(parameters), 'executemany': executemany, 'path': path})
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # La sentencia falló: descartar su marca de inicio para no desalinear la pila
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('_query_started'):
+            conn.info['_query_started'].pop()
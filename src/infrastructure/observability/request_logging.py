@@ -0,0 +1,238 @@
+"""
+Request Logging
+Logging estructurado (JSON) fuera del camino del request:
+- configure_logging: los handlers reales corren en un hilo escritor (QueueListener); los hilos
+  de la app sólo encolan, y si la cola se llena el registro se descarta en lugar de bloquear.
+- RequestLogPolicy: muestreo por ruta (el polling del dashboard no necesita una línea por petición),
+  encabezados por lista permitida con redacción de credenciales.
+- init_request_logging: una línea por petición con método, ruta, estado, duración, tamaño y
+  consultas SQL; además alimenta los histogramas HTTP de /metrics.
+"""
+import fnmatch
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+REQUEST_LOGGER = 'sgubm.request'
+
+DEFAULT_HEADER_ALLOWLIST = ('User-Agent', 'Content-Type', 'Content-Length', 'Referer',
+                            'X-Forwarded-For', 'X-Request-Id', 'Authorization')
+REDACTED_HEADERS = {'authorization', 'cookie', 'set-cookie', 'x-api-key', 'proxy-authorization'}
+
+# Polling del frontend (cada 2-5 s) y recursos estáticos
+DEFAULT_ROUTE_SAMPLES: List[Tuple[str, float]] = [
+    ('/socket.io*', 0.0),
+    ('/static/*', 0.0),
+    ('/metrics', 0.0),
+    ('/api/routers/monitor', 0.01),
+    ('/api/routers/dashboard/monitored-traffic', 0.01),
+    ('/api/routers/*/interface/*/traffic', 0.01),
+    ('/api/whatsapp/status', 0.01),
+]
+
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro; los campos de extra={...} van al primer nivel"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que nunca bloquea: con la cola llena descarta y cuenta"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+
+
+def configure_logging(level: str = 'INFO', fmt: str = 'json', queue_size: int = 10000) -> DroppingQueueHandler:
+    """
+    Reemplaza los handlers del logger raíz por un QueueHandler; el StreamHandler real
+    (con formato JSON o texto) corre en el hilo del QueueListener. Idempotente.
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    if _queue_handler is not None and _queue_handler in root.handlers:
+        return _queue_handler
+
+    stream = logging.StreamHandler()
+    if fmt == 'json':
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=max(0, queue_size))
+    _queue_handler = DroppingQueueHandler(log_queue)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    import atexit
+    atexit.register(stop_logging)
+    return _queue_handler
+
+
+def stop_logging():
+    """Vacía la cola y detiene el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def parse_route_samples(spec: str) -> List[Tuple[str, float]]:
+    """'/api/x*=0.1,/api/y=0' -> [('/api/x*', 0.1), ('/api/y', 0.0)]"""
+    rules = []
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        pattern, rate = item.rsplit('=', 1)
+        try:
+            rules.append((pattern.strip(), max(0.0, min(1.0, float(rate)))))
+        except ValueError:
+            continue
+    return rules
+
+
+class RequestLogPolicy:
+    """Qué peticiones se registran y con qué encabezados"""
+
+    def __init__(self, default_rate: float = 1.0, route_samples: Optional[Iterable[Tuple[str, float]]] = None,
+                 slow_ms: float = 1000, header_allowlist: Iterable[str] = DEFAULT_HEADER_ALLOWLIST,
+                 rng=random.random, query_warn: int = 50):
+        # Las reglas configuradas tienen prioridad sobre las predeterminadas
+        self.route_samples = list(route_samples or []) + DEFAULT_ROUTE_SAMPLES
+        self.default_rate = default_rate
+        self.slow_ms = slow_ms
+        self.query_warn = query_warn
+        self.header_allowlist = {h.lower(): h for h in header_allowlist}
+        self._rng = rng
+        self._rate_cache: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, system_config) -> 'RequestLogPolicy':
+        extra_headers = [h.strip() for h in (system_config.request_log_headers or '').split(',') if h.strip()]
+        return cls(default_rate=system_config.request_log_sample,
+                   route_samples=parse_route_samples(system_config.request_log_routes),
+                   slow_ms=system_config.request_log_slow_ms,
+                   header_allowlist=list(DEFAULT_HEADER_ALLOWLIST) + extra_headers,
+                   query_warn=system_config.request_log_query_warn)
+
+    def rate_for(self, path: str) -> float:
+        rate = self._rate_cache.get(path)
+        if rate is None:
+            rate = next((r for pattern, r in self.route_samples if fnmatch.fnmatchcase(path, pattern)),
+                        self.default_rate)
+            if len(self._rate_cache) < 5000:
+                self._rate_cache[path] = rate
+        return rate
+
+    def is_query_heavy(self, db_queries: int) -> bool:
+        return bool(self.query_warn) and db_queries >= self.query_warn
+
+    def should_log(self, path: str, status: int, duration_ms: float, db_queries: int = 0) -> bool:
+        """Errores, peticiones lentas y con demasiadas consultas siempre; el resto según la tasa de su ruta"""
+        if status >= 500 or duration_ms >= self.slow_ms or self.is_query_heavy(db_queries):
+            return True
+        rate = self.rate_for(path)
+        return rate >= 1.0 or (rate > 0 and self._rng() < rate)
+
+    def headers(self, headers) -> Dict[str, str]:
+        selected = {}
+        for name, value in headers.items():
+            canonical = self.header_allowlist.get(name.lower())
+            if canonical is None:
+                continue
+            selected[canonical] = '[REDACTED]' if name.lower() in REDACTED_HEADERS else value
+        return selected
+
+
+def init_request_logging(app, policy: Optional[RequestLogPolicy] = None) -> RequestLogPolicy:
+    """Registra el cronómetro y la línea estructurada de cada petición en la app Flask"""
+    from flask import g, request
+    from src.infrastructure.observability.metrics import get_metrics
+
+    policy = policy or RequestLogPolicy()
+    request_logger = logging.getLogger(REQUEST_LOGGER)
+    request_seconds = get_metrics().histogram(
+        'sgubm_http_request_seconds', 'Duración de peticiones HTTP', ('method', 'endpoint', 'status'))
+    request_queries = get_metrics().histogram(
+        'sgubm_http_request_db_queries', 'Consultas SQL por petición HTTP', ('endpoint',),
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+
+    @app.before_request
+    def _start_request_timer():
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        started = getattr(g, '_request_started', None)
+        if started is None:
+            return response
+        duration_ms = (time.perf_counter() - started) * 1000
+        status = response.status_code
+        endpoint = request.endpoint or 'unmatched'
+        db_queries = getattr(g, '_db_queries', 0)
+        request_seconds.observe(duration_ms / 1000, method=request.method, endpoint=endpoint,
+                                status=f"{status // 100}xx")
+        request_queries.observe(db_queries, endpoint=endpoint)
+        if not policy.should_log(request.path, status, duration_ms, db_queries):
+            return response
+
+        rate = policy.rate_for(request.path)
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': status,
+            'duration_ms': round(duration_ms, 2),
+            'bytes': response.calculate_content_length(),
+            'db_queries': db_queries,
+            'db_ms': round(getattr(g, '_db_ms', 0.0), 2),
+            'ip': request.headers.get('X-Forwarded-For', request.remote_addr),
+            'tenant_id': getattr(g, 'tenant_id', None),
+            'sample_rate': rate,
+            'headers': policy.headers(request.headers),
+        }
+        if status >= 500:
+            level = logging.ERROR
+        elif duration_ms >= policy.slow_ms or policy.is_query_heavy(db_queries):
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        request_logger.log(level, f"📥 {request.method} {request.path} {status} {duration_ms:.0f}ms", extra=fields)
+        return response
+
+    return policy
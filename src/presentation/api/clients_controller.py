@@ -12,6 +12,8 @@ from src.application.services.sync_service import SyncService
 from src.application.services.audit_service import AuditService
 from src.application.services.auth import login_required, admin_required, UserRole, permission_required
 from src.application.services.monitoring_manager import MonitoringManager
+from src.application.services.ip_index import PrefixTrie
+from src.application.events.event_bus import get_event_bus, SystemEvents
 import logging
 import json
 from ipaddress import ip_network, ip_address
@@ -80,9 +82,23 @@ def get_clients():
         else:
             return jsonify([])
             
-    # Use the new combined filtering method (assumed to handle assigned_collector_id if passed)
-    # If the repo doesn't support it yet, we'll need to update it too.
-    # Let's check the repo later, but for now we'll pass it.
+    # Paginación por cursor (id) opcional: ?cursor=&page_size=N -> {items, next_cursor}
+    cursor = request.args.get('cursor')
+    if cursor is not None or 'page_size' in request.args:
+        try:
+            clients, next_cursor = client_repo.get_page(
+                limit=request.args.get('page_size', default=100, type=int),
+                cursor=cursor or None,
+                router_id=router_id,
+                status=status,
+                search=search,
+                plan_id=plan_id,
+                assigned_collector_id=assigned_collector_id
+            )
+        except ValueError:
+            return jsonify({'error': 'Cursor inválido'}), 400
+        return jsonify({'items': [c.to_dict() for c in clients], 'next_cursor': next_cursor})
+
     clients = client_repo.get_filtered(
         router_id=router_id, 
         status=status, 
@@ -176,11 +192,10 @@ def create_client():
     target_router_id = data.get('router_id')
 
     if ip_addr and ip_addr != 'N/A' and ip_addr != '' and target_router_id:
-        existing = client_repo.get_all()
-        # Verificar duplicados en EL MISMO ROUTER, excluyendo 'deleted'
-        dupes = [c for c in existing if c.ip_address == ip_addr and c.router_id == int(target_router_id) and c.status != 'deleted']
-        if dupes:
-            return jsonify({'error': f'La IP {ip_addr} ya está asignada en este router al cliente {dupes[0].legal_name}'}), 400
+        # Verificar duplicados en EL MISMO ROUTER, excluyendo 'deleted' (consulta indexada: la BD es la fuente de verdad)
+        owner = client_repo.find_ip_owner(ip_addr, int(target_router_id))
+        if owner:
+            return jsonify({'error': f'La IP {ip_addr} ya está asignada en este router al cliente {owner.legal_name}'}), 400
 
     try:
         # Handle assigned_collector_id
@@ -230,7 +245,10 @@ def create_client():
             'event_type': SystemEvents.CLIENT_CREATED,
             'client_id': client.id,
             'tenant_id': g.tenant_id,
-            'client_name': client.full_name
+            'client_name': client.full_name,
+            'ip_address': client.ip_address,
+            'router_id': client.router_id,
+            'status': client.status
         })
         
         return jsonify(client.to_dict()), 201
@@ -294,10 +312,9 @@ def update_client(client_id):
     if new_ip and new_ip != 'N/A' and new_ip != '':
         # Solo validar si cambió la IP o cambió el Router
         if new_ip != old_ip or target_router_id != old_client.router_id:
-            existing = client_repo.get_all()
-            dupes = [c for c in existing if c.ip_address == new_ip and c.router_id == int(target_router_id) and c.id != client_id and c.status != 'deleted']
-            if dupes:
-                 return jsonify({'error': f'La IP {new_ip} ya está en uso en este router por {dupes[0].legal_name}'}), 400
+            owner = client_repo.find_ip_owner(new_ip, int(target_router_id), exclude_client_id=client_id)
+            if owner:
+                 return jsonify({'error': f'La IP {new_ip} ya está en uso en este router por {owner.legal_name}'}), 400
 
     try:
         # Handle assigned_collector_id update
@@ -361,7 +378,10 @@ def update_client(client_id):
             'event_type': SystemEvents.CLIENT_UPDATED,
             'client_id': client_id,
             'tenant_id': g.tenant_id,
-            'action': 'edited'
+            'action': 'edited',
+            'ip_address': updated_client.ip_address,
+            'router_id': updated_client.router_id,
+            'status': updated_client.status
         })
         
         return jsonify(updated_client.to_dict())
@@ -408,6 +428,13 @@ def delete_client(client_id):
             new_state={'status': 'deleted'}
         )
         
+        get_event_bus().publish(SystemEvents.CLIENT_UPDATED, {
+            'event_type': SystemEvents.CLIENT_UPDATED,
+            'client_id': client_id,
+            'tenant_id': g.tenant_id,
+            'action': 'archived'
+        })
+        
         return jsonify({'message': 'Cliente archivado correctamente'}), 200
 
     else:
@@ -428,6 +455,12 @@ def delete_client(client_id):
         if not success:
              return jsonify({'error': 'Error al eliminar de BD'}), 500
         
+        get_event_bus().publish(SystemEvents.CLIENT_DELETED, {
+            'event_type': SystemEvents.CLIENT_DELETED,
+            'client_id': client_id,
+            'tenant_id': g.tenant_id
+        })
+        
         logger.info(f"Cliente {client_id} eliminado permanentemente (Global).")
         return jsonify({'message': 'Cliente eliminado correctamente'}), 200
 
@@ -724,6 +757,13 @@ def restore_client(client_id):
         new_state={'status': 'active'}
     )
     
+    get_event_bus().publish(SystemEvents.CLIENT_UPDATED, {
+        'event_type': SystemEvents.CLIENT_UPDATED,
+        'client_id': client_id,
+        'tenant_id': g.tenant_id,
+        'action': 'restored'
+    })
+    
     logger.info(f"Cliente restaurado del archivo: {client.legal_name}")
     return jsonify(client.to_dict())
 
@@ -989,6 +1029,9 @@ def preview_import_clients(router_id):
 
     logger.info(f"Filtrando importación ({scan_type}) de router {router_id} ({router.alias}) por {len(allowed_networks)} segmentos: {[str(n) for n in allowed_networks]}")
 
+    # Índice de prefijos: cada verificación cuesta O(bits) en lugar de recorrer todos los segmentos
+    segment_trie = PrefixTrie.from_networks(allowed_networks)
+
     # Get exclusion keywords from router config
     exclusion_raw = router.exclusion_keywords or ""
     dynamic_keywords = [k.strip().upper() for k in exclusion_raw.split(',') if k.strip()]
@@ -1002,8 +1045,7 @@ def preview_import_clients(router_id):
         if clean_ip.startswith('169.254') or clean_ip == '0.0.0.0': return False
             
         try:
-            addr = ip_address(clean_ip)
-            return any(addr in net for net in allowed_networks)
+            return ip_address(clean_ip) in segment_trie
         except ValueError:
             return False
 
@@ -1031,18 +1073,13 @@ def preview_import_clients(router_id):
         if not ip_str or ip_str == '0.0.0.0': return 'Sin Plan'
         try:
             addr = ip_address(ip_str.split('/')[0])
-            for net in allowed_networks:
-                if addr in net:
-                    # HEURÍSTICA: Intentar mapear basado en el nombre del segmento o tipo
-                    # 172.16.41.0/24 -> SQ Plan (MI JARDIN AIRE)
-                    # 10.10.10.0/24 -> PLAN_30Mbps (MI JARDIN PPPoE)
-                    net_str = str(net)
-                    if net_str == '172.16.41.0/24': return 'SQ Plan'
-                    if net_str == '10.10.10.0/24': return 'PLAN_30Mbps'
-                    
-                    # Fallback por nombre de segmento si está disponible
-                    # (Como allowed_networks son objetos ip_network, no tenemos el nombre aquí fácilmente
-                    # salvo que lo hayamos guardado)
+            for net, _ in segment_trie.matches(addr):
+                # HEURÍSTICA: Intentar mapear basado en el nombre del segmento o tipo
+                # 172.16.41.0/24 -> SQ Plan (MI JARDIN AIRE)
+                # 10.10.10.0/24 -> PLAN_30Mbps (MI JARDIN PPPoE)
+                net_str = str(net)
+                if net_str == '172.16.41.0/24': return 'SQ Plan'
+                if net_str == '10.10.10.0/24': return 'PLAN_30Mbps'
             return 'Sin Plan'
         except:
             return 'Sin Plan'
@@ -1532,16 +1569,21 @@ def get_usage_report(client_id):
     online_snapshots = 0
     
     # Para calcular consumo diario necesitamos deltas de los contadores de bytes
-    # download_bytes/upload_bytes son acumulados del router.
-    
+    # download_bytes/upload_bytes son acumulados del router: cada delta (tolerante a
+    # reinicios del contador) se atribuye al día de la lectura que lo cierra.
+    from src.application.services.monitoring_utils import counter_delta
+    prev_down = prev_up = None
+
     # Agrupamos por fecha (YYYY-MM-DD)
     for h in history:
         day_key = h.timestamp.date().isoformat()
         if day_key not in daily_stats:
-            daily_stats[day_key] = {'down': [], 'up': [], 'online': 0, 'total': 0}
-        
-        daily_stats[day_key]['down'].append(h.download_bytes)
-        daily_stats[day_key]['up'].append(h.upload_bytes)
+            daily_stats[day_key] = {'down': 0.0, 'up': 0.0, 'online': 0, 'total': 0}
+
+        daily_stats[day_key]['down'] += counter_delta(prev_down, h.download_bytes)
+        daily_stats[day_key]['up'] += counter_delta(prev_up, h.upload_bytes)
+        prev_down = h.download_bytes or prev_down
+        prev_up = h.upload_bytes or prev_up
         daily_stats[day_key]['total'] += 1
         if h.is_online:
             daily_stats[day_key]['online'] += 1
@@ -1549,22 +1591,8 @@ def get_usage_report(client_id):
 
     report_daily = []
     for day, stats in sorted(daily_stats.items()):
-        # Calcular delta (Consumo real del día)
-        # down_delta = max(stats['down']) - min(stats['down'])
-        # Pero si hubo reajuste (reboot), el min podría ser el post-reboot. 
-        # Algoritmo simple: Suma de deltas positivos consecutivos
-        
-        def calculate_total_delta(series):
-            if not series: return 0
-            total = 0
-            for i in range(1, len(series)):
-                diff = series[i] - series[i-1]
-                if diff > 0:
-                    total += diff
-            return total
-
-        down_gb = calculate_total_delta(stats['down']) / (1024**3)
-        up_gb = calculate_total_delta(stats['up']) / (1024**3)
+        down_gb = stats['down'] / (1024**3)
+        up_gb = stats['up'] / (1024**3)
         
         report_daily.append({
             'date': day,
@@ -2476,9 +2504,9 @@ def bulk_revert_recent_payments():
 @clients_bp.route('/export', methods=['GET'])
 @login_required
 def export_clients():
-    """Exporta los clientes a Excel basado en filtros actuales"""
-    from flask import make_response
-    from src.application.services.report_service import ReportService
+    """Exporta los clientes a Excel basado en filtros actuales (streaming, memoria constante)"""
+    from src.application.services.export_service import ExportColumn, iter_xlsx, streaming_response, XLSX_MIMETYPE
+    from src.infrastructure.database.engine_profiles import stream_query
     
     db = get_db()
     client_repo = db.get_client_repository()
@@ -2501,29 +2529,30 @@ def export_clients():
             return jsonify({'error': 'No tienes permisos para exportar clientes'}), 403
             
     try:
-        clients = client_repo.get_filtered(
-            router_id=router_id, 
-            status=status, 
-            search=search, 
-            plan_id=plan_id,
-            assigned_collector_id=assigned_collector_id
-        )
-        
-        clients_dict = [c.to_dict() for c in clients]
-        
         router_name = "General"
         if router_id:
             router = db.get_router_repository().get_by_id(router_id)
             if router:
                 router_name = router.alias
-                
-        excel_buffer = ReportService.generate_clients_excel(clients_dict, router_name=router_name)
+
+        # Sólo las columnas del reporte, leídas por lotes
+        query = client_repo.export_query(
+            [Client.subscriber_code, Client.legal_name, Client.identity_document, Client.ip_address, Client.phone],
+            router_id=router_id,
+            status=status,
+            search=search,
+            plan_id=plan_id,
+            assigned_collector_id=assigned_collector_id
+        )
+        rows = ([i, r.subscriber_code or '-', r.legal_name or '-', r.identity_document or '-', r.ip_address or '-', r.phone or '-']
+                for i, r in enumerate(stream_query(query, 1000), 1))
+        columns = [
+            ExportColumn('No.'), ExportColumn('Código'), ExportColumn('Nombre', 35),
+            ExportColumn('Cédula', 15), ExportColumn('IP', 15), ExportColumn('Teléfono')
+        ]
+
         filename = f"clientes_{router_name.lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        response = make_response(excel_buffer.getvalue())
-        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-        response.headers["Content-type"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        return response
+        return streaming_response(iter_xlsx('Clientes', columns, rows, header_color='#4f46e5'), filename, XLSX_MIMETYPE)
     except Exception as e:
         logger.error(f"Error exporting clients: {e}")
         return jsonify({'error': 'Error al generar el archivo Excel'}), 500
@@ -43,9 +43,11 @@ async def get_clients(
     plan_id: Optional[int] = None,
     status: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
     user=Depends(get_current_user)
 ):
-    """Obtiene todos los clientes con filtros combinados"""
+    """Obtiene todos los clientes con filtros combinados (con cursor o page_size responde {items, next_cursor})"""
     db = get_db()
     client_repo = db.get_client_repository()
     
@@ -60,6 +62,21 @@ async def get_clients(
         else:
             return []
             
+    if cursor is not None or page_size:
+        try:
+            clients, next_cursor = client_repo.get_page(
+                limit=page_size or 100,
+                cursor=cursor or None,
+                router_id=router_id,
+                status=status,
+                search=search,
+                plan_id=plan_id,
+                assigned_collector_id=assigned_collector_id
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        return {'items': [c.to_dict() for c in clients], 'next_cursor': next_cursor}
+
     clients = client_repo.get_filtered(
         router_id=router_id, 
         status=status, 
@@ -5,17 +5,14 @@ API endpoints for the collector's financial summary, earnings and remittance tra
 from flask import Blueprint, request, jsonify, g
 from datetime import datetime, timedelta
 from src.application.services.auth import login_required
+from src.infrastructure.database.db_manager import get_db
 from src.infrastructure.database.models import (
-    User, Payment, Client, CollectorTransfer, Expense, UserRole, get_session, init_db
+    User, Payment, Client, CollectorTransfer, Expense, UserRole, get_session
 )
-import os
 from sqlalchemy import or_
 
 collector_finance_bp = Blueprint('collector_finance', __name__, url_prefix='/api/collector')
 
-DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///sgubm.db')
-engine = init_db(DATABASE_URL)
-
 RESTRICTED_ROLES = [UserRole.COLLECTOR.value, UserRole.TECHNICAL.value, UserRole.SECRETARY.value]
 
 def _get_date_range(args):
@@ -50,7 +47,7 @@ def get_collector_summary():
     - Saldo pendiente por enviar
     """
     admin_user = g.user
-    session = get_session(engine)
+    session = get_session(get_db().engine)
     
     try:
         start, end = _get_date_range(request.args)
@@ -237,7 +234,7 @@ def get_collector_summary():
 def get_transfers():
     """Historial de envíos a la empresa del cobrador."""
     user = g.user
-    session = get_session(engine)
+    session = get_session(get_db().engine)
     try:
         start, end = _get_date_range(request.args)
         
@@ -265,7 +262,7 @@ def create_transfer():
     if not amount or float(amount) <= 0:
         return jsonify({'success': False, 'message': 'El monto debe ser mayor a 0'}), 400
     
-    session = get_session(engine)
+    session = get_session(get_db().engine)
     try:
         target_user_id = data.get('user_id')
         is_admin = user.role in [UserRole.ADMIN.value, UserRole.ADMIN_FEM.value, UserRole.PARTNER.value]
@@ -294,7 +291,7 @@ def create_transfer():
 def get_collector_expenses():
     """Listado de gastos/descuentos aplicados al cobrador."""
     user = g.user
-    session = get_session(engine)
+    session = get_session(get_db().engine)
     try:
         start, end = _get_date_range(request.args)
         
@@ -337,7 +334,7 @@ def create_collector_expense():
         return jsonify({'success': False, 'message': 'No tienes permisos para registrar gastos'}), 403
         
     data = request.json or {}
-    session = get_session(engine)
+    session = get_session(get_db().engine)
     try:
         expense = Expense(
             description=data.get('description'),
@@ -0,0 +1,150 @@
+"""
+Lazy Blueprints
+Registro diferido de módulos API poco usados (reportes, soporte, centinela, finanzas del cobrador).
+Las rutas se leen del código fuente del controller (ast, sin importarlo) y se registran con
+vistas proxy; el módulo y sus dependencias se importan recién en la primera petición a una de ellas.
+Si el controller usa algo que el manifiesto no puede representar (hooks del blueprint, argumentos
+no literales), se registra de forma normal.
+"""
+import ast
+import importlib
+import importlib.util
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from flask import Flask
+
+logger = logging.getLogger(__name__)
+
+_BLUEPRINT_HOOKS = {'before_request', 'after_request', 'teardown_request', 'errorhandler', 'app_errorhandler',
+                    'before_app_request', 'after_app_request', 'context_processor', 'app_context_processor',
+                    'url_value_preprocessor', 'url_defaults', 'record', 'record_once', 'add_url_rule',
+                    'register_blueprint', 'app_template_filter', 'template_filter'}
+
+
+@dataclass
+class RouteSpec:
+    rule: str
+    endpoint: str
+    view_name: str
+    methods: Optional[List[str]] = None
+
+
+@dataclass
+class BlueprintManifest:
+    name: str
+    variable: str
+    url_prefix: Optional[str]
+    routes: List[RouteSpec] = field(default_factory=list)
+
+
+def _literal(node):
+    return ast.literal_eval(node)
+
+
+def read_manifest(module_name: str) -> Optional[BlueprintManifest]:
+    """Rutas del blueprint del módulo, o None si no se pueden extraer sin importarlo"""
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or not spec.origin:
+        return None
+    with open(spec.origin, encoding='utf-8') as fh:
+        tree = ast.parse(fh.read(), filename=spec.origin)
+
+    manifest = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call) \
+                and getattr(node.value.func, 'id', None) == 'Blueprint':
+            if manifest is not None or len(node.targets) != 1:
+                return None
+            try:
+                kwargs = {kw.arg: _literal(kw.value) for kw in node.value.keywords}
+                name = _literal(node.value.args[0])
+            except (ValueError, IndexError):
+                return None
+            if set(kwargs) - {'url_prefix'}:
+                return None   # template/static folders: se registra normal
+            manifest = BlueprintManifest(name=name, variable=node.targets[0].id,
+                                         url_prefix=kwargs.get('url_prefix'))
+    if manifest is None:
+        return None
+
+    for node in ast.walk(tree):
+        # Cualquier otro uso del blueprint (hooks, registros manuales) no es representable
+        if isinstance(node, ast.Attribute) and getattr(node.value, 'id', None) == manifest.variable \
+                and node.attr in _BLUEPRINT_HOOKS:
+            return None
+
+    for node in tree.body:
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        for deco in node.decorator_list:
+            if not (isinstance(deco, ast.Call) and isinstance(deco.func, ast.Attribute)
+                    and getattr(deco.func.value, 'id', None) == manifest.variable and deco.func.attr == 'route'):
+                continue
+            try:
+                rule = _literal(deco.args[0])
+                options = {kw.arg: _literal(kw.value) for kw in deco.keywords}
+            except (ValueError, IndexError):
+                return None
+            if set(options) - {'methods', 'endpoint'}:
+                return None
+            manifest.routes.append(RouteSpec(rule=rule, endpoint=options.get('endpoint', node.name),
+                                             view_name=node.name, methods=options.get('methods')))
+    return manifest if manifest.routes else None
+
+
+def _join_rule(url_prefix: Optional[str], rule: str) -> str:
+    """Misma regla que BlueprintSetupState.add_url_rule"""
+    if url_prefix is None:
+        return rule
+    return '/'.join((url_prefix.rstrip('/'), rule.lstrip('/'))) if rule else url_prefix
+
+
+class LazyView:
+    """Vista proxy: importa el módulo en la primera llamada y delega en la función real"""
+
+    def __init__(self, module_name: str, view_name: str):
+        self.module_name = module_name
+        self.view_name = view_name
+        self.__name__ = view_name
+        self._view = None
+        self._lock = threading.Lock()
+
+    @property
+    def view(self):
+        if self._view is None:
+            with self._lock:
+                if self._view is None:
+                    module = importlib.import_module(self.module_name)
+                    self._view = getattr(module, self.view_name)
+                    logger.info(f"📦 Módulo diferido cargado: {self.module_name}")
+        return self._view
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def register_lazy_blueprint(app: Flask, module_name: str, attribute: str) -> bool:
+    """
+    Registra las rutas del blueprint `attribute` de `module_name` sin importar el módulo.
+    Retorna False (y registra el blueprint de forma normal) si el manifiesto no aplica.
+    """
+    manifest = None
+    try:
+        manifest = read_manifest(module_name)
+    except (OSError, SyntaxError) as e:
+        logger.warning(f"⚠️ No se pudo leer {module_name} para registro diferido: {e}")
+    if manifest is None or manifest.variable != attribute:
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, attribute))
+        return False
+
+    views = {}
+    for route in manifest.routes:
+        view = views.setdefault(route.view_name, LazyView(module_name, route.view_name))
+        app.add_url_rule(_join_rule(manifest.url_prefix, route.rule),
+                         endpoint=f"{manifest.name}.{route.endpoint}",
+                         view_func=view, methods=route.methods)
+    return True
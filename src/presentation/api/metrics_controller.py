@@ -0,0 +1,52 @@
+"""
+Metrics Controller
+Exposición de métricas en formato de texto Prometheus (GET /metrics).
+- Deshabilitado por defecto (METRICS_ENABLED=true para registrarlo).
+- Si METRICS_TOKEN está definido, exige "Authorization: Bearer <token>"; en producción es obligatorio.
+"""
+import hmac
+import logging
+import threading
+from flask import Blueprint, Response, jsonify, request
+from src.infrastructure.config.settings import get_config
+from src.infrastructure.observability.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _collect_runtime(registry):
+    """Valores que se leen al momento del scrape en lugar de actualizarse en cada evento"""
+    from src.infrastructure.observability import request_logging
+    handler = request_logging._queue_handler
+    if handler is not None:
+        registry.gauge('sgubm_log_records_dropped', 'Registros de log descartados por cola llena').set(handler.dropped)
+    registry.gauge('sgubm_threads', 'Hilos vivos en el proceso').set(threading.active_count())
+
+
+def register_metrics(app) -> bool:
+    """Registra /metrics según la configuración. Retorna si quedó expuesto."""
+    system = get_config().system
+    if not system.metrics_enabled:
+        return False
+    if system.is_production and not system.metrics_token:
+        logger.warning("⚠️ /metrics no registrado: en producción METRICS_TOKEN es obligatorio")
+        return False
+    app.register_blueprint(metrics_bp)
+    return True
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    token = get_config().system.metrics_token
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied, f"Bearer {token}"):
+            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+
+    registry = get_metrics()
+    registry.register_collector(_collect_runtime)
+    return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -122,36 +122,30 @@ def get_payments():
         except ValueError:
             pass
 
-    payments = payment_repo.get_filtered(
-        client_id=client_id,
-        start_date=start_dt,
-        end_date=end_dt,
-        method=method,
-        search=search,
-        limit=limit
-    )
-    
     user = g.user
     is_restricted_role = user.role not in [UserRole.ADMIN.value, UserRole.ADMIN_FEM.value, UserRole.PARTNER.value]
     
-    if is_restricted_role:
-        # Obtener routers asignados para filtrado colectivo
-        assigned_router_ids = []
-        if user.assigned_router_id:
-            assigned_router_ids.append(user.assigned_router_id)
-        if hasattr(user, 'assignments') and user.assignments:
-            assigned_router_ids.extend([a.router_id for a in user.assignments])
-            
-        # Filtrar pagos
-        payments = [
-            p for p in payments 
-            if p.client and (
-                p.client.assigned_collector_id == user.id or 
-                p.client.router_id in assigned_router_ids
-            )
-        ]
-            
-    return jsonify([p.to_dict() for p in payments])
+    # Paginación por cursor (payment_date|id); el filtro RBAC va en el WHERE, antes del LIMIT
+    cursor = request.args.get('cursor')
+    paginated = cursor is not None or 'page_size' in request.args
+    try:
+        payments, next_cursor = payment_repo.get_page(
+            limit=request.args.get('page_size', default=limit, type=int),
+            cursor=cursor or None,
+            client_id=client_id,
+            start_date=start_dt,
+            end_date=end_dt,
+            method=method,
+            search=search,
+            scope_user_id=user.id if is_restricted_role else None
+        )
+    except ValueError:
+        return jsonify({'error': 'Cursor inválido'}), 400
+    
+    items = [p.to_dict() for p in payments]
+    if paginated:
+        return jsonify({'items': items, 'next_cursor': next_cursor})
+    return jsonify(items)
 
 
 # --- ENDPOINTS PARA PAGOS REPORTADOS (COBRADORES) ---
@@ -1445,125 +1439,113 @@ def generate_report():
     })
 
 
-@payments_bp.route('/export', methods=['GET'])
-@admin_required
-def export_payments():
-    """
-    Exporta el listado de pagos a CSV con filtros
-    """
-    import csv
-    import io
-    from flask import make_response
-    
-    db = get_db()
-    payment_repo = db.get_payment_repository()
-    
-    # Filtros
+# Traducción de métodos de pago para reportes
+PAYMENT_METHOD_LABELS = {
+    'Cash': 'Efectivo',
+    'Bank Transfer': 'Transferencia',
+    'Mobile Payment': 'Pago Móvil',
+    'Zelle': 'Zelle',
+    'Binance': 'Binance',
+    'Digital Wallet': 'Billetera Digital',
+    'Other': 'Otro'
+}
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_date_filters():
+    """Lee start_date/end_date/method de la query string (end_date inclusivo hasta fin de día)"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-    method = request.args.get('method')
-    
-    from datetime import timedelta
     start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00')) if start_date else None
     end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00')) if end_date else None
-    
     if end_dt:
         end_dt = end_dt.replace(hour=23, minute=59, second=59)
-    
-    payments = payment_repo.get_filtered(
-        start_date=start_dt,
-        end_date=end_dt,
-        method=method,
-        limit=10000
+    return start_dt, end_dt, request.args.get('method')
+
+
+def _payment_export_rows(start_dt, end_dt, method):
+    """Filas de pagos en streaming (sólo columnas, sin objetos ORM)"""
+    from src.infrastructure.database.engine_profiles import stream_query
+    query = get_db().get_payment_repository().export_query(
+        [Payment.id, Client.legal_name, Client.subscriber_code, Payment.payment_date, Payment.amount,
+         Payment.currency, Payment.payment_method, Payment.reference, Payment.notes],
+        start_date=start_dt, end_date=end_dt, method=method
     )
-    
-    # Crear CSV en memoria
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Encabezados - Cambiado 'ID' por 'Ref' para evitar problema SYLK de Excel
-    writer.writerow(['Ref', 'Cliente', 'Código', 'Fecha', 'Monto', 'Moneda', 'Método', 'Referencia', 'Nota'])
-    
-    for p in payments:
-        client_name = p.client.legal_name if p.client else 'N/A'
-        subs_code = p.client.subscriber_code if p.client else 'N/A'
-        # Traducción de métodos de pago
-        method_map = {
-            'Cash': 'Efectivo',
-            'Bank Transfer': 'Transferencia',
-            'Mobile Payment': 'Pago Móvil',
-            'Zelle': 'Zelle',
-            'Binance': 'Binance',
-            'Digital Wallet': 'Billetera Digital',
-            'Other': 'Otro'
-        }
-        
-        display_method = method_map.get(p.payment_method, p.payment_method)
-        
-        writer.writerow([
-            p.id,
-            client_name,
-            subs_code,
-            p.payment_date.strftime('%Y-%m-%d %H:%M'),
-            p.amount,
-            p.currency,
-            display_method,
-            p.reference,
-            p.notes
-        ])
-    
+    return stream_query(query, EXPORT_BATCH_SIZE)
+
+
+def _debtor_export_rows():
+    """Clientes con deuda en streaming, filtrados en SQL"""
+    from src.infrastructure.database.engine_profiles import stream_query
+    query = get_db().session.query(
+        Client.id, Client.subscriber_code, Client.legal_name, Client.phone, Client.plan_name,
+        Client.account_balance, Client.address
+    ).filter(Client.account_balance > 0).order_by(Client.id.asc())
+    return stream_query(query, EXPORT_BATCH_SIZE)
+
+
+@payments_bp.route('/export', methods=['GET'])
+@admin_required
+def export_payments():
+    """
+    Exporta el listado de pagos a CSV con filtros (streaming)
+    """
+    from src.application.services.export_service import iter_csv, streaming_response, CSV_MIMETYPE
+
+    start_dt, end_dt, method = _export_date_filters()
+
+    def rows():
+        for r in _payment_export_rows(start_dt, end_dt, method):
+            yield [
+                r.id,
+                r.legal_name or 'N/A',
+                r.subscriber_code or 'N/A',
+                r.payment_date.strftime('%Y-%m-%d %H:%M') if r.payment_date else '',
+                r.amount,
+                r.currency,
+                PAYMENT_METHOD_LABELS.get(r.payment_method, r.payment_method),
+                r.reference,
+                r.notes
+            ]
+
+    # Encabezados - 'Ref' en lugar de 'ID' para evitar problema SYLK de Excel
+    header = ['Ref', 'Cliente', 'Código', 'Fecha', 'Monto', 'Moneda', 'Método', 'Referencia', 'Nota']
     filename = f"reporte_pagos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    
-    # Usar utf-8-sig para que Excel reconozca los acentos y caracteres especiales inmediatamente
-    response = make_response(output.getvalue().encode('utf-8-sig'))
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    response.headers["Content-type"] = "text/csv; charset=utf-8"
-    
-    return response
+    try:
+        return streaming_response(iter_csv(header, rows()), filename, CSV_MIMETYPE)
+    except Exception as e:
+        logger.error(f"Error exporting payments CSV: {str(e)}")
+        return jsonify({'error': 'Error al generar el archivo CSV'}), 500
 
 
 @payments_bp.route('/export-debtors', methods=['GET'])
 @admin_required
 def export_debtors():
     """
-    Exporta el listado de clientes con deuda a CSV
+    Exporta el listado de clientes con deuda a CSV (streaming)
     """
-    import csv
-    import io
-    from flask import make_response
-    
-    db = get_db()
-    client_repo = db.get_client_repository()
-    
-    # Obtener todos los clientes con balance > 0 (deuda)
-    clients = client_repo.get_all()
-    debtors = [c for c in clients if (c.account_balance or 0) > 0]
-    
-    # Crear CSV en memoria
-    output = io.StringIO()
-    writer = csv.writer(output, lineterminator='\n')
-    
-    # Encabezados - Cambiado 'ID' por 'Ref' para evitar el error SYLK de Excel
-    writer.writerow(['Ref', 'Código', 'Nombre Legal', 'Teléfono', 'Plan', 'Deuda Tot. (COP)'])
-    
-    for c in debtors:
-        writer.writerow([
-            c.id,
-            c.subscriber_code or '---',
-            c.legal_name or 'N/A',
-            c.phone or '---',
-            c.plan_name or 'Básico',
-            f"{c.account_balance:,.2f}"
-        ])
-    
+    from src.application.services.export_service import iter_csv, streaming_response, CSV_MIMETYPE
+
+    def rows():
+        for r in _debtor_export_rows():
+            yield [
+                r.id,
+                r.subscriber_code or '---',
+                r.legal_name or 'N/A',
+                r.phone or '---',
+                r.plan_name or 'Básico',
+                f"{r.account_balance:,.2f}"
+            ]
+
+    # Encabezados - 'Ref' en lugar de 'ID' para evitar el error SYLK de Excel
+    header = ['Ref', 'Código', 'Nombre Legal', 'Teléfono', 'Plan', 'Deuda Tot. (COP)']
     filename = f"reporte_morosos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    
-    # Usar utf-8-sig para compatibilidad total con Excel
-    response = make_response(output.getvalue().encode('utf-8-sig'))
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    response.headers["Content-type"] = "text/csv; charset=utf-8"
-    
-    return response
+    try:
+        return streaming_response(iter_csv(header, rows()), filename, CSV_MIMETYPE)
+    except Exception as e:
+        logger.error(f"Error exporting debtors CSV: {str(e)}")
+        return jsonify({'error': 'Error al generar el archivo CSV'}), 500
 
 
 @payments_bp.route('/export-pdf', methods=['GET'])
@@ -1573,29 +1555,33 @@ def export_payments_pdf():
     Exporta el listado de pagos o morosos a PDF premium
     """
     from src.application.services.report_service import ReportService
+    from src.application.services.export_service import ExportColumn, iter_pdf_table, streaming_response, PDF_MIMETYPE
     from flask import make_response
     
     db = get_db()
     
     # Filtros
     report_type = request.args.get('report_type', 'payments')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    method = request.args.get('method')
-    
-    start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00')) if start_date else None
-    end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00')) if end_date else None
-    
-    if end_dt:
-        end_dt = end_dt.replace(hour=23, minute=59, second=59)
+    start_dt, end_dt, method = _export_date_filters()
     
     if report_type == 'debtors':
-        client_repo = db.get_client_repository()
-        clients = client_repo.get_all()
-        debtors = [c for c in clients if (c.account_balance or 0) > 0]
-        pdf_buffer = ReportService.generate_debtors_pdf(debtors)
-        pdf_buffer = ReportService.generate_debtors_pdf(debtors)
+        totals = {'debt': 0.0}
+
+        def debtor_rows():
+            for r in _debtor_export_rows():
+                totals['debt'] += r.account_balance or 0
+                yield [r.subscriber_code, r.legal_name or 'N/A', r.phone, r.account_balance or 0]
+
         filename = f"reporte_morosos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        chunks = iter_pdf_table(
+            "LISTADO DE CLIENTES CON DEUDA (MOROSOS)",
+            [ExportColumn('CÓDIGO', 1.0), ExportColumn('CLIENTE', 4.0), ExportColumn('TELÉFONO', 1.2),
+             ExportColumn('DEUDA TOT.', 1.3, 'money')],
+            debtor_rows(),
+            header_color='#ef4444', landscape_mode=False,
+            total_row=lambda: ['', 'TOTAL CARTERA PENDIENTE:', '', totals['debt']],
+            footer_text="Cartera Pendiente SGUBM"
+        )
     
     elif report_type == 'routers':
         # Reporte de Análisis por Router
@@ -1738,19 +1724,33 @@ def export_payments_pdf():
         filename = f"analisis_routers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
 
     else:
-        payment_repo = db.get_payment_repository()
-        payments = payment_repo.get_filtered(
-            start_date=start_dt,
-            end_date=end_dt,
-            method=method,
-            limit=2000
-        )
-        pdf_buffer = ReportService.generate_payments_pdf(
-            payments, 
-            start_date=start_dt.strftime('%d/%m/%Y') if start_dt else None,
-            end_date=end_dt.strftime('%d/%m/%Y') if end_dt else None
-        )
+        totals = {'amount': 0.0}
+
+        def payment_rows():
+            for r in _payment_export_rows(start_dt, end_dt, method):
+                totals['amount'] += r.amount or 0
+                yield [r.id, r.legal_name or 'N/A', r.subscriber_code, r.payment_date, r.amount or 0,
+                       r.payment_method.capitalize() if r.payment_method else None, r.reference]
+
+        title = "REPORTE DE RECAUDACIÓN"
+        if start_dt and end_dt:
+            title += f" ({start_dt.strftime('%d/%m/%Y')} al {end_dt.strftime('%d/%m/%Y')})"
         filename = f"reporte_pagos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        chunks = iter_pdf_table(
+            title,
+            [ExportColumn('ID', 0.6), ExportColumn('CLIENTE', 2.5), ExportColumn('CÓDIGO', 1.0),
+             ExportColumn('FECHA/HORA', 1.4), ExportColumn('MONTO', 1.1, 'money'), ExportColumn('MÉTODO', 1.2),
+             ExportColumn('REFERENCIA', 2.0)],
+            payment_rows(),
+            total_row=lambda: ['', '', '', 'TOTAL GENERAL:', totals['amount'], '', '']
+        )
+
+    if report_type != 'routers':
+        try:
+            return streaming_response(chunks, filename, PDF_MIMETYPE)
+        except Exception as e:
+            logger.error(f"Error exporting PDF ({report_type}): {str(e)}")
+            return jsonify({'error': 'Error al generar el archivo PDF'}), 500
     
     response = make_response(pdf_buffer.getvalue())
     response.headers["Content-Disposition"] = f"attachment; filename={filename}"
@@ -1763,48 +1763,40 @@ def export_payments_pdf():
 @admin_required
 def export_payments_excel():
     """
-    Exporta el listado de pagos o morosos a Excel formateado
+    Exporta el listado de pagos o morosos a Excel formateado (streaming, memoria constante)
     """
-    from src.application.services.report_service import ReportService
-    from flask import make_response
-    
-    db = get_db()
+    from src.application.services.export_service import ExportColumn, iter_xlsx, streaming_response, XLSX_MIMETYPE
     
     # Filtros
     report_type = request.args.get('report_type', 'payments')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    method = request.args.get('method')
-    
-    start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00')) if start_date else None
-    end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00')) if end_date else None
-    
-    if end_dt:
-        end_dt = end_dt.replace(hour=23, minute=59, second=59)
+    start_dt, end_dt, method = _export_date_filters()
     
     if report_type == 'debtors':
-        client_repo = db.get_client_repository()
-        clients = client_repo.get_all()
-        debtors = [c for c in clients if (c.account_balance or 0) > 0]
-        # Necesitamos un método en ReportService para Excel de Morosos
-        excel_buffer = ReportService.generate_debtors_excel(debtors)
+        columns = [
+            ExportColumn('Ref'), ExportColumn('Código'), ExportColumn('Cliente', 35), ExportColumn('Teléfono'),
+            ExportColumn('Deuda Total (COP)', 18, 'money'), ExportColumn('Dirección', 40)
+        ]
+        rows = ([r.id, r.subscriber_code or '---', r.legal_name or 'N/A', r.phone or '---',
+                 r.account_balance or 0, r.address or '---'] for r in _debtor_export_rows())
+        chunks = iter_xlsx('Morosos', columns, rows, header_color='#ef4444')
         filename = f"reporte_morosos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     else:
-        payment_repo = db.get_payment_repository()
-        payments = payment_repo.get_filtered(
-            start_date=start_dt,
-            end_date=end_dt,
-            method=method,
-            limit=5000
-        )
-        excel_buffer = ReportService.generate_payments_excel(payments)
+        columns = [
+            ExportColumn('ID'), ExportColumn('Cliente', 30), ExportColumn('Código'),
+            ExportColumn('Fecha', 20, 'datetime'), ExportColumn('Monto (COP)', 15, 'money'), ExportColumn('Moneda'),
+            ExportColumn('Método', 20), ExportColumn('Referencia', 20), ExportColumn('Notas', 20)
+        ]
+        rows = ([r.id, r.legal_name or 'N/A', r.subscriber_code or '---', r.payment_date, r.amount,
+                 r.currency, r.payment_method, r.reference, r.notes]
+                for r in _payment_export_rows(start_dt, end_dt, method))
+        chunks = iter_xlsx('Pagos', columns, rows)
         filename = f"reporte_pagos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     
-    response = make_response(excel_buffer.getvalue())
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    response.headers["Content-type"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    
-    return response
+    try:
+        return streaming_response(chunks, filename, XLSX_MIMETYPE)
+    except Exception as e:
+        logger.error(f"Error exporting {report_type} Excel: {str(e)}")
+        return jsonify({'error': 'Error al generar el archivo Excel'}), 500
 
 
 @payments_bp.route('/rates', methods=['GET'])
@@ -39,9 +39,11 @@ async def get_payments(
     method: Optional[str] = None,
     search: Optional[str] = None,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
     user=Depends(get_current_user)
 ):
-    """Obtiene listado de pagos con filtros"""
+    """Obtiene listado de pagos con filtros (con cursor o page_size responde {items, next_cursor})"""
     db = get_db()
     payment_repo = db.get_payment_repository()
     
@@ -62,28 +64,27 @@ async def get_payments(
                 end_dt = datetime.combine(base_dt.date(), time(23, 59, 59, 999999))
         except ValueError: pass
 
-    payments = payment_repo.get_filtered(
-        client_id=client_id,
-        start_date=start_dt,
-        end_date=end_dt,
-        method=method,
-        search=search,
-        limit=limit
-    )
-    
     is_restricted_role = user.role not in [UserRole.ADMIN.value, UserRole.ADMIN_FEM.value, UserRole.PARTNER.value]
     
-    if is_restricted_role:
-        assigned_router_ids = [user.assigned_router_id] if user.assigned_router_id else []
-        if hasattr(user, 'assignments') and user.assignments:
-            assigned_router_ids.extend([a.router_id for a in user.assignments])
-            
-        payments = [
-            p for p in payments 
-            if p.client and (p.client.assigned_collector_id == user.id or p.client.router_id in assigned_router_ids)
-        ]
-            
-    return [p.to_dict() for p in payments]
+    # Paginación por cursor (payment_date|id); el filtro RBAC va en el WHERE, antes del LIMIT
+    try:
+        payments, next_cursor = payment_repo.get_page(
+            limit=page_size or limit,
+            cursor=cursor or None,
+            client_id=client_id,
+            start_date=start_dt,
+            end_date=end_dt,
+            method=method,
+            search=search,
+            scope_user_id=user.id if is_restricted_role else None
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    
+    items = [p.to_dict() for p in payments]
+    if cursor is not None or page_size:
+        return {'items': items, 'next_cursor': next_cursor}
+    return items
 
 @router.post("")
 async def create_payment(request: Request, user=Depends(get_current_user)):
@@ -28,7 +28,10 @@ def get_incidents():
     if category:
         query = query.filter(SystemIncident.category == category)
         
-    incidents = query.order_by(SystemIncident.created_at.desc()).limit(limit).all()
+    # Los incidentes agrupados suben al repetirse
+    from sqlalchemy import func
+    last_seen = func.coalesce(SystemIncident.last_seen, SystemIncident.created_at)
+    incidents = query.order_by(last_seen.desc()).limit(limit).all()
     
     return jsonify([i.to_dict() for i in incidents])
 
@@ -83,8 +86,10 @@ def get_stats():
     critical = db.session.query(SystemIncident).filter(SystemIncident.severity == 'critical', SystemIncident.status == 'new').count()
     total_resolved = db.session.query(SystemIncident).filter(SystemIncident.status == 'resolved').count()
     
+    from src.application.services.reciclador_service import get_incident_buffer
     return jsonify({
         'new_incidents': total_new,
         'critical_incidents': critical,
-        'resolved_incidents': total_resolved
+        'resolved_incidents': total_resolved,
+        'capture_stats': dict(get_incident_buffer().stats)
     })
@@ -25,8 +25,6 @@ def get_financial_reports():
     router_id = request.args.get('router_id', type=int)
     
     db = get_db()
-    payment_repo = db.get_payment_repository()
-    client_repo = db.get_client_repository()
     
     from flask import g
     user = g.user
@@ -52,56 +50,47 @@ def get_financial_reports():
             router_id = allowed_router_ids
     
     try:
+        from src.application.services.report_aggregation import (
+            MonthlyReportAggregator, financial_months, month_bounds, month_index
+        )
         now = datetime.now()
         
-        # 1. Obtener todos los clientes operativos
-        # client_repo.get_filtered soporta router_id como int o list[int]
-        all_clients = client_repo.get_filtered(router_id=router_id, status='ALL') if router_id else client_repo.get_all()
-        working_clients = [c for c in all_clients if str(c.status).lower() in ['active', 'suspended', 'deleted']]
+        # 1. Métricas agrupadas por (router, mes): una consulta por métrica, no una por mes
+        aggregator = MonthlyReportAggregator(db.session, router_id)
+        year_start, _ = month_bounds(month_index(year, 1))
+        _, year_end = month_bounds(month_index(year, 12))
+        cohorts = aggregator.cohorts()
+        collected_by_month = aggregator.collected(year_start, year_end)
+        invoiced_by_month = aggregator.invoiced(year_start, year_end)
+        
+        indexes = [month_index(year, month) for month in range(1, 13) if datetime(year, month, 1) <= now]
+        months = financial_months(cohorts, collected_by_month, indexes)
         
-        # 2. Calcular datos mensuales base (12 meses)
+        # 2. Datos mensuales base (12 meses)
         monthly_stats = []
-        for month in range(1, 13):
-            start_dt = datetime(year, month, 1)
-            # Fin del mes
-            if month == 12:
-                end_dt = datetime(year + 1, 1, 1) - timedelta(seconds=1)
-            else:
-                end_dt = datetime(year, month + 1, 1) - timedelta(seconds=1)
-            
-            if start_dt > now: continue
-                
-            clients_active = []
-            clients_lost = []
+        for index in indexes:
+            start_dt, end_dt = month_bounds(index)
+            per_router = months[index].values()
             
-            for c in working_clients:
-                if not c.created_at or c.created_at > end_dt:
-                    continue
-                
-                if str(c.status).lower() == 'deleted':
-                    if c.updated_at and c.updated_at < start_dt:
-                        continue
-                    clients_lost.append(c)
-                else:
-                    clients_active.append(c)
-
-            t_active = float(sum((c.monthly_fee or 0) for c in clients_active))
-            t_lost = float(sum((c.monthly_fee or 0) for c in clients_lost))
+            t_active = float(sum(r['theoretical_active'] for r in per_router))
+            t_lost = float(sum(r['theoretical_lost'] for r in per_router))
             t_total = t_active + t_lost
             
             # Solo incluir mes si tiene meta o si es el mes actual
             if t_total == 0 and start_dt.year < now.year:
                 continue
                 
-            collected = float(payment_repo.get_total_by_date_range(start_dt, end_dt, router_id=router_id) or 0)
+            collected = float(sum(r['collected'] for r in per_router))
+            invoiced = float(sum(amount for (_, m), amount in invoiced_by_month.items() if m == index))
             
             monthly_stats.append({
                 'label': start_dt.strftime('%B'),
-                'month': month,
+                'month': start_dt.month,
                 'year': year,
                 'start_dt': start_dt,
                 'end_dt': end_dt,
                 'collected': collected,
+                'invoiced': invoiced,
                 'theoretical': t_total,
                 'theoretical_active': t_active,
                 'theoretical_lost': t_lost,
@@ -114,6 +103,7 @@ def get_financial_reports():
             # Ya son mensuales por defecto
             for m in monthly_stats:
                 m['performance'] = (m['collected'] / m['theoretical'] * 100) if m['theoretical'] > 0 else 0
+                m['collection_rate'] = (m['collected'] / m['invoiced'] * 100) if m['invoiced'] > 0 else 0
                 results.append(m)
         
         elif period == 'quarter':
@@ -121,76 +111,37 @@ def get_financial_reports():
             for q in range(1, 5):
                 m_indices = [(q-1)*3 + 1, (q-1)*3 + 2, (q-1)*3 + 3]
                 q_months = [m for m in monthly_stats if m['month'] in m_indices]
-                if not q_months: continue
-                
-                q_start = q_months[0]['start_dt']
-                q_end = q_months[-1]['end_dt']
-                
-                q_theoretical = sum(m['theoretical'] for m in q_months)
-                q_collected = sum(m['collected'] for m in q_months)
-                
-                results.append({
-                    'label': f'T{q} ({q_start.strftime("%b")}-{q_end.strftime("%b")})',
-                    'period_num': q,
-                    'year': year,
-                    'start_dt': q_start,
-                    'end_dt': q_end,
-                    'collected': q_collected,
-                    'theoretical': q_theoretical,
-                    'theoretical_active': sum(m['theoretical_active'] for m in q_months),
-                    'theoretical_lost': sum(m['theoretical_lost'] for m in q_months),
-                    'loss': max(0, q_theoretical - q_collected),
-                    'performance': (q_collected / q_theoretical * 100) if q_theoretical > 0 else 0
-                })
+                if q_months:
+                    results.append(_group_months(q_months, 'T', q, year))
         
         elif period == 'semester':
             # Agrupar de a 6
             for s in [1, 2]:
                 m_indices = range(1, 7) if s == 1 else range(7, 13)
                 s_months = [m for m in monthly_stats if m['month'] in m_indices]
-                if not s_months: continue
-                
-                s_start = s_months[0]['start_dt']
-                s_end = s_months[-1]['end_dt']
-                
-                s_theoretical = sum(m['theoretical'] for m in s_months)
-                s_collected = sum(m['collected'] for m in s_months)
-                
-                results.append({
-                    'label': f'S{s} ({s_start.strftime("%b")}-{s_end.strftime("%b")})',
-                    'period_num': s,
-                    'year': year,
-                    'start_dt': s_start,
-                    'end_dt': s_end,
-                    'collected': s_collected,
-                    'theoretical': s_theoretical,
-                    'theoretical_active': sum(m['theoretical_active'] for m in s_months),
-                    'theoretical_lost': sum(m['theoretical_lost'] for m in s_months),
-                    'loss': max(0, s_theoretical - s_collected),
-                    'performance': (s_collected / s_theoretical * 100) if s_theoretical > 0 else 0
-                })
+                if s_months:
+                    results.append(_group_months(s_months, 'S', s, year))
         
         # Resumen general
         total_theoretical = float(sum(r['theoretical'] for r in results))
         total_theoretical_active = float(sum(r['theoretical_active'] for r in results))
         total_theoretical_lost = float(sum(r['theoretical_lost'] for r in results))
         total_collected = float(sum(r['collected'] for r in results))
+        total_invoiced = float(sum(r['invoiced'] for r in results))
+        status_distribution = aggregator.status_distribution()
         
         summary = {
             'total_theoretical': total_theoretical,
             'total_theoretical_active': total_theoretical_active,
             'total_theoretical_lost': total_theoretical_lost,
             'total_collected': total_collected,
+            'total_invoiced': total_invoiced,
             'total_loss': max(0, total_theoretical - total_collected),
             'overall_performance': (total_collected / total_theoretical * 100) if total_theoretical > 0 else 0,
-            'active_clients_count': len([c for c in working_clients if str(c.status).lower() == 'active']),
-            'status_distribution': {
-                'active': len([c for c in all_clients if str(c.status).lower() == 'active' and c.is_online]),
-                'suspended': len([c for c in all_clients if str(c.status).lower() == 'suspended']),
-                'retired': len([c for c in all_clients if str(c.status).lower() == 'deleted']),
-                'offline': len([c for c in all_clients if str(c.status).lower() == 'active' and not c.is_online])
-            },
-            'loss_by_router': _calculate_loss_by_router(db, results, working_clients, router_id, is_restricted_role, allowed_router_ids)
+            'collection_rate': (total_collected / total_invoiced * 100) if total_invoiced > 0 else 0,
+            'active_clients_count': status_distribution['active'] + status_distribution['offline'],
+            'status_distribution': status_distribution,
+            'loss_by_router': _calculate_loss_by_router(aggregator, results, months, cohorts)
         }
         
         # Limpiar/Convertir datetimes para JSON
@@ -209,54 +160,56 @@ def get_financial_reports():
         logger.exception("Error in get_financial_reports")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-def _calculate_loss_by_router(db, period_results, working_clients, filtered_router_id, is_restricted_role=False, allowed_router_ids=None):
-    """Calcula el desglose de pérdida por router."""
+def _group_months(months: List[Dict[str, Any]], prefix: str, number: int, year: int) -> Dict[str, Any]:
+    """Agrupa meses consecutivos del reporte financiero en un trimestre (T) o semestre (S)."""
+    start = months[0]['start_dt']
+    end = months[-1]['end_dt']
+    theoretical = sum(m['theoretical'] for m in months)
+    collected = sum(m['collected'] for m in months)
+    invoiced = sum(m['invoiced'] for m in months)
+    return {
+        'label': f'{prefix}{number} ({start.strftime("%b")}-{end.strftime("%b")})',
+        'period_num': number,
+        'year': year,
+        'start_dt': start,
+        'end_dt': end,
+        'months': [m['month'] for m in months],
+        'collected': collected,
+        'invoiced': invoiced,
+        'theoretical': theoretical,
+        'theoretical_active': sum(m['theoretical_active'] for m in months),
+        'theoretical_lost': sum(m['theoretical_lost'] for m in months),
+        'loss': max(0, theoretical - collected),
+        'performance': (collected / theoretical * 100) if theoretical > 0 else 0,
+        'collection_rate': (collected / invoiced * 100) if invoiced > 0 else 0
+    }
+
+def _calculate_loss_by_router(aggregator, period_results, months, cohorts):
+    """
+    Calcula el desglose de pérdida por router a partir de los buckets mensuales ya agregados
+    (el alcance de routers del usuario ya lo aplica el agregador).
+    """
+    from src.application.services.report_aggregation import month_index, working_clients_by_router
+
+    clients_by_router = working_clients_by_router(cohorts)
+    aliases = aggregator.router_aliases(list(clients_by_router))
     router_stats = {}
-    payment_repo = db.get_payment_repository()
-    
-    # Agrupar clientes por router
-    clients_by_router = {}
-    for c in working_clients:
-        rid = c.router_id
-        
-        # Filtrar si es restringido
-        if is_restricted_role and allowed_router_ids is not None:
-            if rid not in allowed_router_ids:
-                continue
-                
-        if rid not in clients_by_router:
-            clients_by_router[rid] = {'alias': c.router.alias if c.router else f"Router {rid}", 'clients': []}
-        clients_by_router[rid]['clients'].append(c)
 
-    for rid, data in clients_by_router.items():
-        # Este filtro es para cuando el usuario selecciona un router específico en el dropdown del frontend
-        if filtered_router_id:
-            if isinstance(filtered_router_id, list):
-                if rid not in filtered_router_id:
-                    continue
-            elif rid != filtered_router_id:
-                continue
-            
+    for rid, client_count in clients_by_router.items():
         total_theoretical = 0
         total_collected = 0
         unpaid_count = 0
         
         # Para cada periodo en los resultados
         for m in period_results:
-            start_dt = m['start_dt']
-            end_dt = m['end_dt']
-                
-            # Calcular meta para este router en este periodo
+            period_months = m.get('months', [m['month']] if 'month' in m else [])
             period_theoretical = 0
-            for c in data['clients']:
-                # Mismo filtro que el reporte principal
-                if not c.created_at or c.created_at > end_dt:
-                    continue
-                if str(c.status).lower() == 'deleted' and c.updated_at and c.updated_at < start_dt:
-                    continue
-                period_theoretical += (c.monthly_fee or 0)
-            
-            period_collected = float(payment_repo.get_total_by_date_range(start_dt, end_dt, router_id=rid) or 0)
+            period_collected = 0
+            for month in period_months:
+                bucket = months.get(month_index(m['year'], month), {}).get(rid)
+                if bucket:
+                    period_theoretical += bucket['theoretical_active'] + bucket['theoretical_lost']
+                    period_collected += bucket['collected']
             
             total_theoretical += period_theoretical
             total_collected += period_collected
@@ -264,12 +217,12 @@ def _calculate_loss_by_router(db, period_results, working_clients, filtered_rout
             # Estimación de clientes que no pagaron (Si lo recolectado < meta)
             if period_theoretical > period_collected:
                 diff = period_theoretical - period_collected
-                avg_fee = period_theoretical / len(data['clients']) if data['clients'] else 1
+                avg_fee = period_theoretical / client_count if client_count else 1
                 unpaid_count += round(diff / avg_fee) if avg_fee > 0 else 0
 
         loss = max(0, total_theoretical - total_collected)
         if loss > 0 or total_theoretical > 0:
-            router_stats[data['alias']] = {
+            router_stats[aliases[rid]] = {
                 'loss': float(loss),
                 'theoretical': float(total_theoretical),
                 'collected': float(total_collected),
@@ -319,9 +272,6 @@ def get_clients_status_report():
     payment_repo = db.get_payment_repository()
     
     try:
-        # Obtener todos los clientes operativos (excluyendo archivados para el cálculo base)
-        all_clients = client_repo.get_filtered(router_id=router_id, status='ALL')
-        
         # El periodo de auditoría solicitado
         if audit_day:
             audit_start = datetime(audit_year, audit_month, audit_day)
@@ -333,62 +283,32 @@ def get_clients_status_report():
             else:
                 audit_end = datetime(audit_year, audit_month + 1, 1) - timedelta(seconds=1)
         
-        # Auditoría de ciclo y pagos
-        invoice_repo = db.get_invoice_repository()
-        period_invoices = invoice_repo.get_by_date_range(audit_start, audit_end, router_id=router_id)
-        period_payments = payment_repo.get_by_date_range(audit_start, audit_end, router_id=router_id)
-        
-        cycle_exists = len(period_invoices) > 0
-        has_payments = len(period_payments) > 0
+        # Auditoría de ciclo y pagos (EXISTS, sin cargar facturas ni pagos)
+        cycle_exists = db.get_invoice_repository().exists_in_range(audit_start, audit_end, router_id=router_id)
+        has_payments = payment_repo.exists_in_range(audit_start, audit_end, router_id=router_id)
         
-        # Mapa de cuánto pagó cada cliente en este periodo
-        paid_map = {}
-        for p in period_payments:
-            if p.client_id:
-                paid_map[p.client_id] = paid_map.get(p.client_id, 0) + p.amount
-        
-        # --- FILTRADO DE CLIENTES SEGÚN TIPO DE REPORTE ---
-        results_list = []
-        if report_type == 'debtors':
-            # Clientes con balance > 0
-            results_list = [c for c in all_clients if (c.account_balance or 0) > 0 and c.status != 'deleted']
-        elif report_type == 'paid':
-            # Clientes que han pagado en el periodo solicitado
-            paid_client_ids = set(paid_map.keys())
-            results_list = [c for c in all_clients if c.id in paid_client_ids and c.status != 'deleted']
-        elif report_type == 'missing':
-            # Clientes activos que NO han pagado en el periodo
-            paid_client_ids = set(paid_map.keys())
-            results_list = [c for c in all_clients if str(c.status).lower() == 'active' and c.id not in paid_client_ids]
-        elif report_type == 'deleted':
-            results_list = [c for c in all_clients if c.status == 'deleted']
+        # Clientes del tipo de reporte con lo pagado en el periodo y su último pago, en una sola consulta
+        rows = client_repo.get_status_report(report_type, audit_start, audit_end, router_id=router_id)
         
         # --- CÁLCULO DE TOTALES SENSIBLES AL FILTRO ---
         # Si el usuario filtra por un tipo, los totales en las tarjetas superiores deben reflejar ese grupo
-        total_collected = sum(paid_map.get(c.id, 0) for c in results_list)
-        total_pending = sum(c.account_balance for c in results_list if (c.account_balance or 0) > 0)
-        total_credit = sum(abs(c.account_balance) for c in results_list if (c.account_balance or 0) < 0)
+        total_collected = sum(r.paid_amount or 0 for r in rows)
+        total_pending = sum(r.account_balance for r in rows if (r.account_balance or 0) > 0)
+        total_credit = sum(abs(r.account_balance) for r in rows if (r.account_balance or 0) < 0)
         
-        # Preparar data final
-        clients_data = []
-        for c in results_list:
-            # Obtener ID del último pago para acceso rápido (impresión)
-            last_p = db.session.query(Payment.id).filter(Payment.client_id == c.id).order_by(Payment.payment_date.desc()).first()
-            last_payment_id = last_p[0] if last_p else None
-            
-            clients_data.append({
-                'id': c.id,
-                'name': c.legal_name,
-                'code': c.subscriber_code,
-                'balance': float(c.account_balance or 0),
-                'fee': float(c.monthly_fee or 0),
-                'paid_amount': float(paid_map.get(c.id, 0)),
-                'last_payment_id': last_payment_id,
-                'status': str(c.status),
-                'address': c.address,
-                'phone': c.phone,
-                'router': c.router.alias if c.router else 'N/A'
-            })
+        clients_data = [{
+            'id': r.id,
+            'name': r.legal_name,
+            'code': r.subscriber_code,
+            'balance': float(r.account_balance or 0),
+            'fee': float(r.monthly_fee or 0),
+            'paid_amount': float(r.paid_amount or 0),
+            'last_payment_id': r.last_payment_id,
+            'status': str(r.status),
+            'address': r.address,
+            'phone': r.phone,
+            'router': r.router_alias or 'N/A'
+        } for r in rows]
             
         return jsonify({
             'type': report_type,
@@ -416,64 +336,35 @@ def get_performance_report():
     Reporte de métricas de crecimiento, eficiencia y churn.
     """
     db = get_db()
-    client_repo = db.get_client_repository()
-    payment_repo = db.get_payment_repository()
     
     try:
+        from src.application.services.report_aggregation import (
+            MonthlyReportAggregator, growth_months, month_bounds, month_index
+        )
         now = datetime.now()
-        # 12 meses atrás
-        months = []
-        for i in range(11, -1, -1):
-            # Obtener primer día de cada mes
-            month_date = (now.replace(day=1) - timedelta(days=i*30)).replace(day=1)
-            # Rebalancear si el cálculo anterior falló por meses de diferente duración
-            # Mejor forma:
-            temp_date = now.replace(day=1)
-            for _ in range(i):
-                last_day_prev_month = temp_date - timedelta(days=1)
-                temp_date = last_day_prev_month.replace(day=1)
-            months.append(temp_date.replace(hour=0, minute=0, second=0))
-
-        # Evitar duplicados si i=0 o similar
-        seen_months = set()
-        unique_months = []
-        for m in months:
-            m_key = f"{m.year}-{m.month}"
-            if m_key not in seen_months:
-                unique_months.append(m)
-                seen_months.add(m_key)
+        # 12 meses atrás (incluye el actual)
+        current = month_index(now.year, now.month)
+        indexes = list(range(current - 11, current + 1))
         
-        all_clients = client_repo.get_all()
+        aggregator = MonthlyReportAggregator(db.session)
+        cohorts = aggregator.cohorts()
+        collected = aggregator.collected(month_bounds(indexes[0])[0], month_bounds(current)[1])
+        stats_by_month = growth_months(cohorts, collected, indexes)
         
         breakdown = []
-        for m_start in unique_months:
-            if m_start.month == 12:
-                m_end = datetime(m_start.year + 1, 1, 1) - timedelta(seconds=1)
-            else:
-                m_end = datetime(m_start.year, m_start.month + 1, 1) - timedelta(seconds=1)
-            
-            if m_start > now: continue
-
-            # Altas en este mes
-            new_clients = [c for c in all_clients if c.created_at and m_start <= c.created_at <= m_end]
-            # Bajas en este mes (usando updated_at como proxy si status es deleted)
-            churned = [c for c in all_clients if str(c.status).lower() == 'deleted' and c.updated_at and m_start <= c.updated_at <= m_end]
-            
-            # Base instalada al final del mes
-            installed_base = [c for c in all_clients if c.created_at and c.created_at <= m_end and 
-                              (str(c.status).lower() != 'deleted' or (c.updated_at and c.updated_at > m_end))]
-            
-            collected = float(payment_repo.get_total_by_date_range(m_start, m_end) or 0)
-            theoretical = float(sum((c.monthly_fee or 0) for c in installed_base))
+        for index in indexes:
+            m_start, _ = month_bounds(index)
+            stats = stats_by_month[index]
+            theoretical = stats['theoretical']
             
             breakdown.append({
                 'month': m_start.strftime('%B %Y'),
-                'new_sales': len(new_clients),
-                'churn': len(churned),
-                'net_growth': len(new_clients) - len(churned),
-                'total_base': len(installed_base),
-                'efficiency': (collected / theoretical * 100) if theoretical > 0 else 0,
-                'revenue': collected
+                'new_sales': stats['new'],
+                'churn': stats['churn'],
+                'net_growth': stats['new'] - stats['churn'],
+                'total_base': stats['base'],
+                'efficiency': (stats['revenue'] / theoretical * 100) if theoretical > 0 else 0,
+                'revenue': stats['revenue']
             })
 
         return jsonify({
@@ -488,3 +379,33 @@ def get_performance_report():
     except Exception as e:
         logger.error(f"Error in performance report: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@reports_bp.route('/audit', methods=['GET'])
+@permission_required('system:admin', 'view')
+def get_audit_log():
+    """
+    Kardex de auditoría filtrado y paginado por cursor.
+    Filtros: entity_type, entity_id, user_id, username, category, operation, start, end (ISO).
+    """
+    from src.application.services.audit_service import AuditService
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        result = AuditService.query(
+            entity_type=request.args.get('entity_type'),
+            entity_id=request.args.get('entity_id', type=int),
+            user_id=request.args.get('user_id', type=int),
+            username=request.args.get('username'),
+            category=request.args.get('category'),
+            operation=request.args.get('operation'),
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None,
+            limit=request.args.get('limit', 50, type=int),
+            cursor=request.args.get('cursor')
+        )
+        return jsonify({'success': True, **result})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Parámetro inválido: {e}'}), 400
+    except Exception as e:
+        logger.error(f"Error in audit log query: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -7,8 +7,10 @@ from datetime import datetime
 from src.infrastructure.database.db_manager import get_db
 from src.infrastructure.database.models import NetworkSegment, Router, Invoice, InvoiceItem, InternetPlan
 from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+from src.application.services.router_discovery import discover_router_configuration
 from src.application.services.audit_service import AuditService
 from ipaddress import ip_network, ip_address, IPv4Network, IPv6Network
+from src.application.services.ip_index import PrefixTrie
 from src.application.services.report_service import ReportService
 from src.application.services.auth import login_required, admin_required, UserRole, permission_required
 import logging
@@ -243,8 +245,8 @@ def test_connection(router_id):
         )
         
         if connected:
-            # Obtener información del sistema
-            config = adapter.discover_configuration()
+            # Obtener información del sistema (snapshot guardado si la huella del router no cambió)
+            config = discover_router_configuration(router_id, adapter)
             adapter.disconnect()
             
             # Actualizar estado
@@ -333,6 +335,7 @@ def sync_router(router_id):
     data = request.json if request.json else {}
     confirm = data.get('confirm', False)
     selected_keys = set(data.get('selected_candidates', []))
+    force_discovery = bool(data.get('force_discovery', False))
     
     db = get_db()
     router_repo = db.get_router_repository()
@@ -358,8 +361,8 @@ def sync_router(router_id):
                 'message': 'No se pudo conectar al router. Verifica la IP y que tengas acceso a la red.'
             }), 200
 
-        # Descubrir configuración
-        config = adapter.discover_configuration()
+        # Descubrir configuración (force_discovery ignora el snapshot guardado)
+        config = discover_router_configuration(router_id, adapter, force=force_discovery)
         
         # Actualizar métricas del router
         sys_info = config.get('system_info', {})
@@ -416,6 +419,7 @@ def sync_router(router_id):
         # Get exclusion keywords from router config
         exclusion_raw = router.exclusion_keywords or ""
         dynamic_keywords = [k.strip().upper() for k in exclusion_raw.split(',') if k.strip()]
+        segment_trie = PrefixTrie.from_networks(allowed_networks)
         
         def is_ip_allowed(ip_str):
             """Valida ESTRICTAMENTE que la IP pertenezca a un segmento declarado."""
@@ -424,8 +428,8 @@ def sync_router(router_id):
             try:
                 addr = ip_network(clean_ip, strict=False) if '/' in clean_ip else ip_address(clean_ip)
                 if isinstance(addr, (IPv4Network, IPv6Network)):
-                    return any(addr.overlaps(net) for net in allowed_networks)
-                return any(addr in net for net in allowed_networks)
+                    return segment_trie.overlaps(addr)
+                return addr in segment_trie
             except ValueError:
                 return False
 
@@ -852,7 +856,7 @@ def sync_all_routers():
             )
             
             if connected:
-                config = adapter.discover_configuration()
+                config = discover_router_configuration(router.id, adapter)
                 metrics = {
                     'status': 'online',
                     'uptime': config['system_info'].get('uptime', 'N/A'),
@@ -1060,6 +1064,7 @@ def discover_clients(router_id):
         }), 400
     
     logger.info(f"Filtering clients by {len(allowed_networks)} declared network segments for router {router_id}")
+    segment_trie = PrefixTrie.from_networks(allowed_networks)
     
     def is_ip_allowed(ip_str):
         """Verifica si una IP está dentro de los segmentos declarados"""
@@ -1070,8 +1075,7 @@ def discover_clients(router_id):
         if not clean_ip or clean_ip == '0.0.0.0':
             return False
         try:
-            addr = ip_address(clean_ip)
-            return any(addr in net for net in allowed_networks)
+            return ip_address(clean_ip) in segment_trie
         except ValueError:
             return False
     
@@ -7,6 +7,7 @@ from src.infrastructure.database.db_manager import get_db
 from src.infrastructure.database.models import Router, UserRole
 from src.application.services.auth import get_current_user, fastapi_permission_required
 from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+from src.application.services.router_discovery import discover_router_configuration
 from src.application.services.audit_service import AuditService
 
 router = APIRouter(prefix="/api/routers", tags=["Routers"])
@@ -77,7 +78,7 @@ async def test_connection(router_id: int, user=Depends(fastapi_permission_requir
     try:
         connected = adapter.connect(r.host_address, r.api_username, r.api_password, r.api_port)
         if connected:
-            config = adapter.discover_configuration()
+            config = discover_router_configuration(router_id, adapter)
             adapter.disconnect()
             router_repo.update(router_id, {'status': 'online'})
             return {
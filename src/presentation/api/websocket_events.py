@@ -1,3 +1,4 @@
+import inspect
 import logging
 from src.application.services.monitoring_manager import MonitoringManager
 from src.application.events.event_bus import get_event_bus, SystemEvents
@@ -46,6 +47,28 @@ def register_socket_events(sio):
     for event_name in business_events:
         event_bus.subscribe(event_name, lambda d: on_business_event(d))
 
+    # AsyncServer (main.py) expone el manager directo; Flask-SocketIO (run.py) vía .server
+    rooms_manager = getattr(sio, 'manager', None) or getattr(getattr(sio, 'server', None), 'manager', None)
+
+    async def room_call(result):
+        """enter_room/leave_room son corrutinas en python-socketio >= 5.10 y funciones antes"""
+        if inspect.isawaitable(result):
+            await result
+
+    def release_empty_router_rooms(sid, rooms):
+        """Rooms router_<id> sin otros participantes en este worker: retirar el interés de cluster"""
+        if rooms_manager is None:
+            return
+        for room in rooms:
+            if not str(room).startswith('router_'):
+                continue
+            others = [p for p, _ in rooms_manager.get_participants('/', room) if p != sid]
+            if not others:
+                try:
+                    monitor_manager.release_router_demand(int(room.split('_', 1)[1]))
+                except ValueError:
+                    continue
+
     # --- Async Handlers for Socket.io ---
 
     @sio.on('connect')
@@ -56,13 +79,16 @@ def register_socket_events(sio):
     @sio.on('disconnect')
     async def disconnect(sid):
         logger.info(f"Client disconnected: {sid}")
+        # Las rooms del sid siguen vigentes mientras corre este handler
+        if rooms_manager is not None:
+            release_empty_router_rooms(sid, rooms_manager.get_rooms(sid, '/'))
 
     @sio.on('join_tenant')
     async def join_tenant(sid, data):
         tenant_id = data.get('tenant_id')
         if tenant_id:
             room = f"tenant_{tenant_id}"
-            sio.enter_room(sid, room)
+            await room_call(sio.enter_room(sid, room))
             logger.info(f"Client {sid} joined tenant room {room}")
             await sio.emit('joined_tenant', {'tenant_id': tenant_id, 'status': 'sync_active'}, room=sid)
 
@@ -71,20 +97,34 @@ def register_socket_events(sio):
         router_id = data.get('router_id')
         if router_id:
             room = f"router_{router_id}"
-            sio.enter_room(sid, room)
+            await room_call(sio.enter_room(sid, room))
             logger.info(f"Client {sid} joined room {room}")
             
             # Asegurar que el hilo de monitoreo esté corriendo
             monitor_manager.start_router_monitoring(int(router_id))
             await sio.emit('joined_router', {'router_id': router_id, 'status': 'monitoring'}, room=sid)
+            # Estado completo del stream delta para que el navegador aplique los deltas siguientes
+            keyframe = monitor_manager.traffic_keyframe(int(router_id))
+            if keyframe is not None:
+                await sio.emit('client_traffic_delta', keyframe, room=sid)
+
+    @sio.on('traffic_resync')
+    async def traffic_resync(sid, data):
+        router_id = data.get('router_id')
+        if router_id:
+            # Sin stream local (router monitoreado por otro worker): el keyframe periódico lo resincroniza
+            keyframe = monitor_manager.traffic_keyframe(int(router_id))
+            if keyframe is not None:
+                await sio.emit('client_traffic_delta', keyframe, room=sid)
 
     @sio.on('leave_router')
     async def leave_router(sid, data):
         router_id = data.get('router_id')
         if router_id:
             room = f"router_{router_id}"
-            sio.leave_room(sid, room)
+            await room_call(sio.leave_room(sid, room))
             logger.info(f"Client {sid} left room {room}")
+            release_empty_router_rooms(sid, [room])
 
     @sio.on('subscribe_interfaces')
     async def subscribe_interfaces(sid, data):
@@ -270,24 +270,16 @@ def send_message():
         agent_service = WhatsAppAgentService(db)
         settings_repo = db.get_system_setting_repository()
         
-        # Enviamos a través del adaptador
-        # El adaptador ahora usa localhost:5001 por defecto
+        # Encolamos en el outbox: la entrega (y el registro en historial) ocurre en los workers
+        from src.infrastructure.config.settings import get_config
         adapter = WhatsAppAdapter(
-            bridge_url="", # No se usa en la implementación local actual pero mantenemos firma
+            bridge_url=get_config().notification.whatsapp_bridge_url,
             api_key=settings_repo.get_value('whatsapp_gemini_key', '')
         )
-        success = adapter.send_whatsapp(clean_phone, message)
+        client = agent_service._find_client_by_phone(clean_phone)
+        message_id = adapter.queue_whatsapp(clean_phone, message, client_id=client.id if client else None, intent="manual_outbound")
         
-        if success:
-            # Registrar en el historial como mensaje saliente
-            # Buscamos el cliente para el log si existe
-            client = agent_service._find_client_by_phone(clean_phone)
-            client_id = client.id if client else None
-            
-            agent_service._log_outgoing(clean_phone, message, client_id, "manual_outbound")
-            return jsonify({"success": True})
-        else:
-            return jsonify({"success": False, "error": "No se pudo enviar el mensaje (¿Bridge desconectado?)"}), 503
+        return jsonify({"success": True, "queued": True, "message_id": message_id}), 202
             
     except Exception as e:
         logger.error(f"Error sending manual WhatsApp: {str(e)}")
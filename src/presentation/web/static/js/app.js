@@ -19,6 +19,7 @@ import { MetricsModule } from './modules/metrics.js';
 import { ApiService } from './services/api.service.js';
 import { FinanceStatsService } from './services/finance-stats.service.js';
 import { EventBus } from './services/event-bus.service.js';
+import { TrafficStream } from './services/traffic-stream.service.js';
 import { ViewManager } from './services/view-manager.service.js';
 import { AuthService } from './services/auth.service.js';
 import { AuthModule } from './modules/auth.module.js';
@@ -419,13 +420,18 @@ class App {
         this.logger.info('🔌 WebSocket: Initializing connection...');
         try {
             // Conectar al mismo host/puerto automáticamente
+            // Con varios workers el servidor indica sólo 'websocket' (sin sesiones pegajosas el polling falla)
+            const transports = (window.SGUBM_CONFIG && window.SGUBM_CONFIG.socket_transports) || ['polling', 'websocket'];
             this.socket = io({
-                transports: ['polling', 'websocket'],
+                transports,
                 reconnection: true,
                 reconnectionAttempts: 10,
                 reconnectionDelay: 2000
             });
 
+            // Tráfico de clientes (protocolo delta): los módulos se suscriben con app.trafficStream.on()
+            this.trafficStream = new TrafficStream(this.socket);
+
             this.socket.on('connect', () => {
                 console.log('%c✅ WebSocket Connected!', 'color: #10b981; font-weight: bold;');
                 this.eventBus.publish('socket_connected', { id: this.socket.id });
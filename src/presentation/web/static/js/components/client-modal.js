@@ -44,10 +44,10 @@ class ClientModal {
     initTrafficSocket() {
         // Esperamos a que el socket global esté disponible
         const checkSocket = setInterval(() => {
-            if (window.app && window.app.socket) {
+            if (window.app && window.app.trafficStream) {
                 clearInterval(checkSocket);
 
-                window.app.socket.on('client_traffic', (data) => {
+                window.app.trafficStream.on((data) => {
                     // Si el modal no está activo o no hay cliente actual, ignorar
                     if (!this.modal.classList.contains('active') || !this.currentClient) return;
 
@@ -1849,8 +1849,8 @@ Esta acción es seria y debe usarse con precaución.`;
     }
 
     setupWebsocketListeners() {
-        if (app.socket && !this.socketInitialized) {
-            app.socket.on('client_traffic', (data) => {
+        if (app.socket && app.trafficStream && !this.socketInitialized) {
+            app.trafficStream.on((data) => {
                 // PERFORMANCE: Buffer traffic updates
                 if (data) Object.assign(this.trafficBuffer, data);
 
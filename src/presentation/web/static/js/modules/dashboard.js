@@ -652,11 +652,16 @@ export class DashboardModule {
 
         if (!btn || !previewContainer || !previewList) return;
 
+        // Redescubrir: el backend ignora el snapshot de descubrimiento guardado para este router
+        const forceToggle = document.getElementById('sync-force-discovery');
+        const forceDiscovery = !!(forceToggle && forceToggle.checked);
+
         btn.disabled = true;
         btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Buscando...';
 
         try {
-            const data = await this.api.post(`/api/routers/${this.activeRouterId}/sync`, { confirm: false });
+            const data = await this.api.post(`/api/routers/${this.activeRouterId}/sync`, { confirm: false, force_discovery: forceDiscovery });
+            if (forceToggle) forceToggle.checked = false;
 
             if (data.success) {
                 if (data.candidates && data.candidates.length > 0) {
@@ -1611,7 +1616,7 @@ export class DashboardModule {
             // Escuchar actualizaciones de tráfico (Solo si esta vista está activa para evitar fugas)
             const trafficHandler = (data) => {
                 if (!document.getElementById('status-clients-list')) {
-                    app.socket.off('client_traffic', trafficHandler);
+                    app.trafficStream.off(trafficHandler);
                     return;
                 }
                 Object.keys(data).forEach(clientId => {
@@ -1624,12 +1629,12 @@ export class DashboardModule {
                     }
                 });
             };
-            app.socket.on('client_traffic', trafficHandler);
+            app.trafficStream.on(trafficHandler);
         }
     }
 
     stopClientDetailsMonitoring() {
-        // No apagamos 'client_traffic' globalmente porque otros módulos lo usan.
+        // No apagamos el stream de tráfico globalmente porque otros módulos lo usan.
         // Los handlers locales se auto-limpian.
     }
 
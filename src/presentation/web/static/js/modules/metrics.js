@@ -110,8 +110,8 @@ export class MetricsModule {
         }
 
         // Inicializar Telemetría en Vivo
-        if (window.app && window.app.socket && !this.socketInitialized) {
-            window.app.socket.on('client_traffic', (data) => {
+        if (window.app && window.app.trafficStream && !this.socketInitialized) {
+            window.app.trafficStream.on((data) => {
                 if (!data || !this.currentClientId || !data[this.currentClientId]) return;
 
                 // Validar que la vista actual sea metrics
@@ -0,0 +1,175 @@
+/**
+ * Traffic Stream Service
+ * Consumidor del protocolo delta de tráfico de clientes ('client_traffic_delta').
+ * Mantiene por router la tabla slot -> client_id y la secuencia, decodifica los arreglos
+ * cuantizados (JSON o msgpack binario) y entrega a los módulos el mismo formato de siempre:
+ * { clientId: { id, status, upload, download, method } } sólo con los clientes que cambiaron.
+ * Ante un salto de secuencia o un epoch desconocido pide 'traffic_resync' al servidor.
+ * También reenvía 'client_traffic' (protocolo JSON legado, MT_TRAFFIC_PROTOCOL=json).
+ */
+
+const METHODS = ['none', 'pppoe', 'arp', 'dhcp'];
+const RESYNC_COOLDOWN_MS = 2000;
+
+export class TrafficStream {
+    constructor(socket) {
+        this.socket = socket;
+        this.handlers = new Set();
+        this.streams = {};      // { routerId: { epoch, seq, ids } }
+        this.lastResync = {};   // { routerId: timestamp }
+
+        socket.on('client_traffic_delta', (frame) => this.handleFrame(frame));
+        socket.on('client_traffic', (data) => this.dispatch(data));
+        // Tras reconectar el servidor puede haber reiniciado: se espera un keyframe nuevo
+        socket.on('connect', () => { this.streams = {}; });
+    }
+
+    on(handler) {
+        this.handlers.add(handler);
+        return () => this.off(handler);
+    }
+
+    off(handler) {
+        this.handlers.delete(handler);
+    }
+
+    dispatch(data) {
+        if (!data) return;
+        this.handlers.forEach(handler => {
+            try {
+                handler(data);
+            } catch (error) {
+                console.error('Error in traffic handler:', error);
+            }
+        });
+    }
+
+    handleFrame(payload) {
+        const frame = (payload instanceof ArrayBuffer || ArrayBuffer.isView(payload))
+            ? decodeMsgpack(payload)
+            : payload;
+        if (!frame || typeof frame !== 'object') return;
+
+        const routerId = frame.r;
+        let stream = this.streams[routerId];
+
+        if (frame.k) {
+            stream = { epoch: frame.e, seq: frame.s, ids: frame.ids.slice() };
+            this.streams[routerId] = stream;
+        } else {
+            if (!stream || stream.epoch !== frame.e || frame.s !== stream.seq + 1) {
+                this.requestResync(routerId);
+                return;
+            }
+            if (frame.add) {
+                if (frame.add[0] !== stream.ids.length) {
+                    this.requestResync(routerId);
+                    return;
+                }
+                for (let i = 1; i < frame.add.length; i++) stream.ids.push(frame.add[i]);
+            }
+            stream.seq = frame.s;
+        }
+
+        const ids = stream.ids;
+        const q = frame.q;
+        const d = frame.d;
+        const changed = {};
+        for (let i = 0; i < d.length; i += 4) {
+            const cid = ids[d[i]];
+            const flags = d[i + 1];
+            changed[cid] = {
+                id: cid,
+                status: (flags & 1) ? 'online' : 'offline',
+                upload: d[i + 2] * q,
+                download: d[i + 3] * q,
+                method: METHODS[flags >> 1] || 'none'
+            };
+        }
+        if (d.length) this.dispatch(changed);
+    }
+
+    requestResync(routerId) {
+        const now = Date.now();
+        if (now - (this.lastResync[routerId] || 0) < RESYNC_COOLDOWN_MS) return;
+        this.lastResync[routerId] = now;
+        delete this.streams[routerId];
+        if (this.socket.connected) this.socket.emit('traffic_resync', { router_id: routerId });
+    }
+}
+
+/**
+ * Decodificador msgpack mínimo (el subconjunto que emite el servidor:
+ * mapas, arreglos, enteros, flotantes, cadenas, binarios, nil y booleanos).
+ */
+export function decodeMsgpack(buffer) {
+    const bytes = buffer instanceof ArrayBuffer
+        ? new Uint8Array(buffer)
+        : new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    const textDecoder = new TextDecoder();
+    let pos = 0;
+
+    const str = (len) => {
+        const value = textDecoder.decode(bytes.subarray(pos, pos + len));
+        pos += len;
+        return value;
+    };
+    const bin = (len) => {
+        const value = bytes.slice(pos, pos + len);
+        pos += len;
+        return value;
+    };
+    const array = (len) => {
+        const out = new Array(len);
+        for (let i = 0; i < len; i++) out[i] = read();
+        return out;
+    };
+    const map = (len) => {
+        const out = {};
+        for (let i = 0; i < len; i++) {
+            const key = read();
+            out[key] = read();
+        }
+        return out;
+    };
+
+    function read() {
+        const b = bytes[pos++];
+        if (b <= 0x7f) return b;
+        if (b >= 0xe0) return b - 0x100;
+        if ((b & 0xf0) === 0x80) return map(b & 0x0f);
+        if ((b & 0xf0) === 0x90) return array(b & 0x0f);
+        if ((b & 0xe0) === 0xa0) return str(b & 0x1f);
+        let value;
+        switch (b) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: { const len = view.getUint8(pos); pos += 1; return bin(len); }
+            case 0xc5: { const len = view.getUint16(pos); pos += 2; return bin(len); }
+            case 0xc6: { const len = view.getUint32(pos); pos += 4; return bin(len); }
+            case 0xca: value = view.getFloat32(pos); pos += 4; return value;
+            case 0xcb: value = view.getFloat64(pos); pos += 8; return value;
+            case 0xcc: value = view.getUint8(pos); pos += 1; return value;
+            case 0xcd: value = view.getUint16(pos); pos += 2; return value;
+            case 0xce: value = view.getUint32(pos); pos += 4; return value;
+            case 0xcf: value = Number(view.getBigUint64(pos)); pos += 8; return value;
+            case 0xd0: value = view.getInt8(pos); pos += 1; return value;
+            case 0xd1: value = view.getInt16(pos); pos += 2; return value;
+            case 0xd2: value = view.getInt32(pos); pos += 4; return value;
+            case 0xd3: value = Number(view.getBigInt64(pos)); pos += 8; return value;
+            case 0xd9: { const len = view.getUint8(pos); pos += 1; return str(len); }
+            case 0xda: { const len = view.getUint16(pos); pos += 2; return str(len); }
+            case 0xdb: { const len = view.getUint32(pos); pos += 4; return str(len); }
+            case 0xdc: { const len = view.getUint16(pos); pos += 2; return array(len); }
+            case 0xdd: { const len = view.getUint32(pos); pos += 4; return array(len); }
+            case 0xde: { const len = view.getUint16(pos); pos += 2; return map(len); }
+            case 0xdf: { const len = view.getUint32(pos); pos += 4; return map(len); }
+            default:
+                throw new Error(`msgpack: tipo no soportado 0x${b.toString(16)}`);
+        }
+    }
+
+    return read();
+}
@@ -0,0 +1,226 @@
+"""
+Unit Tests for Audit Service
+Verifica el sumidero asíncrono del Kardex (volcado por tamaño e intervalo, tenant_id fuera del request),
+la consulta paginada por cursor con sus filtros y el control de permisos de GET /api/reports/audit.
+"""
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+flask = pytest.importorskip("flask")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.application.services import audit_service
+from src.application.services.audit_service import AuditBuffer, AuditService
+from src.infrastructure.database.models import AuditLog, Base, Tenant
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Base SQLite temporal cableada a get_db() y a la cola de escritura"""
+    from src.infrastructure.database import write_queue
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    queue = write_queue.WriteQueue(factory, enabled=False)
+    session = factory()
+    monkeypatch.setattr(write_queue, 'get_write_queue', lambda: queue)
+    monkeypatch.setattr(audit_service, 'get_db', lambda: SimpleNamespace(session=session))
+    yield SimpleNamespace(engine=engine, factory=factory, session=session)
+    session.close()
+    engine.dispose()
+
+
+def stored(db):
+    with db.factory() as s:
+        return s.query(AuditLog).order_by(AuditLog.id).all()
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def row(operation, **kwargs):
+    return dict(category='system', operation=operation, timestamp=datetime.now(), **kwargs)
+
+
+# --- AuditBuffer ---
+
+def test_buffer_flushes_when_batch_is_full(db):
+    buffer = AuditBuffer(flush_interval=60, max_batch=3)
+    buffer.add(row('a'))
+    buffer.add(row('b'))
+    time.sleep(0.05)
+    assert buffer.pending() == 2 and not stored(db)   # Bajo el lote y lejos del intervalo
+
+    buffer.add(row('c'))
+    assert wait_for(lambda: len(stored(db)) == 3)
+    assert buffer.pending() == 0 and buffer.stats['written'] == 3
+
+
+def test_buffer_flushes_on_interval(db):
+    buffer = AuditBuffer(flush_interval=0.05, max_batch=500)
+    buffer.add(row('lonely'))
+    assert wait_for(lambda: len(stored(db)) == 1)
+    assert stored(db)[0].operation == 'lonely'
+
+
+def test_queued_entries_keep_request_tenant_after_background_flush(db):
+    db.session.add(Tenant(id=7, name='Norte'))
+    db.session.commit()
+    app = flask.Flask(__name__)
+    buffer = AuditBuffer(flush_interval=0.05, max_batch=500)
+    audit_service._audit_buffer = buffer
+    try:
+        with app.test_request_context('/'):
+            flask.g.tenant_id = 7
+            assert AuditService.log('client_created', category='client', entity_type='client', entity_id=1)
+        # Fuera del request: el volcado corre en el hilo del sumidero sin contexto Flask
+        AuditService.log('nightly_job')
+        assert wait_for(lambda: len(stored(db)) == 2)
+    finally:
+        audit_service._audit_buffer = None
+
+    by_op = {r.operation: r.tenant_id for r in stored(db)}
+    assert by_op == {'client_created': 7, 'nightly_job': None}
+
+
+def test_buffer_retries_row_by_row_when_batch_fails(db, monkeypatch):
+    buffer = AuditBuffer(flush_interval=60, max_batch=500)
+    monkeypatch.setattr(buffer, '_ensure_started', lambda: None)
+    buffer.add(row('ok'))
+    buffer.add(dict(row('bad'), timestamp='no es una fecha'))
+    buffer.add(row('ok2'))
+    assert buffer.flush() == 2
+    assert buffer.stats['failed'] == 1
+    assert [r.operation for r in stored(db)] == ['ok', 'ok2']
+
+
+# --- AuditService.query ---
+
+@pytest.fixture
+def kardex(db):
+    base = datetime(2024, 5, 1, 12, 0, 0)
+    rows = [
+        AuditLog(timestamp=base, category='client', operation='client_created', entity_type='client',
+                 entity_id=1, user_id=1, username='ana'),
+        AuditLog(timestamp=base, category='client', operation='client_updated', entity_type='client',
+                 entity_id=1, user_id=2, username='luis'),
+        AuditLog(timestamp=base, category='accounting', operation='payment_registered', entity_type='payment',
+                 entity_id=9, user_id=1, username='ana'),
+        AuditLog(timestamp=base + timedelta(hours=1), category='client', operation='client_updated',
+                 entity_type='client', entity_id=2, user_id=1, username='ana'),
+        AuditLog(timestamp=base + timedelta(days=1), category='system', operation='mass_sync', user_id=2,
+                 username='luis'),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return base
+
+
+def test_query_filters(kardex):
+    base = kardex
+
+    def ops(**filters):
+        return [item['operation'] for item in AuditService.query(**filters)['items']]
+
+    assert len(ops()) == 5
+    assert set(ops(entity_type='client', entity_id=1)) == {'client_created', 'client_updated'}
+    assert len(ops(user_id=1)) == 3 and ops(user_id=1) == ops(username='ana')
+    assert ops(category='accounting') == ['payment_registered']
+    assert len(ops(operation='client_updated')) == 2
+    assert ops(start=base + timedelta(minutes=30)) == ['mass_sync', 'client_updated']
+    assert len(ops(end=base)) == 3
+    assert ops(category='client', start=base + timedelta(minutes=1), end=base + timedelta(hours=2)) == \
+        ['client_updated']
+
+
+def test_query_cursor_pages_through_equal_timestamps(kardex):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = AuditService.query(limit=2, cursor=cursor)
+        pages += 1
+        assert page['limit'] == 2 and len(page['items']) <= 2
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 5   # Sin duplicados ni huecos entre páginas con el mismo timestamp
+
+    everything = [item['id'] for item in AuditService.query(limit=500)['items']]
+    assert seen == everything
+
+
+def test_query_clamps_limit_and_rejects_bad_cursor(kardex):
+    assert AuditService.query(limit=0)['limit'] == 1
+    assert AuditService.query(limit=10_000)['limit'] == 500
+    with pytest.raises(ValueError):
+        AuditService.query(cursor='not-a-cursor')
+
+
+# --- GET /api/reports/audit ---
+
+@pytest.fixture
+def client(monkeypatch):
+    pytest.importorskip("fastapi")   # auth.py importa Depends para las dependencias FastAPI
+    from src.application.services.auth import AuthService
+    from src.presentation.api.reports_controller import reports_bp
+
+    users = {
+        'admin-token': SimpleNamespace(id=1, role='admin', tenant_id=1, is_active=True),
+        'viewer-token': SimpleNamespace(id=2, role='viewer', tenant_id=1, is_active=True),
+    }
+    checked = []
+
+    def check_permission(role, module, action):
+        checked.append((role, module, action))
+        return role == 'admin'
+
+    monkeypatch.setattr(AuthService, 'validate_session', staticmethod(lambda token: users.get(token)))
+    monkeypatch.setattr(AuthService, 'check_permission', staticmethod(check_permission))
+    calls = []
+    monkeypatch.setattr(AuditService, 'query',
+                        staticmethod(lambda **kw: calls.append(kw) or {'items': [], 'next_cursor': None, 'limit': 50}))
+
+    app = flask.Flask(__name__)
+    app.register_blueprint(reports_bp)
+    return SimpleNamespace(http=app.test_client(), checked=checked, calls=calls)
+
+
+def test_audit_endpoint_requires_token(client):
+    assert client.http.get('/api/reports/audit').status_code == 401
+    assert client.http.get('/api/reports/audit', headers={'Authorization': 'Bearer unknown'}).status_code == 401
+    assert not client.calls
+
+
+def test_audit_endpoint_requires_system_admin_permission(client):
+    response = client.http.get('/api/reports/audit', headers={'Authorization': 'Bearer viewer-token'})
+    assert response.status_code == 403
+    assert client.checked == [('viewer', 'system:admin', 'view')]
+    assert not client.calls
+
+
+def test_audit_endpoint_passes_filters_and_rejects_bad_dates(client):
+    headers = {'Authorization': 'Bearer admin-token'}
+    response = client.http.get('/api/reports/audit?entity_type=client&entity_id=4&start=2024-05-01T00:00:00&limit=20',
+                               headers=headers)
+    assert response.status_code == 200 and response.get_json()['success'] is True
+    assert client.calls[0]['entity_type'] == 'client' and client.calls[0]['entity_id'] == 4
+    assert client.calls[0]['start'] == datetime(2024, 5, 1) and client.calls[0]['limit'] == 20
+
+    assert client.http.get('/api/reports/audit?start=ayer', headers=headers).status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+"""
+Unit Tests for Client Search Index
+Verifica la búsqueda FTS5 por subcadena, la tolerancia a errores y la sincronización por eventos ORM.
+"""
+import sqlite3
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("flask")  # los modelos registran el filtro de tenant sobre flask.g
+from src.infrastructure.database import search_index
+from src.infrastructure.database.models import init_db, get_session, Router, Client
+from src.infrastructure.database.repository_registry import ClientRepository
+
+def _has_trigram():
+    try:
+        sqlite3.connect(':memory:').execute("CREATE VIRTUAL TABLE t USING fts5(a, tokenize='trigram')")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+pytestmark = pytest.mark.skipif(not _has_trigram(), reason="SQLite sin tokenizador trigram")
+
+@pytest.fixture
+def session():
+    session = get_session(init_db('sqlite:///:memory:'))
+    router = Router(alias='R1', host_address='10.0.0.1', api_password='x')
+    session.add(router)
+    session.flush()
+    people = [('José Pérez', '0414-1234567'), ('María Gómez', '0424-7654321'), ('Pedro Perezoso', None)]
+    for i, (name, phone) in enumerate(people, 1):
+        session.add(Client(router_id=router.id, subscriber_code=f"CLI-{i:03d}", legal_name=name,
+                           username=f"user{i}", ip_address=f"10.0.0.{10 + i}", phone=phone, status='active'))
+    session.commit()
+    yield session
+    session.close()
+
+def _names(clients):
+    return [c.legal_name for c in clients]
+
+def test_substring_search_ignores_case_and_accents(session):
+    repo = ClientRepository(session)
+    assert sorted(_names(repo.get_filtered(search='PEREZ'))) == ['José Pérez', 'Pedro Perezoso']
+    assert _names(repo.get_filtered(search='10.0.0.12')) == ['María Gómez']
+    assert _names(repo.get_filtered(search='7654321')) == ['María Gómez']
+
+def test_typo_tolerant_search(session):
+    assert _names(ClientRepository(session).search('gomes')) == ['María Gómez']
+
+def test_index_follows_orm_changes(session):
+    repo = ClientRepository(session)
+    client = session.query(Client).filter_by(subscriber_code='CLI-002').one()
+    client.legal_name = 'María Rodríguez'
+    session.commit()
+    assert _names(repo.get_filtered(search='rodriguez')) == ['María Rodríguez']
+    assert repo.get_filtered(search='gomez') == []
+
+    session.delete(client)
+    session.commit()
+    assert repo.get_filtered(search='rodriguez') == []
+
+def test_short_terms_fall_back_to_ilike(session):
+    assert search_index.get_client_search_index(session.get_bind()).search_ids(session, 'pe') is None
+    assert _names(ClientRepository(session).get_filtered(search='pe')) == ['Pedro Perezoso']
+
+def test_empty_indexed_result_falls_back_to_ilike(session):
+    from sqlalchemy import text
+    index = search_index.get_client_search_index(session.get_bind())
+    assert index.search_ids(session, 'zzzzzz') is None
+    # Fila fuera del índice (ej. carga masiva sin rebuild): ILIKE la sigue encontrando
+    session.execute(text(f"DELETE FROM {search_index.FTS_TABLE}"))
+    assert _names(ClientRepository(session).get_filtered(search='Gómez')) == ['María Gómez']
+
+def test_postgres_expression_normalizes_both_sides():
+    # Documento y término pasan por la misma función; sin concat_ws (no IMMUTABLE) en el índice
+    assert search_index._PG_EXPR.startswith(f"{search_index.PG_NORMALIZE_FN}(")
+    assert 'concat_ws' not in search_index._PG_EXPR
+    assert search_index.PG_NORMALIZE_FN in search_index._PG_TERM
+    assert search_index.PG_NORMALIZE_FN in search_index._PG_PATTERN
+
+if __name__ == "__main__":
+    pytest.main([__file__])
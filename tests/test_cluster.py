@@ -0,0 +1,313 @@
+"""
+Unit Tests for Cluster Coordination
+Verifica el anillo de hashing consistente, la elección de líder por leases con vencimiento,
+el rebalanceo al morir un worker, los intereses entre workers y la cola Socket.IO en base de datos.
+"""
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.infrastructure.cluster.coordinator import ClusterCoordinator, HashRing
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1, 12, 0, 0)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def engine():
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("flask")
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+    from src.infrastructure.database.models import Base, ClusterLease, SocketIOMessage
+
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[ClusterLease.__table__, SocketIOMessage.__table__])
+    return engine
+
+
+def _pair(engine, clock):
+    from src.infrastructure.cluster.coordinator import LeaseStore
+    store = LeaseStore(engine)
+    a = ClusterCoordinator(store, worker_id='w-a', lease_seconds=30, replicas=32, clock=clock)
+    b = ClusterCoordinator(store, worker_id='w-b', lease_seconds=30, replicas=32, clock=clock)
+    return a, b
+
+
+def test_hash_ring_moves_only_keys_of_removed_node():
+    ring = HashRing(['w1', 'w2', 'w3'], replicas=64)
+    before = {key: ring.node_for(key) for key in range(1000)}
+    assert set(before.values()) == {'w1', 'w2', 'w3'}
+
+    ring.remove('w2')
+    after = {key: ring.node_for(key) for key in range(1000)}
+    moved = [key for key in before if before[key] != after[key]]
+    assert moved and all(before[key] == 'w2' for key in moved)
+    assert HashRing(['w3', 'w1'], replicas=64).node_for(42) == after[42]   # Independiente del orden
+    assert HashRing().node_for(1) is None
+
+
+def test_disabled_coordinator_owns_everything():
+    coordinator = ClusterCoordinator(None, worker_id='solo', enabled=False)
+    assert coordinator.is_leader() and coordinator.owns(7)
+    assert coordinator.tick() is False
+    coordinator.start()
+    coordinator.stop()
+
+
+def test_single_leader_and_router_partition(engine):
+    clock = FakeClock()
+    a, b = _pair(engine, clock)
+    a.tick()
+    b.tick()
+    a.tick()
+    assert a.is_leader() and not b.is_leader()
+    assert a.members == b.members == ['w-a', 'w-b']
+
+    owners = [(a.owns(rid), b.owns(rid)) for rid in range(200)]
+    assert all(x != y for x, y in owners)
+    assert {x for x, _ in owners} == {True, False}
+
+
+def test_worker_death_rebalances_and_hands_over_leadership(engine):
+    clock = FakeClock()
+    a, b = _pair(engine, clock)
+    a.tick()
+    b.tick()
+    a.tick()
+    calls = []
+    b.add_listener(lambda c: calls.append(list(c.members)))
+
+    clock.advance(20)
+    assert b.tick() is False and not b.is_leader()   # a sigue vivo (lease vigente)
+
+    clock.advance(15)   # a dejó de latir hace 35 s > lease
+    assert b.tick() is True
+    assert calls == [['w-b']]
+    assert b.is_leader() and all(b.owns(rid) for rid in range(50))
+    assert not a.is_leader()   # Su lease local también venció
+
+
+def test_stop_releases_leases_without_waiting(engine):
+    clock = FakeClock()
+    a, b = _pair(engine, clock)
+    a.tick()
+    b.tick()
+    a.stop()
+    b.tick()
+    assert b.members == ['w-b'] and b.is_leader()
+
+
+def test_interest_reaches_owner_and_is_withdrawn(engine):
+    clock = FakeClock()
+    a, b = _pair(engine, clock)
+    wanted = {'router:7': {'router_id': 7, 'interfaces': ['ether1'], 'clients': [3]}}
+    b.add_interest_provider(lambda: dict(wanted))
+    b.tick()
+    a.tick()
+    assert a.interests() == {'router:7': [wanted['router:7']]}
+
+    wanted.clear()
+    b.tick()
+    a.tick()
+    assert a.interests() == {}
+
+
+def test_monitoring_manager_follows_ownership(engine, monkeypatch):
+    pytest.importorskip("routeros_api")
+    pytest.importorskip("cachetools")
+    from src.application.services import monitoring_manager as mm
+
+    clock = FakeClock()
+    a, b = _pair(engine, clock)
+    a.tick()
+    b.tick()
+    a.tick()
+    foreign = next(rid for rid in range(100) if b.owns(rid))
+    monkeypatch.setattr(mm, 'get_coordinator', lambda: a)
+
+    manager = mm.MonitoringManager()
+    started = []
+    monkeypatch.setattr(manager, '_monitor_loop',
+                        lambda router_id, stop_event: started.append(router_id) or stop_event.wait(5))
+    manager.start_router_monitoring(foreign)
+    manager.add_monitored_interface(foreign, 'ether2')
+    assert started == [] and foreign in manager.remote_routers
+    assert manager._cluster_interests()[f"router:{foreign}"]['interfaces'] == ['ether2']
+
+    clock.advance(40)   # b muere: a hereda el router y arranca su hilo
+    a.tick()
+    deadline = time.monotonic() + 2
+    while not started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert started == [foreign] and foreign not in manager.remote_routers
+    manager.stop_router_monitoring(foreign)
+
+
+def test_owner_recomputes_remote_demand_on_every_change(engine, monkeypatch):
+    pytest.importorskip("routeros_api")
+    pytest.importorskip("cachetools")
+    from src.application.services import monitoring_manager as mm
+
+    clock = FakeClock()
+    a, b = _pair(engine, clock)
+    a.tick()
+    b.tick()
+    a.tick()
+    router = next(rid for rid in range(100) if a.owns(rid))
+    wanted = {'router_id': router, 'interfaces': ['ether1', 'ether2'], 'clients': [3, 4]}
+    b.add_interest_provider(lambda: {f"router:{router}": dict(wanted)} if wanted else {})
+
+    monkeypatch.setattr(mm, 'get_coordinator', lambda: a)
+    owner = mm.MonitoringManager()
+    monkeypatch.setattr(owner, '_monitor_loop', lambda router_id, stop_event: stop_event.wait(5))
+    a.add_listener(owner._on_cluster_rebalance)
+    owner.add_monitored_interface(router, 'ether9')   # Suscripción local del dueño
+
+    b.tick()
+    a.tick()
+    assert owner._interfaces_of(router) == ['ether1', 'ether2', 'ether9']
+    assert owner._clients_of(router) == [3, 4]
+    assert owner.remote_demand[router].keys() == {'w-b'}
+
+    # Quitar localmente algo que b sigue pidiendo no lo deja sin monitorear
+    owner.add_monitored_interface(router, 'ether1')
+    owner.remove_monitored_interface(router, 'ether1')
+    owner.remove_monitored_clients([3])
+    assert 'ether1' in owner._interfaces_of(router) and 3 in owner._clients_of(router)
+
+    wanted.update(interfaces=['ether1'], clients=[4])   # b deja de pedir ether2 y el cliente 3
+    b.tick()
+    a.tick()
+    assert owner._interfaces_of(router) == ['ether1', 'ether9']
+    assert owner._clients_of(router) == [4]
+
+    wanted.clear()   # b ya no tiene suscriptores
+    b.tick()
+    a.tick()
+    assert owner.remote_demand == {}
+    assert owner._interfaces_of(router) == ['ether9'] and owner._clients_of(router) == []
+    owner.stop_router_monitoring(router)
+
+
+def test_released_router_stops_publishing_interest(engine, monkeypatch):
+    pytest.importorskip("routeros_api")
+    pytest.importorskip("cachetools")
+    from src.application.services import monitoring_manager as mm
+
+    clock = FakeClock()
+    a, b = _pair(engine, clock)
+    a.tick()
+    b.tick()
+    a.tick()
+    foreign = next(rid for rid in range(100) if b.owns(rid))
+    monkeypatch.setattr(mm, 'get_coordinator', lambda: a)
+
+    manager = mm.MonitoringManager()
+    manager.start_router_monitoring(foreign)
+    a.tick()
+    b.tick()
+    assert f"router:{foreign}" in b.interests()
+
+    manager.release_router_demand(foreign)   # Se fue el último suscriptor local
+    assert manager._cluster_interests() == {}
+    a.tick()
+    b.tick()
+    assert b.interests() == {}
+
+
+def _start_listener(listener):
+    """Consume _listen() en un hilo; retorna la cola de payloads una vez fijado el punto de partida"""
+    received = queue.Queue()
+    ready = threading.Event()
+    latest_id = listener._latest_id
+
+    def mark_ready():
+        value = latest_id()
+        ready.set()
+        return value
+
+    listener._latest_id = mark_ready
+
+    def consume():
+        for payload in listener._listen():
+            received.put(json.loads(payload))
+
+    threading.Thread(target=consume, daemon=True).start()
+    assert ready.wait(2)
+    return received
+
+
+def test_database_socketio_queue_delivers_new_messages(engine):
+    pytest.importorskip("socketio")
+    from src.infrastructure.cluster.socketio_queue import DatabaseSocketIOManager
+
+    publisher = DatabaseSocketIOManager(engine, channel='test')
+    listener = DatabaseSocketIOManager(engine, channel='test', poll_interval=0.01)
+    publisher._publish({'method': 'emit', 'event': 'old'})
+
+    received = _start_listener(listener)
+    DatabaseSocketIOManager(engine, channel='other')._publish({'method': 'emit', 'event': 'elsewhere'})
+    publisher._publish({'method': 'emit', 'event': 'new', 'data': {'router_id': 1}})
+    assert received.get(timeout=2) == {'method': 'emit', 'event': 'new', 'data': {'router_id': 1}}
+    assert received.empty()
+
+
+def test_database_socketio_queue_delivers_late_committed_lower_id(engine):
+    pytest.importorskip("socketio")
+    from src.infrastructure.cluster.socketio_queue import DatabaseSocketIOManager
+
+    listener = DatabaseSocketIOManager(engine, channel='test', poll_interval=0.01)
+    table = listener.table
+    received = _start_listener(listener)
+    base = listener._latest_id()
+
+    def insert(row_id, event):
+        with engine.begin() as conn:
+            conn.execute(table.insert().values(id=row_id, channel='test', created_at=datetime.now(),
+                                               payload=json.dumps({'method': 'emit', 'event': event})))
+
+    # Como en PostgreSQL: base+2 se confirma antes que base+1, que tomó su id primero
+    insert(base + 2, 'fast')
+    assert received.get(timeout=2)['event'] == 'fast'
+    insert(base + 1, 'slow')
+    assert received.get(timeout=2)['event'] == 'slow'
+    insert(base + 3, 'next')
+    assert received.get(timeout=2)['event'] == 'next'
+    assert received.empty()
+
+
+def test_socketio_queue_options():
+    pytest.importorskip("socketio")
+    from src.infrastructure.config.settings import ClusterConfig
+    from src.infrastructure.cluster.socketio_queue import socketio_queue_options
+
+    assert socketio_queue_options(ClusterConfig(socketio_message_queue='')) == {}
+    assert socketio_queue_options(ClusterConfig(socketio_message_queue='redis://localhost:6379/0',
+                                                socketio_channel='isp')) == \
+        {'message_queue': 'redis://localhost:6379/0', 'channel': 'isp'}
+
+
+def test_cluster_mode_uses_websocket_only_transport():
+    pytest.importorskip("socketio")
+    from src.infrastructure.config.settings import ClusterConfig
+    from src.infrastructure.cluster.socketio_queue import socketio_transports
+
+    assert socketio_transports(ClusterConfig(enabled=False)) == ['polling', 'websocket']
+    assert socketio_transports(ClusterConfig(enabled=True)) == ['websocket']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
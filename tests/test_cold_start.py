@@ -0,0 +1,198 @@
+"""
+Unit Tests for Cold Start
+Verifica el chequeo de versión de esquema (create_all sólo si cambió), las columnas agregadas a
+tablas existentes y el registro diferido de blueprints.
+"""
+import sys
+import textwrap
+import pytest
+
+pytest.importorskip("sqlalchemy")
+flask = pytest.importorskip("flask")
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine
+from src.infrastructure.database.schema_version import ensure_schema, schema_fingerprint, stamp_version, stored_version
+from src.presentation.api.lazy_blueprints import read_manifest, register_lazy_blueprint
+
+
+def _metadata(extra_column=False):
+    metadata = MetaData()
+    Table('schema_info', metadata, Column('id', Integer, primary_key=True),
+          Column('version', String(64)), Column('applied_at', DateTime))
+    columns = [Column('id', Integer, primary_key=True)]
+    if extra_column:
+        columns.append(Column('extra', Integer))
+    Table('things', metadata, *columns)
+    return metadata
+
+
+def test_schema_is_created_once_per_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    upgrades = []
+    metadata = _metadata()
+
+    assert ensure_schema(engine, metadata, on_upgrade=upgrades.append) is True
+    assert stored_version(engine) == schema_fingerprint(metadata)
+    assert ensure_schema(engine, metadata, on_upgrade=upgrades.append) is False
+    assert len(upgrades) == 1
+
+    changed = _metadata(extra_column=True)
+    assert schema_fingerprint(changed) != schema_fingerprint(metadata)
+    assert ensure_schema(engine, changed, on_upgrade=upgrades.append) is True
+    assert len(upgrades) == 2
+
+
+def test_concurrent_stamps_leave_a_single_row(tmp_path):
+    import threading
+    from sqlalchemy import text
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}", connect_args={'timeout': 30})
+    _metadata().create_all(engine)
+    errors = []
+
+    def stamp(version):
+        try:
+            for _ in range(20):
+                stamp_version(engine, version)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=stamp, args=(f"v{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_info")).scalar() == 1
+    assert stored_version(engine) in {'v0', 'v1', 'v2', 'v3'}
+
+    stamp_version(engine, 'final')
+    assert stored_version(engine) == 'final'
+
+
+def _drop_columns(engine, table, columns):
+    """Simula una base creada antes de que existieran las columnas (SQLite >= 3.35)"""
+    from sqlalchemy import inspect
+    with engine.begin() as conn:
+        for index in inspect(engine).get_indexes(table):
+            if set(index['column_names']) & set(columns):
+                conn.exec_driver_sql(f"DROP INDEX {index['name']}")
+        for column in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN {column}")
+
+
+def test_existing_clients_table_gets_phone_column_and_backfill(tmp_path):
+    from sqlalchemy import inspect
+    from sqlalchemy.orm import sessionmaker
+    from src.infrastructure.database.models import Base, Client, ClientPhone, Router, _ensure_auxiliary_schema
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Router(id=1, alias='R1', host_address='10.0.0.1', api_username='a', api_password='x'))
+    session.commit()
+    session.close()
+    _drop_columns(engine, 'clients', ['phone_e164'])
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO clients (id, router_id, subscriber_code, legal_name, username, phone, status) "
+                             "VALUES (1, 1, 'S1', 'Ana', 'ana', '0414-1234567 / 0424 7654321', 'active')")
+
+    _ensure_auxiliary_schema(engine)
+    _ensure_auxiliary_schema(engine)   # Idempotente: la columna ya existe
+    assert 'phone_e164' in {c['name'] for c in inspect(engine).get_columns('clients')}
+    assert 'ix_clients_phone_e164' in {i['name'] for i in inspect(engine).get_indexes('clients')}
+
+    session = sessionmaker(bind=engine)()
+    assert session.get(Client, 1).phone_e164 == '+584141234567'
+    assert sorted(p.phone_e164 for p in session.query(ClientPhone)) == ['+584141234567', '+584247654321']
+    session.close()
+
+
+def test_existing_incidents_table_gets_dedup_columns(tmp_path):
+    from datetime import datetime
+    from sqlalchemy import inspect
+    from sqlalchemy.orm import sessionmaker
+    from src.infrastructure.database.models import Base, SystemIncident, _ensure_auxiliary_schema
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(engine)
+    _drop_columns(engine, 'system_incidents', ['fingerprint', 'occurrences', 'first_seen', 'last_seen'])
+    created = datetime(2024, 3, 1, 8, 30)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO system_incidents (id, message, created_at) VALUES (1, 'boom', ?)",
+                             (created,))
+
+    _ensure_auxiliary_schema(engine)
+    columns = {c['name'] for c in inspect(engine).get_columns('system_incidents')}
+    assert {'fingerprint', 'occurrences', 'first_seen', 'last_seen'} <= columns
+    assert 'ix_system_incidents_fingerprint' in {i['name'] for i in inspect(engine).get_indexes('system_incidents')}
+
+    session = sessionmaker(bind=engine)()
+    incident = session.get(SystemIncident, 1)
+    assert incident.occurrences == 1 and incident.first_seen == incident.last_seen == created
+    session.close()
+
+
+LAZY_MODULE = '''
+from flask import Blueprint, jsonify
+LOADED = True
+
+demo_bp = Blueprint('demo', __name__, url_prefix='/api/demo')
+
+@demo_bp.route('', methods=['GET'])
+def list_items():
+    return jsonify(['a'])
+
+@demo_bp.route('/<int:item_id>', methods=['GET', 'PUT'])
+def item(item_id):
+    return jsonify({'id': item_id})
+'''
+
+
+@pytest.fixture
+def lazy_package(tmp_path, monkeypatch):
+    package = tmp_path / 'lazydemo'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'demo_controller.py').write_text(textwrap.dedent(LAZY_MODULE))
+    (package / 'hooked_controller.py').write_text(textwrap.dedent(LAZY_MODULE) + textwrap.dedent('''
+        @demo_bp.before_request
+        def check():
+            pass
+    '''))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield 'lazydemo'
+    for name in [m for m in sys.modules if m.startswith('lazydemo')]:
+        del sys.modules[name]
+
+
+def test_manifest_reads_routes_without_importing(lazy_package):
+    manifest = read_manifest(f'{lazy_package}.demo_controller')
+    assert manifest.name == 'demo' and manifest.url_prefix == '/api/demo'
+    assert [(r.rule, r.methods) for r in manifest.routes] == [('', ['GET']), ('/<int:item_id>', ['GET', 'PUT'])]
+    assert f'{lazy_package}.demo_controller' not in sys.modules
+    assert read_manifest(f'{lazy_package}.hooked_controller') is None
+
+
+def test_lazy_routes_import_module_on_first_request(lazy_package):
+    app = flask.Flask(__name__)
+    module_name = f'{lazy_package}.demo_controller'
+    assert register_lazy_blueprint(app, module_name, 'demo_bp') is True
+    assert module_name not in sys.modules
+
+    client = app.test_client()
+    assert client.get('/api/demo').get_json() == ['a']
+    assert module_name in sys.modules
+    assert client.put('/api/demo/7').get_json() == {'id': 7}
+    assert client.post('/api/demo/7').status_code == 405
+    with app.test_request_context():
+        assert flask.url_for('demo.item', item_id=3) == '/api/demo/3'
+
+
+def test_unrepresentable_blueprint_falls_back_to_eager(lazy_package):
+    app = flask.Flask(__name__)
+    assert register_lazy_blueprint(app, f'{lazy_package}.hooked_controller', 'demo_bp') is False
+    assert 'demo' in app.blueprints
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,53 @@
+"""
+Integration Tests for Database Engine Profiles
+Ejecuta el perfil SQLite contra un archivo temporal y el perfil PostgreSQL
+contra la instancia indicada en SGUBM_TEST_POSTGRES_URL (si existe).
+"""
+import os
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+from sqlalchemy import Column, Integer, MetaData, String, Table, text
+from src.infrastructure.database.engine_profiles import EngineOptions, build_engine, profile_name
+
+POSTGRES_URL = os.getenv("SGUBM_TEST_POSTGRES_URL")
+
+def _roundtrip(engine):
+    metadata = MetaData()
+    probe = Table('profile_probe', metadata, Column('id', Integer, primary_key=True), Column('name', String(20)))
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(probe.insert(), [{'name': f'n{i}'} for i in range(10)])
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM profile_probe")).scalar() == 10
+    metadata.drop_all(engine)
+
+def test_profile_detection():
+    assert profile_name('sqlite:///sgubm.db') == 'sqlite'
+    assert profile_name('postgresql://u:p@localhost/db') == 'postgresql'
+    assert profile_name('postgresql+psycopg2://u:p@localhost/db') == 'postgresql'
+
+def test_sqlite_file_profile(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'profile.db'}", EngineOptions(sqlite_read_pool=2))
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == 'wal'
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert engine.pool.size() == 2
+        _roundtrip(engine)
+    finally:
+        engine.dispose()
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="SGUBM_TEST_POSTGRES_URL no definido")
+def test_postgres_profile():
+    engine = build_engine(POSTGRES_URL, EngineOptions(pool_size=2, statement_timeout_ms=5000))
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("SHOW statement_timeout")).scalar() == '5s'
+        _roundtrip(engine)
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
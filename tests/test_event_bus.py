@@ -0,0 +1,161 @@
+"""
+Unit Tests for Event Bus
+Verifica el despacho asíncrono por tipo de evento, las políticas de desborde y el historial acotado.
+"""
+import threading
+import time
+import pytest
+from src.application.events.event_bus import EventBus
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_sync_dispatch_is_default():
+    bus = EventBus()
+    received = []
+    bus.subscribe('client.created', received.append)
+    bus.publish('client.created', {'id': 1})
+    assert received == [{'id': 1}]
+
+
+def test_async_dispatch_does_not_block_publisher():
+    bus = EventBus()
+    gate = threading.Event()
+    received = []
+
+    def slow_handler(data):
+        gate.wait(2)
+        received.append(data)
+
+    bus.subscribe('network.router_metrics', slow_handler)
+    bus.configure('network.router_metrics', maxsize=10, overflow='drop_new')
+
+    started = time.monotonic()
+    for i in range(5):
+        bus.publish('network.router_metrics', {'n': i})
+    assert time.monotonic() - started < 0.5
+
+    gate.set()
+    assert _wait(lambda: len(received) == 5)
+    assert [d['n'] for d in received] == [0, 1, 2, 3, 4]
+    bus.shutdown()
+
+
+def test_coalesce_keeps_latest_per_key():
+    bus = EventBus()
+    gate = threading.Event()
+    received = []
+
+    def handler(data):
+        gate.wait(2)
+        received.append(data)
+
+    bus.subscribe('network.client_traffic', handler)
+    bus.configure('network.client_traffic', maxsize=10, overflow='coalesce',
+                  coalesce_key=lambda d: d['router_id'])
+
+    bus.publish('network.client_traffic', {'router_id': 1, 'v': 'first'})
+    assert _wait(lambda: bus.get_dispatch_stats()['network.client_traffic']['depth'] == 0)
+    # El worker está bloqueado con 'first'; lo siguiente se fusiona por router
+    for v in range(50):
+        bus.publish('network.client_traffic', {'router_id': 1, 'v': v})
+        bus.publish('network.client_traffic', {'router_id': 2, 'v': v})
+
+    stats = bus.get_dispatch_stats()['network.client_traffic']
+    assert stats['depth'] == 2
+    assert stats['coalesced'] == 98
+
+    gate.set()
+    assert _wait(lambda: len(received) == 3)
+    assert received[1] == {'router_id': 1, 'v': 49}
+    assert received[2] == {'router_id': 2, 'v': 49}
+    bus.shutdown()
+
+
+def test_drop_oldest_bounds_queue():
+    bus = EventBus()
+    gate = threading.Event()
+    received = []
+
+    def handler(data):
+        gate.wait(2)
+        received.append(data['n'])
+
+    bus.subscribe('system.incident_reported', handler)
+    bus.configure('system.incident_reported', maxsize=3, overflow='drop_oldest')
+
+    bus.publish('system.incident_reported', {'n': 0})
+    assert _wait(lambda: bus.get_dispatch_stats()['system.incident_reported']['depth'] == 0)
+    for i in range(1, 11):
+        bus.publish('system.incident_reported', {'n': i})
+
+    assert bus.get_dispatch_stats()['system.incident_reported']['dropped'] == 7
+    gate.set()
+    assert _wait(lambda: len(received) == 4)
+    assert received == [0, 8, 9, 10]
+    bus.shutdown()
+
+
+def test_handler_errors_do_not_stop_worker():
+    bus = EventBus()
+    received = []
+
+    def failing(data):
+        raise ValueError("boom")
+
+    bus.subscribe('whatsapp.message_sent', failing)
+    bus.subscribe('whatsapp.message_sent', received.append)
+    bus.configure('whatsapp.message_sent')
+
+    bus.publish('whatsapp.message_sent', {'id': 1})
+    bus.publish('whatsapp.message_sent', {'id': 2})
+    assert _wait(lambda: len(received) == 2)
+    bus.shutdown()
+
+
+def test_history_is_bounded_ring_buffer():
+    bus = EventBus()
+    for i in range(1500):
+        bus.publish('client.updated' if i % 2 else 'client.created', {'n': i})
+
+    history = bus.get_history(limit=5000)
+    assert len(history) == 1000
+    assert history[0].data['n'] == 500
+    assert history[-1].data['n'] == 1499
+    assert [e.data['n'] for e in bus.get_history('client.created', limit=2)] == [1496, 1498]
+
+    bus.clear_history()
+    assert bus.get_history() == []
+
+
+def test_coroutine_handler_runs_on_attached_loop():
+    import asyncio
+    bus = EventBus()
+    calls = []
+
+    async def on_event(data):
+        calls.append(data)
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        bus.attach_loop(loop)
+        bus.subscribe('support.ticket_created', lambda d: on_event(d))
+        bus.publish('support.ticket_created', {'id': 1})
+        assert _wait(lambda: calls == [{'id': 1}])
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(2)
+        loop.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
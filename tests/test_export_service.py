@@ -0,0 +1,90 @@
+"""
+Unit Tests for Export Service
+Verifica la escritura por bloques de CSV y el envío de archivos temporales.
+"""
+import csv
+import io
+import os
+import pytest
+from src.application.services.export_service import iter_csv, iter_file, iter_xlsx, ExportColumn
+
+def test_csv_is_emitted_in_chunks_with_single_bom():
+    rows = ([i, f"Cliente {i}", 10.5] for i in range(1, 1201))
+    chunks = list(iter_csv(['Ref', 'Cliente', 'Monto'], rows, chunk_rows=500))
+
+    assert len(chunks) == 3
+    assert chunks[0].startswith(b'\xef\xbb\xbf')
+    assert not any(chunk.startswith(b'\xef\xbb\xbf') for chunk in chunks[1:])
+
+    text = b''.join(chunks).decode('utf-8-sig')
+    parsed = list(csv.reader(io.StringIO(text)))
+    assert parsed[0] == ['Ref', 'Cliente', 'Monto']
+    assert len(parsed) == 1201
+    assert parsed[-1] == ['1200', 'Cliente 1200', '10.5']
+
+def test_csv_consumes_rows_lazily():
+    consumed = []
+
+    def rows():
+        for i in range(10):
+            consumed.append(i)
+            yield [i]
+
+    stream = iter_csv(['n'], rows(), chunk_rows=3)
+    next(stream)
+    assert consumed == [0, 1, 2]
+
+def test_csv_without_rows_has_header():
+    assert list(iter_csv(['a', 'b'], [], bom=False)) == [b'a,b\n']
+
+def test_iter_file_streams_and_removes(tmp_path):
+    path = tmp_path / 'export.bin'
+    path.write_bytes(b'x' * 150)
+
+    chunks = list(iter_file(str(path), chunk_size=64))
+    assert [len(c) for c in chunks] == [64, 64, 22]
+    assert not path.exists()
+
+def test_xlsx_constant_memory_roundtrip():
+    pytest.importorskip("xlsxwriter")
+    openpyxl = pytest.importorskip("openpyxl")
+    columns = [ExportColumn('Ref'), ExportColumn('Monto', 15, 'money')]
+    data = b''.join(iter_xlsx('Pagos', columns, ([i, i * 1.5] for i in range(1, 2001))))
+
+    sheet = openpyxl.load_workbook(io.BytesIO(data), read_only=True)['Pagos']
+    values = list(sheet.iter_rows(values_only=True))
+    assert values[0] == ('Ref', 'Monto')
+    assert len(values) == 2001
+    assert values[-1] == (2000, 3000.0)
+
+def test_streaming_response_surfaces_generation_errors_before_headers():
+    flask = pytest.importorskip("flask")
+    from src.application.services.export_service import streaming_response
+
+    def broken():
+        raise RuntimeError('xlsxwriter no instalado')
+        yield b''
+
+    with flask.Flask(__name__).test_request_context('/'):
+        with pytest.raises(RuntimeError):
+            streaming_response(broken(), 'x.xlsx', 'application/octet-stream')
+
+def test_streaming_response_logs_errors_mid_stream(caplog):
+    flask = pytest.importorskip("flask")
+    from src.application.services.export_service import streaming_response
+
+    def rows():
+        yield [1]
+        raise RuntimeError('conexión perdida')
+
+    app = flask.Flask(__name__)
+    with app.test_request_context('/'):
+        response = streaming_response(iter_csv(['n'], rows(), chunk_rows=1, bom=False), 'x.csv', 'text/csv')
+        chunks = response.response
+        assert next(chunks) == b'n\n1\n'
+        with pytest.raises(RuntimeError):
+            list(chunks)
+    assert 'x.csv' in caplog.text
+
+if __name__ == "__main__":
+    pytest.main([__file__])
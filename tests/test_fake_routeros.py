@@ -0,0 +1,102 @@
+"""
+Unit Tests for Fake RouterOS Server and Benchmark Harness
+Verifica la codificación del protocolo API, que el adaptador real opere contra el emulador
+y las estadísticas / detección de regresiones del harness.
+"""
+import socket
+import pytest
+from benchmarks.fake_routeros import (
+    BLOCKED_LIST, FakeRouterOS, LatencyProfile, RouterDataset, encode_length, encode_sentence, read_sentence
+)
+from benchmarks.harness import find_regressions, run_benchmark, summarize
+
+
+def test_length_prefix_sizes():
+    assert [len(encode_length(n)) for n in (0x7F, 0x80, 0x3FFF, 0x4000, 0x1FFFFF, 0x200000, 0xFFFFFFF, 0x10000000)] == \
+        [1, 2, 2, 3, 3, 4, 4, 5]
+
+
+@pytest.mark.parametrize('length', [1, 0x7F, 0x80, 0x3FFF, 0x4000])
+def test_sentence_roundtrip(length):
+    word = 'x' * length
+    left, right = socket.socketpair()
+    try:
+        left.sendall(encode_sentence(['/interface/print', word, '.tag=1']))
+        assert read_sentence(right) == ['/interface/print', word, '.tag=1']
+    finally:
+        left.close()
+        right.close()
+
+
+def test_dataset_is_reproducible():
+    a = RouterDataset.generate(500, seed=4)
+    b = RouterDataset.generate(500, seed=4)
+    assert [c.username for c in a.clients] == [c.username for c in b.clients]
+    assert a.tables['/ppp/active'] == b.tables['/ppp/active']
+    assert len(a.tables['/queue/simple']) == 500
+    pppoe = [c for c in a.clients if c.service_type == 'pppoe']
+    assert len(a.tables['/ppp/secret']) == len(pppoe)
+    assert all(row['list'] == BLOCKED_LIST for row in a.tables['/ip/firewall/address-list'])
+
+
+def test_adapter_talks_to_fake_router():
+    pytest.importorskip("routeros_api")
+    from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+
+    dataset = RouterDataset.generate(300, seed=2)
+    with FakeRouterOS(dataset, LatencyProfile(command_ms=0.5)) as fake:
+        adapter = MikroTikAdapter()
+        assert adapter.connect(fake.host, 'admin', 'x', port=fake.port, timeout=2)
+        try:
+            queues = adapter._get_resource('/queue/simple').call('print', {'.proplist': 'name,rate'})
+            assert len(queues) == 300 and set(queues[0]) == {'name', 'rate'}
+            online = [c for c in dataset.clients if c.service_type == 'pppoe' and c.online]
+            assert len(adapter.get_active_pppoe_sessions()) == len(online)
+            assert adapter.get_system_info()['board_name'] == 'CCR2004'
+
+            username = dataset.clients[0].username
+            before = len(fake.state.tables['/queue/simple'])
+            assert adapter.queues.remove_queue(username) is True
+            assert len(fake.state.tables['/queue/simple']) == before - 1
+            assert adapter.queues.remove_queue(username) is False
+
+            assert adapter.system.ensure_firewall_rules() is True
+            assert len(fake.state.tables['/ip/firewall/filter']) == 2
+            assert adapter.ping_target('8.8.8.8', count=3)['status'] == 'online'
+        finally:
+            adapter.disconnect()
+
+        fake.reset()
+        assert len(fake.state.tables['/queue/simple']) == 300
+
+
+def test_login_is_rejected_with_wrong_password():
+    pytest.importorskip("routeros_api")
+    from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+
+    with FakeRouterOS(RouterDataset.generate(10), password='secret') as fake:
+        assert MikroTikAdapter().connect(fake.host, 'admin', 'wrong', port=fake.port, timeout=2) is False
+
+
+def test_latency_profile_scales_with_rows():
+    profile = LatencyProfile(command_ms=2, per_row_us=10)
+    assert profile.delay(0) == pytest.approx(0.002)
+    assert profile.delay(1000) == pytest.approx(0.012)
+
+
+def test_harness_statistics_and_regressions():
+    ticks = iter([0.0, 0.010, 1.0, 1.020, 2.0, 2.030, 3.0, 3.040])
+    calls = []
+    result = run_benchmark('demo', lambda: calls.append(1) or {'n': len(calls)}, setup=lambda: None,
+                           repeat=3, warmup=1, items=10, clock=lambda: next(ticks))
+    assert len(calls) == 4 and result.runs == 3
+    assert result.p50_ms == pytest.approx(30.0) and result.min_ms == pytest.approx(20.0)
+    assert result.extra == {'n': 4}
+
+    baseline = {'demo': {'p50_ms': 20.0}, 'other': {'p50_ms': 5.0}}
+    assert find_regressions([result], baseline, tolerance=0.2)[0]['ratio'] == 1.5
+    assert find_regressions([summarize('demo', [0.021])], baseline, tolerance=0.2) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,98 @@
+"""
+Unit Tests for IP Index
+Verifica el trie de prefijos de segmentos y la detección de IPs duplicadas.
+"""
+import pytest
+from ipaddress import ip_address, ip_network
+from src.application.services.ip_index import PrefixTrie, ClientIPIndex, normalize_ip
+
+def test_trie_membership_and_longest_match():
+    trie = PrefixTrie()
+    trie.insert('10.0.0.0/8', 'core')
+    trie.insert('10.10.10.0/24', 'pppoe')
+
+    assert '10.10.10.5' in trie
+    assert '10.20.0.1' in trie
+    assert '192.168.1.1' not in trie
+    net, value = trie.longest_match('10.10.10.5/32')
+    assert value == 'pppoe'
+    assert net == ip_network('10.10.10.0/24')
+    assert [v for _, v in trie.matches(ip_address('10.10.10.5'))] == ['core', 'pppoe']
+
+def test_trie_overlaps_and_remove():
+    trie = PrefixTrie.from_networks(['172.16.41.0/24', 'invalid-cidr'])
+    assert len(trie) == 1
+    assert trie.overlaps('172.16.0.0/16')      # contiene al segmento
+    assert trie.overlaps('172.16.41.128/25')   # contenido en el segmento
+    assert not trie.overlaps('172.17.0.0/16')
+
+    assert trie.remove('172.16.41.0/24')
+    assert not trie.remove('172.16.41.0/24')
+    assert len(trie) == 0
+    assert '172.16.41.10' not in trie
+
+def test_trie_ipv6():
+    trie = PrefixTrie.from_networks(['2001:db8::/32'])
+    assert '2001:db8::1' in trie
+    assert '2001:db9::1' not in trie
+
+def test_normalize_ip():
+    assert normalize_ip(' 10.0.0.5/32 ') == '10.0.0.5'
+    assert normalize_ip('N/A') is None
+    assert normalize_ip('0.0.0.0') is None
+    assert normalize_ip('no-ip') is None
+
+def test_client_index_conflicts_track_updates():
+    index = ClientIPIndex()
+    index.upsert(1, '10.0.0.5', router_id=1, status='active')
+    index.upsert(2, '10.0.0.5/32', router_id=1, status='active')
+    index.upsert(3, '10.0.0.5', router_id=2, status='suspended')
+
+    assert index.conflicts() == {'10.0.0.5': [1, 2, 3]}
+    assert index.conflicts(statuses=['active']) == {'10.0.0.5': [1, 2]}
+    assert index.conflicts(per_router=True) == {(1, '10.0.0.5'): [1, 2]}
+    assert sorted(index.owners('10.0.0.5', router_id=1)) == [1, 2]
+
+    # Cambio de IP resuelve el conflicto
+    index.upsert(2, '10.0.0.6', router_id=1, status='active')
+    assert index.conflicts(statuses=['active']) == {}
+    assert index.ip_of(2) == '10.0.0.6'
+
+    # Los eliminados no cuentan como dueños
+    index.upsert(4, '10.0.0.6', router_id=1, status='deleted')
+    assert index.owners('10.0.0.6', router_id=1) == [2]
+
+    index.remove(3)
+    index.remove(1)
+    assert index.conflicts() == {'10.0.0.6': [2, 4]}
+
+def test_duplicate_ip_check_queries_database(tmp_path):
+    """La validación de escritura no depende del índice en memoria (otros procesos o escrituras masivas)"""
+    pytest.importorskip("sqlalchemy")
+    from sqlalchemy import create_engine, inspect
+    from sqlalchemy.orm import sessionmaker
+    from src.infrastructure.database.models import Base, Client, Router, _ensure_auxiliary_schema
+    from src.infrastructure.database.repository_registry import ClientRepository
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'ip.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_clients_router_ip")
+    _ensure_auxiliary_schema(engine)   # Base existente: el índice se crea igual
+    assert 'ix_clients_router_ip' in {i['name'] for i in inspect(engine).get_indexes('clients')}
+
+    session = sessionmaker(bind=engine)()
+    session.add_all([Router(id=1, alias='R1', host_address='10.0.0.1', api_username='a', api_password='x'),
+                     Router(id=2, alias='R2', host_address='10.0.0.2', api_username='a', api_password='x')])
+    session.add_all([Client(id=1, router_id=1, subscriber_code='S1', legal_name='A', username='a', ip_address='10.1.1.5', status='active'),
+                     Client(id=2, router_id=1, subscriber_code='S2', legal_name='B', username='b', ip_address='10.1.1.6', status='deleted')])
+    session.commit()
+    repo = ClientRepository(session)
+    assert repo.find_ip_owner('10.1.1.5', 1).id == 1
+    assert repo.find_ip_owner('10.1.1.5', 1, exclude_client_id=1) is None
+    assert repo.find_ip_owner('10.1.1.5', 2) is None
+    assert repo.find_ip_owner('10.1.1.6', 1) is None
+    session.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
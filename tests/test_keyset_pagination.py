@@ -0,0 +1,95 @@
+"""
+Unit Tests for Keyset Pagination
+Verifica la paginación por cursor de pagos y clientes, con el filtro RBAC aplicado en SQL.
+"""
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("flask")  # los modelos registran el filtro de tenant sobre flask.g
+from src.infrastructure.database.models import init_db, get_session, Router, Client, Payment, User, CollectorAssignment
+from src.infrastructure.database.repository_registry import ClientRepository, PaymentRepository
+
+@pytest.fixture
+def session():
+    session = get_session(init_db('sqlite:///:memory:'))
+    routers = [Router(alias=f"R{i}", host_address=f"10.0.0.{i}", api_password='x') for i in (1, 2)]
+    session.add_all(routers)
+    session.flush()
+    collector = User(username='cobrador', password_hash='x', role='collector')
+    session.add(collector)
+    session.flush()
+    session.add(CollectorAssignment(user_id=collector.id, router_id=routers[0].id))
+
+    base = datetime(2026, 1, 1, 8, 0)
+    for i in range(40):
+        client = Client(router_id=routers[i % 2].id, subscriber_code=f"CLI-{i:03d}", legal_name=f"Cliente {i}",
+                        username=f"user{i}", status='active')
+        session.add(client)
+        session.flush()
+        # Dos pagos por minuto: el desempate por id debe mantener el orden estable
+        for j in range(2):
+            session.add(Payment(client_id=client.id, amount=10 + j, payment_date=base + timedelta(minutes=i)))
+    session.commit()
+    yield session
+    session.close()
+
+def _walk(fetch, page_size):
+    items, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = fetch(page_size, cursor)
+        items.extend(rows)
+        pages += 1
+        if not cursor:
+            return items, pages
+
+def test_payment_pages_cover_all_rows_in_order(session):
+    repo = PaymentRepository(session)
+    items, pages = _walk(lambda n, c: repo.get_page(limit=n, cursor=c), 7)
+
+    assert len(items) == 80 and pages == 12
+    keys = [(p.payment_date, p.id) for p in items]
+    assert keys == sorted(keys, reverse=True)
+    assert len({p.id for p in items}) == 80
+
+def test_payments_without_date_are_paged_last(session):
+    client_id = session.query(Client.id).first()[0]
+    legacy = [Payment(client_id=client_id, amount=5, payment_date=None) for _ in range(5)]
+    session.add_all(legacy)
+    session.flush()
+    session.query(Payment).filter(Payment.id.in_([p.id for p in legacy])).update(
+        {Payment.payment_date: None}, synchronize_session=False)   # El default de la columna no aplica
+    session.commit()
+
+    repo = PaymentRepository(session)
+    items, pages = _walk(lambda n, c: repo.get_page(limit=n, cursor=c), 7)
+    assert len(items) == 85 and pages == 13 and len({p.id for p in items}) == 85
+    assert [p.id for p in items[-5:]] == sorted((p.id for p in legacy), reverse=True)
+    assert all(p.payment_date is not None for p in items[:80])
+
+def test_payment_scope_is_applied_before_limit(session):
+    repo = PaymentRepository(session)
+    collector = session.query(User).filter_by(username='cobrador').one()
+
+    first, cursor = repo.get_page(limit=10, scope_user_id=collector.id)
+    assert len(first) == 10  # Página completa aunque la mitad de los pagos no sean visibles
+    assert {p.client.router_id for p in first} == {collector.assignments[0].router_id}
+
+    items, _ = _walk(lambda n, c: repo.get_page(limit=n, cursor=c, scope_user_id=collector.id), 10)
+    assert len(items) == 40
+
+def test_client_pages_by_id(session):
+    repo = ClientRepository(session)
+    items, pages = _walk(lambda n, c: repo.get_page(limit=n, cursor=c), 15)
+
+    assert [c.id for c in items] == sorted(c.id for c in items)
+    assert len(items) == 40 and pages == 3
+
+def test_invalid_cursor_raises_value_error(session):
+    with pytest.raises(ValueError):
+        PaymentRepository(session).get_page(cursor='no-es-un-cursor')
+    with pytest.raises(ValueError):
+        ClientRepository(session).get_page(cursor='abc')
+
+if __name__ == "__main__":
+    pytest.main([__file__])
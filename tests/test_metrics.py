@@ -0,0 +1,158 @@
+"""
+Unit Tests for Performance Telemetry
+Verifica el registro de métricas (texto Prometheus), el cronometraje de capacidades RouterOS,
+el conteo de consultas SQL por petición y el log de sentencias lentas.
+"""
+import logging
+import pytest
+from src.infrastructure.observability.metrics import MetricsRegistry, get_metrics, timed_call
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    calls = registry.counter('demo_calls_total', 'Llamadas', ('router',))
+    calls.inc(router='r1')
+    calls.inc(2, router='r1')
+    registry.gauge('demo_lag_seconds', 'Lag', ('router',)).set(0.25, router='r"2')
+    latency = registry.histogram('demo_seconds', 'Latencia', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value)
+
+    assert registry.counter('demo_calls_total', 'Llamadas', ('router',)) is calls
+    with pytest.raises(ValueError):
+        registry.gauge('demo_calls_total', 'Otro tipo')
+    with pytest.raises(ValueError):
+        calls.inc(host='x')
+
+    text = registry.render()
+    assert '# TYPE demo_calls_total counter' in text
+    assert 'demo_calls_total{router="r1"} 3' in text
+    assert 'demo_lag_seconds{router="r\\"2"} 0.25' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="1"} 2' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 3' in text
+    assert 'demo_seconds_count 3' in text and 'demo_seconds_sum 3.55' in text
+
+
+def test_timed_call_records_latency_and_errors():
+    registry = MetricsRegistry()
+    seconds = registry.histogram('op_seconds', 'Latencia', ('op',))
+    errors = registry.counter('op_errors_total', 'Errores', ('op',))
+
+    @timed_call(seconds, errors, lambda fail: {'op': 'demo'})
+    def operation(fail):
+        if fail:
+            raise RuntimeError('boom')
+        return 'ok'
+
+    assert operation(False) == 'ok'
+    with pytest.raises(RuntimeError):
+        operation(True)
+    assert seconds.count(op='demo') == 2
+    assert errors.value(op='demo') == 1
+
+
+def test_capability_methods_are_timed_per_router():
+    pytest.importorskip("routeros_api")
+    from src.infrastructure.mikrotik.capabilities.base import ROUTEROS_CALL_ERRORS, ROUTEROS_CALL_SECONDS
+    from src.infrastructure.mikrotik.capabilities import SystemCapability
+
+    class FakeResource:
+        def get(self):
+            return [{'cpu-load': '7', 'free-memory': '50', 'total-memory': '100', 'uptime': '1d'}]
+
+    class FakeApi:
+        def get_resource(self, path):
+            return FakeResource()
+
+    capability = SystemCapability(FakeApi())
+    capability.set_host('10.9.9.1')
+    before = ROUTEROS_CALL_SECONDS.count(router='10.9.9.1', call='system.get_resource_usage')
+    capability.get_resource_usage()
+    assert ROUTEROS_CALL_SECONDS.count(router='10.9.9.1', call='system.get_resource_usage') == before + 1
+    assert ROUTEROS_CALL_ERRORS.value(router='10.9.9.1', call='system.get_resource_usage') == 0
+
+
+def test_queries_are_counted_per_request_and_slow_ones_logged(tmp_path):
+    pytest.importorskip("sqlalchemy")
+    flask = pytest.importorskip("flask")
+    from sqlalchemy import text
+    from src.infrastructure.database.engine_profiles import EngineOptions, build_engine
+    from src.infrastructure.observability.query_metrics import SQL_LOGGER, request_query_stats
+    from src.infrastructure.observability.request_logging import RequestLogPolicy, init_request_logging
+
+    engine = build_engine(f"sqlite:///{tmp_path / 'metrics.db'}", EngineOptions(slow_query_ms=0))
+    app = flask.Flask(__name__)
+    seen = {}
+
+    @app.route('/api/items')
+    def items():
+        with engine.connect() as conn:
+            for i in range(3):
+                conn.execute(text("SELECT :i"), {'i': i})
+        seen.update(request_query_stats())
+        return flask.jsonify([])
+
+    policy = init_request_logging(app, RequestLogPolicy(rng=lambda: 0.99, query_warn=3))
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    sql_logger = logging.getLogger(SQL_LOGGER)
+    sql_logger.addHandler(handler)
+    try:
+        app.test_client().get('/api/items')
+    finally:
+        sql_logger.removeHandler(handler)
+        engine.dispose()
+
+    assert seen['queries'] == 3 and seen['ms'] >= 0
+    assert policy.is_query_heavy(3)
+    slow = [r for r in records if getattr(r, 'statement', None) == 'SELECT ?']
+    assert len(slow) == 3 and slow[-1].params == '(2,)'
+    assert 'sgubm_http_request_db_queries_bucket{endpoint="items",le="5"}' in get_metrics().render()
+
+
+def test_metrics_endpoint_serves_prometheus_text(monkeypatch):
+    flask = pytest.importorskip("flask")
+    from src.infrastructure.config.settings import get_config
+    from src.presentation.api.metrics_controller import metrics_bp
+
+    app = flask.Flask(__name__)
+    app.register_blueprint(metrics_bp)
+    client = app.test_client()
+    get_metrics().counter('sgubm_test_total', 'Prueba').inc()
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert 'sgubm_test_total 1' in response.get_data(as_text=True)
+
+    monkeypatch.setattr(get_config().system, 'metrics_token', 's3cret')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+
+
+def test_metrics_endpoint_is_opt_in_and_needs_token_in_production(monkeypatch):
+    flask = pytest.importorskip("flask")
+    from src.infrastructure.config.settings import get_config
+    from src.presentation.api.metrics_controller import register_metrics
+
+    system = get_config().system
+    monkeypatch.setattr(system, 'metrics_token', '')
+    monkeypatch.setattr(system, 'metrics_enabled', False)
+    assert register_metrics(flask.Flask(__name__)) is False
+
+    monkeypatch.setattr(system, 'metrics_enabled', True)
+    monkeypatch.setattr(system, 'environment', 'production')
+    app = flask.Flask(__name__)
+    assert register_metrics(app) is False
+    assert app.test_client().get('/metrics').status_code == 404
+
+    monkeypatch.setattr(system, 'metrics_token', 's3cret')
+    app = flask.Flask(__name__)
+    assert register_metrics(app) is True
+    assert app.test_client().get('/metrics').status_code == 401
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,37 @@
+"""
+Unit Tests for Phone Service
+Verifica la normalización E.164 usada por el índice de teléfonos de clientes.
+"""
+import pytest
+from src.domain.services.phone_service import PhoneService
+
+def test_normalize_formats_to_same_key():
+    expected = '+584141234567'
+    assert PhoneService.normalize('0414-1234567', '58') == expected
+    assert PhoneService.normalize('+58 414 123 4567', '58') == expected
+    assert PhoneService.normalize('584141234567@c.us', '58') == expected
+    assert PhoneService.normalize('00584141234567', '58') == expected
+    assert PhoneService.normalize('4141234567', '58') == expected
+
+def test_normalize_rejects_garbage():
+    assert PhoneService.normalize(None) is None
+    assert PhoneService.normalize('N/A') is None
+    assert PhoneService.normalize('12345', '58') is None
+
+def test_foreign_international_number_kept():
+    assert PhoneService.normalize('+57 300 1234567', '58') == '+573001234567'
+
+def test_extract_primary_and_secondary():
+    raw = '0414-1234567 / 0424 7654321, 0414.123.4567'
+    assert PhoneService.extract_all(raw, '58') == ['+584141234567', '+584247654321']
+    assert PhoneService.extract_all('04141234567 04247654321', '58') == ['+584141234567', '+584247654321']
+    assert PhoneService.extract_all('', '58') == []
+
+def test_default_country_code_comes_from_notification_config(monkeypatch):
+    from src.infrastructure.config.settings import get_config
+    monkeypatch.setattr(get_config().notification, 'phone_country_code', '57')
+    assert PhoneService.normalize('3001234567') == '+573001234567'
+    assert PhoneService.extract_all('300 123 4567') == ['+573001234567']
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,91 @@
+"""
+Unit Tests for Quality Pulse Engine
+Verifica el reparto en canales, el deadline por ronda y el calendario rotativo.
+"""
+import time
+import threading
+import pytest
+from types import SimpleNamespace
+from src.application.services.pulse_engine import QualityPulseEngine
+
+class FakeAdapter:
+    def __init__(self, delay=0.0, registry=None):
+        self.delay = delay
+        self.pinged = []
+        self.disconnected = False
+        if registry is not None:
+            registry.append(self)
+
+    def connect(self, *args, **kwargs):
+        return True
+
+    def disconnect(self):
+        self.disconnected = True
+
+    def ping_target(self, target, count, interval_ms):
+        time.sleep(self.delay)
+        self.pinged.append(target)
+        return {'latency': 1.0, 'loss': 0, 'jitter': 0.1, 'status': 'online', 'thread': threading.current_thread().name}
+
+ROUTER = SimpleNamespace(id=1, alias='R1', host_address='10.0.0.1', api_username='u', api_password='p', api_port=8728)
+
+def test_all_targets_measured_across_channels():
+    opened = []
+    engine = QualityPulseEngine(channels=3, count=1, interval_ms=10, round_deadline=10,
+                                adapter_factory=lambda: FakeAdapter(delay=0.01, registry=opened))
+    primary = FakeAdapter(delay=0.01)
+    targets = [f'10.0.0.{i}' for i in range(2, 20)]
+
+    results = engine.run(ROUTER, targets, primary_adapter=primary)
+
+    assert set(results) == set(targets)
+    assert len(opened) == 2
+    assert all(a.disconnected for a in opened)
+    assert not primary.disconnected
+    assert sum(len(a.pinged) for a in opened + [primary]) == len(targets)
+
+def test_deadline_rotates_cursor_and_keeps_recent_results():
+    engine = QualityPulseEngine(channels=1, count=1, interval_ms=10, round_deadline=0.05,
+                                adapter_factory=lambda: FakeAdapter())
+    primary = FakeAdapter(delay=0.03)
+    targets = [f'10.0.1.{i}' for i in range(1, 11)]
+
+    first = engine.run(ROUTER, targets, primary_adapter=primary)
+    assert 0 < len(first) < len(targets)
+
+    primary.pinged.clear()
+    second = engine.run(ROUTER, targets, primary_adapter=primary)
+    # La segunda ronda empieza donde terminó la primera
+    assert primary.pinged[0] not in first
+    # Los medidos antes se conservan como resultado reciente
+    assert set(first) <= set(second)
+
+def test_targets_removed_are_forgotten():
+    engine = QualityPulseEngine(channels=1, count=1, interval_ms=10, round_deadline=5)
+    primary = FakeAdapter()
+    engine.run(ROUTER, ['10.0.2.1', '10.0.2.2'], primary_adapter=primary)
+    results = engine.run(ROUTER, ['10.0.2.2'], primary_adapter=primary)
+    assert list(results) == ['10.0.2.2']
+
+def test_channel_stays_open_while_its_thread_is_still_pinging():
+    release = threading.Event()
+    opened = []
+
+    class BlockingAdapter(FakeAdapter):
+        def ping_target(self, target, count, interval_ms):
+            release.wait(5)
+            return super().ping_target(target, count, interval_ms)
+
+    engine = QualityPulseEngine(channels=2, count=1, interval_ms=10, round_deadline=0.05, join_grace=0.05,
+                                adapter_factory=lambda: BlockingAdapter(registry=opened))
+    engine.run(ROUTER, ['10.0.3.1', '10.0.3.2'], primary_adapter=FakeAdapter(delay=0.2))
+    assert len(opened) == 1 and not opened[0].disconnected   # El hilo sigue dentro de ping_target
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while not opened[0].disconnected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert opened[0].disconnected
+
+if __name__ == "__main__":
+    pytest.main([__file__])
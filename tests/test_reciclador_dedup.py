@@ -0,0 +1,116 @@
+"""
+Unit Tests for Reciclador Incident Dedup
+Verifica la huella de incidentes, el límite por cubeta de tokens y el volcado agrupado (contadores en vez de filas).
+"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("flask")  # los modelos registran el filtro de tenant sobre flask.g
+from src.infrastructure.database.models import init_db, get_session, SystemIncident
+from src.application.services.reciclador_service import (
+    IncidentBuffer, TokenBucket, incident_fingerprint, normalize_message
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def session():
+    engine = init_db('sqlite:///:memory:')
+    session = get_session(engine)
+    yield session
+    session.close()
+
+
+def _runner(session):
+    def run(unit):
+        result = unit(session)
+        session.commit()
+        return result
+    return run
+
+
+def _row(message='Timeout connecting to 10.0.0.1:8728'):
+    return {'severity': 'error', 'category': 'mikrotik', 'module': 'adapter.py:10',
+            'error_type': 'TimeoutError', 'message': message}
+
+
+def test_normalize_message_strips_variable_parts():
+    assert normalize_message("Router 12 at 10.0.0.5:8728 failed ('ether1')") == \
+        "Router <n> at <ip> failed (<str>)"
+    assert normalize_message("obj at 0x7f3a2b  leaked") == "obj at <hex> leaked"
+
+
+def test_fingerprint_groups_equivalent_errors():
+    a = incident_fingerprint('TimeoutError', 'adapter.py:connect', 'Timeout after 10s on 10.0.0.1')
+    b = incident_fingerprint('TimeoutError', 'adapter.py:connect', 'Timeout after 30s on 10.0.0.9')
+    assert a == b
+    assert a != incident_fingerprint('ValueError', 'adapter.py:connect', 'Timeout after 10s on 10.0.0.1')
+    assert a != incident_fingerprint('TimeoutError', 'adapter.py:login', 'Timeout after 10s on 10.0.0.1')
+    assert a != incident_fingerprint('TimeoutError', 'adapter.py:connect', 'Timeout after 10s on 10.0.0.1', tenant_id=2)
+
+
+def test_token_bucket_burst_and_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=2, refill_per_sec=0.5, clock=clock)
+    assert bucket.consume() and bucket.consume()
+    assert not bucket.consume()
+    clock.now = 2.0
+    assert bucket.consume()
+    assert not bucket.consume()
+
+
+def test_storm_becomes_one_row_with_counter(session):
+    clock = FakeClock()
+    buffer = IncidentBuffer(flush_interval=60, burst=3, refill_per_minute=1, runner=_runner(session), clock=clock)
+    announced = [buffer.record('fp1', _row) for _ in range(1000)]
+    assert announced.count(True) == 3
+    assert buffer.stats['suppressed'] == 997
+
+    assert buffer.flush() == 1
+    incident = session.query(SystemIncident).one()
+    assert incident.occurrences == 1000
+    assert incident.status == 'new'
+    assert incident.first_seen <= incident.last_seen
+
+    for _ in range(5):
+        buffer.record('fp1', _row)
+    buffer.flush()
+    assert session.query(SystemIncident).count() == 1
+    assert session.query(SystemIncident).one().occurrences == 1005
+    assert buffer.stats['inserted'] == 1 and buffer.stats['merged'] == 1
+
+
+def test_resolved_fingerprint_reopens_as_recurring(session):
+    buffer = IncidentBuffer(flush_interval=60, runner=_runner(session))
+    buffer.record('fp1', _row)
+    buffer.record('fp2', lambda: _row('Other'))
+    assert buffer.flush() == 2
+
+    first = session.query(SystemIncident).filter_by(fingerprint='fp1').one()
+    first.status = 'resolved'
+    session.commit()
+
+    buffer.record('fp1', _row)
+    buffer.flush()
+    rows = session.query(SystemIncident).filter_by(fingerprint='fp1').order_by(SystemIncident.id).all()
+    assert [r.status for r in rows] == ['resolved', 'recurring']
+    assert rows[1].occurrences == 1
+
+
+def test_pending_fingerprints_are_bounded():
+    buffer = IncidentBuffer(flush_interval=60, max_pending=2, runner=lambda unit: [])
+    for i in range(5):
+        buffer.record(f'fp{i}', _row)
+    assert buffer.pending() == 2
+    assert buffer.stats['dropped'] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,146 @@
+"""
+Unit Tests for Report Aggregation
+Verifica los buckets mensuales (recaudo, facturado, altas, bajas, base instalada) contra el cálculo mes a mes
+y que el número de consultas no dependa de la cantidad de meses.
+"""
+from datetime import datetime
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("flask")  # los modelos registran el filtro de tenant sobre flask.g
+from sqlalchemy import event
+from src.infrastructure.database.models import init_db, get_session, Router, Client, Payment, Invoice
+from src.application.services.report_aggregation import (
+    MonthlyReportAggregator, financial_months, growth_months, month_bounds, month_index,
+    working_clients_by_router
+)
+
+YEAR = 2025
+INDEXES = [month_index(YEAR, m) for m in range(1, 13)]
+
+@pytest.fixture
+def session():
+    engine = init_db('sqlite:///:memory:')
+    session = get_session(engine)
+    r1 = Router(alias='Norte', host_address='10.0.0.1', api_password='x')
+    r2 = Router(alias='Sur', host_address='10.0.0.2', api_password='x')
+    session.add_all([r1, r2])
+    session.flush()
+
+    def client(code, router, fee, created, status='active', updated=None, online=False):
+        c = Client(router_id=router.id, subscriber_code=code, legal_name=code, username=code.lower(),
+                   monthly_fee=fee, status=status, created_at=created, updated_at=updated or created,
+                   is_online=online)
+        session.add(c)
+        session.flush()
+        return c
+
+    old = client('OLD', r1, 30, datetime(2024, 6, 1), online=True)
+    march = client('MARCH', r1, 20, datetime(YEAR, 3, 15))
+    gone = client('GONE', r2, 25, datetime(2024, 11, 3), status='deleted', updated=datetime(YEAR, 5, 20))
+    late = client('LATE', r2, 40, datetime(YEAR, 9, 30, 12), status='suspended')
+
+    session.add_all([
+        Payment(client_id=old.id, amount=30, payment_date=datetime(YEAR, 1, 5), status='paid'),
+        Payment(client_id=old.id, amount=30, payment_date=datetime(YEAR, 3, 31, 23), status='verified'),
+        Payment(client_id=march.id, amount=20, payment_date=datetime(YEAR, 4, 1), status='paid'),
+        Payment(client_id=march.id, amount=99, payment_date=datetime(YEAR, 4, 2), status='rejected'),
+        Payment(client_id=gone.id, amount=25, payment_date=datetime(YEAR, 2, 10), status='paid'),
+        Payment(client_id=late.id, amount=40, payment_date=datetime(YEAR + 1, 1, 2), status='paid'),
+        Invoice(client_id=old.id, issue_date=datetime(YEAR, 1, 1), due_date=datetime(YEAR, 1, 10), total_amount=30),
+        Invoice(client_id=gone.id, issue_date=datetime(YEAR, 1, 1), due_date=datetime(YEAR, 1, 10), total_amount=25),
+        Invoice(client_id=march.id, issue_date=datetime(YEAR, 4, 1), due_date=datetime(YEAR, 4, 10), total_amount=20),
+    ])
+    session.commit()
+    session.routers = (r1.id, r2.id)
+    yield session
+    session.close()
+
+def _reference_financial(clients, index):
+    """Cálculo mes a mes original (recorriendo todos los clientes)"""
+    start, end = month_bounds(index)
+    active = lost = 0.0
+    for c in clients:
+        if str(c.status).lower() not in ('active', 'suspended', 'deleted'):
+            continue
+        if not c.created_at or c.created_at > end:
+            continue
+        if c.status == 'deleted':
+            if c.updated_at and c.updated_at < start:
+                continue
+            lost += c.monthly_fee
+        else:
+            active += c.monthly_fee
+    return active, lost
+
+def test_financial_buckets_match_month_by_month(session):
+    aggregator = MonthlyReportAggregator(session)
+    collected = aggregator.collected(month_bounds(INDEXES[0])[0], month_bounds(INDEXES[-1])[1])
+    months = financial_months(aggregator.cohorts(), collected, INDEXES)
+    clients = session.query(Client).all()
+
+    for index in INDEXES:
+        buckets = months[index].values()
+        active, lost = _reference_financial(clients, index)
+        assert sum(b['theoretical_active'] for b in buckets) == active
+        assert sum(b['theoretical_lost'] for b in buckets) == lost
+
+    r1, r2 = session.routers
+    assert months[month_index(YEAR, 1)][r1]['collected'] == 30
+    assert months[month_index(YEAR, 3)][r1]['collected'] == 30
+    assert months[month_index(YEAR, 4)][r1]['collected'] == 20     # El pago rechazado no cuenta
+    assert months[month_index(YEAR, 5)][r2]['theoretical_lost'] == 25
+    assert r2 not in months[month_index(YEAR, 6)] or months[month_index(YEAR, 6)][r2]['theoretical_lost'] == 0
+    assert months[month_index(YEAR, 10)][r2]['theoretical_active'] == 40
+
+def test_invoiced_and_router_scope(session):
+    r1, r2 = session.routers
+    start, end = datetime(YEAR, 1, 1), datetime(YEAR, 12, 31, 23, 59, 59)
+    invoiced = MonthlyReportAggregator(session).invoiced(start, end)
+    assert invoiced == {(r1, month_index(YEAR, 1)): 30, (r2, month_index(YEAR, 1)): 25, (r1, month_index(YEAR, 4)): 20}
+
+    scoped = MonthlyReportAggregator(session, r2)
+    assert set(scoped.invoiced(start, end)) == {(r2, month_index(YEAR, 1))}
+    assert {c.router_id for c in scoped.cohorts()} == {r2}
+    assert working_clients_by_router(MonthlyReportAggregator(session, [r1]).cohorts()) == {r1: 2}
+    assert MonthlyReportAggregator(session).router_aliases([r1, r2, None]) == {r1: 'Norte', r2: 'Sur', None: 'Router None'}
+
+def test_growth_new_churn_and_installed_base(session):
+    aggregator = MonthlyReportAggregator(session)
+    collected = aggregator.collected(datetime(YEAR, 1, 1), datetime(YEAR, 12, 31, 23, 59, 59))
+    stats = growth_months(aggregator.cohorts(), collected, INDEXES)
+
+    assert stats[month_index(YEAR, 1)] == {'new': 0, 'churn': 0, 'base': 2, 'theoretical': 55.0, 'revenue': 30.0}
+    assert stats[month_index(YEAR, 3)]['new'] == 1
+    assert stats[month_index(YEAR, 5)]['churn'] == 1
+    assert stats[month_index(YEAR, 5)]['base'] == 2          # GONE ya no cuenta al cierre de mayo
+    assert stats[month_index(YEAR, 9)]['new'] == 1
+    assert stats[month_index(YEAR, 12)]['theoretical'] == 90.0
+    assert stats[month_index(YEAR, 12)]['revenue'] == 0       # El pago de enero siguiente queda fuera
+
+def test_status_distribution(session):
+    assert MonthlyReportAggregator(session).status_distribution() == {
+        'active': 1, 'suspended': 1, 'retired': 1, 'offline': 1
+    }
+
+def test_query_count_is_independent_of_months(session):
+    statements = []
+    engine = session.get_bind()
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        aggregator = MonthlyReportAggregator(session)
+        cohorts = aggregator.cohorts()
+        collected = aggregator.collected(datetime(2000, 1, 1), datetime(YEAR, 12, 31))
+        aggregator.invoiced(datetime(2000, 1, 1), datetime(YEAR, 12, 31))
+        financial_months(cohorts, collected, list(range(month_index(2000, 1), month_index(YEAR, 12))))
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    assert len(statements) == 3
+
+def test_month_bounds():
+    assert month_bounds(month_index(YEAR, 12)) == (datetime(YEAR, 12, 1), datetime(YEAR, 12, 31, 23, 59, 59))
+    assert month_bounds(month_index(2024, 2))[1] == datetime(2024, 2, 29, 23, 59, 59)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,97 @@
+"""
+Unit Tests for Request Logging
+Verifica el formato JSON, la cola sin bloqueo, el muestreo por ruta y la redacción de encabezados.
+"""
+import json
+import logging
+import queue
+import pytest
+from src.infrastructure.observability.request_logging import (
+    REQUEST_LOGGER, DroppingQueueHandler, JsonFormatter, RequestLogPolicy, init_request_logging,
+    parse_route_samples
+)
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.LogRecord('sgubm.request', logging.INFO, __file__, 1, 'GET %s', ('/x',), None)
+    record.status = 200
+    record.duration_ms = 1.5
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload['msg'] == 'GET /x'
+    assert payload['level'] == 'INFO' and payload['logger'] == 'sgubm.request'
+    assert payload['status'] == 200 and payload['duration_ms'] == 1.5
+    assert 'args' not in payload and 'lineno' not in payload
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.getLogger('test.dropping')
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(5):
+            logger.warning('msg %s', i)
+    finally:
+        logger.removeHandler(handler)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_route_sampling_and_overrides():
+    values = iter([0.5, 0.001])
+    policy = RequestLogPolicy(route_samples=parse_route_samples('/api/reports/*=0,bad,/api/x=oops'),
+                              rng=lambda: next(values))
+    assert policy.rate_for('/api/clients') == 1.0
+    assert policy.rate_for('/api/reports/financial') == 0.0
+    assert policy.rate_for('/socket.io/') == 0.0
+    assert policy.rate_for('/api/routers/3/interface/ether1/traffic') == 0.01
+
+    assert policy.should_log('/api/clients', 200, 5)
+    assert not policy.should_log('/api/routers/monitor', 200, 5)     # rng 0.5
+    assert policy.should_log('/api/routers/monitor', 200, 5)         # rng 0.001
+    assert policy.should_log('/api/reports/financial', 500, 5)       # Errores siempre
+    assert policy.should_log('/static/app.js', 200, 5000)            # Lentas siempre
+
+
+def test_headers_are_allowlisted_and_redacted():
+    policy = RequestLogPolicy(header_allowlist=['User-Agent', 'Authorization', 'Cookie'])
+    headers = {'user-agent': 'pytest', 'Authorization': 'Bearer secret', 'Cookie': 'sid=1', 'X-Other': 'no'}
+    assert policy.headers(headers) == {'User-Agent': 'pytest', 'Authorization': '[REDACTED]', 'Cookie': '[REDACTED]'}
+
+
+def test_flask_requests_are_logged_with_timing():
+    flask = pytest.importorskip("flask")
+    app = flask.Flask(__name__)
+
+    @app.route('/api/ping')
+    def ping():
+        return flask.jsonify({'ok': True})
+
+    @app.route('/api/routers/monitor')
+    def monitor():
+        return flask.jsonify([])
+
+    init_request_logging(app, RequestLogPolicy(rng=lambda: 0.99))
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger(REQUEST_LOGGER)
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        client = app.test_client()
+        client.get('/api/ping', headers={'Authorization': 'Bearer x'})
+        for _ in range(20):
+            client.get('/api/routers/monitor')
+    finally:
+        logger.removeHandler(handler)
+
+    assert len(records) == 1
+    record = records[0]
+    assert record.path == '/api/ping' and record.status == 200 and record.method == 'GET'
+    assert record.duration_ms >= 0
+    assert record.headers['Authorization'] == '[REDACTED]'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,108 @@
+"""
+Unit Tests for Router Discovery Cache
+Verifica la huella de configuración y que el descubrimiento completo sólo se repita
+cuando la huella cambia o se fuerza.
+"""
+import pytest
+
+pytest.importorskip("routeros_api")
+
+from src.application.services.router_discovery import discovery_fingerprint
+
+FACTS = {
+    'resource': {'version': '7.14 (stable)', 'board-name': 'CCR2004', 'architecture-name': 'arm64',
+                 'uptime': '1d', 'cpu-load': '5'},
+    'identity': 'core-1',
+    'counts': {'/ppp/secret': 10, '/queue/simple': 12},
+}
+
+
+def test_fingerprint_ignores_volatile_fields():
+    volatile = {**FACTS, 'resource': {**FACTS['resource'], 'uptime': '9d', 'cpu-load': '80'}}
+    assert discovery_fingerprint(FACTS) == discovery_fingerprint(volatile)
+
+
+def test_fingerprint_changes_with_layout_and_needs_counts():
+    grown = {**FACTS, 'counts': {'/ppp/secret': 11, '/queue/simple': 12}}
+    upgraded = {**FACTS, 'resource': {**FACTS['resource'], 'version': '7.15 (stable)'}}
+    assert discovery_fingerprint(grown) != discovery_fingerprint(FACTS)
+    assert discovery_fingerprint(upgraded) != discovery_fingerprint(FACTS)
+    assert discovery_fingerprint({**FACTS, 'counts': {'/ppp/secret': None}}) is None
+    assert discovery_fingerprint({}) is None
+
+
+def test_discovery_reuses_snapshot_until_router_changes():
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("flask")
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from benchmarks.fake_routeros import FakeRouterOS, LatencyProfile, RouterDataset
+    from src.application.services.router_discovery import discover_router_configuration
+    from src.infrastructure.database.models import Base, Router
+    from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    router = Router(alias='R1', host_address='127.0.0.1', api_username='admin', api_password='x')
+    session.add(router)
+    session.commit()
+    router_id = router.id
+    session.close()
+
+    def write(unit):
+        s = Session()
+        unit(s)
+        s.commit()
+        s.close()
+
+    def discover(adapter, **kwargs):
+        return discover_router_configuration(router_id, adapter, session_factory=Session, write=write, **kwargs)
+
+    with FakeRouterOS(RouterDataset.generate(200, seed=5), LatencyProfile(command_ms=0)) as fake:
+        adapter = MikroTikAdapter()
+        assert adapter.connect(fake.host, 'admin', 'x', port=fake.port, timeout=2)
+        try:
+            first = discover(adapter)
+            assert first['discovery']['cached'] is False and 'pppoe' in first['methods']
+
+            before = fake.state.commands
+            second = discover(adapter)
+            assert second['discovery']['cached'] is True
+            assert second['methods'] == first['methods'] and second['detected_plans'] == first['detected_plans']
+            assert second['system_info']['board_name'] == 'CCR2004'
+            assert fake.state.commands - before == 2 + 4   # resource + identity + un count-only por tabla
+
+            adapter.ppp._get_resource('/ppp/secret').add(name='nuevo', password='x', service='pppoe')
+            assert discover(adapter)['discovery']['cached'] is False
+            assert discover(adapter)['discovery']['cached'] is True
+            assert discover(adapter, force=True)['discovery']['cached'] is False
+        finally:
+            adapter.disconnect()
+
+
+def test_unreadable_facts_fall_back_to_uncached_discovery():
+    from types import SimpleNamespace
+    from src.application.services.router_discovery import discover_router_configuration
+    from src.infrastructure.mikrotik.capabilities.system import SystemCapability
+
+    class BrokenApi:
+        def get_resource(self, path):
+            raise RuntimeError('!trap: no such command')
+
+    assert SystemCapability(BrokenApi()).get_discovery_facts(['/ppp/secret']) == {}
+
+    def facts(paths):
+        raise ConnectionResetError('conexión perdida')
+
+    adapter = SimpleNamespace(get_discovery_facts=facts, discover_configuration=lambda: {'methods': ['pppoe']})
+    writes = []
+    config = discover_router_configuration(1, adapter, session_factory=lambda: None, write=writes.append)
+    assert config['methods'] == ['pppoe']
+    assert config['discovery']['cached'] is False and config['discovery']['fingerprint'] is None
+    assert writes == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
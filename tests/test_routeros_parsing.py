@@ -0,0 +1,103 @@
+"""
+Unit Tests for RouterOS Parsing
+Verifica el parseo precompilado de tiempos y tasas, las APIs por lote y la paridad con la
+implementación anterior de MikroTikTimeParser.
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from benchmarks.micro_parsing import legacy_parse_time, legacy_rate_pair, sample_columns
+from src.infrastructure.mikrotik import parsing
+
+NOW = datetime(2026, 3, 15, 12, 0, 0)
+
+
+@pytest.mark.parametrize('value, seconds', [
+    ('1w2d03:04:05', 604800 + 2 * 86400 + 3 * 3600 + 4 * 60 + 5),
+    ('24d 06:36:28', 24 * 86400 + 6 * 3600 + 36 * 60 + 28),
+    ('5h30m', 5 * 3600 + 30 * 60),
+    ('10m', 600),
+    ('3m20s', 200),
+    ('00:45', 45),
+    ('1d850ms', 86400),
+    ('never', None),
+    ('', None),
+    ('abc', None),
+    ('5x', None),
+])
+def test_parse_duration(value, seconds):
+    assert parsing.parse_duration(value) == seconds
+
+
+def test_parse_absolute_formats():
+    assert parsing.parse_absolute('sep/02/2023 14:00:00') == datetime(2023, 9, 2, 14, 0, 0)
+    assert parsing.parse_absolute('Sep/02 14:00:00', NOW) == datetime(2026, 9, 2, 14, 0, 0)
+    assert parsing.parse_absolute('2023-09-02 14:00:00') == datetime(2023, 9, 2, 14, 0, 0)
+    assert parsing.parse_absolute('feb/30/2023 10:00:00') is None
+    assert parsing.parse_absolute('xyz/02/2023 10:00:00') is None
+
+
+def test_parse_routeros_time_is_relative_to_now():
+    assert parsing.parse_routeros_time('1h', NOW) == NOW - timedelta(hours=1)
+    assert parsing.parse_routeros_time('jan/01/2026 00:00:00', NOW) == datetime(2026, 1, 1)
+    assert parsing.parse_routeros_time('never', NOW) is None
+    assert parsing.parse_routeros_time('0s', NOW) is None
+    assert parsing.parse_time_column(['5m', None, 'never'], NOW) == [NOW - timedelta(minutes=5), None, None]
+
+
+def test_time_parity_with_legacy_parser():
+    """Mismos resultados que la versión anterior (salvo el `now` que ésta tomaba por llamada)"""
+    cols = sample_columns(300)
+    values = cols['last_seen'] + cols['absolute']
+    now = datetime.now()
+    current = parsing.parse_time_column(values, now)
+    for value, new in zip(values, current):
+        old = legacy_parse_time(value)
+        if old is None:
+            assert new is None, value
+        else:
+            assert abs((old - new).total_seconds()) < 5, value
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('123456/654321', (123456, 654321)),
+    ('10M/5M', (10_000_000, 5_000_000)),
+    ('512k/1M', (512_000, 1_000_000)),
+    ('1.5M/2G', (1_500_000, 2_000_000_000)),
+    ('0/0', (0, 0)),
+    ('10/', (10, 0)),
+    ('garbage', (0, 0)),
+    ('', (0, 0)),
+    (None, (0, 0)),
+])
+def test_parse_rate_pair(value, expected):
+    assert parsing.parse_rate_pair(value) == expected
+
+
+def test_rate_parity_and_live_rates_skip_cache():
+    cols = sample_columns(200)
+    parsing.clear_caches()
+    assert parsing.parse_rate_column(cols['rates']) == [legacy_rate_pair(v) for v in cols['rates']]
+    assert parsing.cache_info()['_parse_rate_pair_cached'] == (0, 0)
+
+    parsing.parse_rate_column(cols['limits'])
+    hits, misses = parsing.cache_info()['_parse_rate_pair_cached']
+    assert misses <= 8 and hits == len(cols['limits']) - misses
+
+
+def test_rate_map():
+    rows = [{'name': 'Cliente-1', 'rate': '100/200'}, {'name': '', 'rate': '1/1'}, {'name': 'c2'}]
+    assert parsing.rate_map(rows) == {'Cliente-1': (100, 200), 'c2': (0, 0)}
+    assert parsing.rate_map(rows, lower=True)['cliente-1'] == (100, 200)
+    assert parsing.rate_map([{'name': 'q', 'max-limit': '10M/5M'}], field='max-limit') == {'q': (10_000_000, 5_000_000)}
+
+
+def test_time_parser_delegates():
+    from src.application.services.monitoring_utils import MikroTikTimeParser
+
+    assert MikroTikTimeParser.parse('2h', NOW) == NOW - timedelta(hours=2)
+    assert MikroTikTimeParser.parse_many(['never', 'mar/01/2026 08:00:00'], NOW) == [None, datetime(2026, 3, 1, 8)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
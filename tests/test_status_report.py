@@ -0,0 +1,93 @@
+"""
+Unit Tests for Clients Status Report
+Verifica el reporte de estado en una sola consulta: filtros por tipo, totales del periodo y último pago.
+"""
+from datetime import datetime
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("flask")  # los modelos registran el filtro de tenant sobre flask.g
+from sqlalchemy import event
+from src.infrastructure.database.models import init_db, get_session, Router, Client, Payment, Invoice
+from src.infrastructure.database.repository_registry import ClientRepository, PaymentRepository, InvoiceRepository
+
+START, END = datetime(2026, 3, 1), datetime(2026, 3, 31, 23, 59, 59)
+
+@pytest.fixture
+def session():
+    engine = init_db('sqlite:///:memory:')
+    session = get_session(engine)
+    r1 = Router(alias='Norte', host_address='10.0.0.1', api_password='x')
+    r2 = Router(alias='Sur', host_address='10.0.0.2', api_password='x')
+    session.add_all([r1, r2])
+    session.flush()
+
+    def client(code, router, balance, status='active'):
+        c = Client(router_id=router.id, subscriber_code=code, legal_name=code, username=code.lower(),
+                   account_balance=balance, monthly_fee=20, status=status)
+        session.add(c)
+        session.flush()
+        return c
+
+    paid = client('PAID', r1, 0)
+    debtor = client('DEBTOR', r1, 35)
+    missing = client('MISSING', r2, -5)
+    gone = client('GONE', r1, 10, status='deleted')
+
+    session.add_all([
+        Payment(client_id=paid.id, amount=20, payment_date=datetime(2026, 3, 5)),
+        Payment(client_id=paid.id, amount=5, payment_date=datetime(2026, 3, 20)),
+        Payment(client_id=debtor.id, amount=10, payment_date=datetime(2026, 2, 10)),   # Fuera del periodo
+        Payment(client_id=gone.id, amount=7, payment_date=datetime(2026, 3, 2)),
+        Invoice(client_id=debtor.id, issue_date=datetime(2026, 3, 1), due_date=datetime(2026, 3, 10), total_amount=20),
+    ])
+    session.commit()
+    session.ids = {c.subscriber_code: c.id for c in (paid, debtor, missing, gone)}
+    session.routers = (r1.id, r2.id)
+    yield session
+    session.close()
+
+def _report(session, report_type, router_id=None):
+    return {r.subscriber_code: r for r in ClientRepository(session).get_status_report(report_type, START, END, router_id)}
+
+def test_report_types_are_filtered_in_sql(session):
+    assert set(_report(session, 'debtors')) == {'DEBTOR'}
+    assert set(_report(session, 'paid')) == {'PAID'}
+    assert set(_report(session, 'missing')) == {'DEBTOR', 'MISSING'}
+    assert set(_report(session, 'deleted')) == {'GONE'}
+    assert _report(session, 'unknown') == {}
+
+def test_period_totals_and_last_payment(session):
+    paid = _report(session, 'paid')['PAID']
+    assert paid.paid_amount == 25
+    assert paid.router_alias == 'Norte'
+    last = session.query(Payment).filter_by(client_id=session.ids['PAID']).order_by(Payment.payment_date.desc()).first()
+    assert paid.last_payment_id == last.id
+
+    debtor = _report(session, 'missing')['DEBTOR']
+    assert debtor.paid_amount == 0
+    assert debtor.last_payment_id is not None   # Último pago aunque sea de otro periodo
+    assert _report(session, 'missing')['MISSING'].last_payment_id is None
+
+def test_router_scope(session):
+    r1, r2 = session.routers
+    assert set(_report(session, 'missing', router_id=r2)) == {'MISSING'}
+    assert set(_report(session, 'missing', router_id=[r1])) == {'DEBTOR'}
+    assert InvoiceRepository(session).exists_in_range(START, END, router_id=r1)
+    assert not InvoiceRepository(session).exists_in_range(START, END, router_id=r2)
+    assert PaymentRepository(session).exists_in_range(START, END, router_id=[r1])
+    assert not PaymentRepository(session).exists_in_range(START, END, router_id=r2)
+
+def test_single_query_regardless_of_client_count(session):
+    statements = []
+    engine = session.get_bind()
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        _report(session, 'missing')
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
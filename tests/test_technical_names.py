@@ -0,0 +1,115 @@
+"""
+Unit Tests for Technical Names Reconciliation
+Verifica los índices por nombre / IP / comentario, el diff de nombres técnicos y la
+reconciliación en una pasada contra el router falso.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("routeros_api")
+
+from src.application.services.technical_names import TechnicalNameIndex, compute_name_changes
+
+
+@pytest.fixture
+def index():
+    return TechnicalNameIndex.build(
+        secrets=[
+            {'name': 'jperez', 'remote-address': '10.0.0.2'},
+            {'name': 'Maria.Lopez', 'remote-address': '10.0.0.3', 'comment': 'María López'},
+        ],
+        queues=[
+            {'name': '<pppoe-jperez>', 'target': '10.0.0.2/32'},
+            {'name': 'Cola Bodega', 'target': '10.0.0.9/32', 'comment': 'Ferretería Bodega, C.A.'},
+            {'name': 'q-legacy', 'target': '10.0.0.7/32,10.0.1.7/32'},
+        ],
+        interfaces=[{'name': 'ether1'}, {'name': '<pppoe-jperez>'}],
+    )
+
+
+def test_resolve_by_name_patterns(index):
+    assert index.resolve('JPerez', 'Juan Pérez', '10.0.0.2') == ('<pppoe-jperez>', '<pppoe-jperez>')
+
+
+def test_resolve_through_secret_comment_and_predicted_interface(index):
+    # El usuario en DB no coincide con el secret: se enlaza por el comentario (razón social)
+    queue, iface = index.resolve('mlopez', 'MARIA LOPEZ', None)
+    assert queue is None
+    assert iface == '<pppoe-Maria.Lopez>'   # Sin sesión activa: nombre predecible de la interfaz dinámica
+
+
+def test_resolve_queue_by_comment_then_ip(index):
+    assert index.resolve('bodega', 'Ferreteria Bodega CA', '10.0.0.250')[0] == 'Cola Bodega'
+    assert index.resolve('otro', 'Sin Nombre', '10.0.0.7') == ('q-legacy', None)
+    assert index.resolve('nadie', None, '192.168.1.1') == (None, None)
+
+
+def test_compute_name_changes_only_returns_differences(index):
+    rows = [
+        SimpleNamespace(id=1, username='jperez', legal_name='Juan', ip_address='10.0.0.2',
+                        mikrotik_queue_name='<pppoe-jperez>', mikrotik_interface_name='<pppoe-jperez>'),
+        SimpleNamespace(id=2, username='otro', legal_name='X', ip_address='10.0.0.7',
+                        mikrotik_queue_name='viejo', mikrotik_interface_name='<pppoe-otro>'),
+    ]
+    assert compute_name_changes(rows, index) == [
+        {'id': 2, 'mikrotik_queue_name': 'q-legacy', 'mikrotik_interface_name': None}]
+
+
+def test_reconcile_against_fake_router_in_one_batch():
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("flask")
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from benchmarks.fake_routeros import FakeRouterOS, LatencyProfile, RouterDataset
+    from src.application.services.technical_names import reconcile_technical_names
+    from src.infrastructure.database.models import Base, Client, Router
+    from src.infrastructure.mikrotik.adapter import MikroTikAdapter
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    dataset = RouterDataset.generate(60, seed=3)
+    session = Session()
+    router = Router(alias='R1', host_address='127.0.0.1', api_username='admin', api_password='x')
+    session.add(router)
+    session.flush()
+    session.add_all([Client(router_id=router.id, subscriber_code=f"C{c.index}", legal_name=c.legal_name,
+                            username=c.username.upper(), ip_address=c.ip_address) for c in dataset.clients])
+    session.commit()
+    router_id = router.id
+    session.close()
+
+    batches = []
+
+    def write(unit):
+        s = Session()
+        unit(s)
+        s.commit()
+        s.close()
+        batches.append(unit)
+
+    with FakeRouterOS(dataset, LatencyProfile(command_ms=0)) as fake:
+        adapter = MikroTikAdapter()
+        assert adapter.connect(fake.host, 'admin', 'x', port=fake.port, timeout=2)
+        try:
+            changes = reconcile_technical_names(router_id, adapter, Session, write=write)
+            assert len(changes) == 60 and len(batches) == 1
+            assert reconcile_technical_names(router_id, adapter, Session, write=write) == []
+        finally:
+            adapter.disconnect()
+
+    session = Session()
+    by_user = {c.username: c for c in session.query(Client)}
+    for simulated in dataset.clients:
+        client = by_user[simulated.username.upper()]
+        assert client.mikrotik_queue_name == simulated.username
+        if simulated.service_type == 'pppoe':
+            assert client.mikrotik_interface_name == f"<pppoe-{simulated.username}>"
+        else:
+            assert client.mikrotik_interface_name is None
+    session.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
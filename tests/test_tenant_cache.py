@@ -0,0 +1,104 @@
+"""
+Unit Tests for Tenant Host Cache
+Verifica la resolución host -> tenant en memoria, la caché negativa y la invalidación al cambiar tenants.
+"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("flask")  # los modelos registran el filtro de tenant sobre flask.g
+from sqlalchemy import event
+from src.infrastructure.database.models import init_db, get_session, Tenant
+from src.application.services import tenant_service
+from src.application.services.tenant_service import TenantHostCache, TenantService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def session():
+    engine = init_db('sqlite:///:memory:')
+    session = get_session(engine)
+    session.add_all([
+        Tenant(name='Norte', subdomain='norte', brand_color='#111111'),
+        Tenant(name='Viejo', subdomain='viejo', is_active=False),
+    ])
+    session.commit()
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    session.statements = statements
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TenantHostCache(clock=FakeClock())
+    monkeypatch.setattr(tenant_service, '_host_cache', cache)
+    return cache
+
+
+def test_lookup_is_a_dictionary_hit_after_warm(session, cache):
+    assert cache.warm(session) == 1
+    before = len(session.statements)
+    for _ in range(100):
+        tenant = cache.lookup('norte', session)
+    assert tenant.name == 'Norte' and tenant.brand_color == '#111111'
+    assert cache.lookup('NORTE', session) is tenant
+    assert len(session.statements) == before
+
+
+def test_unknown_hosts_are_negatively_cached(session, cache):
+    cache.warm(session)
+    before = len(session.statements)
+    assert cache.lookup('nadie', session) is None
+    assert cache.lookup('nadie', session) is None
+    assert cache.lookup('viejo', session) is None       # Inactivo
+    assert len(session.statements) == before + 2
+    assert cache.stats['negative_hits'] == 1
+
+    cache._clock.now += cache.negative_ttl + 1
+    assert cache.lookup('nadie', session) is None
+    assert len(session.statements) == before + 3
+
+
+def test_tenant_created_elsewhere_is_found_on_miss(session, cache):
+    cache.warm(session)
+    engine = session.get_bind()
+    other = get_session(engine)
+    other.add(Tenant(name='Sur', subdomain='sur'))
+    other.commit()
+    other.close()
+    cache.warm(session)   # Simula max_age vencido
+    assert cache.lookup('sur', session).name == 'Sur'
+
+
+def test_commit_invalidates_cache(session, cache):
+    cache.warm(session)
+    assert cache.lookup('norte', session).name == 'Norte'
+
+    tenant = session.query(Tenant).filter_by(subdomain='norte').one()
+    tenant.name = 'Norte SAS'
+    session.commit()
+    assert cache.lookup('norte', session).name == 'Norte SAS'
+
+    tenant.is_active = False
+    session.commit()
+    assert cache.lookup('norte', session) is None
+
+
+def test_resolve_from_host_uses_cache(session, cache, monkeypatch):
+    cache.warm(session)
+    monkeypatch.setattr(cache, 'lookup', lambda sub, session=None: ('hit', sub))
+    assert TenantService.resolve_from_host('norte.sgubm.com') == ('hit', 'norte')
+    assert TenantService.resolve_from_host('www.sgubm.com') is None
+    assert TenantService.resolve_from_host('localhost') is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
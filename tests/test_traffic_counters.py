@@ -0,0 +1,70 @@
+"""
+Unit Tests for Traffic Counters
+Verifica el cálculo de consumo a partir de contadores acumulados con reinicios y la
+lectura masiva de contadores de bytes (colas con respaldo en interfaces).
+"""
+import pytest
+from src.application.services.monitoring_utils import counter_delta
+
+def test_counter_delta_monotonic_and_reset():
+    assert counter_delta(100, 250) == 150
+    # Reinicio: el contador volvió a empezar, se cuenta todo lo nuevo
+    assert counter_delta(5000, 120) == 120
+    # Sin lectura previa o lectura no disponible
+    assert counter_delta(None, 300) == 0
+    assert counter_delta(300, 0) == 0
+
+class FakeResource:
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+
+    def call(self, command, args=None):
+        self.calls.append(args)
+        return self.rows
+
+
+class FakeApi:
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = {path: [] for path in tables}
+
+    def get_resource(self, path):
+        return FakeResource(self.tables[path], self.calls[path])
+
+
+def test_bulk_byte_counters_prefer_queue_and_fall_back_to_interface():
+    pytest.importorskip("routeros_api")
+    from src.infrastructure.mikrotik.capabilities.queues import QueueCapability
+
+    api = FakeApi({
+        '/queue/simple': [{'name': 'Cliente-A', 'bytes': '1000/5000'}, {'name': 'roto', 'bytes': 'x/y'}],
+        '/interface': [{'name': '<pppoe-b>', 'rx-byte': '700', 'tx-byte': '9000'}],
+    })
+    counters = QueueCapability(api).get_bulk_byte_counters({
+        1: ('cliente-a', '<pppoe-a>'),   # Cola (sin distinguir mayúsculas) gana sobre la interfaz
+        2: ('sin-cola', '<PPPoE-b>'),    # Respaldo: interfaz dinámica
+        3: ('roto', None),               # Contador ilegible y sin interfaz: se omite
+        4: (None, '<pppoe-ausente>'),
+    })
+
+    assert counters == {
+        1: {'tx_bytes': 5000, 'rx_bytes': 1000, 'source': 'queue'},
+        2: {'tx_bytes': 9000, 'rx_bytes': 700, 'source': 'interface'},
+    }
+    # Una sola lectura por tabla, limitada a las columnas necesarias
+    assert api.calls['/queue/simple'] == [{'.proplist': 'name,bytes'}]
+    assert len(api.calls['/interface']) == 1
+
+
+def test_bulk_byte_counters_skip_interfaces_when_queues_cover_all():
+    pytest.importorskip("routeros_api")
+    from src.infrastructure.mikrotik.capabilities.queues import QueueCapability
+
+    api = FakeApi({'/queue/simple': [{'name': 'a', 'bytes': '1/2'}], '/interface': []})
+    assert QueueCapability(api).get_bulk_byte_counters({1: ('a', '<pppoe-a>')})[1]['source'] == 'queue'
+    assert api.calls['/interface'] == []
+    assert QueueCapability(api).get_bulk_byte_counters({}) == {}
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,120 @@
+"""
+Unit Tests for Traffic Delta Protocol
+Verifica la codificación delta del tráfico de clientes: slots por stream, umbral, keyframes
+(periódicos y a pedido), resincronización del decodificador y el emit del MonitoringManager.
+"""
+import pytest
+
+from src.application.services.traffic_delta import TrafficDeltaDecoder, TrafficDeltaEncoder, pack_frame
+
+
+def client(cid, up, down, status='online', method='pppoe'):
+    return {'id': cid, 'status': status, 'upload': up, 'download': down, 'method': method}
+
+
+def make_encoder(**kwargs):
+    clock = {'now': 0.0}
+    encoder = TrafficDeltaEncoder(1, clock=lambda: clock['now'], **kwargs)
+    return encoder, clock
+
+
+def test_round_trip_sends_only_changed_clients():
+    encoder, _ = make_encoder()
+    decoder = TrafficDeltaDecoder()
+    tick = {10: client(10, 100_000, 2_000_000), 11: client(11, 0, 0, 'offline', 'none')}
+
+    first = encoder.encode(tick, 0)
+    assert first['k'] == 1 and first['ids'] == [10, 11]
+    assert decoder.apply(first) == tick
+
+    tick[10] = client(10, 110_000, 2_020_000)   # Bajo el umbral de 50 kbps
+    assert encoder.encode(tick, 1) is None
+
+    tick[11] = client(11, 0, 0, 'online', 'arp')
+    tick[12] = client(12, 1_234_567, 7_654_321, method='dhcp')
+    delta = encoder.encode(tick, 2)
+    assert delta['k'] == 0 and delta['add'] == [2, 12] and len(delta['d']) == 8
+    changed = decoder.apply(delta)
+    assert set(changed) == {11, 12}
+    assert changed[11]['status'] == 'online' and changed[11]['method'] == 'arp'
+    assert changed[12]['upload'] == 1_235_000 and changed[12]['download'] == 7_654_000   # Cuantizado a kbps
+
+
+def test_decoder_requires_keyframe_after_gap_and_on_demand_keyframe_resyncs():
+    encoder, clock = make_encoder()
+    encoder.encode({1: client(1, 0, 0)}, 0)
+    clock['now'] = 1
+    encoder.encode({1: client(1, 900_000, 0)}, 1)
+
+    late = TrafficDeltaDecoder()
+    assert late.apply(encoder.encode({1: client(1, 0, 0), 2: client(2, 0, 0)}, 2)) is None
+
+    keyframe = encoder.keyframe(3)
+    assert keyframe['k'] == 1 and keyframe['s'] == encoder.seq
+    assert set(late.apply(keyframe)) == {1, 2}
+    # El keyframe a pedido no altera lo enviado a la sala: el delta siguiente aplica para todos
+    assert late.apply(encoder.encode({1: client(1, 5_000_000, 0), 2: client(2, 0, 0)}, 4)) == \
+        {1: client(1, 5_000_000, 0)}
+
+
+def test_periodic_keyframe_compacts_departed_clients():
+    encoder, _ = make_encoder(keyframe_seconds=10)
+    encoder.encode({1: client(1, 0, 0), 2: client(2, 0, 0), 3: client(3, 0, 0)}, 0)
+    assert encoder.encode({3: client(3, 0, 0)}, 5) is None   # 1 y 2 conservan su slot hasta el keyframe
+    frame = encoder.encode({3: client(3, 0, 0)}, 15)
+    assert frame['k'] == 1 and frame['ids'] == [3]
+    decoder = TrafficDeltaDecoder()
+    assert decoder.apply(frame) == {3: client(3, 0, 0)}
+
+
+def test_delta_payload_is_smaller_than_json():
+    import json
+    encoder, _ = make_encoder()
+    clients = {cid: client(cid, cid * 10_000, cid * 40_000) for cid in range(1, 501)}
+    encoder.encode(clients, 0)
+    for cid in range(1, 501, 10):
+        clients[cid] = client(cid, cid * 10_000 + 500_000, cid * 40_000)
+    delta = encoder.encode(clients, 1)
+    legacy = {cid: data for cid, data in clients.items() if cid % 10 == 1}
+    assert len(json.dumps(delta)) * 3 < len(json.dumps(legacy))
+
+
+def test_msgpack_frames_round_trip():
+    pytest.importorskip("msgpack")
+    encoder, _ = make_encoder()
+    frame = encoder.encode({5: client(5, 1_000, 2_000)}, 0)
+    payload = pack_frame(frame, binary=True)
+    assert isinstance(payload, bytes)
+    assert TrafficDeltaDecoder().apply(payload) == {5: client(5, 1_000, 2_000)}
+
+
+@pytest.mark.parametrize('protocol', ['delta', 'json'])
+def test_monitoring_manager_emits_selected_protocol(protocol):
+    pytest.importorskip("cachetools")
+    pytest.importorskip("routeros_api")
+    from src.application.services.monitoring_manager import MonitoringManager
+
+    manager = MonitoringManager()
+    manager._traffic_options = {'protocol': protocol, 'binary': False, 'quantum': 1000,
+                                'threshold': 50000, 'keyframe_seconds': 30}
+    emitted = []
+    manager._safe_emit = lambda event, data, room=None: emitted.append((event, data, room))
+
+    tick = {7: client(7, 300_000, 900_000)}
+    manager._emit_client_traffic(3, tick, 100.0)
+    manager._emit_client_traffic(3, tick, 101.0)
+
+    assert len(emitted) == 1 and emitted[0][2] == 'router_3'
+    if protocol == 'delta':
+        assert emitted[0][0] == 'client_traffic_delta'
+        assert TrafficDeltaDecoder().apply(emitted[0][1]) == tick
+        assert manager.traffic_keyframe(3)['k'] == 1
+    else:
+        assert emitted[0][0] == 'client_traffic' and emitted[0][1] == tick
+        assert manager.traffic_keyframe(3) is None
+    manager.stop_router_monitoring(3)
+    assert 3 not in manager.traffic_encoders
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
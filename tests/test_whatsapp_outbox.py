@@ -0,0 +1,217 @@
+"""
+Integration Tests for WhatsApp Outbox
+Entrega contra un gateway HTTP local que imita al bridge (/send).
+"""
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.infrastructure.notifications.whatsapp_outbox import MemoryOutboxStore, WhatsAppOutbox
+
+class StubGateway(BaseHTTPRequestHandler):
+    received = []
+    fail_first = set()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        phone = body['phone']
+        if phone in StubGateway.fail_first:
+            StubGateway.fail_first.discard(phone)
+            self.send_response(500)
+            self.end_headers()
+            return
+        StubGateway.received.append((time.monotonic(), phone, body['text']))
+        payload = json.dumps({'success': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def gateway():
+    StubGateway.received = []
+    StubGateway.fail_first = set()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGateway)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/send"
+    server.shutdown()
+
+def make_sender(url):
+    def send(phone, text):
+        req = urllib.request.Request(url, data=json.dumps({'phone': phone, 'text': text}).encode(),
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                return json.loads(resp.read()).get('success')
+        except Exception:
+            return False
+    return send
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_mass_run_is_delivered_and_deduplicated(gateway):
+    sent_log = []
+    outbox = WhatsAppOutbox(MemoryOutboxStore(), make_sender(gateway), workers=4,
+                            per_destination_interval=0, poll_interval=0.05, on_sent=sent_log.append)
+    ids = [outbox.enqueue(f"58414000{i:04d}", "Recordatorio de pago") for i in range(30)]
+    assert outbox.enqueue("584140000000", "Recordatorio de pago") == ids[0]   # duplicado pendiente
+
+    assert wait_for(lambda: len(StubGateway.received) == 30)
+    outbox.stop()
+    assert outbox.stats['deduplicated'] == 1
+    assert len(sent_log) == 30
+
+def test_retry_with_backoff_then_success(gateway):
+    StubGateway.fail_first = {'584141111111'}
+    store = MemoryOutboxStore()
+    outbox = WhatsAppOutbox(store, make_sender(gateway), workers=1, per_destination_interval=0,
+                            backoff_base=0.1, poll_interval=0.05)
+    message_id = outbox.enqueue('584141111111', 'Aviso de suspensión')
+
+    assert wait_for(lambda: store.get(message_id)['status'] == 'sent')
+    outbox.stop()
+    row = store.get(message_id)
+    assert row['attempts'] == 1
+    assert outbox.stats['retried'] == 1
+
+def test_gives_up_after_max_attempts():
+    store = MemoryOutboxStore()
+    outbox = WhatsAppOutbox(store, lambda phone, text: False, workers=1, per_destination_interval=0,
+                            max_attempts=2, backoff_base=0.05, poll_interval=0.02)
+    message_id = outbox.enqueue('584142222222', 'x')
+    assert wait_for(lambda: store.get(message_id)['status'] == 'failed')
+    outbox.stop()
+    assert store.get(message_id)['attempts'] == 2
+
+def test_per_destination_rate_limit(gateway):
+    outbox = WhatsAppOutbox(MemoryOutboxStore(), make_sender(gateway), workers=3,
+                            per_destination_interval=0.3, poll_interval=0.02)
+    for i in range(3):
+        outbox.enqueue('584143333333', f'mensaje {i}')
+    assert wait_for(lambda: len(StubGateway.received) == 3)
+    outbox.stop()
+    times = [t for t, _, _ in StubGateway.received]
+    assert all(b - a >= 0.25 for a, b in zip(times, times[1:]))
+
+@pytest.fixture
+def sql_store(tmp_path):
+    pytest.importorskip("sqlalchemy")
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.infrastructure.database.models import Base, Tenant
+    from src.infrastructure.notifications.whatsapp_outbox import SqlOutboxStore
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add(Tenant(id=3, name='Norte'))
+        session.commit()
+    yield SqlOutboxStore(factory)
+    engine.dispose()
+
+def test_delivered_message_carries_outbox_tenant(sql_store):
+    delivered = []
+    outbox = WhatsAppOutbox(sql_store, lambda phone, text: True, workers=1, per_destination_interval=0,
+                            poll_interval=0.02, on_sent=delivered.append)
+    outbox.enqueue('584144444444', 'Factura disponible', intent='invoice', tenant_id=3)
+    assert wait_for(lambda: len(delivered) == 1)
+    outbox.stop()
+    assert delivered[0].tenant_id == 3 and delivered[0].intent == 'invoice'
+
+def test_competing_dispatchers_send_each_message_once(sql_store):
+    sent, lock = [], threading.Lock()
+
+    def send(phone, text):
+        with lock:
+            sent.append(phone)
+        time.sleep(0.01)
+        return True
+
+    producer = WhatsAppOutbox(sql_store, send, workers=1)
+    for i in range(20):
+        producer.store.enqueue(f"58414555{i:04d}", 'Corte programado', f"k{i}")
+    # Dos procesos sobre la misma tabla leen los mismos pendientes
+    outboxes = [WhatsAppOutbox(sql_store, send, workers=4, per_destination_interval=0, poll_interval=0.01)
+                for _ in range(2)]
+    for outbox in outboxes:
+        outbox.start()
+    assert wait_for(lambda: len(sent) >= 20)
+    time.sleep(0.2)
+    for outbox in outboxes:
+        outbox.stop()
+    assert sorted(sent) == sorted(f"58414555{i:04d}" for i in range(20))
+
+def test_recover_only_requeues_expired_claims():
+    from datetime import datetime, timedelta
+    store = MemoryOutboxStore()
+    live, _ = store.enqueue('584146666666', 'a', 'ka')
+    stale, _ = store.enqueue('584147777777', 'b', 'kb')
+    assert store.claim([live], datetime.now() + timedelta(minutes=5)) == [live]
+    assert store.claim([stale], datetime.now() - timedelta(seconds=1)) == [stale]
+    assert store.claim([live, stale], datetime.now()) == []   # Ya reclamados
+
+    assert store.recover() == 1
+    assert store.get(live)['status'] == 'sending'
+    assert store.get(stale)['status'] == 'pending'
+
+def test_only_the_leader_dispatches():
+    leader = {'value': False}
+    sent = []
+    store = MemoryOutboxStore()
+    outbox = WhatsAppOutbox(store, lambda phone, text: sent.append(phone) or True, workers=1,
+                            per_destination_interval=0, poll_interval=0.02, is_leader=lambda: leader['value'])
+    message_id = outbox.enqueue('584148888888', 'Aviso')
+    time.sleep(0.1)
+    assert sent == [] and store.get(message_id)['status'] == 'pending'   # Encolado, sin despachar
+
+    leader['value'] = True
+    assert wait_for(lambda: store.get(message_id)['status'] == 'sent')
+    outbox.stop()
+    assert sent == ['584148888888']
+
+def test_restarted_outbox_delivers_pending_rows_without_new_enqueue(sql_store):
+    from datetime import datetime, timedelta
+    pending, _ = sql_store.enqueue('584149000001', 'Pendiente', 'kp')
+    orphan, _ = sql_store.enqueue('584149000002', 'Reclamado por un proceso caído', 'ko')
+    assert sql_store.claim([orphan], datetime.now() - timedelta(seconds=1)) == [orphan]
+
+    sent = []
+    outbox = WhatsAppOutbox(sql_store, lambda phone, text: sent.append(phone) or True, workers=2,
+                            per_destination_interval=0, poll_interval=0.02)
+    outbox.start()   # Como en create_app: sin enqueue local
+    assert wait_for(lambda: len(sent) == 2)
+    outbox.stop()
+    assert sorted(sent) == ['584149000001', '584149000002']
+
+def test_failed_claim_releases_destination_reservations():
+    class FlakyStore(MemoryOutboxStore):
+        failures = 1
+
+        def claim(self, ids, lease_until):
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError('database is locked')
+            return super().claim(ids, lease_until)
+
+    store = FlakyStore()
+    sent = []
+    outbox = WhatsAppOutbox(store, lambda phone, text: sent.append(phone) or True, workers=1,
+                            per_destination_interval=60, poll_interval=0.02)
+    message_id = outbox.enqueue('584149000003', 'Aviso')
+    assert wait_for(lambda: store.get(message_id)['status'] == 'sent')
+    outbox.stop()
+    assert sent == ['584149000003'] and outbox.idle()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
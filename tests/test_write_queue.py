@@ -0,0 +1,75 @@
+"""
+Unit Tests for Database Write Queue
+Verifica el agrupamiento de escrituras, el aislamiento de fallos y el modo en línea.
+"""
+import threading
+import pytest
+
+pytest.importorskip("sqlalchemy")  # el paquete database importa los modelos
+from src.infrastructure.database.write_queue import WriteQueue
+
+class FakeSession:
+    """Sesión mínima: acumula operaciones y las publica al hacer commit"""
+    def __init__(self, store):
+        self.store = store
+        self.staged = []
+
+    def add(self, value):
+        self.staged.append(value)
+
+    def commit(self):
+        self.store['commits'] += 1
+        self.store['rows'].extend(self.staged)
+        self.staged = []
+
+    def rollback(self):
+        self.staged = []
+
+    def close(self):
+        pass
+
+def _make_queue(**kwargs):
+    store = {'commits': 0, 'rows': []}
+    return WriteQueue(lambda: FakeSession(store), **kwargs), store
+
+def test_units_are_grouped_in_one_transaction():
+    wq, store = _make_queue(linger_ms=200)
+    gate = threading.Event()
+    # La primera unidad retiene al escritor hasta que el resto ya está encolado
+    first = wq.submit(lambda s: gate.wait(2) and s.add('first'))
+    futures = [wq.submit(lambda s, i=i: s.add(i) or i) for i in range(20)]
+    gate.set()
+
+    assert [f.result(timeout=2) for f in futures] == list(range(20))
+    first.result(timeout=2)
+    wq.stop()
+    assert len(store['rows']) == 21
+    assert store['commits'] <= 2
+
+def test_failing_unit_does_not_discard_the_batch():
+    wq, store = _make_queue(linger_ms=100)
+
+    def broken(session):
+        session.add('broken')
+        raise ValueError('constraint')
+
+    ok1 = wq.submit(lambda s: s.add('a'))
+    bad = wq.submit(broken)
+    ok2 = wq.submit(lambda s: s.add('b'))
+
+    ok1.result(timeout=2)
+    ok2.result(timeout=2)
+    with pytest.raises(ValueError):
+        bad.result(timeout=2)
+    wq.stop()
+    assert sorted(store['rows']) == ['a', 'b']
+    assert wq.stats['failed'] == 1
+
+def test_disabled_queue_runs_inline():
+    wq, store = _make_queue(enabled=False)
+    assert wq.run(lambda s: s.add('x') or 'done') == 'done'
+    assert store['rows'] == ['x']
+    assert wq._thread is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])